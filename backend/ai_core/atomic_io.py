@@ -0,0 +1,28 @@
+"""
+Evolance Atomic IO
+Crash-safe replacement of small state files (pointers, indexes, checkpoints) shared between processes
+"""
+
+import json
+import os
+import tempfile
+from typing import Any
+
+
+def write_json_atomic(path: str, data: Any):
+    """
+    Write `data` as JSON to `path` so readers see the old file or the new one, never a partial write
+
+    The JSON goes to a temporary file in the same directory, which is then
+    renamed over `path`.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp.", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
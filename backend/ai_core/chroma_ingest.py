@@ -0,0 +1,248 @@
+"""
+Evolance Chroma Ingestion
+Streaming, batched and resumable loading of generated training data into the private Chroma collections
+
+    python -m ai_core.chroma_ingest backend/data/full_training_dataset.json --batch-size 256 --workers 2
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .training_export import _open_text, iter_records
+from .atomic_io import write_json_atomic
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 256
+
+# Messages of a generated conversation go to the collection for their role
+USER_MESSAGE = ("conversations", "conv", "user_message", "neutral", "general")
+AI_RESPONSE = ("emotional_patterns", "resp", "ai_response", "empathetic", "supportive")
+
+
+def iter_dataset(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Items of a generated dataset, one at a time
+
+    JSONL files (optionally gzipped) are read line by line; a JSON array
+    (full_training_dataset.json) is parsed incrementally with ijson, or
+    loaded whole when ijson is not installed.
+    """
+    if ".jsonl" in os.path.basename(path):
+        yield from iter_records(path)
+    elif IJSON_AVAILABLE:
+        with open(path, "rb") as f:
+            yield from ijson.items(f, "item", use_float=True)
+    else:
+        logger.warning("ijson is not installed; loading the whole dataset into memory")
+        with _open_text(path, "r") as f:
+            yield from json.load(f)
+
+
+def document_id(prefix: str, text: str) -> str:
+    """Content-addressed id: re-ingesting the same text updates one document instead of adding another"""
+    return f"{prefix}_{hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]}"
+
+
+def legacy_document_id(doc_id: str, item_index: int, message_index: int) -> str:
+    """The positional id (conv_{i}_{j} / resp_{i}_{j}) the same message had before ids were content hashes"""
+    return f"{doc_id.split('_', 1)[0]}_{item_index}_{message_index}"
+
+
+def item_documents(item: Dict[str, Any]) -> Iterator[Tuple[str, str, str, Dict[str, Any]]]:
+    """(collection, id, text, metadata) for each message of a dataset item"""
+    for message in item.get("messages", []):
+        collection, prefix, kind, emotion, context = USER_MESSAGE if message["role"] == "user" else AI_RESPONSE
+        yield collection, document_id(prefix, message["text"]), message["text"], {
+            "type": kind,
+            "emotion": message.get("emotion", emotion),
+            "context": message.get("context", context),
+            "scenario": item.get("scenario", "unknown"),
+            "timestamp": time.time()
+        }
+
+
+class ChromaIngester:
+    """
+    Loads dataset items into Chroma collections in fixed-size batches
+
+    Items are read as a stream and their messages grouped into batches of
+    about `batch_size` documents, always ending on an item boundary. Up to
+    `workers` batches are embedded concurrently; batches are upserted and
+    checkpointed strictly in order, so the checkpoint (items done per
+    source file) is always a prefix of the dataset and an interrupted run
+    resumes after the last stored batch. Ids are content hashes, so a
+    repeated run or a document that appears twice is stored once.
+
+    Earlier versions stored the same messages under positional ids; with
+    delete_legacy_ids each batch first deletes those ids, so collections
+    filled that way do not end up with every message twice. The counts
+    reported per collection are upserts: a text repeated in several
+    batches is stored once but counted in each of them.
+    """
+
+    def __init__(self, collections: Dict[str, Any], embed: Callable[[List[str]], Any],
+                 checkpoint_path: str, batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 2,
+                 progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 delete_legacy_ids: bool = True):
+        """
+        Args:
+            collections: Collection name ("conversations", "emotional_patterns") -> Chroma collection
+            embed: Callable mapping a list of texts to their embeddings
+            checkpoint_path: JSON file recording how far each source file was ingested
+            progress: Optional callback receiving the running totals after each batch
+            delete_legacy_ids: Delete the positional ids of earlier ingestions (can be turned
+                off once every collection was re-ingested with content-hash ids)
+        """
+        self.collections = collections
+        self.embed = embed
+        self.checkpoint_path = checkpoint_path
+        self.batch_size = batch_size
+        self.workers = max(1, workers)
+        self.progress = progress
+        self.delete_legacy_ids = delete_legacy_ids
+
+    def _load_checkpoints(self) -> Dict[str, Any]:
+        try:
+            with open(self.checkpoint_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"sources": {}}
+
+    @staticmethod
+    def _signature(path: str) -> Dict[str, Any]:
+        stat = os.stat(path)
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    def _batches(self, items: Iterable[Dict[str, Any]], start: int) -> Iterator[Dict[str, Any]]:
+        """Groups of documents per collection, with the item count reached after them"""
+        batch: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        legacy: Dict[str, List[str]] = {}
+        pending = 0
+        done = start
+        for index, item in enumerate(items):
+            if index < start:
+                continue
+            for position, (collection, doc_id, text, metadata) in enumerate(item_documents(item)):
+                documents = batch.setdefault(collection, {})
+                pending += doc_id not in documents
+                documents[doc_id] = {"text": text, "metadata": metadata}
+                if self.delete_legacy_ids:
+                    legacy.setdefault(collection, []).append(legacy_document_id(doc_id, index, position))
+            done = index + 1
+            if pending >= self.batch_size:
+                yield {"documents": batch, "legacy_ids": legacy, "items_done": done}
+                batch, legacy, pending = {}, {}, 0
+        if pending or done > start:
+            yield {"documents": batch, "legacy_ids": legacy, "items_done": done}
+
+    def _embed_batch(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        for documents in batch["documents"].values():
+            texts = [document["text"] for document in documents.values()]
+            for document, embedding in zip(documents.values(), self.embed(texts)):
+                document["embedding"] = [float(value) for value in embedding]
+        return batch
+
+    def ingest(self, path: str, resume: bool = True) -> Dict[str, Any]:
+        """Ingest one dataset file; returns counts and throughput"""
+        source = os.path.abspath(path)
+        checkpoints = self._load_checkpoints()
+        signature = self._signature(path)
+        state = checkpoints["sources"].get(source)
+        if not resume or state is None or state.get("signature") != signature:
+            state = {"signature": signature, "items_done": 0, "upserts": {}, "completed": False}
+        state.setdefault("upserts", state.pop("documents", {}))  # checkpoints written before the rename
+        if state.get("completed"):
+            print(f"✅ {path} was already ingested ({sum(state['upserts'].values())} upserts)")
+            return {"items": state["items_done"], "upserts": state["upserts"], "resumed_from": state["items_done"],
+                    "ingested": 0, "seconds": 0.0, "documents_per_second": 0.0}
+
+        resumed_from = state["items_done"]
+        if resumed_from:
+            print(f"🔄 Resuming {path} after {resumed_from} items")
+        started = time.perf_counter()
+        ingested = 0
+        in_flight = deque()
+
+        def store(batch):
+            nonlocal ingested
+            for collection, ids in batch["legacy_ids"].items():
+                self.collections[collection].delete(ids=ids)
+            for collection, documents in batch["documents"].items():
+                if not documents:
+                    continue
+                self.collections[collection].upsert(
+                    ids=list(documents),
+                    documents=[document["text"] for document in documents.values()],
+                    embeddings=[document["embedding"] for document in documents.values()],
+                    metadatas=[document["metadata"] for document in documents.values()]
+                )
+                state["upserts"][collection] = state["upserts"].get(collection, 0) + len(documents)
+                ingested += len(documents)
+            state["items_done"] = batch["items_done"]
+            checkpoints["sources"][source] = state
+            write_json_atomic(self.checkpoint_path, checkpoints)
+
+            elapsed = time.perf_counter() - started
+            report = {"items_done": state["items_done"], "ingested": ingested,
+                      "documents_per_second": round(ingested / elapsed, 1) if elapsed else 0.0}
+            print(f"📥 {report['items_done']} items, {ingested} documents "
+                  f"({report['documents_per_second']} docs/s)")
+            if self.progress is not None:
+                self.progress(report)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="evolance-ingest") as pool:
+            for batch in self._batches(iter_dataset(path), resumed_from):
+                in_flight.append(pool.submit(self._embed_batch, batch))
+                # Bounded read-ahead: store the oldest batch before reading too far ahead
+                while len(in_flight) > self.workers:
+                    store(in_flight.popleft().result())
+            while in_flight:
+                store(in_flight.popleft().result())
+
+        state["completed"] = True
+        checkpoints["sources"][source] = state
+        write_json_atomic(self.checkpoint_path, checkpoints)
+        seconds = round(time.perf_counter() - started, 3)
+        return {
+            "items": state["items_done"],
+            "upserts": state["upserts"],
+            "resumed_from": resumed_from,
+            "ingested": ingested,
+            "seconds": seconds,
+            "documents_per_second": round(ingested / seconds, 1) if seconds else 0.0,
+        }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Ingest generated training data into the private Chroma database")
+    parser.add_argument("data_file", nargs="?", default="backend/data/full_training_dataset.json")
+    parser.add_argument("--db-path", default="./private_chroma_db")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=2, help="Batches embedded concurrently")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first item")
+    args = parser.parse_args(argv)
+
+    from .private_chroma_db import PrivateChromaDB
+    logging.basicConfig(level=logging.INFO)
+    result = PrivateChromaDB(args.db_path).ingest_generated_data(
+        args.data_file, batch_size=args.batch_size, workers=args.workers, resume=not args.restart
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Evolance Co-occurrence Graph
+Time-decayed concept co-occurrence counts with bounded memory
+"""
+
+import heapq
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z][a-z']+")
+GRAPH_FORMAT_VERSION = 1
+
+
+def extract_concepts(message: str, min_length: int = 4) -> List[str]:
+    """Lowercased word tokens long enough to carry meaning, in message order"""
+    return [token for token in _TOKEN.findall(message.lower()) if len(token) >= min_length]
+
+
+class CooccurrenceGraph:
+    """
+    Weighted, undirected concept graph built from messages
+
+    Concepts are interned to integer ids and edges live in per-node
+    {neighbor_id: weight} dicts. Only concepts within `window` tokens of
+    each other are linked, so a message costs O(tokens * window).
+
+    Weights decay exponentially with `half_life` seconds. The decay is not
+    applied per update. Weights are stored scaled to a reference time, and
+    an increment at time t is added as inc * 2^((t - t0) / half_life). Every
+    weight therefore decays by the same factor, and the scaling is folded
+    back in whenever the graph is pruned. Pruning runs every `prune_every`
+    messages. It drops edges and concepts whose decayed weight is below
+    `min_weight`, then the weakest ones until the graph fits max_edges and
+    max_concepts.
+    """
+
+    def __init__(self, half_life: float = 30 * 86400, window: int = 5,
+                 min_weight: float = 0.05, max_concepts: int = 100000, max_edges: int = 1000000,
+                 prune_every: int = 10000, clock: Callable[[], float] = time.time):
+        self.half_life = half_life
+        self.window = window
+        self.min_weight = min_weight
+        self.max_concepts = max_concepts
+        self.max_edges = max_edges
+        self.prune_every = prune_every
+        self._clock = clock
+        self._lock = threading.RLock()
+
+        self._ids: Dict[str, int] = {}
+        self._concepts: List[Optional[str]] = []
+        self._free_ids: List[int] = []
+        self._usage: List[float] = []  # scaled concept weights
+        self._adjacency: List[Dict[int, float]] = []  # scaled edge weights, stored in both directions
+        self._edge_count = 0
+        self._reference_time = clock()
+        self._messages_since_prune = 0
+
+        # Autosave (see start_autosave)
+        self._updates_since_save = 0
+        self._autosave_path: Optional[str] = None
+        self._save_every = 0
+        self._save_requested = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def edge_count(self) -> int:
+        return self._edge_count
+
+    def _scale(self, now: float) -> float:
+        """Factor converting a weight added at `now` to reference-time units"""
+        return 2.0 ** ((now - self._reference_time) / self.half_life)
+
+    def _intern(self, concept: str) -> int:
+        concept_id = self._ids.get(concept)
+        if concept_id is None:
+            if self._free_ids:
+                concept_id = self._free_ids.pop()
+                self._concepts[concept_id] = concept
+                self._usage[concept_id] = 0.0
+            else:
+                concept_id = len(self._concepts)
+                self._concepts.append(concept)
+                self._usage.append(0.0)
+                self._adjacency.append({})
+            self._ids[concept] = concept_id
+        return concept_id
+
+    def add_message(self, message: str):
+        """Count the concepts in a message and their co-occurrences"""
+        self.add_concepts(extract_concepts(message))
+
+    def add_concepts(self, concepts: List[str]):
+        if not concepts:
+            return
+        with self._lock:
+            scale = self._scale(self._clock())
+            ids = [self._intern(concept) for concept in concepts]
+            for concept_id in set(ids):
+                self._usage[concept_id] += scale
+
+            pairs = set()
+            for i, a in enumerate(ids):
+                for b in ids[i + 1:i + 1 + self.window]:
+                    if a != b:
+                        pairs.add((a, b) if a < b else (b, a))
+            for a, b in pairs:
+                neighbors = self._adjacency[a]
+                if b not in neighbors:
+                    self._edge_count += 1
+                    neighbors[b] = 0.0
+                    self._adjacency[b][a] = 0.0
+                neighbors[b] += scale
+                self._adjacency[b][a] += scale
+
+            self._messages_since_prune += 1
+            if self._messages_since_prune >= self.prune_every:
+                self.prune()
+            self._updates_since_save += 1
+            if self._save_every and self._updates_since_save >= self._save_every:
+                self._save_requested.set()
+
+    def neighbors(self, concept: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Top-k co-occurring concepts with their current (decayed) weights"""
+        with self._lock:
+            concept_id = self._ids.get(concept)
+            if concept_id is None:
+                return []
+            decay = 1.0 / self._scale(self._clock())
+            top = heapq.nlargest(k, self._adjacency[concept_id].items(), key=lambda item: item[1])
+            return [(self._concepts[other], weight * decay) for other, weight in top]
+
+    def weight(self, concept: str) -> float:
+        """Current (decayed) usage weight of a concept"""
+        with self._lock:
+            concept_id = self._ids.get(concept)
+            if concept_id is None:
+                return 0.0
+            return self._usage[concept_id] / self._scale(self._clock())
+
+    def _drop_concept(self, concept_id: int):
+        for other in self._adjacency[concept_id]:
+            del self._adjacency[other][concept_id]
+            self._edge_count -= 1
+        self._adjacency[concept_id] = {}
+        del self._ids[self._concepts[concept_id]]
+        self._concepts[concept_id] = None
+        self._usage[concept_id] = 0.0
+        self._free_ids.append(concept_id)
+
+    def prune(self):
+        """Rebase weights to now, then drop weak edges and concepts until within bounds"""
+        with self._lock:
+            self._messages_since_prune = 0
+            now = self._clock()
+            decay = 1.0 / self._scale(now)
+            self._reference_time = now
+
+            edge_threshold = self.min_weight
+            if self._edge_count > self.max_edges:
+                weights = np.fromiter(
+                    (w for a, neighbors in enumerate(self._adjacency) for b, w in neighbors.items() if a < b),
+                    dtype=np.float64, count=self._edge_count
+                ) * decay
+                edge_threshold = max(edge_threshold, float(np.partition(weights, -self.max_edges)[-self.max_edges]))
+
+            for a, neighbors in enumerate(self._adjacency):
+                for b in list(neighbors):
+                    weight = neighbors[b] * decay
+                    if a < b and weight < edge_threshold:
+                        del neighbors[b]
+                        del self._adjacency[b][a]
+                        self._edge_count -= 1
+                    elif b in neighbors:
+                        neighbors[b] = weight
+
+            live = [concept_id for concept_id, concept in enumerate(self._concepts) if concept is not None]
+            for concept_id in live:
+                self._usage[concept_id] *= decay
+
+            concept_threshold = self.min_weight
+            if len(live) > self.max_concepts:
+                usage = np.array([self._usage[concept_id] for concept_id in live])
+                concept_threshold = max(concept_threshold, float(np.partition(usage, -self.max_concepts)[-self.max_concepts]))
+            for concept_id in live:
+                if self._usage[concept_id] < concept_threshold:
+                    self._drop_concept(concept_id)
+
+            logger.info(f"Pruned co-occurrence graph to {len(self._ids)} concepts, {self._edge_count} edges")
+
+    def save(self, path: str):
+        """Write the graph atomically (weights are stored as of now)"""
+        with self._lock:
+            self.prune()
+            live = [concept_id for concept_id, concept in enumerate(self._concepts) if concept is not None]
+            index = {concept_id: position for position, concept_id in enumerate(live)}
+            sources, targets, weights = [], [], []
+            for a in live:
+                for b, weight in self._adjacency[a].items():
+                    if a < b:
+                        sources.append(index[a])
+                        targets.append(index[b])
+                        weights.append(weight)
+            header = {
+                "format_version": GRAPH_FORMAT_VERSION,
+                "reference_time": self._reference_time,
+                "concepts": [self._concepts[concept_id] for concept_id in live],
+            }
+            arrays = {
+                "usage": np.array([self._usage[concept_id] for concept_id in live], dtype=np.float64),
+                "sources": np.array(sources, dtype=np.int32),
+                "targets": np.array(targets, dtype=np.int32),
+                "weights": np.array(weights, dtype=np.float64),
+            }
+            self._updates_since_save = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".cooccurrence.", suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, header=np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8), **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "CooccurrenceGraph":
+        """Load a saved graph; kwargs configure decay and bounds as in __init__"""
+        graph = cls(**kwargs)
+        with np.load(path) as data:
+            header = json.loads(data["header"].tobytes().decode("utf-8"))
+            if header.get("format_version") != GRAPH_FORMAT_VERSION:
+                raise ValueError(f"Unsupported co-occurrence graph format: {header.get('format_version')}")
+            graph._reference_time = header["reference_time"]
+            graph._concepts = list(header["concepts"])
+            graph._ids = {concept: concept_id for concept_id, concept in enumerate(graph._concepts)}
+            graph._usage = data["usage"].tolist()
+            graph._adjacency = [{} for _ in graph._concepts]
+            for a, b, weight in zip(data["sources"].tolist(), data["targets"].tolist(), data["weights"].tolist()):
+                graph._adjacency[a][b] = weight
+                graph._adjacency[b][a] = weight
+            graph._edge_count = len(data["weights"])
+        return graph
+
+    def start_autosave(self, path: str, save_every: int = 1000, interval: float = 300.0):
+        """
+        Save to `path` in a background thread after every `save_every` updates,
+        and every `interval` seconds if anything changed, so a crash loses at
+        most that much of the graph
+        """
+        self._autosave_path = path
+        self._save_every = save_every
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._autosave_loop, args=(interval,),
+                                            name="evolance-cooccurrence-save", daemon=True)
+            self._thread.start()
+
+    def _autosave_loop(self, interval: float):
+        while not self._stop.is_set():
+            self._save_requested.wait(interval)
+            self._save_requested.clear()
+            if self._stop.is_set():
+                break
+            if self._updates_since_save:
+                try:
+                    self.save(self._autosave_path)
+                except Exception as e:
+                    logger.error(f"Failed to save co-occurrence graph: {e}")
+
+    def close(self):
+        """Stop autosaving and write the final state"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._save_requested.set()
+        self._thread.join()
+        self._thread = None
+        if self._updates_since_save:
+            self.save(self._autosave_path)
+
+    def get_metrics(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "concepts": len(self._ids),
+                "edges": self._edge_count,
+                "messages_since_prune": self._messages_since_prune,
+                "updates_since_save": self._updates_since_save,
+            }
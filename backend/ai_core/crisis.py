@@ -0,0 +1,15 @@
+"""
+Evolance Crisis Indicators
+Shared keyword check used wherever a message must be treated as a possible crisis
+"""
+
+CRISIS_KEYWORDS = [
+    'suicide', 'kill myself', 'want to die', 'end it all', 'no reason to live',
+    'self harm', 'cut myself', 'hurt myself', 'better off dead',
+    'can\'t take it anymore', 'give up', 'hopeless', 'worthless'
+]
+
+def has_crisis_indicators(message: str) -> bool:
+    """True if the message contains any crisis keyword"""
+    message_lower = message.lower()
+    return any(keyword in message_lower for keyword in CRISIS_KEYWORDS)
@@ -0,0 +1,162 @@
+"""
+Evolance Embeddings
+One sentence-transformer embedding function shared by the Chroma collections and the intent engine
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+try:
+    from chromadb.api.types import EmbeddingFunction
+except ImportError:
+    EmbeddingFunction = object
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+
+class SentenceEmbeddingFunction(EmbeddingFunction):
+    """
+    Batched, cached sentence-transformer embeddings
+
+    Usable as a Chroma embedding function (called with a list of documents)
+    and through embed() for numpy callers. The model is loaded by load() or
+    on first use with the given device, and texts are encoded
+    `batch_size` at a time with L2-normalized output, the same vectors
+    Chroma's default all-MiniLM-L6-v2 embedder produces. Recently embedded
+    texts are kept in an LRU cache of `cache_size` entries, so a query
+    embedded for a search is not encoded again by the next component.
+
+    num_threads is passed to torch.set_num_threads when the model loads.
+    That setting is process-wide: it also limits every other torch model in
+    the process, so set it (EMBEDDING_THREADS) once per process and not per
+    embedding function.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL, device: Optional[str] = None,
+                 batch_size: int = 64, num_threads: Optional[int] = None, cache_size: int = 4096):
+        self.model_name = model_name
+        self.device = device
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+        self.cache_size = cache_size
+        self._model = None
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+
+    @staticmethod
+    def name() -> str:
+        return "evolance-sentence-transformer"
+
+    def load(self):
+        """Load the model now instead of on the first embedding; returns it"""
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    if not SENTENCE_TRANSFORMERS_AVAILABLE:
+                        raise ImportError("sentence-transformers is required for embeddings")
+                    if self.num_threads:
+                        import torch
+                        torch.set_num_threads(self.num_threads)  # process-wide, see the class docstring
+                        logger.info(f"torch intra-op threads set to {self.num_threads} for this process")
+                    self._model = SentenceTransformer(self.model_name, device=self.device)
+                    logger.info(f"Loaded embedding model {self.model_name} on {self._model.device}")
+        return self._model
+
+    @property
+    def model(self):
+        return self.load()
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        return self.embed(input).tolist()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """(n, dim) float32 array of normalized embeddings, in the order of texts"""
+        texts = list(texts)
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, text in enumerate(texts):
+                cached = self._cache.get(text)
+                if cached is not None:
+                    self._cache.move_to_end(text)
+                    vectors[i] = cached
+                    self.hits += 1
+                else:
+                    missing.setdefault(text, []).append(i)
+            self.misses += len(missing)
+
+        if missing:
+            unique = list(missing)
+            encoded = np.asarray(self.model.encode(
+                unique, batch_size=self.batch_size, normalize_embeddings=True,
+                convert_to_numpy=True, show_progress_bar=False
+            ), dtype=np.float32)
+            with self._lock:
+                self.batches += -(-len(unique) // self.batch_size)
+                for text, vector in zip(unique, encoded):
+                    for i in missing[text]:
+                        vectors[i] = vector
+                    if self.cache_size:
+                        self._cache[text] = vector
+                        self._cache.move_to_end(text)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(vectors)
+
+    def get_metrics(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "device": str(self._model.device) if self._model is not None else self.device,
+            "loaded": self._model is not None,
+            "cached": len(self._cache),
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "batches": self.batches,
+        }
+
+
+_shared: Dict[Tuple[str, Optional[str]], SentenceEmbeddingFunction] = {}
+_shared_lock = threading.Lock()
+
+
+def get_embedding_function(model_name: str = DEFAULT_EMBEDDING_MODEL,
+                           device: Optional[str] = None, **settings) -> SentenceEmbeddingFunction:
+    """
+    The process-wide embedding function for a model and device
+
+    Device, batch size and torch threads default to EMBEDDING_DEVICE,
+    EMBEDDING_BATCH_SIZE and EMBEDDING_THREADS (process-wide, applied when
+    the model loads). Settings only apply to the first call for a model;
+    later callers share the same instance.
+    """
+    device = device or os.getenv("EMBEDDING_DEVICE") or None
+    settings.setdefault("batch_size", int(os.getenv("EMBEDDING_BATCH_SIZE", "64")))
+    if os.getenv("EMBEDDING_THREADS"):
+        settings.setdefault("num_threads", int(os.getenv("EMBEDDING_THREADS")))
+    key = (model_name, device)
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = SentenceEmbeddingFunction(model_name, device=device, **settings)
+        return _shared[key]
@@ -0,0 +1,215 @@
+"""
+Evolance Executors
+Bounded, purpose-specific thread pools for blocking work called from async code
+"""
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# Default limits per pool: worker threads and how many calls may wait for a worker
+DEFAULT_EXECUTOR_LIMITS = {
+    "inference": {"max_workers": 2, "max_queue": 32},
+    "vector_store": {"max_workers": 4, "max_queue": 64},
+}
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when a pool already has max_waiting callers waiting for admission"""
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a bounded admission queue and queue-depth metrics
+
+    At most max_workers calls run at once and at most max_queue more are
+    queued inside the pool; further callers wait on the event loop (without
+    holding a thread) until a slot frees up. With max_waiting set, a caller
+    that would make more than max_waiting callers wait is rejected with
+    ExecutorSaturated instead.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, max_waiting: Optional[int] = None):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_waiting = max_waiting
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"evolance-{name}")
+        self._semaphores = weakref.WeakKeyDictionary()  # event loop -> admission semaphore
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._waiting = 0  # waiting for admission
+        self._pending = 0  # admitted, waiting for a worker thread
+        self._active = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._max_queue_depth = 0
+        self._total_wait = 0.0
+        self._total_run = 0.0
+
+    def _semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_workers + self.max_queue)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    def _record_queue_depth(self):
+        depth = self._waiting + self._pending
+        if depth > self._max_queue_depth:
+            self._max_queue_depth = depth
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking callable on this pool and await its result"""
+        loop = asyncio.get_running_loop()
+        enqueued = time.perf_counter()
+        semaphore = self._semaphore(loop)
+
+        with self._lock:
+            if self.max_waiting is not None and semaphore.locked() and self._waiting >= self.max_waiting:
+                self._rejected += 1
+                raise ExecutorSaturated(f"{self.name} pool is saturated ({self._waiting} callers waiting)")
+            self._waiting += 1
+            self._submitted += 1
+            self._record_queue_depth()
+
+        try:
+            await semaphore.acquire()
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+        try:
+            with self._lock:
+                self._pending += 1
+
+            state = {"started": False}
+
+            def call():
+                started = time.perf_counter()
+                with self._lock:
+                    state["started"] = True
+                    self._pending -= 1
+                    self._active += 1
+                    self._total_wait += started - enqueued
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    with self._lock:
+                        self._active -= 1
+                        self._total_run += time.perf_counter() - started
+
+            try:
+                result = await loop.run_in_executor(self._pool, call)
+            except BaseException:
+                with self._lock:
+                    self._failed += 1
+                    # A call cancelled before a worker picked it up never ran
+                    if not state["started"]:
+                        self._pending -= 1
+                raise
+        finally:
+            semaphore.release()
+
+        with self._lock:
+            self._completed += 1
+        return result
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Current queue depth and cumulative timing statistics"""
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queue_depth": self._waiting + self._pending,
+                "max_queue_depth": self._max_queue_depth,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._total_wait / finished * 1000, 2) if finished else 0.0,
+                "avg_run_ms": round(self._total_run / finished * 1000, 2) if finished else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+class LoopLagMonitor:
+    """Measures event-loop lag by timing how late a periodic sleep wakes up"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self._total_lag_ms = 0.0
+        self._samples = 0
+
+    def ensure_started(self):
+        """Start sampling on the running loop (no-op if already running)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._sample())
+
+    async def _sample(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - expected) * 1000)
+            self.last_lag_ms = lag_ms
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            self._total_lag_ms += lag_ms
+            self._samples += 1
+
+    def get_metrics(self) -> Dict[str, float]:
+        return {
+            "last_ms": round(self.last_lag_ms, 2),
+            "max_ms": round(self.max_lag_ms, 2),
+            "avg_ms": round(self._total_lag_ms / self._samples, 2) if self._samples else 0.0,
+        }
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+class ExecutorPools:
+    """The set of purpose-specific pools used by the AI system"""
+
+    def __init__(self, limits: Dict[str, Dict[str, int]] = None):
+        """
+        Args:
+            limits: Per-pool overrides, e.g. {"inference": {"max_workers": 4, "max_waiting": 100}}.
+                    EVOLANCE_<POOL>_WORKERS / EVOLANCE_<POOL>_QUEUE env vars take precedence.
+        """
+        limits = limits or {}
+        for name, defaults in DEFAULT_EXECUTOR_LIMITS.items():
+            settings = {**defaults, **limits.get(name, {})}
+            env_prefix = f"EVOLANCE_{name.upper()}"
+            if os.getenv(f"{env_prefix}_WORKERS"):
+                settings["max_workers"] = int(os.getenv(f"{env_prefix}_WORKERS"))
+            if os.getenv(f"{env_prefix}_QUEUE"):
+                settings["max_queue"] = int(os.getenv(f"{env_prefix}_QUEUE"))
+            setattr(self, name, BoundedExecutor(name, **settings))
+        self.loop_lag = LoopLagMonitor()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = {name: getattr(self, name).get_metrics() for name in DEFAULT_EXECUTOR_LIMITS}
+        metrics["event_loop_lag"] = self.loop_lag.get_metrics()
+        return metrics
+
+    def shutdown(self, wait: bool = True):
+        self.loop_lag.stop()
+        for name in DEFAULT_EXECUTOR_LIMITS:
+            getattr(self, name).shutdown(wait=wait)
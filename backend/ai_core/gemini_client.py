@@ -0,0 +1,388 @@
+"""
+Evolance Gemini Client
+Shared async access to Gemini: reused models and connections, bounded concurrency, jittered retries
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import google.generativeai as genai
+    GENAI_AVAILABLE = True
+except ImportError:
+    GENAI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gemini-2.5-pro"
+DEFAULT_API_ENDPOINT = "https://generativelanguage.googleapis.com"
+# Rate limiting and transient server errors are worth retrying; other statuses are not
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class GeminiError(Exception):
+    """A Gemini call failed; `retryable` tells the client whether trying again can help"""
+
+    def __init__(self, message: str, status: Optional[int] = None, retryable: bool = False):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+
+
+def _camel_case(key: str) -> str:
+    head, *rest = key.split("_")
+    return head + "".join(part.title() for part in rest)
+
+
+class SDKTransport:
+    """
+    Calls Gemini through google-generativeai, used when httpx is not installed
+
+    Model objects are created once per model name and reused. Async calls go
+    through the SDK's default async client, whose single gRPC channel is
+    shared (and multiplexed) by every model and request. With an endpoint,
+    the SDK's own REST transport is pointed at it through client_options.
+    """
+
+    def __init__(self, api_key: str, api_endpoint: Optional[str] = None):
+        if not GENAI_AVAILABLE:
+            raise ImportError("google-generativeai is required for the SDK transport")
+        if api_endpoint:
+            genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": api_endpoint})
+        else:
+            genai.configure(api_key=api_key)
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _model(self, name: str):
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.setdefault(name, genai.GenerativeModel(name))
+        return model
+
+    @staticmethod
+    def _error(exc: Exception) -> GeminiError:
+        # google.api_core exceptions carry the HTTP status as `code`
+        status = getattr(exc, "code", None)
+        if not isinstance(status, int):
+            status = None
+        retryable = status in RETRYABLE_STATUS if status is not None else isinstance(exc, (ConnectionError, TimeoutError))
+        return GeminiError(str(exc), status=status, retryable=retryable)
+
+    async def generate(self, model: str, prompt: str, generation_config: Optional[Dict] = None) -> str:
+        try:
+            response = await self._model(model).generate_content_async(prompt, generation_config=generation_config)
+            return response.text
+        except Exception as e:
+            raise self._error(e) from e
+
+    def generate_blocking(self, model: str, prompt: str, generation_config: Optional[Dict] = None) -> str:
+        try:
+            return self._model(model).generate_content(prompt, generation_config=generation_config).text
+        except Exception as e:
+            raise self._error(e) from e
+
+    async def aclose(self):
+        pass
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {"transport": "sdk", "models": len(self._models)}
+
+
+class RestTransport:
+    """
+    Calls the Gemini REST API (generateContent) through httpx
+
+    The shipped transport whenever httpx is installed (it comes with the
+    openai SDK). Each event loop gets one AsyncClient whose pool keeps at
+    most `pool_size` keep-alive connections open; blocking calls share one
+    thread-safe Client. `base_url` points requests at a proxy, an emulator
+    or a local stub server.
+    """
+
+    def __init__(self, api_key: str, base_url: str = DEFAULT_API_ENDPOINT, pool_size: int = 8,
+                 api_version: str = "v1beta", timeout: float = 60.0):
+        if not HTTPX_AVAILABLE:
+            raise ImportError("httpx is required for the REST transport")
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.api_version = api_version
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._loops = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+        self._blocking: Optional["httpx.Client"] = None
+        self._lock = threading.Lock()
+        self._connections_opened = 0
+        self._requests = 0
+
+    def _client_settings(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "headers": {"x-goog-api-key": self.api_key},
+            "limits": httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            "timeout": self.timeout,
+        }
+
+    def _async_client(self) -> "httpx.AsyncClient":
+        loop = asyncio.get_running_loop()
+        client = self._loops.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(**self._client_settings())
+            self._loops[loop] = client
+        return client
+
+    def _blocking_client(self) -> "httpx.Client":
+        with self._lock:
+            if self._blocking is None:
+                self._blocking = httpx.Client(**self._client_settings())
+            return self._blocking
+
+    def _path(self, model: str) -> str:
+        return f"/{self.api_version}/models/{model}:generateContent"
+
+    def _body(self, prompt: str, generation_config: Optional[Dict]) -> Dict[str, Any]:
+        body = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+        if generation_config:
+            body["generationConfig"] = {_camel_case(key): value for key, value in generation_config.items()}
+        return body
+
+    def _count(self, name: str):
+        with self._lock:
+            if name == "connection.connect_tcp.complete":
+                self._connections_opened += 1
+
+    async def _trace(self, name: str, info: Dict[str, Any]):
+        self._count(name)
+
+    def _parse(self, response: "httpx.Response") -> str:
+        with self._lock:
+            self._requests += 1
+        try:
+            data = response.json() if response.content else {}
+        except ValueError:
+            data = {}
+        if response.status_code >= 400:
+            message = (data.get("error") or {}).get("message") or f"HTTP {response.status_code}"
+            raise GeminiError(message, status=response.status_code,
+                              retryable=response.status_code in RETRYABLE_STATUS)
+        candidates = data.get("candidates") or []
+        if not candidates:
+            reason = (data.get("promptFeedback") or {}).get("blockReason", "no candidates returned")
+            raise GeminiError(f"Gemini returned no response: {reason}", status=response.status_code)
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        return "".join(part.get("text", "") for part in parts)
+
+    async def generate(self, model: str, prompt: str, generation_config: Optional[Dict] = None) -> str:
+        try:
+            response = await self._async_client().post(
+                self._path(model), json=self._body(prompt, generation_config), extensions={"trace": self._trace}
+            )
+        except httpx.TransportError as e:
+            raise GeminiError(f"Gemini connection error: {e}", retryable=True) from e
+        return self._parse(response)
+
+    def generate_blocking(self, model: str, prompt: str, generation_config: Optional[Dict] = None) -> str:
+        try:
+            response = self._blocking_client().post(
+                self._path(model), json=self._body(prompt, generation_config),
+                extensions={"trace": lambda name, info: self._count(name)}
+            )
+        except httpx.TransportError as e:
+            raise GeminiError(f"Gemini connection error: {e}", retryable=True) from e
+        return self._parse(response)
+
+    async def aclose(self):
+        """Close this loop's connections"""
+        client = self._loops.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "transport": "rest",
+            "connections_opened": self._connections_opened,
+            "requests": self._requests,
+        }
+
+
+class GeminiClient:
+    """
+    Bounded, retrying front end for a Gemini transport
+
+    At most `max_concurrency` calls are in flight per event loop; further
+    callers wait on the loop without holding a thread. Retryable failures
+    (rate limits, 5xx, connection errors, per-attempt timeouts) are retried
+    up to `max_retries` times with full-jitter exponential backoff, and the
+    concurrency slot is released while backing off.
+    """
+
+    def __init__(self, transport, model: str = DEFAULT_MODEL, max_concurrency: int = 8,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 timeout: float = 60.0, rng: Callable[[], float] = random.random):
+        self.transport = transport
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self._rng = rng
+        self._semaphores = weakref.WeakKeyDictionary()  # event loop -> concurrency semaphore
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._calls = 0
+        self._attempts = 0
+        self._retries = 0
+        self._failures = 0
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._total_latency = 0.0
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (0-based)"""
+        return self._rng() * min(self.backoff_max, self.backoff_base * (2 ** attempt))
+
+    def _start_attempt(self):
+        with self._lock:
+            self._attempts += 1
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+
+    def _end_attempt(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _should_retry(self, error: GeminiError, attempt: int) -> bool:
+        if not error.retryable or attempt >= self.max_retries:
+            return False
+        with self._lock:
+            self._retries += 1
+        return True
+
+    def _record_call(self, started: float, failed: bool):
+        with self._lock:
+            self._calls += 1
+            self._failures += failed
+            self._total_latency += time.perf_counter() - started
+
+    async def generate(self, prompt: str, model: Optional[str] = None,
+                       generation_config: Optional[Dict] = None) -> str:
+        """Generate text for a prompt; raises GeminiError once retries are exhausted"""
+        started = time.perf_counter()
+        semaphore = self._semaphore()
+        attempt = 0
+        try:
+            while True:
+                async with semaphore:
+                    self._start_attempt()
+                    try:
+                        text = await asyncio.wait_for(
+                            self.transport.generate(model or self.model, prompt, generation_config),
+                            timeout=self.timeout
+                        )
+                    except asyncio.TimeoutError as e:
+                        error = GeminiError(f"Gemini call exceeded {self.timeout}s", retryable=True)
+                        error.__cause__ = e
+                    except GeminiError as e:
+                        error = e
+                    else:
+                        self._record_call(started, failed=False)
+                        return text
+                    finally:
+                        self._end_attempt()
+                if not self._should_retry(error, attempt):
+                    raise error
+                delay = self.backoff(attempt)
+                logger.warning(f"Gemini call failed ({error}); retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+                attempt += 1
+                await asyncio.sleep(delay)
+        except BaseException:
+            self._record_call(started, failed=True)
+            raise
+
+    def generate_blocking(self, prompt: str, model: Optional[str] = None,
+                          generation_config: Optional[Dict] = None) -> str:
+        """Synchronous variant for scripts and other code that has no event loop"""
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            self._start_attempt()
+            try:
+                text = self.transport.generate_blocking(model or self.model, prompt, generation_config)
+                self._record_call(started, failed=False)
+                return text
+            except GeminiError as error:
+                if not self._should_retry(error, attempt):
+                    self._record_call(started, failed=True)
+                    raise
+                time.sleep(self.backoff(attempt))
+                attempt += 1
+            finally:
+                self._end_attempt()
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "model": self.model,
+                "max_concurrency": self.max_concurrency,
+                "calls": self._calls,
+                "attempts": self._attempts,
+                "retries": self._retries,
+                "failures": self._failures,
+                "in_flight": self._in_flight,
+                "max_in_flight": self._max_in_flight,
+                "avg_latency_ms": round(self._total_latency / self._calls * 1000, 2) if self._calls else 0.0,
+                **self.transport.get_metrics(),
+            }
+
+
+_clients: Dict[Tuple[str, Optional[str]], GeminiClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_gemini_client(api_key: str, api_endpoint: Optional[str] = None, **settings) -> GeminiClient:
+    """
+    Process-wide client for an API key (and optional endpoint)
+
+    Every caller with the same key shares one client, and therefore the same
+    models, connections and concurrency limit. Requests go over REST through
+    httpx when it is installed, and through the SDK otherwise. Settings
+    (GeminiClient keyword arguments) apply when the client is created.
+    """
+    key = (api_key, api_endpoint)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            if HTTPX_AVAILABLE:
+                transport = RestTransport(api_key, api_endpoint or DEFAULT_API_ENDPOINT,
+                                          pool_size=settings.get("max_concurrency", 8),
+                                          timeout=settings.get("timeout", 60.0))
+            else:
+                transport = SDKTransport(api_key, api_endpoint)
+            client = GeminiClient(transport, **settings)
+            _clients[key] = client
+        return client
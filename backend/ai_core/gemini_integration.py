@@ -1,24 +1,109 @@
-import google.generativeai as genai
 import os
+import re
 import json
+import asyncio
+import functools
+import hashlib
+import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+from .executors import BoundedExecutor
+from .gemini_client import GeminiClient, get_gemini_client
+from .response_cache import SemanticResponseCache, response_cache as shared_response_cache
+
+logger = logging.getLogger(__name__)
+
+# Fields of an emotion analysis that shape the response prompt (timestamps and confidence do not)
+RESPONSE_EMOTION_FIELDS = ("primary_emotion", "emotion_intensity", "secondary_emotions",
+                           "reasoning", "emotional_triggers")
+
+CHAT_MODES = ("combined", "parallel", "sequential")
+
+_NUMBER = (int, float)
+# Expected shape of the combined analysis + reply + emolytics response
+COMBINED_RESPONSE_SCHEMA = {
+    "emotion_analysis": {
+        "primary_emotion": str,
+        "emotion_intensity": _NUMBER,
+        "secondary_emotions": list,
+        "reasoning": str,
+        "emotional_triggers": list,
+        "confidence_score": _NUMBER,
+    },
+    "response": str,
+    "emolytics": {
+        "emotional_state": {
+            "current_emotion": str,
+            "intensity": _NUMBER,
+            "stability": _NUMBER,
+            "mood_trend": str,
+        },
+        "emotional_insights": dict,
+        "recommendations": dict,
+        "analytics_metrics": dict,
+    },
+}
+
+_JSON_FENCE = re.compile(r"^```(?:json)?\s*(.*?)\s*```$", re.DOTALL)
+
+
+def parse_json_response(text: str) -> Any:
+    """Parse a model's JSON reply, tolerating a surrounding ```json fence"""
+    text = text.strip()
+    match = _JSON_FENCE.match(text)
+    return json.loads(match.group(1) if match else text)
+
+
+def validate_schema(data: Any, schema: Any, path: str = "$") -> List[str]:
+    """
+    Check data against a nested {key: type or sub-schema} schema
+
+    Returns a list of problems (empty when valid). Extra keys are allowed;
+    booleans are not accepted as numbers.
+    """
+    if isinstance(schema, dict):
+        if not isinstance(data, dict):
+            return [f"{path}: expected object"]
+        errors = []
+        for key, expected in schema.items():
+            if key not in data:
+                errors.append(f"{path}.{key}: missing")
+            else:
+                errors.extend(validate_schema(data[key], expected, f"{path}.{key}"))
+        return errors
+    if isinstance(data, bool) and schema is _NUMBER:
+        return [f"{path}: expected number"]
+    if not isinstance(data, schema):
+        name = "number" if schema is _NUMBER else schema.__name__
+        return [f"{path}: expected {name}"]
+    return []
 
 class GeminiEmotionAnalyzer:
-    def __init__(self, api_key: str):
-        """Initialize Gemini for emotion analysis and conversational AI."""
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-pro')
-        self.emotion_history = []
-        
-    def analyze_conversation_emotion(self, user_message: str, conversation_context: Optional[List[Dict]] = None) -> Dict:
+    def __init__(self, api_key: str, response_cache: Optional[SemanticResponseCache] = None,
+                 client: Optional[GeminiClient] = None, executor: Optional[BoundedExecutor] = None):
         """
-        Analyze user message for emotions and reasoning.
-        Returns structured emotion data for emolytics.
+        Initialize Gemini for emotion analysis and conversational AI.
+
+        Args:
+            executor: Pool for response cache lookups and stores from async code (they may
+                      embed the message); the event loop's default executor when None
         """
+        self.client = client if client is not None else get_gemini_client(api_key)
+        self.emotion_history = []
+        self.response_cache = response_cache if response_cache is not None else shared_response_cache
+        self.executor = executor
+    
+    async def _off_loop(self, fn, *args, **kwargs):
+        """Run blocking cache work without stalling the event loop"""
+        if self.executor is not None:
+            return await self.executor.run(fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args, **kwargs))
+        
+    def _emotion_prompt(self, user_message: str, conversation_context: Optional[List[Dict]]) -> str:
         if conversation_context is None:
             conversation_context = []
-        prompt = f"""
+        return f"""
         Analyze this user message for emotional content and reasoning.
         
         User Message: "{user_message}"
@@ -36,37 +121,72 @@ class GeminiEmotionAnalyzer:
             "timestamp": "current_timestamp"
         }}
         """
+    
+    def _record_emotion(self, text: str) -> Dict:
+        logger.debug(f"Gemini raw response: {text}")
+        return self.remember_emotion(parse_json_response(text))
+    
+    def remember_emotion(self, emotion_data: Dict) -> Dict:
+        """Timestamp an emotion analysis and keep it for pattern analysis"""
+        emotion_data['timestamp'] = datetime.now().isoformat()
         
+        # Store in history for pattern analysis
+        self.emotion_history.append(emotion_data)
+        
+        return emotion_data
+    
+    def analyze_conversation_emotion(self, user_message: str, conversation_context: Optional[List[Dict]] = None) -> Dict:
+        """
+        Analyze user message for emotions and reasoning.
+        Returns structured emotion data for emolytics.
+        """
         try:
-            response = self.model.generate_content(prompt)
-            print("Gemini raw response:", response.text)  # Debug print
-            emotion_data = json.loads(response.text)
-            emotion_data['timestamp'] = datetime.now().isoformat()
-            
-            # Store in history for pattern analysis
-            self.emotion_history.append(emotion_data)
-            
-            return emotion_data
-            
+            text = self.client.generate_blocking(self._emotion_prompt(user_message, conversation_context))
+            return self._record_emotion(text)
         except Exception as e:
             print(f"Error analyzing emotion: {e}")
-            return {
-                "primary_emotion": "neutral",
-                "emotion_intensity": 50,
-                "secondary_emotions": [],
-                "reasoning": "Unable to analyze",
-                "emotional_triggers": [],
-                "confidence_score": 0,
-                "timestamp": datetime.now().isoformat()
-            }
+            return self._neutral_emotion()
     
-    def generate_emotional_response(self, user_message: str, emotion_data: Dict, user_profile: Optional[Dict] = None) -> str:
-        """
-        Generate emotionally intelligent response based on user's emotional state.
-        """
-        if user_profile is None:
-            user_profile = {}
-        prompt = f"""
+    async def analyze_conversation_emotion_async(self, user_message: str,
+                                                 conversation_context: Optional[List[Dict]] = None) -> Dict:
+        """analyze_conversation_emotion without blocking the event loop or a worker thread"""
+        try:
+            text = await self.client.generate(self._emotion_prompt(user_message, conversation_context))
+            return self._record_emotion(text)
+        except Exception as e:
+            print(f"Error analyzing emotion: {e}")
+            return self._neutral_emotion()
+    
+    @staticmethod
+    def _neutral_emotion() -> Dict:
+        return {
+            "primary_emotion": "neutral",
+            "emotion_intensity": 50,
+            "secondary_emotions": [],
+            "reasoning": "Unable to analyze",
+            "emotional_triggers": [],
+            "confidence_score": 0,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def _response_cache_args(self, emotion_data: Dict, user_profile: Optional[Dict], user_id: Optional[str]) -> Dict:
+        # Everything the response prompt is built from, besides the message, is part of the cache namespace
+        prompt_inputs = {
+            "emotion": {field: emotion_data.get(field) for field in RESPONSE_EMOTION_FIELDS},
+            "profile": user_profile or {},
+        }
+        digest = hashlib.sha256(
+            json.dumps(prompt_inputs, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+        return dict(
+            emotion=str(emotion_data.get("primary_emotion", "neutral")),
+            intent="",
+            user_id=user_id,
+            namespace=f"gemini:{digest}"
+        )
+    
+    def _response_prompt(self, user_message: str, emotion_data: Dict, user_profile: Optional[Dict]) -> str:
+        return f"""
         You are an emotionally intelligent AI assistant for Evolance and your name is EV, an emotional wellness platform.
         
         User's emotional state: {emotion_data}
@@ -82,24 +202,48 @@ class GeminiEmotionAnalyzer:
         
         Keep the response conversational and under 150 words.
         """
+    
+    def generate_emotional_response(self, user_message: str, emotion_data: Dict, user_profile: Optional[Dict] = None,
+                                    user_id: Optional[str] = None) -> str:
+        """
+        Generate emotionally intelligent response based on user's emotional state.
+        Responses are cached per emotional state (emotion, intensity, triggers and
+        reasoning) and profile; crisis messages and opted-out users always reach the model.
+        """
+        cache_args = self._response_cache_args(emotion_data, user_profile, user_id)
+        cached = self.response_cache.get(user_message, **cache_args)
+        if cached is not None:
+            return cached
         
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            text = self.client.generate_blocking(self._response_prompt(user_message, emotion_data, user_profile))
+            self.response_cache.put(user_message, response=text, **cache_args)
+            return text
         except Exception as e:
             print(f"Error generating response: {e}")
             return "I'm here to support you. How are you feeling right now?"
     
-    def analyze_emotional_patterns(self, user_id: str, time_period: str = "7d") -> Dict:
-        """
-        Analyze emotional patterns over time for emolytics insights.
-        """
-        if not self.emotion_history:
-            return {"patterns": [], "insights": "No emotional data available"}
+    async def generate_emotional_response_async(self, user_message: str, emotion_data: Dict,
+                                                user_profile: Optional[Dict] = None,
+                                                user_id: Optional[str] = None) -> str:
+        """generate_emotional_response without blocking the event loop; cache work runs on the executor"""
+        cache_args = self._response_cache_args(emotion_data, user_profile, user_id)
+        cached = await self._off_loop(self.response_cache.get, user_message, **cache_args)
+        if cached is not None:
+            return cached
         
+        try:
+            text = await self.client.generate(self._response_prompt(user_message, emotion_data, user_profile))
+            await self._off_loop(self.response_cache.put, user_message, response=text, **cache_args)
+            return text
+        except Exception as e:
+            print(f"Error generating response: {e}")
+            return "I'm here to support you. How are you feeling right now?"
+    
+    def _patterns_prompt(self) -> str:
         recent_emotions = self.emotion_history[-50:]  # Last 50 interactions
         
-        prompt = f"""
+        return f"""
         Analyze these emotional data points for patterns and insights:
         {recent_emotions}
         
@@ -113,25 +257,38 @@ class GeminiEmotionAnalyzer:
             "recommendations": ["recommendation1", "recommendation2"]
         }}
         """
+    
+    def analyze_emotional_patterns(self, user_id: str, time_period: str = "7d") -> Dict:
+        """
+        Analyze emotional patterns over time for emolytics insights.
+        """
+        if not self.emotion_history:
+            return {"patterns": [], "insights": "No emotional data available"}
         
         try:
-            response = self.model.generate_content(prompt)
-            return json.loads(response.text)
+            return parse_json_response(self.client.generate_blocking(self._patterns_prompt()))
+        except Exception as e:
+            print(f"Error analyzing patterns: {e}")
+            return {"patterns": [], "insights": "Unable to analyze patterns"}
+    
+    async def analyze_emotional_patterns_async(self, user_id: str, time_period: str = "7d") -> Dict:
+        """analyze_emotional_patterns without blocking the event loop or a worker thread"""
+        if not self.emotion_history:
+            return {"patterns": [], "insights": "No emotional data available"}
+        
+        try:
+            return parse_json_response(await self.client.generate(self._patterns_prompt()))
         except Exception as e:
             print(f"Error analyzing patterns: {e}")
             return {"patterns": [], "insights": "Unable to analyze patterns"}
 
 class GeminiCoreAI:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, client: Optional[GeminiClient] = None):
         """Initialize Gemini for core AI processing and emolytics updates."""
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-pro')
+        self.client = client if client is not None else get_gemini_client(api_key)
     
-    def update_emolytics(self, user_id: str, emotion_data: Dict, conversation_context: List[Dict]) -> Dict:
-        """
-        Update user's emolytics based on conversation and emotion analysis.
-        """
-        prompt = f"""
+    def _emolytics_prompt(self, user_id: str, emotion_data: Dict, conversation_context: List[Dict]) -> str:
+        return f"""
         Update the user's emotional analytics based on this interaction:
         
         User ID: {user_id}
@@ -165,34 +322,201 @@ class GeminiCoreAI:
             }}
         }}
         """
-        
+    
+    def update_emolytics(self, user_id: str, emotion_data: Dict, conversation_context: List[Dict]) -> Dict:
+        """
+        Update user's emolytics based on conversation and emotion analysis.
+        """
+        try:
+            text = self.client.generate_blocking(self._emolytics_prompt(user_id, emotion_data, conversation_context))
+            return parse_json_response(text)
+        except Exception as e:
+            print(f"Error updating emolytics: {e}")
+            return self._default_emolytics(emotion_data)
+    
+    async def update_emolytics_async(self, user_id: str, emotion_data: Dict, conversation_context: List[Dict]) -> Dict:
+        """update_emolytics without blocking the event loop or a worker thread"""
         try:
-            response = self.model.generate_content(prompt)
-            return json.loads(response.text)
+            text = await self.client.generate(self._emolytics_prompt(user_id, emotion_data, conversation_context))
+            return parse_json_response(text)
         except Exception as e:
             print(f"Error updating emolytics: {e}")
-            return {
-                "emotional_state": {
-                    "current_emotion": emotion_data.get("primary_emotion", "neutral"),
-                    "intensity": emotion_data.get("emotion_intensity", 50),
-                    "stability": 50,
-                    "mood_trend": "stable"
-                },
-                "emotional_insights": {
-                    "primary_triggers": [],
-                    "coping_patterns": [],
-                    "emotional_strengths": [],
-                    "growth_areas": []
-                },
-                "recommendations": {
-                    "immediate_actions": [],
-                    "long_term_strategies": [],
-                    "wellness_practices": []
-                },
-                "analytics_metrics": {
-                    "emotional_variability": 50,
-                    "response_time_to_triggers": "medium",
-                    "emotional_awareness_score": 50,
-                    "wellness_progress": 50
-                }
-            } 
\ No newline at end of file
+            return self._default_emolytics(emotion_data)
+    
+    @staticmethod
+    def _default_emolytics(emotion_data: Dict) -> Dict:
+        return {
+            "emotional_state": {
+                "current_emotion": emotion_data.get("primary_emotion", "neutral"),
+                "intensity": emotion_data.get("emotion_intensity", 50),
+                "stability": 50,
+                "mood_trend": "stable"
+            },
+            "emotional_insights": {
+                "primary_triggers": [],
+                "coping_patterns": [],
+                "emotional_strengths": [],
+                "growth_areas": []
+            },
+            "recommendations": {
+                "immediate_actions": [],
+                "long_term_strategies": [],
+                "wellness_practices": []
+            },
+            "analytics_metrics": {
+                "emotional_variability": 50,
+                "response_time_to_triggers": "medium",
+                "emotional_awareness_score": 50,
+                "wellness_progress": 50
+            }
+        } 
+
+
+class GeminiChatPipeline:
+    """
+    Produces the emotion analysis, reply and emolytics update for a chat turn
+
+    combined   -> one Gemini call returns all three as a single JSON object,
+                  validated against COMBINED_RESPONSE_SCHEMA; if the call,
+                  the parse or the validation fails, the turn falls back to
+                  `fallback_mode` (parallel by default; sequential makes the
+                  original three calls)
+    parallel   -> analysis first, then the reply and the emolytics update
+                  concurrently (both need the analysis, not each other)
+    sequential -> the original three calls, one after another
+
+    The combined path does not use the reply cache: replies are cached per
+    emotional state, which is only known once the combined call has returned.
+    """
+
+    def __init__(self, analyzer: GeminiEmotionAnalyzer, core_ai: GeminiCoreAI, mode: str = "combined",
+                 fallback_mode: str = "parallel"):
+        if mode not in CHAT_MODES:
+            raise ValueError(f"Unknown Gemini chat mode: {mode}")
+        if fallback_mode not in ("parallel", "sequential"):
+            raise ValueError(f"Unknown Gemini fallback mode: {fallback_mode}")
+        self.analyzer = analyzer
+        self.core_ai = core_ai
+        self.mode = mode
+        self.fallback_mode = fallback_mode
+        self._counts = {"combined": 0, "parallel": 0, "sequential": 0, "combined_fallbacks": 0}
+
+    def _combined_prompt(self, user_message: str, conversation_context: List[Dict],
+                         user_id: Optional[str], user_profile: Optional[Dict]) -> str:
+        return f"""
+        You are an emotionally intelligent AI assistant for Evolance and your name is EV, an emotional wellness platform.
+        
+        User ID: {user_id}
+        User message: "{user_message}"
+        User profile: {user_profile or {}}
+        Previous Context: {conversation_context[-5:] if conversation_context else "None"}
+        
+        In one step:
+        1. Analyze the message for emotional content and reasoning.
+        2. Write a supportive, empathetic reply that acknowledges their emotional state, provides
+           emotional support, offers practical guidance if appropriate, keeps a warm, caring tone and
+           encourages emotional awareness. Keep it conversational and under 150 words.
+        3. Update the user's emotional analytics based on this interaction.
+        
+        Respond ONLY with a valid JSON object in the following format:
+        {{
+            "emotion_analysis": {{
+                "primary_emotion": "emotion_name",
+                "emotion_intensity": 0-100,
+                "secondary_emotions": ["emotion1", "emotion2"],
+                "reasoning": "why they feel this way",
+                "emotional_triggers": ["trigger1", "trigger2"],
+                "confidence_score": 0-100
+            }},
+            "response": "your reply to the user",
+            "emolytics": {{
+                "emotional_state": {{
+                    "current_emotion": "emotion_name",
+                    "intensity": 0-100,
+                    "stability": 0-100,
+                    "mood_trend": "improving/declining/stable"
+                }},
+                "emotional_insights": {{
+                    "primary_triggers": ["trigger1", "trigger2"],
+                    "coping_patterns": ["pattern1", "pattern2"],
+                    "emotional_strengths": ["strength1", "strength2"],
+                    "growth_areas": ["area1", "area2"]
+                }},
+                "recommendations": {{
+                    "immediate_actions": ["action1", "action2"],
+                    "long_term_strategies": ["strategy1", "strategy2"],
+                    "wellness_practices": ["practice1", "practice2"]
+                }},
+                "analytics_metrics": {{
+                    "emotional_variability": 0-100,
+                    "response_time_to_triggers": "fast/medium/slow",
+                    "emotional_awareness_score": 0-100,
+                    "wellness_progress": 0-100
+                }}
+            }}
+        }}
+        """
+
+    async def _run_combined(self, user_message: str, conversation_context: List[Dict],
+                            user_id: Optional[str], user_profile: Optional[Dict]) -> Optional[Dict]:
+        """One round trip; None when the result cannot be used"""
+        try:
+            text = await self.analyzer.client.generate(
+                self._combined_prompt(user_message, conversation_context, user_id, user_profile)
+            )
+            data = parse_json_response(text)
+        except Exception as e:
+            logger.warning(f"Combined Gemini call failed, falling back to separate calls: {e}")
+            return None
+        errors = validate_schema(data, COMBINED_RESPONSE_SCHEMA)
+        if not errors and not data["response"].strip():
+            errors = ["$.response: empty"]
+        if errors:
+            logger.warning(f"Combined Gemini response failed validation ({'; '.join(errors[:5])}), "
+                           "falling back to separate calls")
+            return None
+
+        emotion_data = self.analyzer.remember_emotion(data["emotion_analysis"])
+        return {"emotion_data": emotion_data, "response": data["response"].strip(), "emolytics": data["emolytics"]}
+
+    async def _run_separate(self, user_message: str, conversation_context: List[Dict], user_id: Optional[str],
+                            user_profile: Optional[Dict], parallel: bool) -> Dict:
+        emotion_data = await self.analyzer.analyze_conversation_emotion_async(user_message, conversation_context)
+        reply = self.analyzer.generate_emotional_response_async(
+            user_message, emotion_data, user_profile, user_id=user_id
+        )
+        emolytics = self.core_ai.update_emolytics_async(user_id, emotion_data, conversation_context)
+        if parallel:
+            response, updated_emolytics = await asyncio.gather(reply, emolytics)
+        else:
+            response = await reply
+            updated_emolytics = await emolytics
+        return {"emotion_data": emotion_data, "response": response, "emolytics": updated_emolytics}
+
+    async def run(self, user_message: str, conversation_context: Optional[List[Dict]] = None,
+                  user_id: Optional[str] = None, user_profile: Optional[Dict] = None,
+                  mode: Optional[str] = None) -> Dict:
+        """
+        Returns {"emotion_data", "response", "emolytics", "mode"}, where mode
+        is the path that actually produced the result
+        """
+        conversation_context = conversation_context or []
+        mode = mode or self.mode
+        if mode not in CHAT_MODES:
+            raise ValueError(f"Unknown Gemini chat mode: {mode}")
+
+        if mode == "combined":
+            result = await self._run_combined(user_message, conversation_context, user_id, user_profile)
+            if result is not None:
+                self._counts["combined"] += 1
+                return {**result, "mode": "combined"}
+            self._counts["combined_fallbacks"] += 1
+            mode = self.fallback_mode
+
+        result = await self._run_separate(user_message, conversation_context, user_id, user_profile,
+                                          parallel=mode == "parallel")
+        self._counts[mode] += 1
+        return {**result, "mode": mode}
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "fallback_mode": self.fallback_mode, **self._counts}
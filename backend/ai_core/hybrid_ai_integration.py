@@ -8,6 +8,7 @@ import json
 
 # Import the hybrid AI system
 from ai_core.hybrid_ai_system import HybridAISystem
+from ai_core.crisis import has_crisis_indicators
 
 logger = logging.getLogger(__name__)
 
@@ -30,14 +31,19 @@ class EvolanceHybridAI:
             logger.error(f"Failed to initialize hybrid AI system: {e}")
             return False
     
+    async def shutdown(self):
+        """Shut down the hybrid AI system (draining buffered writes off the event loop)"""
+        if self.hybrid_system:
+            await asyncio.get_running_loop().run_in_executor(None, self.hybrid_system.shutdown)
+    
     async def process_chat_message(self, user_id: str, message: str, context: Dict = None) -> Dict[str, Any]:
         """Process chat message using hybrid AI system"""
         try:
             if not self.hybrid_system:
                 await self.initialize()
             
-            # Process message through hybrid system
-            response = await self.hybrid_system.process_message(
+            # Process message through hybrid system; its analysis is reused as-is
+            analysis = await self.hybrid_system.process_message(
                 user_id=user_id,
                 message=message,
                 context=context or {}
@@ -47,9 +53,12 @@ class EvolanceHybridAI:
             crisis_detected = await self._check_crisis_indicators(message, user_id)
             
             return {
-                "response": response,
-                "emotion": self.hybrid_system._detect_emotion(message),
-                "intent": self.hybrid_system._classify_intent(message),
+                "response": analysis.response,
+                "emotion": analysis.emotion,
+                "intent": analysis.intent,
+                "emotion_score": analysis.emotion_score,
+                "intent_score": analysis.intent_score,
+                "timings": analysis.timings,
                 "crisis_detected": crisis_detected,
                 "crisis_resources": self._get_crisis_resources() if crisis_detected else None,
                 "timestamp": datetime.utcnow().isoformat()
@@ -72,28 +81,8 @@ class EvolanceHybridAI:
             if not self.hybrid_system:
                 await self.initialize()
             
-            # Get training data for this user
-            training_data = self.hybrid_system.get_training_data()
-            user_data = [item for item in training_data if item.get('user_id') == user_id]
-            
-            # Calculate emotional trends
-            emotions = [item.get('emotion', 'neutral') for item in user_data[-50:]]  # Last 50 interactions
-            emotion_counts = {}
-            for emotion in emotions:
-                emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-            
-            # Calculate fulfillment trend
-            fulfillment_trend = self._calculate_fulfillment_trend(user_data)
-            
-            return {
-                "emotional_fingerprint": emotion_counts,
-                "fulfillment_trend": fulfillment_trend,
-                "total_interactions": len(user_data),
-                "recent_emotions": emotions[-10:],  # Last 10 emotions
-                "dominant_emotion": max(emotion_counts.items(), key=lambda x: x[1])[0] if emotion_counts else "neutral",
-                "emotional_balance_score": self._calculate_emotional_balance(emotion_counts),
-                "growth_milestones": self._get_growth_milestones(user_data)
-            }
+            # Materialized view, kept current as interactions are stored
+            return self.hybrid_system.profiles.get_profile(user_id)
             
         except Exception as e:
             logger.error(f"Error getting emotional profile: {e}")
@@ -196,8 +185,7 @@ class EvolanceHybridAI:
                 await self.initialize()
             
             # Get user's training data for milestone detection
-            training_data = self.hybrid_system.get_training_data()
-            user_data = [item for item in training_data if item.get('user_id') == user_id]
+            user_data = self.hybrid_system.get_training_data(user_id)
             
             if len(user_data) < 5:
                 return None  # Not enough data for meaningful reminders
@@ -206,7 +194,7 @@ class EvolanceHybridAI:
             positive_interactions = [
                 item for item in user_data 
                 if item.get('emotion') in ['joy', 'love'] and 
-                item.get('feedback', 0) > 0.7
+                (item.get('feedback') or 0) > 0.7
             ]
             
             if positive_interactions:
@@ -231,17 +219,9 @@ class EvolanceHybridAI:
     
     async def _check_crisis_indicators(self, message: str, user_id: str) -> bool:
         """Check for crisis indicators in message"""
-        crisis_keywords = [
-            'suicide', 'kill myself', 'want to die', 'end it all', 'no reason to live',
-            'self harm', 'cut myself', 'hurt myself', 'better off dead',
-            'can\'t take it anymore', 'give up', 'hopeless', 'worthless'
-        ]
-        
-        message_lower = message.lower()
-        for keyword in crisis_keywords:
-            if keyword in message_lower:
-                logger.warning(f"Crisis indicators detected for user {user_id}")
-                return True
+        if has_crisis_indicators(message):
+            logger.warning(f"Crisis indicators detected for user {user_id}")
+            return True
         
         return False
     
@@ -265,84 +245,6 @@ class EvolanceHybridAI:
             },
             "disclaimer": "Evolance is a growth tool, not a replacement for professional mental health care. If you're experiencing a crisis, please reach out to the resources above or a mental health professional."
         }
-    
-    def _calculate_fulfillment_trend(self, user_data: List[Dict]) -> str:
-        """Calculate fulfillment trend from user data"""
-        if len(user_data) < 10:
-            return "stable"
-        
-        # Calculate average feedback scores over time
-        recent_data = user_data[-10:]
-        older_data = user_data[-20:-10] if len(user_data) >= 20 else user_data[:10]
-        
-        recent_avg = sum(item.get('feedback', 0.5) for item in recent_data) / len(recent_data)
-        older_avg = sum(item.get('feedback', 0.5) for item in older_data) / len(older_data)
-        
-        if recent_avg > older_avg + 0.1:
-            return "ascending"
-        elif recent_avg < older_avg - 0.1:
-            return "descending"
-        else:
-            return "stable"
-    
-    def _calculate_emotional_balance(self, emotion_counts: Dict[str, int]) -> int:
-        """Calculate emotional balance score (0-100)"""
-        if not emotion_counts:
-            return 50
-        
-        total = sum(emotion_counts.values())
-        positive_emotions = emotion_counts.get('joy', 0) + emotion_counts.get('love', 0)
-        negative_emotions = emotion_counts.get('sadness', 0) + emotion_counts.get('fear', 0) + emotion_counts.get('anger', 0)
-        
-        if total == 0:
-            return 50
-        
-        positive_ratio = positive_emotions / total
-        negative_ratio = negative_emotions / total
-        
-        # Balance score: higher for more positive emotions, lower for more negative
-        balance_score = int((positive_ratio - negative_ratio + 1) * 50)
-        return max(0, min(100, balance_score))
-    
-    def _get_growth_milestones(self, user_data: List[Dict]) -> List[Dict]:
-        """Get user's growth milestones"""
-        milestones = []
-        
-        if len(user_data) >= 10:
-            milestones.append({
-                "type": "first_steps",
-                "title": "First Steps on the Path",
-                "description": "Completed your first 10 interactions",
-                "achieved_at": user_data[9].get('timestamp', ''),
-                "icon": "🌱"
-            })
-        
-        if len(user_data) >= 50:
-            milestones.append({
-                "type": "dedicated_journey",
-                "title": "Dedicated Journey",
-                "description": "Completed 50 interactions",
-                "achieved_at": user_data[49].get('timestamp', ''),
-                "icon": "💜"
-            })
-        
-        # Add emotion-specific milestones
-        emotion_counts = {}
-        for item in user_data:
-            emotion = item.get('emotion', 'neutral')
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-        
-        for emotion, count in emotion_counts.items():
-            if count >= 5:
-                milestones.append({
-                    "type": f"emotion_mastery_{emotion}",
-                    "title": f"Emotional Awareness: {emotion.title()}",
-                    "description": f"Explored {emotion} emotions {count} times",
-                    "achieved_at": user_data[-1].get('timestamp', ''),
-                    "icon": "🧘"
-                })
-        
-        return milestones
 
 # Global instance
 evolance_ai = EvolanceHybridAI() 
\ No newline at end of file
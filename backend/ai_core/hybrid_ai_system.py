@@ -1,12 +1,14 @@
 import os
 import json
+import hashlib
+import time
 import asyncio
 import logging
+import threading
 from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 import openai
-import google.generativeai as genai
 from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
 import torch
 import numpy as np
@@ -15,10 +17,34 @@ from sklearn.metrics.pairwise import cosine_similarity
 import chromadb
 from chromadb.config import Settings
 
+from .intent_engine import EmbeddingIntentClassifier, INTENT_LABELS
+from .executors import ExecutorPools
+from .gemini_client import get_gemini_client
+from .provider_router import CircuitBreaker, Provider, ProviderRouter
+from .response_cache import SemanticResponseCache, response_cache as shared_response_cache
+from .write_behind import WriteBehindBuffer
+from .interaction_store import InteractionStore
+from .profile_view import ProfileView
+from .cooccurrence import CooccurrenceGraph
+from .semantic_network import core_network
+from .training_export import ExportWatermark, export_records
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Labels the transformer emotion model predicts; the lexicon pre-filter may only answer with these
+EMOTION_DETECTOR_LABELS = {"anger", "disgust", "fear", "joy", "sadness", "surprise"}
+
+def _elapsed_ms(start: float) -> float:
+    """Milliseconds since a time.perf_counter() reading"""
+    return round((time.perf_counter() - start) * 1000, 2)
+
+def _timed(fn, *args):
+    """Call fn and return (result, elapsed ms); used inside executor threads"""
+    start = time.perf_counter()
+    return fn(*args), _elapsed_ms(start)
+
 @dataclass
 class UserInteraction:
     user_id: str
@@ -31,25 +57,49 @@ class UserInteraction:
     context: Dict[str, Any] = None
 
 @dataclass
-class SemanticNode:
-    id: str
-    concept: str
-    embeddings: List[float]
-    connections: List[str]
-    weight: float
-    last_updated: datetime
-    usage_count: int = 0
+class MessageAnalysis:
+    """Everything process_message learned about a message, so callers never re-run the models"""
+    response: str
+    emotion: str
+    intent: str
+    emotion_score: Optional[float] = None
+    intent_score: Optional[float] = None
+    timings: Dict[str, float] = field(default_factory=dict)  # stage -> milliseconds
+    embedding: Optional[np.ndarray] = None  # normalized message embedding from the intent engine
 
 class HybridAISystem:
     def __init__(self, config_path: str = "config.json"):
         self.config = self._load_config(config_path)
-        self.user_interactions = []
-        self.semantic_network = {}
+        store_settings = self.config.get("interaction_store", {})
+        self.interactions = InteractionStore(
+            path=store_settings.get("path", "./interaction_store"),
+            tail_size=store_settings.get("tail_size", 200),
+            segment_size=store_settings.get("segment_size", 1000),
+            max_users=store_settings.get("max_users", 10000)
+        )
+        profile_settings = self.config.get("profiles", {})
+        self.profiles = ProfileView(
+            self.interactions,
+            snapshot_path=profile_settings.get("snapshot_path", "./interaction_store/profiles.json"),
+            window=profile_settings.get("window", 50),
+            snapshot_interval=profile_settings.get("snapshot_interval_seconds", 60)
+        )
+        self.semantic_network = self._load_semantic_network()
         self.emotion_detector = None
         self.intent_classifier = None
+        self.intent_engine = None
+        self._zero_shot_failed = False
+        self._zero_shot_lock = threading.Lock()
         self.vectorizer = TfidfVectorizer(max_features=1000)
         self.chroma_client = None
         self.collection = None
+        self.interaction_log = None
+        self._retrieval_stats = {"queries": 0, "widened": 0, "hits": 0, "misses": 0}
+        self._retrieval_lock = threading.Lock()  # retrievals run concurrently on the vector_store pool
+        
+        # Blocking work (inference, vector store) runs on bounded pools; provider
+        # calls go through the async HTTP transport and need no thread
+        self.executors = ExecutorPools(self.config.get("executors"))
         
         # Initialize external APIs
         self._setup_external_apis()
@@ -60,6 +110,12 @@ class HybridAISystem:
         # Initialize ChromaDB
         self._setup_chromadb()
         
+        # Route generation across the configured providers
+        self.provider_router = self._setup_provider_router()
+        
+        # Cache provider responses; the semantic tier reuses the intent engine's encoder
+        self.response_cache = self._setup_response_cache()
+        
         logger.info("Hybrid AI System initialized successfully")
 
     def _load_config(self, config_path: str) -> Dict:
@@ -75,11 +131,73 @@ class HybridAISystem:
                 "use_openai": True,
                 "use_gemini": True,
                 "fallback_to_local": True,
+                "providers": {
+                    "openai": {"deadline": 8.0, "hedge_after": 2.0},
+                    "gemini": {"deadline": 10.0, "hedge_after": 3.0}
+                },
+                "circuit_breaker": {"failure_threshold": 3, "reset_timeout": 30.0},
+                "gemini_client": {
+                    "api_endpoint": None,
+                    "max_concurrency": 8,
+                    "max_retries": 3,
+                    "timeout_seconds": 60.0
+                },
+                "response_cache": {
+                    "enabled": True,
+                    "ttl_seconds": 3600,
+                    "max_entries": 5000,
+                    "similarity_threshold": 0.92
+                },
                 "data_collection_enabled": True,
                 "semantic_network_enabled": True,
+                "semantic_network": {
+                    "path": "./interaction_store/cooccurrence.npz",
+                    "half_life_days": 30,
+                    "window": 5,
+                    "max_concepts": 100000,
+                    "max_edges": 1000000,
+                    "prune_every": 10000,
+                    "save_every": 1000,
+                    "save_interval_seconds": 300
+                },
                 "emotion_detection_enabled": True,
+                "emotion_lexicon_prefilter": {
+                    "enabled": True,
+                    "min_confidence": 0.8,
+                    "min_score": 1.0
+                },
                 "intent_classification_enabled": True,
+                "intent_engine": "embedding",
+                "intent_encoder_model": "all-MiniLM-L6-v2",
+                "intent_confidence_threshold": 0.5,
+                "intent_zero_shot_fallback": True,
                 "chromadb_path": "./chroma_db",
+                "interaction_store": {
+                    "path": "./interaction_store",
+                    "tail_size": 200,
+                    "segment_size": 1000,
+                    "max_users": 10000
+                },
+                "profiles": {
+                    "snapshot_path": "./interaction_store/profiles.json",
+                    "snapshot_interval_seconds": 60,
+                    "window": 50
+                },
+                "semantic_retrieval": {
+                    "responses": 3,
+                    "initial_n_results": 5,
+                    "max_n_results": 40,
+                    "max_distance": None
+                },
+                "training_export": {
+                    "watermark_path": "./interaction_store/export_watermark.json"
+                },
+                "interaction_log": {
+                    "batch_size": 64,
+                    "flush_interval_ms": 250,
+                    "max_retries": 3,
+                    "max_buffer": 10000
+                },
                 "model_cache_dir": "./model_cache"
             }
             # Save default config
@@ -93,8 +211,16 @@ class HybridAISystem:
             openai.api_key = self.config["openai_api_key"]
             logger.info("OpenAI API configured")
         
+        self.gemini_client = None
         if self.config["use_gemini"] and self.config["gemini_api_key"]:
-            genai.configure(api_key=self.config["gemini_api_key"])
+            settings = self.config.get("gemini_client", {})
+            self.gemini_client = get_gemini_client(
+                self.config["gemini_api_key"],
+                api_endpoint=settings.get("api_endpoint"),
+                max_concurrency=settings.get("max_concurrency", 8),
+                max_retries=settings.get("max_retries", 3),
+                timeout=settings.get("timeout_seconds", 60.0)
+            )
             logger.info("Gemini API configured")
 
     def _setup_ml_models(self):
@@ -108,18 +234,48 @@ class HybridAISystem:
                 )
                 logger.info("Emotion detection model loaded")
 
-            # Intent classification model
+            # Intent classification: fast embedding engine, zero-shot BART as fallback
             if self.config["intent_classification_enabled"]:
-                self.intent_classifier = pipeline(
-                    "zero-shot-classification",
-                    model="facebook/bart-large-mnli"
-                )
-                logger.info("Intent classification model loaded")
+                if self.config.get("intent_engine", "embedding") == "embedding":
+                    try:
+                        self.intent_engine = EmbeddingIntentClassifier(
+                            encoder_model=self.config.get("intent_encoder_model", "all-MiniLM-L6-v2")
+                        )
+                        logger.info("Embedding intent engine loaded")
+                    except Exception as e:
+                        logger.warning(f"Failed to load embedding intent engine, using zero-shot: {e}")
+                
+                # The zero-shot model is only loaded eagerly when it is the primary classifier
+                if self.intent_engine is None:
+                    self._get_zero_shot_classifier()
 
         except Exception as e:
             logger.warning(f"Failed to load ML models: {e}")
             self.emotion_detector = None
             self.intent_classifier = None
+            self.intent_engine = None
+
+    def _get_zero_shot_classifier(self):
+        """Load the zero-shot intent model on first use (once, however many inference threads ask)"""
+        if self.intent_classifier is None and not self._zero_shot_failed:
+            with self._zero_shot_lock:
+                if self.intent_classifier is None and not self._zero_shot_failed:
+                    try:
+                        self.intent_classifier = pipeline(
+                            "zero-shot-classification",
+                            model="facebook/bart-large-mnli"
+                        )
+                        logger.info("Zero-shot intent classification model loaded")
+                    except Exception as e:
+                        logger.warning(f"Failed to load zero-shot intent model: {e}")
+                        self._zero_shot_failed = True
+        return self.intent_classifier
+
+    def train_intent_head(self, min_samples: int = 50) -> Optional[float]:
+        """Train the intent engine's logistic-regression head on logged intents"""
+        if not self.intent_engine:
+            return None
+        return self.intent_engine.fit_head(list(self.interactions.iter_all()), min_samples=min_samples)
 
     def _setup_chromadb(self):
         """Setup ChromaDB for semantic storage"""
@@ -135,109 +291,221 @@ class HybridAISystem:
             except:
                 self.collection = self.chroma_client.create_collection("user_interactions")
             
+            # Interactions are written behind the request path in batches
+            log_settings = self.config.get("interaction_log", {})
+            self.interaction_log = WriteBehindBuffer(
+                self._write_interactions,
+                name="interaction-log",
+                batch_size=log_settings.get("batch_size", 64),
+                flush_interval=log_settings.get("flush_interval_ms", 250) / 1000,
+                max_retries=log_settings.get("max_retries", 3),
+                max_buffer=log_settings.get("max_buffer", 10000)
+            )
+            
             logger.info("ChromaDB initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize ChromaDB: {e}")
             self.chroma_client = None
             self.collection = None
 
-    async def process_message(self, user_id: str, message: str, context: Dict = None) -> str:
+    async def process_message(self, user_id: str, message: str, context: Dict = None) -> MessageAnalysis:
         """Main method to process user messages"""
+        timings = {}
+        started = time.perf_counter()
+        self.executors.loop_lag.ensure_started()
         try:
-            # 1. Analyze message
-            emotion = self._detect_emotion(message)
-            intent = self._classify_intent(message)
+            # 1. Analyze message (both models run concurrently off the event loop)
+            emotion_result, intent_result = await asyncio.gather(
+                self.executors.inference.run(_timed, self._score_emotion, message),
+                self.executors.inference.run(_timed, self._analyze_intent, message)
+            )
+            (emotion, emotion_score), timings["emotion_ms"] = emotion_result
+            (intent, intent_score, embedding), timings["intent_ms"] = intent_result
             
             # 2. Generate response using external APIs
-            response = await self._generate_response(message, emotion, intent, context)
+            stage = time.perf_counter()
+            response = await self._generate_response(message, emotion, intent, context, user_id, embedding)
+            timings["generation_ms"] = _elapsed_ms(stage)
             
-            # 3. Store interaction for training
+            # 3. Store interaction for training (file appends run on the vector_store pool)
             if self.config["data_collection_enabled"]:
-                self._store_interaction(user_id, message, emotion, intent, response, context)
+                await self.executors.vector_store.run(
+                    self._store_interaction, user_id, message, emotion, intent, response, context
+                )
             
-            # 4. Update semantic network
+            # 4. Update semantic network (graph update and periodic save stay off the event loop)
             if self.config["semantic_network_enabled"]:
-                self._update_semantic_network(message, emotion, intent)
+                await self.executors.vector_store.run(self._update_semantic_network, message, emotion, intent)
             
-            return response
+            timings["total_ms"] = _elapsed_ms(started)
+            return MessageAnalysis(
+                response=response,
+                emotion=emotion,
+                intent=intent,
+                emotion_score=emotion_score,
+                intent_score=intent_score,
+                timings=timings,
+                embedding=embedding
+            )
 
         except Exception as e:
             logger.error(f"Error processing message: {e}")
-            return self._get_fallback_response(message)
+            timings["total_ms"] = _elapsed_ms(started)
+            return MessageAnalysis(
+                response=self._get_fallback_response(message),
+                emotion="neutral",
+                intent="statement",
+                timings=timings
+            )
 
     def _detect_emotion(self, text: str) -> str:
         """Detect emotion in text using local model"""
+        return self._score_emotion(text)[0]
+
+    def _score_emotion(self, text: str) -> Tuple[str, Optional[float]]:
+        """Detect emotion and its model score (None for the keyword fallback)"""
         try:
+            # Unambiguous, un-negated lexicon matches skip the transformer model
+            prefilter = self.config.get("emotion_lexicon_prefilter", {})
+            if prefilter.get("enabled", True):
+                match = core_network.lexicon_prefilter(
+                    text, min_confidence=prefilter.get("min_confidence", 0.8),
+                    min_score=prefilter.get("min_score", 1.0)
+                )
+                if match is not None and match[0] in EMOTION_DETECTOR_LABELS:
+                    return match
+            
             if self.emotion_detector:
                 result = self.emotion_detector(text)
-                return result[0]['label']
+                return result[0]['label'], float(result[0]['score'])
             else:
                 # Simple keyword-based fallback
                 text_lower = text.lower()
                 if any(word in text_lower for word in ['happy', 'joy', 'excited', 'great']):
-                    return 'joy'
+                    return 'joy', None
                 elif any(word in text_lower for word in ['sad', 'depressed', 'unhappy']):
-                    return 'sadness'
+                    return 'sadness', None
                 elif any(word in text_lower for word in ['angry', 'mad', 'furious']):
-                    return 'anger'
+                    return 'anger', None
                 elif any(word in text_lower for word in ['afraid', 'scared', 'fear']):
-                    return 'fear'
+                    return 'fear', None
                 else:
-                    return 'neutral'
+                    return 'neutral', None
         except Exception as e:
             logger.error(f"Emotion detection error: {e}")
-            return 'neutral'
+            return 'neutral', None
 
     def _classify_intent(self, text: str) -> str:
         """Classify intent using local model"""
+        return self._score_intent(text)[0]
+
+    def _score_intent(self, text: str) -> Tuple[str, Optional[float]]:
+        """Classify intent and its model score (None for the keyword fallback)"""
+        label, score, _ = self._analyze_intent(text)
+        return label, score
+
+    def _analyze_intent(self, text: str) -> Tuple[str, Optional[float], Optional[np.ndarray]]:
+        """Classify intent, also returning the message embedding when the intent engine computed one"""
+        embedding = None
         try:
-            if self.intent_classifier:
-                # Define intent categories
-                candidate_labels = [
-                    "question", "statement", "greeting", "farewell", 
-                    "request", "complaint", "compliment", "help"
-                ]
-                result = self.intent_classifier(text, candidate_labels)
-                return result['labels'][0]
+            if self.intent_engine:
+                prediction = self.intent_engine.classify(text)
+                embedding = prediction.embedding
+                threshold = self.config.get("intent_confidence_threshold", 0.5)
+                if prediction.confidence >= threshold or not self.config.get("intent_zero_shot_fallback", True):
+                    return prediction.label, prediction.confidence, embedding
+            
+            zero_shot = self._get_zero_shot_classifier() if self.config["intent_classification_enabled"] else None
+            if zero_shot:
+                result = zero_shot(text, INTENT_LABELS)
+                return result['labels'][0], float(result['scores'][0]), embedding
             else:
                 # Simple keyword-based fallback
                 text_lower = text.lower()
                 if '?' in text:
-                    return 'question'
+                    return 'question', None, embedding
                 elif any(word in text_lower for word in ['hello', 'hi', 'hey']):
-                    return 'greeting'
+                    return 'greeting', None, embedding
                 elif any(word in text_lower for word in ['bye', 'goodbye', 'see you']):
-                    return 'farewell'
+                    return 'farewell', None, embedding
                 else:
-                    return 'statement'
+                    return 'statement', None, embedding
         except Exception as e:
             logger.error(f"Intent classification error: {e}")
-            return 'statement'
+            return 'statement', None, embedding
 
-    async def _generate_response(self, message: str, emotion: str, intent: str, context: Dict = None) -> str:
-        """Generate response using external APIs with fallback"""
+    def _setup_provider_router(self) -> ProviderRouter:
+        """Register external providers in priority order, with local generation as the fallback"""
+        provider_settings = self.config.get("providers", {})
+        breaker_settings = self.config.get("circuit_breaker", {})
         
-        # Try OpenAI first
-        if self.config["use_openai"] and self.config["openai_api_key"]:
-            try:
-                response = await self._generate_openai_response(message, emotion, intent, context)
-                if response:
-                    return response
-            except Exception as e:
-                logger.warning(f"OpenAI generation failed: {e}")
+        candidates = [
+            ("openai", self.config["use_openai"] and self.config["openai_api_key"], self._generate_openai_response),
+            ("gemini", self.config["use_gemini"] and self.config["gemini_api_key"], self._generate_gemini_response),
+        ]
+        providers = [
+            Provider(
+                name=name,
+                generate=generate,
+                breaker=CircuitBreaker(**breaker_settings),
+                **provider_settings.get(name, {})
+            )
+            for name, enabled, generate in candidates if enabled
+        ]
+        return ProviderRouter(providers, fallback=self._generate_fallback_response)
 
-        # Try Gemini
-        if self.config["use_gemini"] and self.config["gemini_api_key"]:
-            try:
-                response = await self._generate_gemini_response(message, emotion, intent, context)
-                if response:
-                    return response
-            except Exception as e:
-                logger.warning(f"Gemini generation failed: {e}")
+    def _setup_response_cache(self) -> Optional[SemanticResponseCache]:
+        """
+        This system's response cache, or None when disabled
+
+        The cache is configured from this system's settings only; opt-outs are
+        shared with the global cache so one user preference covers both.
+        """
+        settings = self.config.get("response_cache", {})
+        if not settings.get("enabled", True):
+            return None
+        return SemanticResponseCache(
+            ttl_seconds=settings.get("ttl_seconds", 3600),
+            max_entries=settings.get("max_entries", 5000),
+            similarity_threshold=settings.get("similarity_threshold", 0.92),
+            embed_fn=self.intent_engine.embed if self.intent_engine else None,
+            opted_out_users=shared_response_cache.opted_out_users
+        )
 
-        # Fallback to local generation
+    async def _generate_response(self, message: str, emotion: str, intent: str, context: Dict = None,
+                                 user_id: str = None, embedding: np.ndarray = None) -> str:
+        """Generate response by racing external APIs, with local fallback"""
+        if self.response_cache is None:
+            return await self.provider_router.generate(message, emotion, intent, context, embedding=embedding)
+        
+        # Context changes the prompt, so only context-free messages share cache entries
+        namespace = "hybrid"
+        if context:
+            namespace += ":" + hashlib.sha256(json.dumps(context, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        # Lookups may embed the message, so they run alongside intent inference
+        cached = await self.executors.inference.run(
+            self.response_cache.get, message, emotion, intent, user_id, namespace, embedding
+        )
+        if cached is not None:
+            return cached
+        
+        response, provider = await self.provider_router.generate_with_source(
+            message, emotion, intent, context, embedding=embedding
+        )
+        if provider is not None:
+            # Local fallback responses are never cached so a recovered provider is used again
+            await self.executors.inference.run(
+                self.response_cache.put, message, emotion, intent, response, user_id, namespace, embedding
+            )
+        return response
+
+    async def _generate_fallback_response(self, message: str, emotion: str, intent: str, context: Dict = None,
+                                          embedding: np.ndarray = None) -> str:
+        """Used when every external provider failed, timed out or was skipped"""
         if self.config["fallback_to_local"]:
-            return self._generate_local_response(message, emotion, intent, context)
+            return await self.executors.vector_store.run(
+                self._generate_local_response, message, emotion, intent, context, embedding
+            )
 
         return "I'm having trouble generating a response right now. Please try again."
 
@@ -267,8 +535,6 @@ class HybridAISystem:
     async def _generate_gemini_response(self, message: str, emotion: str, intent: str, context: Dict = None) -> str:
         """Generate response using Gemini"""
         try:
-            model = genai.GenerativeModel('gemini-2.5-pro')
-            
             prompt = f"""You are an emotionally intelligent AI assistant. 
             The user's message shows {emotion} emotion and {intent} intent.
             Respond naturally and empathetically, matching the emotional context.
@@ -276,17 +542,18 @@ class HybridAISystem:
             
             User message: {message}"""
             
-            response = model.generate_content(prompt)
-            return response.text.strip()
+            response = await self.gemini_client.generate(prompt)
+            return response.strip()
         except Exception as e:
             logger.error(f"Gemini API error: {e}")
             return None
 
-    def _generate_local_response(self, message: str, emotion: str, intent: str, context: Dict = None) -> str:
+    def _generate_local_response(self, message: str, emotion: str, intent: str, context: Dict = None,
+                                 embedding: np.ndarray = None) -> str:
         """Generate response using local models and semantic network"""
         try:
             # Use semantic network to find relevant responses
-            relevant_responses = self._get_semantic_responses(message, emotion)
+            relevant_responses = self._get_semantic_responses(message, emotion, embedding)
             
             if relevant_responses:
                 # Return the most relevant response
@@ -341,90 +608,141 @@ class HybridAISystem:
                 context=context or {}
             )
             
-            self.user_interactions.append(interaction)
+            self.interactions.append(user_id, self._training_record(interaction))
+            self.profiles.record(user_id)
             
-            # Store in ChromaDB
-            if self.collection:
-                self.collection.add(
-                    documents=[message],
-                    metadatas=[{
-                        'user_id': user_id,
-                        'emotion': emotion,
-                        'intent': intent,
-                        'timestamp': interaction.timestamp.isoformat(),
-                        'response': response
-                    }],
-                    ids=[f"{user_id}_{interaction.timestamp.timestamp()}"]
-                )
+            # Queue for the batched ChromaDB write
+            if self.interaction_log:
+                self.interaction_log.put(interaction)
             
             logger.info(f"Stored interaction for user {user_id}")
             
         except Exception as e:
             logger.error(f"Failed to store interaction: {e}")
 
+    @staticmethod
+    def _interaction_id(interaction: UserInteraction) -> str:
+        """Content-hash id: a retried batch rewrites the same documents instead of failing or duplicating"""
+        key = f"{interaction.user_id}|{interaction.timestamp.isoformat()}|{interaction.message}"
+        return f"{interaction.user_id}_{hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]}"
+
+    def _write_interactions(self, interactions: List[UserInteraction]):
+        """Write a batch of interactions with one upsert (Chroma embeds the batch in one model call)"""
+        # Chroma rejects a batch that repeats an id, so the last copy of a duplicate wins
+        batch = {self._interaction_id(interaction): interaction for interaction in interactions}
+        self.collection.upsert(
+            documents=[interaction.message for interaction in batch.values()],
+            metadatas=[{
+                'user_id': interaction.user_id,
+                'emotion': interaction.emotion,
+                'intent': interaction.intent,
+                'timestamp': interaction.timestamp.isoformat(),
+                'response': interaction.response
+            } for interaction in batch.values()],
+            ids=list(batch)
+        )
+
+    def _graph_settings(self) -> Dict:
+        settings = self.config.get("semantic_network", {})
+        return {
+            "half_life": settings.get("half_life_days", 30) * 86400,
+            "window": settings.get("window", 5),
+            "max_concepts": settings.get("max_concepts", 100000),
+            "max_edges": settings.get("max_edges", 1000000),
+            "prune_every": settings.get("prune_every", 10000),
+        }
+
+    def _load_semantic_network(self) -> CooccurrenceGraph:
+        """Restore the last saved concept co-occurrence graph and keep saving it in the background"""
+        settings = self.config.get("semantic_network", {})
+        path = settings.get("path", "./interaction_store/cooccurrence.npz")
+        graph = None
+        if os.path.exists(path):
+            try:
+                graph = CooccurrenceGraph.load(path, **self._graph_settings())
+            except Exception as e:
+                logger.warning(f"Failed to load semantic network, starting empty: {e}")
+        if graph is None:
+            graph = CooccurrenceGraph(**self._graph_settings())
+        graph.start_autosave(path, save_every=settings.get("save_every", 1000),
+                             interval=settings.get("save_interval_seconds", 300))
+        return graph
+
     def _update_semantic_network(self, message: str, emotion: str, intent: str):
         """Update semantic network with new interaction"""
         try:
-            # Extract key concepts from message
-            words = message.lower().split()
-            key_concepts = [word for word in words if len(word) > 3]
-            
-            for concept in key_concepts:
-                if concept not in self.semantic_network:
-                    # Create new semantic node
-                    self.semantic_network[concept] = SemanticNode(
-                        id=concept,
-                        concept=concept,
-                        embeddings=self._get_concept_embeddings(concept),
-                        connections=[],
-                        weight=1.0,
-                        last_updated=datetime.now(),
-                        usage_count=1
-                    )
-                else:
-                    # Update existing node
-                    node = self.semantic_network[concept]
-                    node.usage_count += 1
-                    node.weight += 0.1
-                    node.last_updated = datetime.now()
-                    
-                    # Add connections to other concepts in the message
-                    for other_concept in key_concepts:
-                        if other_concept != concept and other_concept not in node.connections:
-                            node.connections.append(other_concept)
-            
+            self.semantic_network.add_message(message)
         except Exception as e:
             logger.error(f"Failed to update semantic network: {e}")
 
-    def _get_concept_embeddings(self, concept: str) -> List[float]:
-        """Get embeddings for a concept (simplified version)"""
-        # For now, use simple TF-IDF-like embeddings
-        # In production, use proper embedding models
-        return [hash(concept) % 100 / 100.0 for _ in range(10)]
+    def _get_semantic_responses(self, message: str, emotion: str, embedding: np.ndarray = None) -> List[str]:
+        """
+        Get responses given to similar past messages with the same emotion
 
-    def _get_semantic_responses(self, message: str, emotion: str) -> List[str]:
-        """Get relevant responses from semantic network"""
+        The emotion filter runs inside Chroma. The page widens only when the
+        results are filtered further (too distant, empty or duplicate responses).
+        """
+        if not self.collection:
+            return []
+        settings = self.config.get("semantic_retrieval", {})
+        wanted = settings.get("responses", 3)
+        n_results = settings.get("initial_n_results", 5)
+        max_n_results = settings.get("max_n_results", 40)
+        max_distance = settings.get("max_distance")
+        
+        query = {"query_texts": [message]}
+        if embedding is not None and self._query_embeddings_compatible():
+            # Same model as the collection's embedding function, so skip re-embedding the message
+            query = {"query_embeddings": [np.asarray(embedding, dtype=np.float32).tolist()]}
+        
         try:
-            relevant_responses = []
-            
-            # Search ChromaDB for similar interactions
-            if self.collection:
+            while True:
+                self._count_retrieval("queries")
                 results = self.collection.query(
-                    query_texts=[message],
-                    n_results=5
+                    n_results=n_results,
+                    where={"emotion": emotion},
+                    include=["metadatas", "distances"],
+                    **query
                 )
+                metadatas, distances = results["metadatas"][0], results["distances"][0]
+                
+                relevant_responses = []
+                for metadata, distance in zip(metadatas, distances):
+                    response = metadata.get("response")
+                    if not response or response in relevant_responses:
+                        continue
+                    if max_distance is not None and distance > max_distance:
+                        continue
+                    relevant_responses.append(response)
                 
-                for i, doc in enumerate(results['documents'][0]):
-                    metadata = results['metadatas'][0][i]
-                    if metadata['emotion'] == emotion:
-                        relevant_responses.append(metadata['response'])
+                exhausted = len(metadatas) < n_results
+                if len(relevant_responses) >= wanted or exhausted or n_results >= max_n_results:
+                    break
+                n_results = min(n_results * 2, max_n_results)
+                self._count_retrieval("widened")
             
-            return relevant_responses
+            self._count_retrieval("hits" if relevant_responses else "misses")
+            return relevant_responses[:wanted]
             
         except Exception as e:
             logger.error(f"Failed to get semantic responses: {e}")
             return []
 
+    def _count_retrieval(self, stat: str):
+        with self._retrieval_lock:
+            self._retrieval_stats[stat] += 1
+
+    def _retrieval_metrics(self) -> Dict[str, int]:
+        with self._retrieval_lock:
+            return dict(self._retrieval_stats)
+
+    def _query_embeddings_compatible(self) -> bool:
+        """Intent-engine embeddings live in the same space as Chroma's default embedding function"""
+        return (
+            self.intent_engine is not None
+            and self.config.get("intent_encoder_model", "all-MiniLM-L6-v2") == "all-MiniLM-L6-v2"
+        )
+
     def _get_fallback_response(self, message: str) -> str:
         """Get a fallback response when all else fails"""
         fallback_responses = [
@@ -438,41 +756,75 @@ class HybridAISystem:
         import random
         return random.choice(fallback_responses)
 
-    def get_training_data(self) -> List[Dict]:
-        """Get collected training data for proprietary model development"""
-        training_data = []
-        
-        for interaction in self.user_interactions:
-            training_data.append({
-                'input': interaction.message,
-                'output': interaction.response,
-                'emotion': interaction.emotion,
-                'intent': interaction.intent,
-                'user_id': interaction.user_id,
-                'timestamp': interaction.timestamp.isoformat(),
-                'feedback': interaction.user_feedback
-            })
-        
-        return training_data
+    @staticmethod
+    def _training_record(interaction: UserInteraction) -> Dict:
+        """Training-data form of an interaction, as stored in the interaction store"""
+        return {
+            'input': interaction.message,
+            'output': interaction.response,
+            'emotion': interaction.emotion,
+            'intent': interaction.intent,
+            'user_id': interaction.user_id,
+            'timestamp': interaction.timestamp.isoformat(),
+            'feedback': interaction.user_feedback
+        }
+
+    def get_training_data(self, user_id: str = None) -> List[Dict]:
+        """Get collected training data for proprietary model development (one user's, if given)"""
+        if user_id is not None:
+            return self.interactions.history(user_id)
+        return list(self.interactions.iter_all())
 
-    def export_training_data(self, filepath: str):
-        """Export training data to JSON file"""
+    def export_training_data(self, filepath: str, incremental: bool = False,
+                             chunk_size: int = 1000) -> Optional[Dict]:
+        """
+        Stream training data to newline-delimited JSON, or Parquet for *.parquet paths
+
+        With incremental=True only interactions newer than the previous
+        incremental export are written.
+        """
         try:
-            training_data = self.get_training_data()
-            with open(filepath, 'w') as f:
-                json.dump(training_data, f, indent=2)
-            logger.info(f"Training data exported to {filepath}")
+            watermark = None
+            if incremental:
+                watermark = ExportWatermark(self.config.get("training_export", {}).get(
+                    "watermark_path", "./interaction_store/export_watermark.json"
+                ))
+            result = export_records(self.interactions.iter_all(), filepath, chunk_size=chunk_size, watermark=watermark)
+            logger.info(f"Exported {result['records']} training records to {filepath}")
+            return result
         except Exception as e:
             logger.error(f"Failed to export training data: {e}")
+            return None
 
     def get_system_stats(self) -> Dict:
         """Get system statistics"""
         return {
-            'total_interactions': len(self.user_interactions),
+            'total_interactions': self.interactions.total_count(),
             'semantic_nodes': len(self.semantic_network),
+            'semantic_edges': self.semantic_network.edge_count,
+            'semantic_retrieval': self._retrieval_metrics(),
             'chromadb_available': self.collection is not None,
             'emotion_detector_available': self.emotion_detector is not None,
             'intent_classifier_available': self.intent_classifier is not None,
+            'intent_engine_available': self.intent_engine is not None,
             'openai_configured': bool(self.config["openai_api_key"]),
-            'gemini_configured': bool(self.config["gemini_api_key"])
-        } 
\ No newline at end of file
+            'gemini_configured': bool(self.config["gemini_api_key"]),
+            'executors': self.executors.get_metrics(),
+            'providers': self.provider_router.get_stats(),
+            'response_cache': self.response_cache.get_metrics() if self.response_cache else None,
+            'gemini_client': self.gemini_client.get_metrics() if self.gemini_client else None,
+            'interaction_log': self.interaction_log.get_metrics() if self.interaction_log else None,
+            'interaction_store': self.interactions.get_metrics(),
+            'profiles': self.profiles.get_metrics()
+        }
+
+    def shutdown(self):
+        """Drain pending interaction writes, snapshot profiles and release executor threads"""
+        if self.interaction_log:
+            self.interaction_log.close()
+        self.profiles.close()
+        try:
+            self.semantic_network.close()
+        except Exception as e:
+            logger.error(f"Failed to save semantic network: {e}")
+        self.executors.shutdown(wait=False) 
\ No newline at end of file
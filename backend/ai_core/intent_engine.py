@@ -0,0 +1,230 @@
+"""
+Evolance Intent Engine
+Fast intent classification by cosine similarity to embedded prototype utterances
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Any
+
+import numpy as np
+
+from .embeddings import SENTENCE_TRANSFORMERS_AVAILABLE, get_embedding_function
+
+logger = logging.getLogger(__name__)
+
+INTENT_LABELS = [
+    "question", "statement", "greeting", "farewell",
+    "request", "complaint", "compliment", "help"
+]
+
+# Prototype utterances per intent, embedded once at startup
+INTENT_PROTOTYPES = {
+    "question": [
+        "What do you think about this?",
+        "Why do I feel this way?",
+        "How does meditation work?",
+        "Is it normal to feel like this?",
+        "Can you explain what anxiety is?",
+        "When will I start feeling better?",
+    ],
+    "statement": [
+        "I went to work today.",
+        "My sister is visiting this weekend.",
+        "I have been feeling tired lately.",
+        "I'm stressed about work.",
+        "I had a long day.",
+        "I started journaling last week.",
+    ],
+    "greeting": [
+        "Hello!",
+        "Hi there",
+        "Hey, how are you?",
+        "Good morning",
+        "Good evening, nice to talk again",
+    ],
+    "farewell": [
+        "Goodbye",
+        "Bye, talk to you later",
+        "See you tomorrow",
+        "I have to go now, thanks",
+        "Good night",
+    ],
+    "request": [
+        "Can you give me a breathing exercise?",
+        "Please recommend a meditation for sleep.",
+        "Tell me a story about resilience.",
+        "Remind me to check in tomorrow.",
+        "Could you suggest something to help me relax?",
+    ],
+    "complaint": [
+        "This isn't helping at all.",
+        "Your answers are useless.",
+        "I'm annoyed that the app keeps crashing.",
+        "That response made no sense.",
+        "I'm tired of giving the same answers.",
+    ],
+    "compliment": [
+        "Thank you, that really helped!",
+        "You are so kind.",
+        "That was a great suggestion.",
+        "I love talking to you.",
+        "This app is wonderful.",
+    ],
+    "help": [
+        "I need help.",
+        "I don't know what to do anymore.",
+        "Please help me, I'm struggling.",
+        "I can't cope with this on my own.",
+        "I need someone to talk to right now.",
+    ],
+}
+
+
+@dataclass
+class IntentPrediction:
+    """Result of an intent classification"""
+    label: str
+    confidence: float
+    scores: Dict[str, float]
+    source: str  # "prototype" or "head"
+    embedding: Optional[np.ndarray] = None
+
+
+class EmbeddingIntentClassifier:
+    """
+    Classifies intent by cosine similarity between a message embedding and
+    embedded prototype utterances, with an optional logistic-regression head
+    """
+
+    def __init__(self, encoder_model: str = "all-MiniLM-L6-v2",
+                 prototypes: Dict[str, List[str]] = None,
+                 encoder: Callable[[List[str]], np.ndarray] = None,
+                 temperature: float = 0.05):
+        """
+        Args:
+            encoder_model: Sentence transformer used when no encoder is given (the
+                process-wide embedding function, shared with the Chroma collections)
+            prototypes: Intent label -> example utterances
+            encoder: Optional callable mapping texts to an (n, dim) embedding array
+            temperature: Softmax temperature over per-label similarities
+        """
+        if encoder is None:
+            if not SENTENCE_TRANSFORMERS_AVAILABLE:
+                raise ImportError("sentence-transformers is required for the embedding intent engine")
+            encoder = get_embedding_function(encoder_model).embed
+        self._encoder = encoder
+        self.temperature = temperature
+        self.head = None
+
+        prototypes = prototypes or INTENT_PROTOTYPES
+        self.labels = list(prototypes)
+        utterances, owners = [], []
+        for label_id, label in enumerate(self.labels):
+            utterances.extend(prototypes[label])
+            owners.extend([label_id] * len(prototypes[label]))
+        self._prototype_matrix = self.embed(utterances)
+        self._prototype_labels = np.array(owners)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """L2-normalized embeddings for texts"""
+        embeddings = np.asarray(self._encoder(list(texts)), dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+    def classify(self, text: str, embedding: np.ndarray = None) -> IntentPrediction:
+        """Classify a single message"""
+        if embedding is None:
+            embedding = self.embed([text])[0]
+        return self.classify_embeddings(embedding[None, :])[0]
+
+    def classify_batch(self, texts: List[str]) -> List[IntentPrediction]:
+        """Classify many messages with one encoder call"""
+        if not texts:
+            return []
+        return self.classify_embeddings(self.embed(texts))
+
+    def _prototype_probabilities(self, embeddings: np.ndarray) -> np.ndarray:
+        """Softmax over the best-matching prototype of each label"""
+        similarities = embeddings @ self._prototype_matrix.T
+        label_scores = np.full((len(embeddings), len(self.labels)), -1.0, dtype=np.float32)
+        for label_id in range(len(self.labels)):
+            mask = self._prototype_labels == label_id
+            label_scores[:, label_id] = similarities[:, mask].max(axis=1)
+        logits = (label_scores - label_scores.max(axis=1, keepdims=True)) / self.temperature
+        probabilities = np.exp(logits)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+    def classify_embeddings(self, embeddings: np.ndarray) -> List[IntentPrediction]:
+        """
+        Classify precomputed, normalized embeddings
+
+        The head (when trained) decides among the labels it was trained on.
+        A message whose best prototype match is a label the head does not
+        know is classified by the prototypes, so labels with too little
+        logged data remain reachable.
+        """
+        prototype = self._prototype_probabilities(embeddings)
+        head = self.head.predict_proba(embeddings) if self.head is not None else None
+        head_labels = list(self.head.classes_) if self.head is not None else []
+
+        predictions = []
+        for i, embedding in enumerate(embeddings):
+            if head is not None and self.labels[int(np.argmax(prototype[i]))] in head_labels:
+                labels, row, source = head_labels, head[i], "head"
+            else:
+                labels, row, source = self.labels, prototype[i], "prototype"
+            best = int(np.argmax(row))
+            predictions.append(IntentPrediction(
+                label=labels[best],
+                confidence=float(row[best]),
+                scores={label: float(p) for label, p in zip(labels, row)},
+                source=source,
+                embedding=embedding
+            ))
+        return predictions
+
+    def fit_head(self, interactions: List[Any], min_samples: int = 50,
+                 min_per_label: int = 5) -> Optional[float]:
+        """
+        Train a logistic-regression head on logged intents
+
+        Args:
+            interactions: UserInteraction objects or training-data dicts with message/input and intent
+            min_samples: Minimum number of usable samples
+            min_per_label: Labels with fewer examples are left to the prototypes (see
+                classify_embeddings)
+
+        Returns:
+            Held-out accuracy, or None if there was not enough data
+        """
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.model_selection import train_test_split
+
+        texts, labels = [], []
+        for item in interactions:
+            if isinstance(item, dict):
+                text, intent = item.get("input") or item.get("message"), item.get("intent")
+            else:
+                text, intent = item.message, item.intent
+            if text and intent:
+                texts.append(text)
+                labels.append(intent)
+
+        counts = {label: labels.count(label) for label in set(labels)}
+        keep = [i for i, label in enumerate(labels) if counts[label] >= min_per_label]
+        if len(keep) < min_samples or len({labels[i] for i in keep}) < 2:
+            logger.info(f"Not enough logged intents to train a head ({len(keep)} samples)")
+            return None
+
+        X = self.embed([texts[i] for i in keep])
+        y = [labels[i] for i in keep]
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+        head = LogisticRegression(max_iter=1000)
+        head.fit(X_train, y_train)
+        accuracy = float(head.score(X_test, y_test))
+        logger.info(f"Intent head trained on {len(X_train)} samples - accuracy {accuracy:.3f}")
+
+        self.head = head
+        return accuracy
@@ -0,0 +1,279 @@
+"""
+Evolance Interaction Store
+Per-user, append-only interaction log with a bounded in-memory tail
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from .training_export import truncate_torn_line
+from .atomic_io import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+
+
+class _UserLog:
+    """One user's segments on disk plus their most recent records in memory"""
+
+    def __init__(self, directory: str, tail_size: int):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.tail = deque(maxlen=tail_size)
+        self.count = 0
+        self.segments: List[str] = []  # segment file paths, oldest first
+        self.segment_counts: List[int] = []  # records per segment, parallel to segments
+        self.pins = 0  # callers using this log right now; guarded by the store lock
+
+    @property
+    def last_segment_count(self) -> int:
+        return self.segment_counts[-1] if self.segment_counts else 0
+
+
+class InteractionStore:
+    """
+    Interaction records grouped by user
+
+    Each user has a directory of JSONL segments, segment_size records each,
+    so a user's history can be read without touching anyone else's. An
+    index.json per user records the number of records in each closed
+    segment, so counts and random access stay exact when a segment holds
+    fewer records (a torn write, a changed segment_size) and only the newest
+    segment is read at startup. The last tail_size records of up to
+    max_users recently active users are kept in memory. That covers the
+    profile, check-in and avatar queries without any disk reads. A log in
+    use by a caller is never evicted (the store may briefly hold more than
+    max_users), so there is only ever one open log per user.
+    """
+
+    def __init__(self, path: str = "./interaction_store", tail_size: int = 200,
+                 segment_size: int = 1000, max_users: int = 10000):
+        """
+        Args:
+            path: Root directory for per-user segments
+            tail_size: Recent records kept in memory per user
+            segment_size: Records per segment file
+            max_users: Users whose tails stay in memory (least recently used are reloaded from disk)
+        """
+        self.path = path
+        self.tail_size = tail_size
+        self.segment_size = segment_size
+        self.max_users = max_users
+        self._users: "OrderedDict[str, _UserLog]" = OrderedDict()
+        self._opening: Dict[str, threading.Event] = {}  # users whose log is being read from disk
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._total = self._count_existing()
+
+    @staticmethod
+    def _user_dirname(user_id: str) -> str:
+        # User ids come from clients; hash them rather than trust them in paths
+        return hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:32]
+
+    @contextmanager
+    def _user_log(self, user_id: str) -> Iterator[_UserLog]:
+        """The user's log, pinned in memory while the caller uses it"""
+        log = self._pin(user_id)
+        try:
+            yield log
+        finally:
+            with self._lock:
+                log.pins -= 1
+                self._evict()
+
+    def _pin(self, user_id: str) -> _UserLog:
+        while True:
+            with self._lock:
+                log = self._users.get(user_id)
+                if log is not None:
+                    log.pins += 1
+                    self._users.move_to_end(user_id)
+                    return log
+                opening = self._opening.get(user_id)
+                if opening is None:
+                    opening = self._opening[user_id] = threading.Event()
+                    break
+            # Another thread is reading this user's log from disk; use the one it opens
+            opening.wait()
+        # Disk reads happen outside the store lock; other users are not held up
+        try:
+            log = self._open_user_log(os.path.join(self.path, self._user_dirname(user_id)))
+            log.pins += 1
+            with self._lock:
+                self._users[user_id] = log
+                self._evict()
+        finally:
+            with self._lock:
+                del self._opening[user_id]
+            opening.set()
+        return log
+
+    def _evict(self):
+        """Drop the least recently used unpinned logs beyond max_users; call with the store lock held"""
+        excess = len(self._users) - self.max_users
+        if excess <= 0:
+            return
+        for user_id in [user_id for user_id, log in self._users.items() if log.pins == 0][:excess]:
+            del self._users[user_id]
+
+    @staticmethod
+    def _segment_names(directory: str) -> List[str]:
+        return sorted(name for name in os.listdir(directory) if name.endswith(".jsonl"))
+
+    def _closed_counts(self, directory: str, closed: List[str]) -> List[int]:
+        """Record counts of a user's closed segments, from the index"""
+        try:
+            with open(os.path.join(directory, INDEX_FILE), "r") as f:
+                index = json.load(f).get("segments", {})
+        except (FileNotFoundError, ValueError):
+            index = {}
+        missing = [name for name in closed if name not in index]
+        if missing:
+            # Segments written before the index existed are counted once
+            for name in missing:
+                index[name] = len(self._read_segment(os.path.join(directory, name)))
+            write_json_atomic(os.path.join(directory, INDEX_FILE), {"segments": index})
+        return [index[name] for name in closed]
+
+    def _open_user_log(self, directory: str) -> _UserLog:
+        """Recover counts and the in-memory tail from existing segments"""
+        log = _UserLog(directory, self.tail_size)
+        if not os.path.isdir(directory):
+            return log
+        names = self._segment_names(directory)
+        if not names:
+            return log
+        log.segments = [os.path.join(directory, name) for name in names]
+
+        truncate_torn_line(log.segments[-1])
+        last_records = self._read_segment(log.segments[-1])
+        log.segment_counts = self._closed_counts(directory, names[:-1]) + [len(last_records)]
+        log.count = sum(log.segment_counts)
+
+        # The tail may span the last two segments
+        if len(last_records) < self.tail_size and len(log.segments) > 1:
+            last_records = self._read_segment(log.segments[-2]) + last_records
+        log.tail.extend(last_records[-self.tail_size:])
+        return log
+
+    @staticmethod
+    def _read_segment(path: str) -> List[Dict[str, Any]]:
+        records = []
+        with open(path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash mid-write
+                        logger.warning(f"Skipping corrupt record in {path}")
+        return records
+
+    def append(self, user_id: str, record: Dict[str, Any]):
+        """Append a record to the user's log"""
+        line = json.dumps(record, default=str) + "\n"
+        with self._user_log(user_id) as log, log.lock:
+            if not log.segments or log.last_segment_count >= self.segment_size:
+                os.makedirs(log.directory, exist_ok=True)
+                if log.segments:
+                    # The newest segment is closed: record its count
+                    write_json_atomic(os.path.join(log.directory, INDEX_FILE), {"segments": {
+                        os.path.basename(segment): count
+                        for segment, count in zip(log.segments, log.segment_counts)
+                    }})
+                log.segments.append(os.path.join(log.directory, f"{len(log.segments):06d}.jsonl"))
+                log.segment_counts.append(0)
+            with open(log.segments[-1], "a") as f:
+                f.write(line)
+            log.segment_counts[-1] += 1
+            log.count += 1
+            log.tail.append(record)
+        with self._lock:
+            self._total += 1
+
+    def count(self, user_id: str) -> int:
+        """Number of records for a user"""
+        with self._user_log(user_id) as log:
+            return log.count
+
+    def recent(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        """The user's last `limit` records, oldest first"""
+        with self._user_log(user_id) as log, log.lock:
+            if limit <= len(log.tail) or len(log.tail) == log.count:
+                return list(log.tail)[-limit:] if limit else []
+        return list(self.iter_user(user_id))[-limit:]
+
+    def history(self, user_id: str) -> List[Dict[str, Any]]:
+        """All of a user's records, served from memory when the tail holds them all"""
+        return self.recent(user_id, self.count(user_id))
+
+    def get(self, user_id: str, index: int) -> Optional[Dict[str, Any]]:
+        """The user's index-th record (0 = first), reading a single segment"""
+        with self._user_log(user_id) as log, log.lock:
+            if not 0 <= index < log.count:
+                return None
+            from_tail = index - (log.count - len(log.tail))
+            if from_tail >= 0:
+                return log.tail[from_tail]
+            for segment, count in zip(log.segments, log.segment_counts):
+                if index < count:
+                    break
+                index -= count
+        return self._read_segment(segment)[index]
+
+    def iter_user(self, user_id: str) -> Iterator[Dict[str, Any]]:
+        """All of a user's records, oldest first"""
+        with self._user_log(user_id) as log, log.lock:
+            segments = list(log.segments)
+        for segment in segments:
+            yield from self._read_segment(segment)
+
+    def iter_all(self) -> Iterator[Dict[str, Any]]:
+        """Every record on disk, user by user"""
+        if not os.path.isdir(self.path):
+            return
+        for dirname in sorted(os.listdir(self.path)):
+            directory = os.path.join(self.path, dirname)
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(".jsonl"):
+                    yield from self._read_segment(os.path.join(directory, name))
+
+    def total_count(self) -> int:
+        """Records across all users"""
+        with self._lock:
+            return self._total
+
+    def _count_existing(self) -> int:
+        """Count records on disk from the indexes, reading only each user's newest segment"""
+        total = 0
+        for dirname in os.listdir(self.path):
+            directory = os.path.join(self.path, dirname)
+            if not os.path.isdir(directory):
+                continue
+            segments = self._segment_names(directory)
+            if segments:
+                total += sum(self._closed_counts(directory, segments[:-1]))
+                total += len(self._read_segment(os.path.join(directory, segments[-1])))
+        return total
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            logs = list(self._users.values())
+            total = self._total
+        return {
+            "users_loaded": len(logs),
+            "records": total,
+            "records_in_memory": sum(len(log.tail) for log in logs),
+            "tail_size": self.tail_size,
+            "segment_size": self.segment_size,
+        }
@@ -0,0 +1,192 @@
+"""
+Evolance Model Bundle
+Versioned, lazily loaded and memory-mapped sets of progressive-learning models
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import joblib
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "bundle.json"
+# Components of a pre-bundle ai_models/ directory, stored as <name>.pkl next to each other
+LEGACY_COMPONENTS = (
+    "emotion_vectorizer", "emotion_classifier",
+    "response_vectorizer", "response_classifier", "response_patterns",
+    "emolytics_patterns",
+)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    """The bundle.json of a bundle directory; None if it has none (e.g. an interrupted write)"""
+    try:
+        with open(os.path.join(path, MANIFEST_FILE), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def new_version() -> str:
+    """Sortable version id from the current UTC time, to the microsecond"""
+    return datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+
+
+class ModelBundle:
+    """
+    An immutable, named set of model components stored in one directory
+
+    Each component is an uncompressed joblib file (<name>.pkl). Components
+    are loaded on first use with mmap_mode, so the numpy arrays inside them
+    (TF-IDF idf_, MLP weights) are mapped read-only from the page cache and
+    shared by every process serving the same bundle. A bundle is never
+    modified after it is written: retraining writes a new version and the
+    owner swaps its reference, so a request that took a bundle keeps a
+    consistent set of models for its whole duration.
+    """
+
+    def __init__(self, path: str, version: str, mmap_mode: Optional[str] = "r",
+                 components: Dict[str, Any] = None, metadata: Dict[str, Any] = None):
+        self.path = path
+        self.version = version
+        self.mmap_mode = mmap_mode
+        self.metadata = metadata or {}
+        self._loaded: Dict[str, Any] = dict(components or {})
+        self._on_disk: Optional[frozenset] = None  # listed once; bundles never change
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.pkl")
+
+    def _disk_names(self) -> frozenset:
+        if self._on_disk is None:
+            entries = os.listdir(self.path) if os.path.isdir(self.path) else []
+            self._on_disk = frozenset(entry[:-4] for entry in entries if entry.endswith(".pkl"))
+        return self._on_disk
+
+    @property
+    def names(self) -> List[str]:
+        return sorted(self._disk_names() | set(self._loaded))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._loaded or name in self._disk_names()
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """The named component, loading (and memory-mapping) it on first use"""
+        component = self._loaded.get(name)
+        if component is not None:
+            return component
+        with self._lock:
+            if name not in self._loaded:
+                if name not in self._disk_names():
+                    return default
+                self._loaded[name] = joblib.load(self._file(name), mmap_mode=self.mmap_mode)
+                self.loads += 1
+            return self._loaded[name]
+
+    @classmethod
+    def open(cls, path: str, mmap_mode: Optional[str] = "r") -> Optional["ModelBundle"]:
+        """Open a bundle directory written by write(); None if it has no manifest"""
+        manifest = read_manifest(path)
+        if manifest is None:
+            return None
+        return cls(path, manifest["version"], mmap_mode=mmap_mode, metadata=manifest.get("metadata"))
+
+    @classmethod
+    def latest(cls, root: str, mmap_mode: Optional[str] = "r") -> Optional["ModelBundle"]:
+        """The newest complete bundle under root"""
+        if not os.path.isdir(root):
+            return None
+        for entry in sorted(os.listdir(root), reverse=True):
+            if entry.startswith("."):
+                continue
+            bundle = cls.open(os.path.join(root, entry), mmap_mode)
+            if bundle is not None:
+                return bundle
+        return None
+
+    @classmethod
+    def legacy(cls, model_dir: str, mmap_mode: Optional[str] = "r") -> Optional["ModelBundle"]:
+        """Serve flat <name>.pkl files from before bundles existed"""
+        if not any(os.path.exists(os.path.join(model_dir, f"{name}.pkl")) for name in LEGACY_COMPONENTS):
+            return None
+        return cls(model_dir, "legacy", mmap_mode=mmap_mode)
+
+    @classmethod
+    def write(cls, root: str, components: Dict[str, Any], base: Optional["ModelBundle"] = None,
+              metadata: Dict[str, Any] = None, mmap_mode: Optional[str] = "r") -> "ModelBundle":
+        """
+        Write a new bundle version under root and return it
+
+        Components missing from `components` are carried over from `base`
+        (hard-linked when possible), so retraining one model keeps the
+        others. The version directory is assembled under a temporary name
+        and renamed into place, so readers never see a partial bundle. The
+        manifest records the SHA-256 of every component file.
+        """
+        os.makedirs(root, exist_ok=True)
+        version = new_version()
+        while os.path.exists(os.path.join(root, version)):
+            version = new_version()
+        tmp_path = tempfile.mkdtemp(dir=root, prefix=f".{version}.")
+        try:
+            for name, component in components.items():
+                joblib.dump(component, os.path.join(tmp_path, f"{name}.pkl"))
+            if base is not None:
+                for name in base.names:
+                    if name in components:
+                        continue
+                    source, target = base._file(name), os.path.join(tmp_path, f"{name}.pkl")
+                    if name in base._disk_names():
+                        try:
+                            os.link(source, target)
+                        except OSError:
+                            shutil.copy2(source, target)
+                    else:
+                        joblib.dump(base.get(name), target)
+            names = sorted(set(components) | set(base.names if base is not None else []))
+            manifest = {
+                "version": version,
+                "created_at": datetime.utcnow().isoformat(),
+                "base_version": base.version if base is not None else None,
+                "components": names,
+                "hashes": {name: file_sha256(os.path.join(tmp_path, f"{name}.pkl")) for name in names},
+                "metadata": metadata or {},
+            }
+            with open(os.path.join(tmp_path, MANIFEST_FILE), "w") as f:
+                json.dump(manifest, f, indent=2)
+            os.chmod(tmp_path, 0o755)
+            path = os.path.join(root, version)
+            os.rename(tmp_path, path)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+        logger.info(f"Wrote model bundle {version} ({', '.join(manifest['components'])})")
+        # The trained objects are already in memory; later processes map them from disk
+        return cls(path, version, mmap_mode=mmap_mode, components=components, metadata=metadata)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "components": self.names,
+            "loaded": sorted(self._loaded),
+            "loads": self.loads,
+        }
@@ -0,0 +1,230 @@
+"""
+Evolance Model Registry
+Immutable model bundle versions, the pointer to the one being served, promotion, rollback and cleanup
+
+    python -m ai_core.model_registry list --model-dir ai_models
+    python -m ai_core.model_registry promote 20250101T120000000000Z
+    python -m ai_core.model_registry rollback
+    python -m ai_core.model_registry verify [VERSION]
+    python -m ai_core.model_registry gc --keep 10
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .model_bundle import ModelBundle, file_sha256, read_manifest
+from .atomic_io import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "current.json"
+HISTORY_LIMIT = 20
+STALE_WRITE_SECONDS = 3600  # temporary bundle directories older than this are left over from a crash
+
+
+class ModelRegistry:
+    """
+    The versions under `root` and which one is served
+
+    {root}/<version>/      an immutable ModelBundle; its bundle.json lists the
+                           components with their SHA-256 and metadata (training
+                           metrics and the data watermark the models saw)
+    {root}/current.json    {"version", "history", ...}; replaced atomically, so
+                           every serving process switches to a promoted version
+                           (or back) on its next refresh_models
+
+    `history` holds the previously current versions, newest first; rollback
+    returns to the first of them. With `keep`, gc runs after each publish
+    and removes all but the newest `keep` versions, never the current one
+    or the one rollback would return to.
+
+    Only promoted versions are served: without a pointer nothing is current.
+    Bundles written before the registry existed (their manifests have no
+    hashes) were served as the newest one, so the newest of them is
+    promoted once when a registry without current.json is opened.
+    """
+
+    def __init__(self, root: str, keep: Optional[int] = None):
+        self.root = root
+        self.keep = keep
+        self.current_path = os.path.join(root, CURRENT_FILE)
+        self._adopt_pre_registry_version()
+
+    def _adopt_pre_registry_version(self):
+        if os.path.exists(self.current_path):
+            return
+        legacy = [manifest["version"] for manifest in self.versions() if "hashes" not in manifest]
+        if legacy:
+            self.promote(legacy[-1], reason="adopted pre-registry version", verify=False)
+
+    def _version_dirs(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(entry for entry in os.listdir(self.root)
+                      if not entry.startswith(".") and os.path.isdir(os.path.join(self.root, entry)))
+
+    def versions(self) -> List[Dict[str, Any]]:
+        """Manifests of complete versions, oldest first"""
+        manifests = (read_manifest(os.path.join(self.root, entry)) for entry in self._version_dirs())
+        return [manifest for manifest in manifests if manifest is not None]
+
+    def manifest(self, version: str) -> Optional[Dict[str, Any]]:
+        return read_manifest(os.path.join(self.root, version))
+
+    def _read_current(self) -> Dict[str, Any]:
+        try:
+            with open(self.current_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"version": None, "history": []}
+
+    def current_version(self) -> Optional[str]:
+        """The served version; None until one is promoted"""
+        version = self._read_current().get("version")
+        if version is not None and self.manifest(version) is not None:
+            return version
+        return None
+
+    def open(self, version: str, mmap_mode: Optional[str] = "r") -> Optional[ModelBundle]:
+        return ModelBundle.open(os.path.join(self.root, version), mmap_mode)
+
+    def open_current(self, mmap_mode: Optional[str] = "r") -> Optional[ModelBundle]:
+        version = self.current_version()
+        return self.open(version, mmap_mode) if version is not None else None
+
+    def latest(self, component: Optional[str] = None, mmap_mode: Optional[str] = "r") -> Optional[ModelBundle]:
+        """The newest published version, promoted or not; with `component`, the newest that has it"""
+        for manifest in reversed(self.versions()):
+            if component is None or component in manifest.get("components", []):
+                return self.open(manifest["version"], mmap_mode)
+        return None
+
+    def publish(self, components: Dict[str, Any], base: Optional[ModelBundle] = None,
+                metadata: Dict[str, Any] = None, promote: bool = True) -> ModelBundle:
+        """Write a new version (see ModelBundle.write), promote it unless told not to, then gc"""
+        bundle = ModelBundle.write(self.root, components, base=base, metadata=metadata)
+        if promote:
+            self.promote(bundle.version, reason="published", verify=False)
+        if self.keep:
+            self.gc(self.keep)
+        return bundle
+
+    def verify(self, version: str) -> List[str]:
+        """Components whose file is missing or does not match the manifest hash"""
+        manifest = self.manifest(version)
+        if manifest is None:
+            raise ValueError(f"Unknown model version: {version}")
+        problems = []
+        for name, expected in manifest.get("hashes", {}).items():
+            path = os.path.join(self.root, version, f"{name}.pkl")
+            if not os.path.exists(path):
+                problems.append(f"{name}: missing")
+            elif file_sha256(path) != expected:
+                problems.append(f"{name}: hash mismatch")
+        return problems
+
+    def promote(self, version: str, reason: str = "promoted", verify: bool = True) -> Dict[str, Any]:
+        """Make `version` the served one"""
+        if verify:
+            problems = self.verify(version)
+            if problems:
+                raise ValueError(f"Version {version} failed verification: {', '.join(problems)}")
+        elif self.manifest(version) is None:
+            raise ValueError(f"Unknown model version: {version}")
+        state = self._read_current()
+        previous = state.get("version")
+        if previous == version:
+            return state
+        history = ([previous] if previous else []) + [v for v in state.get("history", []) if v != version]
+        return self._write_current(version, history[:HISTORY_LIMIT], reason)
+
+    def rollback(self) -> Dict[str, Any]:
+        """Serve the previously current version again"""
+        state = self._read_current()
+        history = [version for version in state.get("history", []) if self.manifest(version) is not None]
+        if not history:
+            raise ValueError("No earlier version to roll back to")
+        return self._write_current(history[0], history[1:], f"rolled back from {state.get('version')}")
+
+    def _write_current(self, version: str, history: List[str], reason: str) -> Dict[str, Any]:
+        state = {"version": version, "history": history, "reason": reason,
+                 "updated_at": datetime.utcnow().isoformat()}
+        write_json_atomic(self.current_path, state)
+        logger.info(f"Serving model version {version} ({reason})")
+        return state
+
+    def gc(self, keep: int) -> List[str]:
+        """Remove old versions and interrupted writes; returns the removed versions"""
+        state = self._read_current()
+        versions = [manifest["version"] for manifest in self.versions()]
+        protected = set(versions[-keep:]) | set(state.get("history", [])[:1])
+        protected.add(self.current_version())
+        removed = []
+        for entry in self._version_dirs():
+            if entry in protected:
+                continue
+            # Directories without a manifest are only removed once they are clearly abandoned
+            if entry not in versions and time.time() - os.path.getmtime(os.path.join(self.root, entry)) < STALE_WRITE_SECONDS:
+                continue
+            shutil.rmtree(os.path.join(self.root, entry), ignore_errors=True)
+            removed.append(entry)
+        for entry in os.listdir(self.root) if os.path.isdir(self.root) else []:
+            path = os.path.join(self.root, entry)
+            if entry.startswith(".") and os.path.isdir(path) and time.time() - os.path.getmtime(path) > STALE_WRITE_SECONDS:
+                shutil.rmtree(path, ignore_errors=True)
+        if removed:
+            logger.info(f"Removed model versions: {', '.join(removed)}")
+        return removed
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Manage progressive-learning model versions")
+    parser.add_argument("--model-dir", default="ai_models")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="List versions with their metrics")
+    promote = commands.add_parser("promote", help="Serve the given version")
+    promote.add_argument("version")
+    commands.add_parser("rollback", help="Serve the previously current version again")
+    verify = commands.add_parser("verify", help="Check component hashes (current version by default)")
+    verify.add_argument("version", nargs="?")
+    gc = commands.add_parser("gc", help="Remove old versions")
+    gc.add_argument("--keep", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(os.path.join(args.model_dir, "bundles"))
+    try:
+        if args.command == "list":
+            current = registry.current_version()
+            for manifest in registry.versions():
+                metadata = manifest.get("metadata", {})
+                metrics = metadata.get("learning_metrics", {})
+                samples = {category: mark.get("records")
+                           for category, mark in metadata.get("data_watermark", {}).items()}
+                marker = "*" if manifest["version"] == current else " "
+                print(f"{marker} {manifest['version']}  confidence={metrics.get('model_confidence')}  "
+                      f"samples={samples}  components={','.join(manifest['components'])}")
+        elif args.command == "promote":
+            print(f"Serving {registry.promote(args.version)['version']}")
+        elif args.command == "rollback":
+            print(f"Serving {registry.rollback()['version']}")
+        elif args.command == "verify":
+            version = args.version or registry.current_version()
+            problems = registry.verify(version)
+            print(f"{version}: " + ("; ".join(problems) if problems else "ok"))
+            if problems:
+                raise SystemExit(1)
+        else:
+            removed = registry.gc(args.keep)
+            print(f"Removed {len(removed)} version(s)" + (f": {', '.join(removed)}" if removed else ""))
+    except ValueError as e:
+        parser.exit(1, f"error: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
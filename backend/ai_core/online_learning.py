@@ -0,0 +1,203 @@
+"""
+Evolance Online Learning
+Incremental progressive-learning models: hashed features and partial_fit on mini-batches
+"""
+
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.model_selection import train_test_split
+from sklearn.naive_bayes import MultinomialNB
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ("emotion_data", "conversation_pairs", "emolytics_patterns")
+
+
+class OnlineLearner:
+    """
+    Progressive-learning models updated one mini-batch at a time
+
+    Text is hashed with a stateless HashingVectorizer, so there is no
+    vocabulary to refit, and emotions are classified by a MultinomialNB
+    updated with partial_fit (its state is per-class feature counts, so
+    batch updates give exactly the model a full fit would). Emotion labels
+    come from Gemini and are open-ended; unseen labels are added to the
+    classifier with zero counts before the batch is applied. Response and
+    emolytics patterns are updated incrementally and keep the most recent
+    entries per key.
+
+    The update cost depends only on the batch: new samples are read from
+    the training logs from the positions reached last time.
+    Accuracy is measured prequentially (each batch is predicted before it
+    is learned) with exponential decay; every `validate_every` batches the
+    online model is validated against a refit on the most recent
+    `validation_samples` samples, so validation costs the same however much
+    data has been collected.
+    """
+
+    def __init__(self, n_features: int = 2 ** 16, alpha: float = 0.1, max_patterns: int = 50,
+                 accuracy_decay: float = 0.9, validate_every: int = 20, validation_samples: int = 2000):
+        self.n_features = n_features
+        self.max_patterns = max_patterns
+        self.accuracy_decay = accuracy_decay
+        self.validate_every = validate_every
+        self.validation_samples = validation_samples
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features, alternate_sign=False, ngram_range=(1, 2), stop_words="english"
+        )
+        self.classifier = MultinomialNB(alpha=alpha)
+        self.response_patterns: Dict[str, List[str]] = {}
+        self.emolytics_patterns = {
+            "emotion_to_wellness": defaultdict(list),
+            "trigger_patterns": defaultdict(list),
+            "recommendation_patterns": defaultdict(list)
+        }
+        self.state = {
+            "positions": {category: None for category in CATEGORIES},
+            "samples_seen": 0,
+            "batches": 0,
+            "weighted_correct": 0.0,
+            "weighted_total": 0.0,
+            "validation": None,
+        }
+
+    @property
+    def fitted(self) -> bool:
+        return hasattr(self.classifier, "classes_")
+
+    @property
+    def accuracy(self) -> float:
+        total = self.state["weighted_total"]
+        return self.state["weighted_correct"] / total if total else 0.0
+
+    def _add_classes(self, labels: List[str]):
+        """Grow the fitted classifier to cover labels it has not seen (with zero counts)"""
+        new = sorted(set(labels) - set(self.classifier.classes_))
+        if not new:
+            return
+        clf = self.classifier
+        clf.classes_ = np.concatenate([clf.classes_.astype(object), np.array(new, dtype=object)])
+        clf.class_count_ = np.concatenate([clf.class_count_, np.zeros(len(new))])
+        clf.feature_count_ = np.vstack([clf.feature_count_, np.zeros((len(new), clf.feature_count_.shape[1]))])
+
+    def _fit_emotions(self, samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+        texts = [sample["text"] for sample in samples]
+        labels = [str(sample.get("primary_emotion", "neutral")) for sample in samples]
+        X = self.vectorizer.transform(texts)
+        stats = {"samples": len(samples)}
+        if self.fitted:
+            # Test-then-train: score the batch before learning from it
+            correct = float(np.sum(self.classifier.predict(X) == np.array(labels, dtype=object)))
+            decay = self.accuracy_decay
+            self.state["weighted_correct"] = self.state["weighted_correct"] * decay + correct
+            self.state["weighted_total"] = self.state["weighted_total"] * decay + len(samples)
+            stats["batch_accuracy"] = round(correct / len(samples), 4)
+            self._add_classes(labels)
+            self.classifier.partial_fit(X, np.array(labels, dtype=object))
+        else:
+            self.classifier.partial_fit(X, np.array(labels, dtype=object),
+                                        classes=np.array(sorted(set(labels)), dtype=object))
+        return stats
+
+    def _update_responses(self, samples: List[Dict[str, Any]]):
+        for sample in samples:
+            emotion = (sample.get("emotion_context") or {}).get("primary_emotion", "neutral")
+            responses = self.response_patterns.setdefault(emotion, [])
+            responses.append(sample["ai_response"])
+            del responses[:-self.max_patterns]
+
+    def _update_emolytics(self, samples: List[Dict[str, Any]]):
+        for sample in samples:
+            emotion = sample["emotion_data"].get("primary_emotion", "neutral")
+            emolytics = sample["emolytics_update"]
+            if "emotional_state" in emolytics:
+                scores = self.emolytics_patterns["emotion_to_wellness"][emotion]
+                scores.append(emolytics["emotional_state"].get("stability", 50))
+                del scores[:-self.max_patterns]
+            recommendations = emolytics.get("recommendations", {}).get("immediate_actions", [])
+            for trigger in sample["emotion_data"].get("emotional_triggers", []):
+                patterns = self.emolytics_patterns["trigger_patterns"][trigger]
+                patterns.extend(recommendations)
+                del patterns[:-self.max_patterns]
+
+    def partial_fit(self, batch: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Apply one mini-batch ({category: samples}); returns batch statistics"""
+        stats: Dict[str, Any] = {category: len(batch.get(category, [])) for category in CATEGORIES}
+        if batch.get("emotion_data"):
+            stats.update(self._fit_emotions(batch["emotion_data"]))
+            self.state["samples_seen"] += len(batch["emotion_data"])
+        self._update_responses(batch.get("conversation_pairs", []))
+        self._update_emolytics(batch.get("emolytics_patterns", []))
+        if any(batch.get(category) for category in CATEGORIES):
+            self.state["batches"] += 1
+        stats["accuracy"] = round(self.accuracy, 4)
+        return stats
+
+    def update_from_logs(self, logs: Dict[str, Any]) -> Dict[str, Any]:
+        """Learn everything appended to the training logs ({category: TrainingLog}) since the last update"""
+        batch = {}
+        positions = self.state["positions"]
+        for category in CATEGORIES:
+            batch[category], positions[category] = logs[category].read_from(positions[category])
+        stats = self.partial_fit(batch)
+        if self.validate_every and self.state["batches"] and self.state["batches"] % self.validate_every == 0 \
+                and batch.get("emotion_data"):
+            stats["validation"] = self.validate(logs["emotion_data"].tail(self.validation_samples))
+        return stats
+
+    def validate(self, samples, test_size: float = 0.2, random_state: int = 42) -> Optional[Dict[str, Any]]:
+        """
+        Compare the online model with a full refit on the same features
+
+        The refit is trained on a split of all samples and both models are
+        scored on the held-out rest. It is never served.
+        """
+        samples = list(samples)
+        labels = [str(sample.get("primary_emotion", "neutral")) for sample in samples]
+        if len(samples) < 10 or len(set(labels)) < 2 or not self.fitted:
+            return None
+        X = self.vectorizer.transform([sample["text"] for sample in samples])
+        y = np.array(labels, dtype=object)
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+        refit = MultinomialNB(alpha=self.classifier.alpha).fit(X_train, y_train)
+        validation = {
+            "samples": len(samples),
+            "online_accuracy": round(float(np.mean(self.classifier.predict(X_test) == y_test)), 4),
+            "refit_accuracy": round(float(np.mean(refit.predict(X_test) == y_test)), 4),
+        }
+        self.state["validation"] = validation
+        logger.info(f"Online model validation: {validation}")
+        return validation
+
+    def components(self) -> Dict[str, Any]:
+        """Bundle components; the serving path uses them like the batch-trained ones"""
+        return {
+            "emotion_vectorizer": self.vectorizer,
+            "emotion_classifier": self.classifier,
+            "response_patterns": dict(self.response_patterns),
+            "emolytics_patterns": self.emolytics_patterns,
+            "online_state": dict(self.state),
+        }
+
+    @classmethod
+    def from_bundle(cls, bundle, **kwargs) -> Optional["OnlineLearner"]:
+        """Resume from a checkpoint bundle (its arrays are copied, since partial_fit updates in place)"""
+        if bundle is None or "online_state" not in bundle:
+            return None
+        from .model_bundle import ModelBundle
+        writable = ModelBundle(bundle.path, bundle.version, mmap_mode=None)
+        learner = cls(**kwargs)
+        learner.vectorizer = writable.get("emotion_vectorizer")
+        learner.classifier = writable.get("emotion_classifier")
+        learner.response_patterns = writable.get("response_patterns", {})
+        learner.emolytics_patterns = writable.get("emolytics_patterns")
+        learner.state = writable.get("online_state")
+        if "offsets" in learner.state:
+            # Checkpoints from before segmented logs: byte offsets into the flat files, now segment 0
+            learner.state["positions"] = {category: (0, offset)
+                                          for category, offset in learner.state.pop("offsets").items()}
+        return learner
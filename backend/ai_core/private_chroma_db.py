@@ -6,26 +6,32 @@ Secure, local storage for conversational data with access control
 import chromadb
 import json
 import hashlib
+import heapq
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
-from sentence_transformers import SentenceTransformer
 import numpy as np
 
+from .chroma_ingest import DEFAULT_BATCH_SIZE, ChromaIngester
+from .embeddings import DEFAULT_EMBEDDING_MODEL, get_embedding_function
+
 class PrivateChromaDB:
     """
     Secure ChromaDB integration for Evolance LLM
     Stores conversational data locally with access control
     """
     
-    def __init__(self, db_path: str = "./private_chroma_db", embedding_model: str = "all-MiniLM-L6-v2"):
+    def __init__(self, db_path: str = "./private_chroma_db", embedding_model: str = DEFAULT_EMBEDDING_MODEL):
         """
         Initialize private ChromaDB
         
         Args:
             db_path: Local path to store ChromaDB data
-            embedding_model: Sentence transformer model for embeddings
+            embedding_model: Sentence transformer model for embeddings; every collection
+                and query uses this one (shared) embedding function
         """
         self.db_path = Path(db_path)
         self.db_path.mkdir(parents=True, exist_ok=True)
@@ -33,17 +39,21 @@ class PrivateChromaDB:
         # Initialize ChromaDB client (local only)
         self.client = chromadb.PersistentClient(path=str(self.db_path))
         
-        # Load embedding model
+        # Load embedding model (attached to every collection, so Chroma loads no embedder of its own)
         try:
-            self.embedding_model = SentenceTransformer(embedding_model)
+            self.embedding_function = get_embedding_function(embedding_model)
+            self.embedding_function.load()
             print(f"✅ Loaded embedding model: {embedding_model}")
         except Exception as e:
             print(f"⚠️  Could not load {embedding_model}, using default")
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.embedding_function = get_embedding_function(DEFAULT_EMBEDDING_MODEL)
         
         # Initialize collections
         self._init_collections()
         
+        # The conversation and pattern searches of one query run side by side
+        self._query_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="evolance-chroma-query")
+        
         # Access control (simple hash-based for demo)
         self.authorized_users = set()
         self._load_authorized_users()
@@ -54,18 +64,21 @@ class PrivateChromaDB:
             # Main conversations collection
             self.conversations = self.client.get_or_create_collection(
                 name="evolance_conversations",
+                embedding_function=self.embedding_function,
                 metadata={"description": "Private conversation storage for Evolance LLM"}
             )
             
             # Emotional patterns collection
             self.emotional_patterns = self.client.get_or_create_collection(
                 name="emotional_patterns",
+                embedding_function=self.embedding_function,
                 metadata={"description": "Emotional response patterns and examples"}
             )
             
             # User context collection
             self.user_contexts = self.client.get_or_create_collection(
                 name="user_contexts",
+                embedding_function=self.embedding_function,
                 metadata={"description": "User-specific context and preferences"}
             )
             
@@ -122,68 +135,32 @@ class PrivateChromaDB:
         user_hash = self._hash_user_id(user_id)
         return user_hash in self.authorized_users
     
-    def ingest_generated_data(self, data_file: str = "backend/data/full_training_dataset.json"):
-        """Ingest generated training data into ChromaDB"""
+    def ingest_generated_data(self, data_file: str = "backend/data/full_training_dataset.json",
+                              batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 2,
+                              resume: bool = True) -> Dict[str, Any]:
+        """
+        Ingest generated training data into ChromaDB
+        
+        The file (a JSON array or JSONL) is streamed and embedded in batches of
+        about batch_size documents on `workers` threads; ids are content hashes
+        and progress is checkpointed after each batch, so an interrupted run
+        resumes where it stopped (see chroma_ingest.ChromaIngester).
+        """
         print("🔄 Ingesting generated data into ChromaDB...")
         
         try:
-            with open(data_file, 'r') as f:
-                data = json.load(f)
-            
-            conversation_docs = []
-            conversation_metadatas = []
-            conversation_ids = []
-            
-            emotional_docs = []
-            emotional_metadatas = []
-            emotional_ids = []
-            
-            for i, item in enumerate(data):
-                if "messages" in item:
-                    # Process conversation
-                    for j, message in enumerate(item["messages"]):
-                        if message["role"] == "user":
-                            doc_id = f"conv_{i}_{j}"
-                            conversation_docs.append(message["text"])
-                            conversation_metadatas.append({
-                                "type": "user_message",
-                                "emotion": message.get("emotion", "neutral"),
-                                "context": message.get("context", "general"),
-                                "scenario": item.get("scenario", "unknown"),
-                                "timestamp": time.time()
-                            })
-                            conversation_ids.append(doc_id)
-                        else:
-                            # AI response
-                            doc_id = f"resp_{i}_{j}"
-                            emotional_docs.append(message["text"])
-                            emotional_metadatas.append({
-                                "type": "ai_response",
-                                "emotion": message.get("emotion", "empathetic"),
-                                "context": message.get("context", "supportive"),
-                                "scenario": item.get("scenario", "unknown"),
-                                "timestamp": time.time()
-                            })
-                            emotional_ids.append(doc_id)
-            
-            # Add to collections
-            if conversation_docs:
-                self.conversations.add(
-                    documents=conversation_docs,
-                    metadatas=conversation_metadatas,
-                    ids=conversation_ids
-                )
-                print(f"✅ Added {len(conversation_docs)} conversation documents")
-            
-            if emotional_docs:
-                self.emotional_patterns.add(
-                    documents=emotional_docs,
-                    metadatas=emotional_metadatas,
-                    ids=emotional_ids
-                )
-                print(f"✅ Added {len(emotional_docs)} emotional pattern documents")
-            
-            print("✅ Data ingestion completed")
+            ingester = ChromaIngester(
+                {"conversations": self.conversations, "emotional_patterns": self.emotional_patterns},
+                self.embedding_function.embed,
+                str(self.db_path / "ingest_checkpoint.json"),
+                batch_size=batch_size, workers=workers
+            )
+            result = ingester.ingest(data_file, resume=resume)
+            for collection, count in result["upserts"].items():
+                print(f"✅ {count} {collection} documents upserted")
+            print(f"✅ Data ingestion completed: {result['ingested']} documents in {result['seconds']}s "
+                  f"({result['documents_per_second']} docs/s)")
+            return result
             
         except Exception as e:
             print(f"❌ Failed to ingest data: {str(e)}")
@@ -242,48 +219,43 @@ class PrivateChromaDB:
             return []
         
         try:
-            # Search conversations
-            conv_results = self.conversations.query(
-                query_texts=[query],
-                n_results=n_results
-            )
-            
-            # Search emotional patterns
-            pattern_results = self.emotional_patterns.query(
-                query_texts=[query],
-                n_results=n_results
-            )
-            
-            # Combine and format results
-            results = []
-            
-            if conv_results['documents']:
-                for i, doc in enumerate(conv_results['documents'][0]):
-                    results.append({
-                        "text": doc,
-                        "metadata": conv_results['metadatas'][0][i],
-                        "type": "conversation",
-                        "distance": conv_results['distances'][0][i] if 'distances' in conv_results else None
-                    })
+            # Embed the query once and search both collections with the same vector, concurrently
+            query_embedding = self.embedding_function([query])
+            searches = [
+                self._query_pool.submit(self._query_collection, collection, result_type, query_embedding, n_results)
+                for collection, result_type in ((self.conversations, "conversation"),
+                                                (self.emotional_patterns, "pattern"))
+            ]
             
-            if pattern_results['documents']:
-                for i, doc in enumerate(pattern_results['documents'][0]):
-                    results.append({
-                        "text": doc,
-                        "metadata": pattern_results['metadatas'][0][i],
-                        "type": "pattern",
-                        "distance": pattern_results['distances'][0][i] if 'distances' in pattern_results else None
-                    })
-            
-            # Sort by relevance (distance)
-            results.sort(key=lambda x: x.get('distance', float('inf')))
-            
-            return results[:n_results]
+            # Each list is already ordered by distance; merge them lazily up to n_results
+            merged = heapq.merge(*(search.result() for search in searches), key=self._distance_key)
+            return list(islice(merged, n_results))
             
         except Exception as e:
             print(f"❌ Failed to search conversations: {str(e)}")
             return []
     
+    @staticmethod
+    def _distance_key(result: Dict[str, Any]) -> float:
+        distance = result.get('distance')
+        return float('inf') if distance is None else distance
+    
+    def _query_collection(self, collection, result_type: str, query_embedding: List[List[float]],
+                          n_results: int) -> List[Dict[str, Any]]:
+        """Nearest documents of one collection, formatted as search results and ordered by distance"""
+        query_results = collection.query(query_embeddings=query_embedding, n_results=n_results)
+        if not query_results['documents']:
+            return []
+        distances = query_results.get('distances')
+        results = [{
+            "text": doc,
+            "metadata": query_results['metadatas'][0][i],
+            "type": result_type,
+            "distance": distances[0][i] if distances else None
+        } for i, doc in enumerate(query_results['documents'][0])]
+        results.sort(key=self._distance_key)
+        return results
+    
     def get_user_context(self, user_id: str) -> Dict[str, Any]:
         """Get user-specific context and preferences"""
         if not self.is_authorized_user(user_id):
@@ -0,0 +1,297 @@
+"""
+Evolance Emotional Profile View
+Per-user emotional profiles maintained incrementally as interactions are stored
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import Counter, deque
+from typing import Any, Dict, List
+
+from .interaction_store import InteractionStore
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+POSITIVE_EMOTIONS = ("joy", "love")
+NEGATIVE_EMOTIONS = ("sadness", "fear", "anger")
+NEUTRAL_FEEDBACK = 0.5  # used for interactions without user feedback
+TREND_WINDOW = 10
+MASTERY_THRESHOLD = 5
+
+
+def _feedback(record: Dict[str, Any]) -> float:
+    feedback = record.get("feedback")
+    return NEUTRAL_FEEDBACK if feedback is None else float(feedback)
+
+
+class ProfileAggregate:
+    """One user's running profile state; every update is O(1)"""
+
+    def __init__(self, window: int):
+        self.count = 0  # interactions applied, i.e. the position in the user's log
+        self.recent_emotions = deque(maxlen=window)
+        self.window_counts = Counter()
+        self.all_time_counts: Dict[str, int] = {}
+        self.first_feedback: List[float] = []  # first TREND_WINDOW interactions
+        self.recent_feedback = deque(maxlen=2 * TREND_WINDOW)
+        self.milestone_timestamps: Dict[str, str] = {}  # interaction count reached -> timestamp
+        self.last_timestamp = ""
+
+    def apply(self, record: Dict[str, Any]):
+        emotion = record.get("emotion") or "neutral"
+        if len(self.recent_emotions) == self.recent_emotions.maxlen:
+            expired = self.recent_emotions[0]
+            self.window_counts[expired] -= 1
+            if not self.window_counts[expired]:
+                del self.window_counts[expired]
+        self.recent_emotions.append(emotion)
+        self.window_counts[emotion] += 1
+        self.all_time_counts[emotion] = self.all_time_counts.get(emotion, 0) + 1
+
+        feedback = _feedback(record)
+        if len(self.first_feedback) < TREND_WINDOW:
+            self.first_feedback.append(feedback)
+        self.recent_feedback.append(feedback)
+
+        self.count += 1
+        self.last_timestamp = record.get("timestamp", "")
+        if self.count in (10, 50):
+            self.milestone_timestamps[str(self.count)] = self.last_timestamp
+
+    def fingerprint(self) -> Dict[str, int]:
+        """Emotion counts over the window, in order of first appearance"""
+        return {emotion: self.window_counts[emotion] for emotion in dict.fromkeys(self.recent_emotions)}
+
+    def fulfillment_trend(self) -> str:
+        if self.count < TREND_WINDOW:
+            return "stable"
+        recent = list(self.recent_feedback)[-TREND_WINDOW:]
+        older = list(self.recent_feedback)[:TREND_WINDOW] if self.count >= 2 * TREND_WINDOW else self.first_feedback
+        recent_avg = sum(recent) / len(recent)
+        older_avg = sum(older) / len(older)
+        if recent_avg > older_avg + 0.1:
+            return "ascending"
+        if recent_avg < older_avg - 0.1:
+            return "descending"
+        return "stable"
+
+    @staticmethod
+    def balance_score(emotion_counts: Dict[str, int]) -> int:
+        """Emotional balance score (0-100): higher for more positive emotions"""
+        total = sum(emotion_counts.values())
+        if not total:
+            return 50
+        positive_ratio = sum(emotion_counts.get(e, 0) for e in POSITIVE_EMOTIONS) / total
+        negative_ratio = sum(emotion_counts.get(e, 0) for e in NEGATIVE_EMOTIONS) / total
+        return max(0, min(100, int((positive_ratio - negative_ratio + 1) * 50)))
+
+    def milestones(self) -> List[Dict[str, Any]]:
+        milestones = []
+        if "10" in self.milestone_timestamps:
+            milestones.append({
+                "type": "first_steps",
+                "title": "First Steps on the Path",
+                "description": "Completed your first 10 interactions",
+                "achieved_at": self.milestone_timestamps["10"],
+                "icon": "🌱"
+            })
+        if "50" in self.milestone_timestamps:
+            milestones.append({
+                "type": "dedicated_journey",
+                "title": "Dedicated Journey",
+                "description": "Completed 50 interactions",
+                "achieved_at": self.milestone_timestamps["50"],
+                "icon": "💜"
+            })
+        for emotion, count in self.all_time_counts.items():
+            if count >= MASTERY_THRESHOLD:
+                milestones.append({
+                    "type": f"emotion_mastery_{emotion}",
+                    "title": f"Emotional Awareness: {emotion.title()}",
+                    "description": f"Explored {emotion} emotions {count} times",
+                    "achieved_at": self.last_timestamp,
+                    "icon": "🧘"
+                })
+        return milestones
+
+    def to_profile(self) -> Dict[str, Any]:
+        """The profile served by /ai/profile"""
+        fingerprint = self.fingerprint()
+        return {
+            "emotional_fingerprint": fingerprint,
+            "fulfillment_trend": self.fulfillment_trend(),
+            "total_interactions": self.count,
+            "recent_emotions": list(self.recent_emotions)[-10:],
+            "dominant_emotion": max(fingerprint.items(), key=lambda x: x[1])[0] if fingerprint else "neutral",
+            "emotional_balance_score": self.balance_score(fingerprint),
+            "growth_milestones": self.milestones()
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "recent_emotions": list(self.recent_emotions),
+            "all_time_counts": self.all_time_counts,
+            "first_feedback": self.first_feedback,
+            "recent_feedback": list(self.recent_feedback),
+            "milestone_timestamps": self.milestone_timestamps,
+            "last_timestamp": self.last_timestamp,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], window: int) -> "ProfileAggregate":
+        aggregate = cls(window)
+        aggregate.count = data["count"]
+        aggregate.recent_emotions.extend(data["recent_emotions"])
+        aggregate.window_counts = Counter(aggregate.recent_emotions)
+        aggregate.all_time_counts = dict(data["all_time_counts"])
+        aggregate.first_feedback = list(data["first_feedback"])
+        aggregate.recent_feedback.extend(data["recent_feedback"])
+        aggregate.milestone_timestamps = dict(data["milestone_timestamps"])
+        aggregate.last_timestamp = data["last_timestamp"]
+        return aggregate
+
+
+class ProfileView:
+    """
+    Materialized emotional profiles backed by the interaction store
+
+    Each aggregate remembers how many of the user's interactions it has
+    applied. Any records appended since then are replayed when the user is
+    next touched. That makes a write an O(1) update and a read a lookup.
+    The same catch-up repairs aggregates restored from a stale snapshot.
+    Replays hold only that user's lock, so a cold user's segment scan does
+    not stall everyone else's profile updates.
+    """
+
+    def __init__(self, interactions: InteractionStore, snapshot_path: str = None,
+                 window: int = 50, snapshot_interval: float = 60.0):
+        """
+        Args:
+            interactions: Source of truth the aggregates are derived from
+            snapshot_path: JSON file the aggregates are periodically saved to
+            window: Number of recent emotions in the fingerprint
+            snapshot_interval: Seconds between snapshots (only written when something changed)
+        """
+        self.interactions = interactions
+        self.snapshot_path = snapshot_path
+        self.window = window
+        self.snapshot_interval = snapshot_interval
+        self._aggregates: Dict[str, ProfileAggregate] = {}
+        self._user_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()  # guards the two dicts and the dirty flag
+        self._dirty = False
+        self._stop = threading.Event()
+        self._thread = None
+
+        if snapshot_path:
+            self._load_snapshot()
+            self._thread = threading.Thread(target=self._snapshot_loop, name="evolance-profile-snapshot", daemon=True)
+            self._thread.start()
+
+    def _user_lock(self, user_id: str) -> threading.Lock:
+        with self._lock:
+            lock = self._user_locks.get(user_id)
+            if lock is None:
+                lock = self._user_locks[user_id] = threading.Lock()
+            return lock
+
+    def _aggregate(self, user_id: str) -> ProfileAggregate:
+        """The user's aggregate, caught up with their interaction log (call with the user's lock held)"""
+        target = self.interactions.count(user_id)
+        with self._lock:
+            aggregate = self._aggregates.get(user_id)
+            if aggregate is None or aggregate.count > target:
+                aggregate = ProfileAggregate(self.window)
+                self._aggregates[user_id] = aggregate
+        if aggregate.count < target:
+            missing = target - aggregate.count
+            if missing > self.interactions.tail_size:
+                # Far behind (cold start): one sequential pass over the user's segments
+                for index, record in enumerate(self.interactions.iter_user(user_id)):
+                    if index >= target:
+                        break
+                    if index >= aggregate.count:
+                        aggregate.apply(record)
+            else:
+                # Recent records are served from the store's in-memory tail
+                for index in range(aggregate.count, target):
+                    aggregate.apply(self.interactions.get(user_id, index))
+            with self._lock:
+                self._dirty = True
+        return aggregate
+
+    def record(self, user_id: str):
+        """Apply interactions appended for a user since the last update"""
+        with self._user_lock(user_id):
+            self._aggregate(user_id)
+
+    def get_profile(self, user_id: str) -> Dict[str, Any]:
+        """The user's current emotional profile"""
+        with self._user_lock(user_id):
+            return self._aggregate(user_id).to_profile()
+
+    def _load_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, "r") as f:
+                snapshot = json.load(f)
+            if snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get("window") != self.window:
+                logger.info("Profile snapshot is from another version, rebuilding profiles on demand")
+                return
+            self._aggregates = {
+                user_id: ProfileAggregate.from_dict(data, self.window)
+                for user_id, data in snapshot["users"].items()
+            }
+            logger.info(f"Loaded {len(self._aggregates)} profiles from snapshot")
+        except Exception as e:
+            logger.warning(f"Failed to load profile snapshot, rebuilding profiles on demand: {e}")
+            self._aggregates = {}
+
+    def save_snapshot(self):
+        """Write all aggregates atomically"""
+        with self._lock:
+            aggregates = list(self._aggregates.items())
+            self._dirty = False
+        users = {}
+        for user_id, aggregate in aggregates:
+            # Wait out a replay in progress rather than serialize a half-applied aggregate
+            with self._user_lock(user_id):
+                users[user_id] = aggregate.to_dict()
+        snapshot = {"version": SNAPSHOT_VERSION, "window": self.window, "users": users}
+
+        directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".profiles.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+            os.replace(tmp_path, self.snapshot_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _snapshot_loop(self):
+        while not self._stop.wait(self.snapshot_interval):
+            if self._dirty:
+                try:
+                    self.save_snapshot()
+                except Exception as e:
+                    logger.error(f"Failed to save profile snapshot: {e}")
+
+    def close(self):
+        """Stop the snapshot thread and write a final snapshot"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            if self._dirty:
+                self.save_snapshot()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"profiles": len(self._aggregates), "window": self.window, "dirty": self._dirty}
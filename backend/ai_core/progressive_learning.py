@@ -5,37 +5,142 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
 import os
+import sys
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.neural_network import MLPClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
-import joblib
+from threadpoolctl import threadpool_limits
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from .model_bundle import ModelBundle
+from .model_registry import ModelRegistry
+from .online_learning import OnlineLearner
+from .atomic_io import write_json_atomic
+from .training_jobs import TrainingJobQueue
+from .training_log import TrainingLog
+
+# Independently trainable models and the method that trains each
+MODEL_TRAINERS = {
+    "emotion_classifier": "train_emotion_classifier",
+    "response_generator": "train_response_generator",
+    "emolytics_analyzer": "train_emolytics_analyzer",
+}
+# Training data each model needs before it is (re)trained
+DEFAULT_MIN_SAMPLES = {"emotion_classifier": 50, "response_generator": 50, "emolytics_analyzer": 30}
+# Job name for an online-mode mini-batch update (all models at once)
+ONLINE_UPDATE = "online_update"
+# Per-model fit resources: n_jobs for estimators that support it, threads for the
+# BLAS/OpenMP pools, and an address-space limit in MB (pool processes only; None = unlimited)
+DEFAULT_MODEL_RESOURCES = {
+    "emotion_classifier": {"n_jobs": 4, "threads": 1, "memory_mb": None},
+    "response_generator": {"n_jobs": 1, "threads": 2, "memory_mb": None},
+    "emolytics_analyzer": {"n_jobs": 1, "threads": 1, "memory_mb": None},
+}
+
+
+def _peak_memory_mb() -> Optional[float]:
+    """Peak resident memory of this process so far (a fit's own peak in a pool process, which runs one fit)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _fit_in_process(model_dir: str, model: str, min_samples: Dict[str, int], resources: Dict):
+    """Train one model in a pool process; returns its result, staged components and resource usage."""
+    if resource is not None and resources.get("memory_mb"):
+        limit = int(resources["memory_mb"] * 1024 * 1024)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    # The process reads the training logs itself, so no samples are sent over the pipe
+    system = ProgressiveLearningSystem(model_dir, min_samples=min_samples, model_resources={model: resources})
+    result, usage = system._fit(model)
+    usage["peak_memory_mb"] = _peak_memory_mb()
+    return result, system._staged_components, usage
 
 class ProgressiveLearningSystem:
-    def __init__(self, model_dir: str = "ai_models"):
-        """Initialize the progressive learning system."""
+    def __init__(self, model_dir: str = "ai_models", training_mode: str = "inline",
+                 train_every=100, min_samples: Optional[Dict[str, int]] = None,
+                 reload_interval: float = 5.0, learning_mode: str = "batch",
+                 online_batch_size: int = 32, training_processes: int = 1,
+                 model_resources: Optional[Dict[str, Dict]] = None, auto_promote: bool = True,
+                 keep_versions: Optional[int] = 10):
+        """
+        Initialize the progressive learning system.
+        
+        Args:
+            training_mode: "inline" trains inside collect_training_data; "worker" only
+                queues jobs for the training worker process (ai_core.training_worker)
+            train_every: Interactions between retrains, as one number or per model
+            min_samples: Per-model minimum training data (defaults to DEFAULT_MIN_SAMPLES)
+            reload_interval: Seconds between checks for bundles published by the worker
+            learning_mode: "batch" refits every model on all collected data; "online"
+                updates hashed-feature models with each mini-batch (ai_core.online_learning)
+            online_batch_size: Interactions per online mini-batch (replaces train_every)
+            training_processes: Processes that fit models concurrently in train_models
+                (1 fits them one after another in this process)
+            model_resources: Per-model overrides of DEFAULT_MODEL_RESOURCES
+            auto_promote: Serve each newly published version right away; otherwise
+                versions wait for `python -m ai_core.model_registry promote`
+            keep_versions: Model versions kept by the registry's garbage collection
+                (None keeps all)
+        """
+        if training_mode not in ("inline", "worker"):
+            raise ValueError(f"Unknown training mode: {training_mode}")
+        if learning_mode not in ("batch", "online"):
+            raise ValueError(f"Unknown learning mode: {learning_mode}")
         self.model_dir = model_dir
         os.makedirs(model_dir, exist_ok=True)
+        self.training_mode = training_mode
+        if isinstance(train_every, dict):
+            self.train_every = {model: train_every.get(model, 100) for model in MODEL_TRAINERS}
+        else:
+            self.train_every = {model: train_every for model in MODEL_TRAINERS}
+        self.min_samples = {**DEFAULT_MIN_SAMPLES, **(min_samples or {})}
+        self.reload_interval = reload_interval
+        self._last_reload_check = time.monotonic()
+        self.jobs = TrainingJobQueue(f"{model_dir}/jobs") if training_mode == "worker" else None
+        self.learning_mode = learning_mode
+        self.online_batch_size = online_batch_size
+        self.online: Optional[OnlineLearner] = None  # restored from the latest checkpoint on first update
+        self.training_processes = training_processes
+        self.model_resources = {
+            model: {**DEFAULT_MODEL_RESOURCES[model], **(model_resources or {}).get(model, {})}
+            for model in MODEL_TRAINERS
+        }
         
-        # Core models
-        self.emotion_classifier = None
-        self.response_generator = None
-        self.emolytics_analyzer = None
-        
-        # Training data storage
+        # Serving models live in an immutable, versioned bundle that is swapped
+        # by reference after retraining; newly trained components are staged
+        # until save_models publishes them as the next version in the registry,
+        # whose "current" pointer decides which version every process serves
+        self.bundle_dir = f"{model_dir}/bundles"
+        self.registry = ModelRegistry(self.bundle_dir, keep=keep_versions)
+        self.auto_promote = auto_promote
+        self.bundle: Optional[ModelBundle] = None
+        self._staged_components: Dict[str, object] = {}
+        
+        # Training data storage: append-only segmented logs, streamed when training
         self.training_data = {
-            "emotion_data": [],
-            "conversation_pairs": [],
-            "emolytics_patterns": []
+            category: TrainingLog(f"{model_dir}/training_data/{category}")
+            for category in ("emotion_data", "conversation_pairs", "emolytics_patterns")
         }
+        self._migrate_training_data_json()
         
         # Learning metrics
         self.learning_metrics = {
-            "total_interactions": 0,
+            "total_interactions": len(self.training_data["emotion_data"]),  # recovered from the log index
             "model_confidence": 0.0,
             "last_training": None,
-            "training_frequency": 100,  # Retrain every 100 interactions
+            "training_frequency": (online_batch_size if learning_mode == "online"
+                                   else min(self.train_every.values())),  # Retrain every N interactions
             "independence_threshold": 0.85  # Confidence threshold for independence
         }
         
@@ -43,48 +148,126 @@ class ProgressiveLearningSystem:
         self.load_models()
     
     def load_models(self):
-        """Load existing trained models."""
+        """Point at the current model version; its components are loaded (memory-mapped) on first use."""
         try:
-            if os.path.exists(f"{self.model_dir}/emotion_classifier.pkl"):
-                self.emotion_classifier = joblib.load(f"{self.model_dir}/emotion_classifier.pkl")
-                print("✅ Loaded existing emotion classifier")
-            
-            if os.path.exists(f"{self.model_dir}/response_generator.pkl"):
-                self.response_generator = joblib.load(f"{self.model_dir}/response_generator.pkl")
-                print("✅ Loaded existing response generator")
-                
-            if os.path.exists(f"{self.model_dir}/emolytics_analyzer.pkl"):
-                self.emolytics_analyzer = joblib.load(f"{self.model_dir}/emolytics_analyzer.pkl")
-                print("✅ Loaded existing emolytics analyzer")
+            bundle = self.registry.open_current() or ModelBundle.legacy(self.model_dir)
+            if bundle is not None:
+                self._use_bundle(bundle)
+                print(f"✅ Found model bundle {bundle.version}: {', '.join(bundle.names)}")
                 
         except Exception as e:
             print(f"⚠️ Could not load existing models: {e}")
     
-    def save_models(self):
+    def _use_bundle(self, bundle: ModelBundle):
+        """Swap in a bundle and adopt the training results recorded with it."""
+        trained = bundle.metadata.get("learning_metrics", {})
+        for key in ("model_confidence", "last_training"):
+            if trained.get(key) is not None:
+                self.learning_metrics[key] = trained[key]
+        # A single reference assignment: requests in flight keep the bundle they started with
+        self.bundle = bundle
+    
+    def refresh_models(self, force: bool = False) -> bool:
+        """Swap in the current version if another process promoted (or rolled back); checks at most every reload_interval."""
+        now = time.monotonic()
+        if not force and now - self._last_reload_check < self.reload_interval:
+            return False
+        self._last_reload_check = now
+        try:
+            version = self.registry.current_version()
+            if version is None or (self.bundle is not None and version == self.bundle.version):
+                return False
+            current = self.registry.open(version)
+        except Exception as e:
+            print(f"⚠️ Could not check for new models: {e}")
+            return False
+        if current is None:
+            return False
+        self._use_bundle(current)
+        print(f"✅ Switched to model bundle {current.version}")
+        return True
+    
+    def publish_models(self, replace: bool = False, metrics: Optional[Dict] = None,
+                       watermark: Optional[Dict] = None) -> Optional[ModelBundle]:
+        """
+        Write staged components as a new registry version and, with auto_promote, swap it in.
+        
+        Args:
+            replace: Publish only the staged components (nothing carried over) and
+                serve them from disk; used for online checkpoints, whose objects the
+                learner keeps updating in place
+            metrics: Results of the training run, recorded in the version manifest
+            watermark: How far into each training log the models have seen
+        """
+        if not self._staged_components:
+            return self.bundle
+        bundle = self.registry.publish(
+            self._staged_components, base=None if replace else self.bundle,
+            metadata={
+                "learning_metrics": dict(self.learning_metrics),
+                "metrics": metrics or {},
+                "data_watermark": watermark or self.data_watermark(),
+            },
+            promote=self.auto_promote
+        )
+        self._staged_components = {}
+        if self.auto_promote:
+            self.bundle = ModelBundle.open(bundle.path) if replace else bundle
+        else:
+            print(f"📦 Published model version {bundle.version} (not promoted)")
+        return bundle
+    
+    def data_watermark(self) -> Dict:
+        """Records and end position of each training log, to record what a version was trained on"""
+        return {
+            category: {"records": len(log), "position": list(log.position())}
+            for category, log in self.training_data.items()
+        }
+    
+    def save_models(self, replace: bool = False, metrics: Optional[Dict] = None,
+                    watermark: Optional[Dict] = None):
         """Save trained models."""
         try:
-            if self.emotion_classifier:
-                joblib.dump(self.emotion_classifier, f"{self.model_dir}/emotion_classifier.pkl")
-            
-            if self.response_generator:
-                joblib.dump(self.response_generator, f"{self.model_dir}/response_generator.pkl")
-                
-            if self.emolytics_analyzer:
-                joblib.dump(self.emolytics_analyzer, f"{self.model_dir}/emolytics_analyzer.pkl")
+            self.publish_models(replace=replace, metrics=metrics, watermark=watermark)
                 
-            # Save training data
-            with open(f"{self.model_dir}/training_data.json", 'w') as f:
-                json.dump(self.training_data, f, indent=2)
-                
-            # Save learning metrics
-            with open(f"{self.model_dir}/learning_metrics.json", 'w') as f:
-                json.dump(self.learning_metrics, f, indent=2)
+            self.save_training_data()
                 
             print("✅ Models and data saved successfully")
             
         except Exception as e:
             print(f"❌ Error saving models: {e}")
     
+    def save_training_data(self):
+        """Flush buffered samples to the training logs and save the metrics."""
+        for log in self.training_data.values():
+            log.flush()
+            
+        # Save learning metrics
+        write_json_atomic(f"{self.model_dir}/learning_metrics.json", self.learning_metrics)
+    
+    def _migrate_training_data_json(self):
+        """Move a training_data.json written before the logs into them (once)."""
+        legacy_path = f"{self.model_dir}/training_data.json"
+        if not os.path.exists(legacy_path):
+            return
+        with open(legacy_path, "r") as f:
+            legacy = json.load(f)
+        for category, log in self.training_data.items():
+            for sample in legacy.get(category, []):
+                log.append(sample)
+            log.flush()
+        os.replace(legacy_path, f"{legacy_path}.migrated")
+        print("✅ Migrated training_data.json into the training logs")
+    
+    def request_training(self, models: List[str]) -> List[str]:
+        """Persist new samples and queue training jobs; returns the models newly queued."""
+        self.save_training_data()
+        params = {"learning_mode": self.learning_mode}
+        queued = [model for model in models if self.jobs.enqueue(model, params)]
+        if queued:
+            print(f"📬 Queued training for {', '.join(queued)}")
+        return queued
+    
     def collect_training_data(self, user_message: str, gemini_emotion_data: Dict, 
                             gemini_response: str, gemini_emolytics: Dict):
         """Collect training data from Gemini interactions."""
@@ -121,18 +304,30 @@ class ProgressiveLearningSystem:
         self.learning_metrics["total_interactions"] += 1
         
         # Check if it's time to retrain
-        if self.learning_metrics["total_interactions"] % self.learning_metrics["training_frequency"] == 0:
-            self.train_models()
+        total = self.learning_metrics["total_interactions"]
+        if self.learning_mode == "online":
+            due = [ONLINE_UPDATE] if total % self.online_batch_size == 0 else []
+        else:
+            due = [model for model, every in self.train_every.items() if total % every == 0]
+        if due:
+            if self.training_mode == "worker":
+                self.request_training(due)
+            elif self.learning_mode == "online":
+                self.update_online()
+            else:
+                self.train_models(due)
     
     def train_emotion_classifier(self):
         """Train emotion classification model."""
-        if len(self.training_data["emotion_data"]) < 50:
+        if len(self.training_data["emotion_data"]) < self.min_samples["emotion_classifier"]:
             print("⚠️ Need more training data for emotion classifier")
             return
         
-        # Prepare training data
-        texts = [sample["text"] for sample in self.training_data["emotion_data"]]
-        emotions = [sample["primary_emotion"] for sample in self.training_data["emotion_data"]]
+        # Prepare training data (one streaming pass over the log)
+        texts, emotions = [], []
+        for sample in self.training_data["emotion_data"]:
+            texts.append(sample["text"])
+            emotions.append(sample["primary_emotion"])
         
         # Vectorize text
         vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
@@ -143,63 +338,64 @@ class ProgressiveLearningSystem:
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
         # Train model
-        self.emotion_classifier = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.emotion_classifier.fit(X_train, y_train)
+        classifier = RandomForestClassifier(n_estimators=100, random_state=42,
+                                            n_jobs=self.model_resources["emotion_classifier"]["n_jobs"])
+        classifier.fit(X_train, y_train)
         
         # Evaluate
-        y_pred = self.emotion_classifier.predict(X_test)
+        y_pred = classifier.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
         
         print(f"🎯 Emotion classifier trained - Accuracy: {accuracy:.3f}")
         
-        # Save vectorizer
-        joblib.dump(vectorizer, f"{self.model_dir}/emotion_vectorizer.pkl")
+        # Stage for the next bundle
+        self._staged_components["emotion_vectorizer"] = vectorizer
+        self._staged_components["emotion_classifier"] = classifier
         
         return accuracy
     
     def train_response_generator(self):
         """Train response generation model using patterns."""
-        if len(self.training_data["conversation_pairs"]) < 50:
+        if len(self.training_data["conversation_pairs"]) < self.min_samples["response_generator"]:
             print("⚠️ Need more training data for response generator")
             return
         
-        # Create response templates based on patterns
+        # Create response templates based on patterns, and the inputs of a
+        # simple classifier for response selection (one streaming pass over the log)
         response_patterns = defaultdict(list)
+        texts, emotions = [], []
         
         for sample in self.training_data["conversation_pairs"]:
             emotion = sample["emotion_context"].get("primary_emotion", "neutral")
             response_patterns[emotion].append(sample["ai_response"])
+            texts.append(sample["user_input"])
+            emotions.append(emotion)
         
-        # Store patterns
-        self.response_patterns = dict(response_patterns)
-        
-        # Create a simple classifier for response selection
-        texts = [sample["user_input"] for sample in self.training_data["conversation_pairs"]]
-        emotions = [sample["emotion_context"].get("primary_emotion", "neutral") 
-                   for sample in self.training_data["conversation_pairs"]]
+        response_patterns = dict(response_patterns)
         
         vectorizer = TfidfVectorizer(max_features=500, stop_words='english')
         X = vectorizer.fit_transform(texts)
         
-        self.response_classifier = MLPClassifier(hidden_layer_sizes=(100, 50), max_iter=500, random_state=42)
-        self.response_classifier.fit(X, emotions)
+        classifier = MLPClassifier(hidden_layer_sizes=(100, 50), max_iter=500, random_state=42)
+        classifier.fit(X, emotions)
         
         print(f"🎯 Response generator trained with {len(response_patterns)} emotion patterns")
         
-        # Save components
-        joblib.dump(vectorizer, f"{self.model_dir}/response_vectorizer.pkl")
-        joblib.dump(self.response_patterns, f"{self.model_dir}/response_patterns.pkl")
+        # Stage for the next bundle (the classifier was previously never saved)
+        self._staged_components["response_vectorizer"] = vectorizer
+        self._staged_components["response_classifier"] = classifier
+        self._staged_components["response_patterns"] = response_patterns
         
         return True
     
     def train_emolytics_analyzer(self):
         """Train emolytics analysis model."""
-        if len(self.training_data["emolytics_patterns"]) < 30:
+        if len(self.training_data["emolytics_patterns"]) < self.min_samples["emolytics_analyzer"]:
             print("⚠️ Need more training data for emolytics analyzer")
             return
         
         # Extract patterns from emolytics data
-        self.emolytics_patterns = {
+        emolytics_patterns = {
             "emotion_to_wellness": defaultdict(list),
             "trigger_patterns": defaultdict(list),
             "recommendation_patterns": defaultdict(list)
@@ -212,64 +408,187 @@ class ProgressiveLearningSystem:
             # Map emotions to wellness scores
             if "emotional_state" in emolytics:
                 wellness_score = emolytics["emotional_state"].get("stability", 50)
-                self.emolytics_patterns["emotion_to_wellness"][emotion].append(wellness_score)
+                emolytics_patterns["emotion_to_wellness"][emotion].append(wellness_score)
             
             # Map triggers to recommendations
             triggers = sample["emotion_data"].get("emotional_triggers", [])
             recommendations = emolytics.get("recommendations", {}).get("immediate_actions", [])
             
             for trigger in triggers:
-                self.emolytics_patterns["trigger_patterns"][trigger].extend(recommendations)
+                emolytics_patterns["trigger_patterns"][trigger].extend(recommendations)
         
-        print(f"🎯 Emolytics analyzer trained with {len(self.emolytics_patterns['emotion_to_wellness'])} emotion patterns")
+        print(f"🎯 Emolytics analyzer trained with {len(emolytics_patterns['emotion_to_wellness'])} emotion patterns")
         
-        # Save patterns
-        joblib.dump(self.emolytics_patterns, f"{self.model_dir}/emolytics_patterns.pkl")
+        # Stage for the next bundle
+        self._staged_components["emolytics_patterns"] = emolytics_patterns
         
         return True
     
-    def train_models(self):
-        """Train all models with collected data."""
-        print("🚀 Starting model training...")
-        
-        # Train emotion classifier
-        emotion_accuracy = self.train_emotion_classifier()
-        
-        # Train response generator
-        response_success = self.train_response_generator()
-        
-        # Train emolytics analyzer
-        emolytics_success = self.train_emolytics_analyzer()
+    def _fit(self, model: str):
+        """
+        Run one trainer under its thread limit; returns its result and resource usage.
+        
+        peak_memory_mb is only known for fits in pool processes (set by _fit_in_process);
+        in a shared process the high-water mark belongs to everything else it ran.
+        """
+        resources = self.model_resources[model]
+        started_at = time.time()
+        started = time.perf_counter()
+        with threadpool_limits(limits=resources["threads"]):
+            result = getattr(self, MODEL_TRAINERS[model])()
+        memory_limit = None
+        if resource is not None:
+            soft_limit = resource.getrlimit(resource.RLIMIT_AS)[0]
+            memory_limit = None if soft_limit == resource.RLIM_INFINITY else soft_limit >> 20
+        return result, {
+            "wall_seconds": round(time.perf_counter() - started, 3),
+            "peak_memory_mb": None,
+            "memory_limit_mb": memory_limit,
+            "n_jobs": resources["n_jobs"],
+            "threads": resources["threads"],
+            "started_at": started_at,
+            "finished_at": time.time(),
+            "pid": os.getpid(),
+        }
+    
+    def _fit_in_pool(self, models: List[str], progress=None):
+        """Fit models concurrently, each in a fresh process (so its peak memory is its own)."""
+        # Forked from a server process that has already imported this module (and sklearn),
+        # so workers start quickly without inheriting the caller's threads or state
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        
+        def fit_isolated(model):
+            # One single-process pool per model: a fit that kills its process (native code
+            # aborts on allocation failures under memory_mb) can't fail the other models
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                return pool.submit(_fit_in_process, self.model_dir, model, self.min_samples,
+                                   self.model_resources[model]).result()
+        
+        results, usage = {}, {}
+        with ThreadPoolExecutor(max_workers=min(self.training_processes, len(models))) as launcher:
+            futures = {launcher.submit(fit_isolated, model): model for model in models}
+            for done, future in enumerate(as_completed(futures), 1):
+                model = futures[future]
+                try:
+                    results[model], components, usage[model] = future.result()
+                    self._staged_components.update(components)
+                except Exception as e:
+                    print(f"❌ Training {model} failed: {e!r}")
+                    results[model], usage[model] = None, {"error": repr(e)}
+                if progress is not None:
+                    progress(model, done, len(models))
+        return results, usage
+    
+    def train_models(self, models: Optional[List[str]] = None, progress=None):
+        """
+        Train the given models (all by default) with collected data and publish them.
+        
+        With training_processes > 1 the models are fitted concurrently in a
+        process pool, so a run takes about as long as the slowest model.
+        
+        Args:
+            progress: Optional callback(model, done, total) called as each model finishes
+        """
+        models = [model for model in MODEL_TRAINERS if models is None or model in models]
+        print(f"🚀 Starting model training ({', '.join(models)})...")
+        
+        started = time.perf_counter()
+        watermark = self.data_watermark()  # the fits read the logs up to here
+        if self.training_processes > 1 and len(models) > 1:
+            self.save_training_data()  # pool processes read the logs from disk
+            results, usage = self._fit_in_pool(models, progress)
+        else:
+            results, usage = {}, {}
+            for done, model in enumerate(models, 1):
+                results[model], usage[model] = self._fit(model)
+                if progress is not None:
+                    progress(model, done, len(models))
+        durations = {model: usage[model].get("wall_seconds") for model in models}
+        for model in models:
+            if "wall_seconds" in usage[model]:
+                memory = usage[model]["peak_memory_mb"]
+                print(f"⏱️ {model}: {usage[model]['wall_seconds']}s"
+                      + (f", peak memory {memory} MB" if memory is not None else ""))
         
         # Update learning metrics
+        emotion_accuracy = results.get("emotion_classifier")
         self.learning_metrics["last_training"] = datetime.now().isoformat()
         if emotion_accuracy:
             self.learning_metrics["model_confidence"] = emotion_accuracy
         
         # Save models
-        self.save_models()
+        self.save_models(metrics={"emotion_accuracy": emotion_accuracy, "durations": durations},
+                         watermark=watermark)
         
         print("✅ Model training completed!")
         
         return {
             "emotion_accuracy": emotion_accuracy,
-            "response_success": response_success,
-            "emolytics_success": emolytics_success
+            "response_success": results.get("response_generator"),
+            "emolytics_success": results.get("emolytics_analyzer"),
+            "durations": durations,
+            "resources": usage,
+            "wall_seconds": round(time.perf_counter() - started, 3),
+            "bundle_version": self.bundle.version if self.bundle else None
+        }
+    
+    def update_online(self) -> Dict:
+        """
+        Apply the samples collected since the last update to the online models and checkpoint them.
+        
+        New samples are read from the training logs from where the previous
+        update stopped, so the cost depends on the batch, not on the
+        amount of data collected. A new learner resumes from the newest
+        published checkpoint, which is not the served bundle when
+        auto_promote is off.
+        """
+        self.save_training_data()
+        if self.online is None:
+            self.online = OnlineLearner.from_bundle(self.registry.latest("online_state")) or OnlineLearner()
+        learner = self.online
+        
+        started = time.perf_counter()
+        stats = learner.update_from_logs(self.training_data)
+        duration = round(time.perf_counter() - started, 3)
+        print(f"🎯 Online update: {stats['emotion_data']} samples in {duration}s - "
+              f"prequential accuracy {learner.accuracy:.3f}")
+        
+        self.learning_metrics["last_training"] = datetime.now().isoformat()
+        if learner.state["samples_seen"] >= self.min_samples["emotion_classifier"]:
+            self.learning_metrics["model_confidence"] = round(learner.accuracy, 4)
+        
+        # Checkpoint: the models are a fixed size, however many samples they have seen
+        self._staged_components.update(learner.components())
+        self.save_models(
+            replace=True,
+            metrics={"prequential_accuracy": round(learner.accuracy, 4),
+                     "samples_seen": learner.state["samples_seen"]},
+            watermark={category: {"records": len(self.training_data[category]),
+                                  "position": list(position) if position else None}
+                       for category, position in learner.state["positions"].items()}
+        )
+        
+        return {
+            **stats,
+            "durations": {ONLINE_UPDATE: duration},
+            "bundle_version": self.bundle.version if self.bundle else None
         }
     
     def predict_emotion(self, text: str) -> Dict:
         """Predict emotion using trained model."""
-        if not self.emotion_classifier:
+        bundle = self.bundle
+        if bundle is None or "emotion_classifier" not in bundle:
             return {"primary_emotion": "neutral", "confidence": 0.0}
         
         try:
-            # Load vectorizer
-            vectorizer = joblib.load(f"{self.model_dir}/emotion_vectorizer.pkl")
-            X = vectorizer.transform([text])
+            # Resident models (loaded once per bundle)
+            classifier = bundle.get("emotion_classifier")
+            X = bundle.get("emotion_vectorizer").transform([text])
             
             # Predict
-            emotion = self.emotion_classifier.predict(X)[0]
-            confidence = max(self.emotion_classifier.predict_proba(X)[0])
+            emotion = classifier.predict(X)[0]
+            confidence = max(classifier.predict_proba(X)[0])
             
             return {
                 "primary_emotion": emotion,
@@ -282,20 +601,28 @@ class ProgressiveLearningSystem:
     
     def generate_response(self, user_message: str, emotion_data: Dict) -> str:
         """Generate response using trained model."""
-        if not hasattr(self, 'response_patterns'):
+        bundle = self.bundle
+        if bundle is not None and "online_state" in bundle:
+            # Online bundles select responses with the emotion classifier (it predicts the same label)
+            vectorizer_name, classifier_name = "emotion_vectorizer", "emotion_classifier"
+        else:
+            vectorizer_name, classifier_name = "response_vectorizer", "response_classifier"
+        if bundle is None or not all(
+            name in bundle for name in ("response_patterns", vectorizer_name, classifier_name)
+        ):
             return "I'm still learning. Please continue our conversation."
         
         try:
-            # Load vectorizer and classifier
-            vectorizer = joblib.load(f"{self.model_dir}/response_vectorizer.pkl")
-            X = vectorizer.transform([user_message])
+            # Resident vectorizer and classifier (loaded once per bundle)
+            response_patterns = bundle.get("response_patterns")
+            X = bundle.get(vectorizer_name).transform([user_message])
             
             # Predict emotion
-            predicted_emotion = self.response_classifier.predict(X)[0]
+            predicted_emotion = bundle.get(classifier_name).predict(X)[0]
             
             # Get response pattern
-            if predicted_emotion in self.response_patterns:
-                responses = self.response_patterns[predicted_emotion]
+            if predicted_emotion in response_patterns:
+                responses = response_patterns[predicted_emotion]
                 # Return a random response from the pattern
                 return np.random.choice(responses)
             else:
@@ -307,14 +634,16 @@ class ProgressiveLearningSystem:
     
     def analyze_emolytics(self, emotion_data: Dict, conversation_context: List[Dict]) -> Dict:
         """Analyze emolytics using trained model."""
-        if not hasattr(self, 'emolytics_patterns'):
+        bundle = self.bundle
+        emolytics_patterns = bundle.get("emolytics_patterns") if bundle is not None else None
+        if emolytics_patterns is None:
             return self._default_emolytics(emotion_data)
         
         try:
             emotion = emotion_data.get("primary_emotion", "neutral")
             
             # Get wellness score pattern
-            wellness_scores = self.emolytics_patterns["emotion_to_wellness"].get(emotion, [50])
+            wellness_scores = emolytics_patterns["emotion_to_wellness"].get(emotion, [50])
             avg_wellness = np.mean(wellness_scores) if wellness_scores else 50
             
             # Get recommendation patterns
@@ -322,8 +651,8 @@ class ProgressiveLearningSystem:
             recommendations = []
             
             for trigger in triggers:
-                if trigger in self.emolytics_patterns["trigger_patterns"]:
-                    recommendations.extend(self.emolytics_patterns["trigger_patterns"][trigger])
+                if trigger in emolytics_patterns["trigger_patterns"]:
+                    recommendations.extend(emolytics_patterns["trigger_patterns"][trigger])
             
             # Remove duplicates and limit
             recommendations = list(set(recommendations))[:3]
@@ -378,10 +707,12 @@ class ProgressiveLearningSystem:
     
     def should_use_own_model(self) -> bool:
         """Determine if we should use our own model instead of Gemini."""
+        self.refresh_models()
         return self.learning_metrics["model_confidence"] >= self.learning_metrics["independence_threshold"]
     
     def get_learning_status(self) -> Dict:
         """Get current learning status and metrics."""
+        self.refresh_models()
         return {
             "total_interactions": self.learning_metrics["total_interactions"],
             "model_confidence": self.learning_metrics["model_confidence"],
@@ -392,5 +723,10 @@ class ProgressiveLearningSystem:
                 "emotion_data": len(self.training_data["emotion_data"]),
                 "conversation_pairs": len(self.training_data["conversation_pairs"]),
                 "emolytics_patterns": len(self.training_data["emolytics_patterns"])
-            }
+            },
+            "training_mode": self.training_mode,
+            "learning_mode": self.learning_mode,
+            "online_learning": self.bundle.get("online_state") if self.bundle and "online_state" in self.bundle else None,
+            "model_version": self.bundle.version if self.bundle else None,
+            "training_jobs": self.jobs.get_status() if self.jobs else None
         } 
\ No newline at end of file
@@ -0,0 +1,237 @@
+"""
+Evolance Provider Router
+Hedged, deadline-aware racing of LLM providers with per-provider circuit breakers
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# A provider takes (message, emotion, intent, context) and returns a response or None
+ProviderFn = Callable[[str, str, str, Optional[Dict]], Awaitable[Optional[str]]]
+
+
+class CircuitBreaker:
+    """
+    Skips a provider after repeated failures
+
+    closed    -> requests flow normally
+    open      -> requests are skipped until reset_timeout has passed
+    half_open -> a single trial request decides whether to close or re-open
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_cancelled(self):
+        """A permitted request never completed (e.g. it lost a hedged race)"""
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = self._clock()
+
+
+class ProviderStats:
+    """Rolling latency window and outcome counters for one provider"""
+
+    def __init__(self, window: int = 200):
+        self.latencies = deque(maxlen=window)  # seconds, successful calls only
+        self.successes = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.hedges_started = 0
+        self.wins = 0
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        return float(np.percentile(self.latencies, q))
+
+    def to_dict(self) -> Dict[str, Any]:
+        calls = self.successes + self.failures + self.timeouts
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "successes": self.successes,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "skipped": self.skipped,
+            "hedges_started": self.hedges_started,
+            "wins": self.wins,
+            "error_rate": round((self.failures + self.timeouts) / calls, 3) if calls else 0.0,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+@dataclass
+class Provider:
+    """An LLM provider registered with the router"""
+    name: str
+    generate: ProviderFn
+    deadline: float = 10.0  # seconds before a call is abandoned
+    hedge_after: float = 2.0  # hedge delay used until enough latency samples exist
+    min_samples: int = 20  # samples needed before the observed p95 replaces hedge_after
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+    stats: ProviderStats = field(default_factory=ProviderStats)
+
+    def hedge_delay(self) -> float:
+        """How long to wait for this provider before starting the next one"""
+        if len(self.stats.latencies) >= self.min_samples:
+            return min(self.stats.percentile(95), self.deadline)
+        return min(self.hedge_after, self.deadline)
+
+
+class ProviderRouter:
+    """
+    Races providers in priority order
+
+    The first available provider starts immediately. If it has not answered
+    by its hedge delay (its observed p95 latency), the next provider is started
+    in parallel, and so on. The first non-empty response wins and the
+    remaining calls are cancelled. Providers whose circuit is open are skipped.
+    """
+
+    def __init__(self, providers: List[Provider], fallback: Optional[ProviderFn] = None):
+        """
+        Args:
+            providers: Providers in priority order
+            fallback: Called when every provider fails, times out or is skipped
+        """
+        self.providers = providers
+        self.fallback = fallback
+
+    async def _call(self, provider: Provider, message: str, emotion: str,
+                    intent: str, context: Optional[Dict]) -> Optional[str]:
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                provider.generate(message, emotion, intent, context), timeout=provider.deadline
+            )
+        except asyncio.TimeoutError:
+            provider.stats.timeouts += 1
+            provider.breaker.record_failure()
+            logger.warning(f"Provider {provider.name} exceeded its {provider.deadline}s deadline")
+            return None
+        except asyncio.CancelledError:
+            # Lost the race; says nothing about provider health
+            provider.breaker.record_cancelled()
+            raise
+        except Exception as e:
+            provider.stats.failures += 1
+            provider.breaker.record_failure()
+            logger.warning(f"Provider {provider.name} failed: {e}")
+            return None
+
+        if not response:
+            provider.stats.failures += 1
+            provider.breaker.record_failure()
+            return None
+
+        provider.stats.successes += 1
+        provider.stats.latencies.append(time.perf_counter() - started)
+        provider.breaker.record_success()
+        return response
+
+    async def generate(self, message: str, emotion: str, intent: str,
+                       context: Optional[Dict] = None, **fallback_kwargs) -> Optional[str]:
+        """Return the first successful provider response, or the fallback's"""
+        response, _ = await self.generate_with_source(message, emotion, intent, context, **fallback_kwargs)
+        return response
+
+    async def generate_with_source(self, message: str, emotion: str, intent: str,
+                                   context: Optional[Dict] = None,
+                                   **fallback_kwargs) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Like generate, but also return the winning provider's name (None for the fallback)
+
+        Args:
+            fallback_kwargs: Passed to the fallback only, e.g. a precomputed query embedding
+        """
+        queue = []
+        for provider in self.providers:
+            if provider.breaker.allow_request():
+                queue.append(provider)
+            else:
+                provider.stats.skipped += 1
+
+        running: Dict[asyncio.Task, Provider] = {}
+        try:
+            while queue or running:
+                if queue:
+                    provider = queue.pop(0)
+                    if running:
+                        provider.stats.hedges_started += 1
+                    task = asyncio.ensure_future(self._call(provider, message, emotion, intent, context))
+                    running[task] = provider
+                    # Give the newest provider until its hedge delay before starting another
+                    wait_for = provider.hedge_delay() if queue else None
+                else:
+                    wait_for = None
+
+                done, _ = await asyncio.wait(running, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    winner = running.pop(task)
+                    response = task.result()
+                    if response:
+                        winner.stats.wins += 1
+                        return response, winner.name
+        finally:
+            for task, provider in running.items():
+                task.cancel()
+                provider.breaker.record_cancelled()
+            for provider in queue:
+                provider.breaker.record_cancelled()
+
+        if self.fallback is not None:
+            return await self.fallback(message, emotion, intent, context, **fallback_kwargs), None
+        return None, None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-provider latency, error and circuit statistics"""
+        return {
+            provider.name: {
+                **provider.stats.to_dict(),
+                "circuit": provider.breaker.state,
+                "hedge_delay_ms": round(provider.hedge_delay() * 1000, 1),
+            }
+            for provider in self.providers
+        }
@@ -0,0 +1,249 @@
+"""
+Evolance Semantic Response Cache
+Two-tier cache in front of external LLM providers:
+exact match on the normalized prompt, then embedding nearest-neighbor lookup
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Any, Set
+
+import numpy as np
+
+from .crisis import has_crisis_indicators
+
+_NON_WORD = re.compile(r"[^\w\s']+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass
+class CacheEntry:
+    """A cached provider response"""
+    response: str
+    group: str  # namespace + emotion + intent; semantic hits must stay within a group
+    expires_at: float
+    slot: Optional[int] = None  # row in the embedding matrix, if embedded
+    hits: int = 0
+
+
+class SemanticResponseCache:
+    """
+    Response cache keyed by (namespace, emotion, intent, prompt)
+
+    Never serves or stores responses for messages with crisis indicators,
+    and skips users who opted out of caching.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_entries: int = 5000,
+                 similarity_threshold: float = 0.92,
+                 embed_fn: Callable[[List[str]], np.ndarray] = None,
+                 clock: Callable[[], float] = time.time,
+                 opted_out_users: Optional[Set[str]] = None):
+        """
+        Args:
+            ttl_seconds: How long an entry may be served
+            max_entries: LRU capacity
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            embed_fn: Maps texts to normalized embeddings; the semantic tier is off without it
+            opted_out_users: Set of opted-out user ids to share with another cache, so one
+                             preference covers both; a new set by default
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn = embed_fn
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._opted_out = opted_out_users if opted_out_users is not None else set()
+
+        # Semantic tier: one embedding row per cached entry
+        self._vectors: Optional[np.ndarray] = None
+        self._slot_keys: List[Optional[str]] = []
+        self._slot_groups: List[Optional[str]] = []
+        self._free_slots: List[int] = []
+
+        self._metrics = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "bypassed_crisis": 0,
+            "bypassed_opt_out": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    @staticmethod
+    def normalize(prompt: str) -> str:
+        """Lowercase, strip punctuation and collapse whitespace"""
+        return _WHITESPACE.sub(" ", _NON_WORD.sub(" ", prompt.lower())).strip()
+
+    @staticmethod
+    def _group(namespace: str, emotion: str, intent: str) -> str:
+        return f"{namespace}|{emotion}|{intent}"
+
+    def _key(self, group: str, normalized: str) -> str:
+        return hashlib.sha256(f"{group}|{normalized}".encode("utf-8")).hexdigest()
+
+    @property
+    def opted_out_users(self) -> Set[str]:
+        return self._opted_out
+
+    def set_opt_out(self, user_id: str, opted_out: bool = True):
+        """Exclude (or re-include) a user's messages from caching"""
+        with self._lock:
+            if opted_out:
+                self._opted_out.add(user_id)
+            else:
+                self._opted_out.discard(user_id)
+
+    def _bypass(self, prompt: str, user_id: Optional[str], count: bool = True) -> bool:
+        if has_crisis_indicators(prompt):
+            if count:
+                self._metrics["bypassed_crisis"] += 1
+            return True
+        if user_id is not None and user_id in self._opted_out:
+            if count:
+                self._metrics["bypassed_opt_out"] += 1
+            return True
+        return False
+
+    def _embed(self, prompt: str, embedding: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        if embedding is not None:
+            return np.asarray(embedding, dtype=np.float32)
+        if self.embed_fn is None:
+            return None
+        vector = np.asarray(self.embed_fn([prompt])[0], dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        if entry.slot is not None:
+            self._slot_keys[entry.slot] = None
+            self._slot_groups[entry.slot] = None
+            self._free_slots.append(entry.slot)
+
+    def get(self, prompt: str, emotion: str, intent: str, user_id: str = None,
+            namespace: str = "default", embedding: np.ndarray = None) -> Optional[str]:
+        """
+        Look up a cached response
+
+        Args:
+            embedding: Precomputed normalized embedding of the prompt, if the caller has one
+        """
+        with self._lock:
+            if self._bypass(prompt, user_id):
+                return None
+
+            now = self._clock()
+            group = self._group(namespace, emotion, intent)
+            key = self._key(group, self.normalize(prompt))
+
+            # Tier 1: exact match
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    entry.hits += 1
+                    self._metrics["exact_hits"] += 1
+                    return entry.response
+                self._remove(key)
+                self._metrics["expirations"] += 1
+            semantic = self._vectors is not None
+
+        # Tier 2: nearest neighbor within the same namespace/emotion/intent.
+        # Embedding happens outside the lock so lookups are not serialized on the encoder.
+        vector = self._embed(prompt, embedding) if semantic else None
+
+        with self._lock:
+            if vector is not None and self._vectors is not None:
+                candidates = [slot for slot, slot_group in enumerate(self._slot_groups) if slot_group == group]
+                if candidates:
+                    similarities = self._vectors[candidates] @ vector
+                    best = int(np.argmax(similarities))
+                    if similarities[best] >= self.similarity_threshold:
+                        neighbor_key = self._slot_keys[candidates[best]]
+                        neighbor = self._entries[neighbor_key]
+                        if neighbor.expires_at > now:
+                            self._entries.move_to_end(neighbor_key)
+                            neighbor.hits += 1
+                            self._metrics["semantic_hits"] += 1
+                            return neighbor.response
+                        self._remove(neighbor_key)
+                        self._metrics["expirations"] += 1
+
+            self._metrics["misses"] += 1
+            return None
+
+    def put(self, prompt: str, emotion: str, intent: str, response: str, user_id: str = None,
+            namespace: str = "default", embedding: np.ndarray = None):
+        """Cache a provider response"""
+        if not response:
+            return
+        with self._lock:
+            # Bypasses are counted on lookup only
+            if self._bypass(prompt, user_id, count=False):
+                return
+        vector = self._embed(prompt, embedding)
+
+        with self._lock:
+            group = self._group(namespace, emotion, intent)
+            key = self._key(group, self.normalize(prompt))
+            if key in self._entries:
+                self._remove(key)
+
+            entry = CacheEntry(response=response, group=group, expires_at=self._clock() + self.ttl_seconds)
+            if vector is not None:
+                entry.slot = self._allocate_slot(vector)
+                self._slot_keys[entry.slot] = key
+                self._slot_groups[entry.slot] = group
+
+            self._entries[key] = entry
+            self._metrics["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._metrics["evictions"] += 1
+
+    def _allocate_slot(self, vector: np.ndarray) -> int:
+        if self._vectors is None:
+            self._vectors = np.zeros((0, vector.shape[0]), dtype=np.float32)
+        if self._free_slots:
+            slot = self._free_slots.pop()
+        else:
+            slot = len(self._slot_keys)
+            self._slot_keys.append(None)
+            self._slot_groups.append(None)
+            if slot >= len(self._vectors):
+                # Grow geometrically up to max_entries (+1 for the entry being evicted)
+                capacity = min(max(16, len(self._vectors) * 2), self.max_entries + 1)
+                grown = np.zeros((max(capacity, slot + 1), vector.shape[0]), dtype=np.float32)
+                grown[:len(self._vectors)] = self._vectors
+                self._vectors = grown
+        self._vectors[slot] = vector
+        return slot
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._vectors = None
+            self._slot_keys, self._slot_groups, self._free_slots = [], [], []
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Hit-rate and size statistics"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            lookups = metrics["exact_hits"] + metrics["semantic_hits"] + metrics["misses"]
+            metrics["entries"] = len(self._entries)
+            metrics["opted_out_users"] = len(self._opted_out)
+            metrics["hit_rate"] = round(
+                (metrics["exact_hits"] + metrics["semantic_hits"]) / lookups, 3
+            ) if lookups else 0.0
+            return metrics
+
+# Global instance used by the Gemini analyzer; its opt-outs are shared with the hybrid system's cache
+response_cache = SemanticResponseCache()
@@ -4,12 +4,89 @@ The foundation of emotional intelligence - maps emotions, concepts, and relation
 """
 
 import json
-import networkx as nx
+import os
+import re
+import zlib
+import hashlib
+import logging
+from pathlib import Path
 from typing import Dict, List, Set, Tuple, Optional, Any
 from dataclasses import dataclass, asdict
 from collections import defaultdict
 import numpy as np
 from .config import config
+from .semantic_snapshot import SnapshotError, read_snapshot, write_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Snapshots are tied to the exact source that built them
+SOURCE_VERSION = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+DEFAULT_SNAPSHOT_PATH = Path(
+    os.getenv("EVOLANCE_SEMANTIC_SNAPSHOT", Path(__file__).with_name("core_network.evsnap"))
+)
+
+# Node type codes used by the array index
+NODE_UNKNOWN = 0
+NODE_EMOTION = 1
+NODE_CONCEPT = 2
+
+# Hashed bag-of-words space for the emotion lexicon
+LEXICON_HASH_FEATURES = 2 ** 18
+_TOKEN_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+# Negation scope ends at clause punctuation or a contrasting conjunction
+_CLAUSE_PATTERN = re.compile(r"[.,;:!?]+|\bbut\b|\bhowever\b")
+
+# Plutchik's primary dyads: each mixed emotion is a blend of two primaries
+MIXED_EMOTION_COMPONENTS = {
+    "love": ("joy", "trust"),
+    "submission": ("trust", "fear"),
+    "awe": ("fear", "surprise"),
+    "disappointment": ("surprise", "sadness"),
+    "remorse": ("sadness", "disgust"),
+    "contempt": ("disgust", "anger"),
+    "aggressiveness": ("anger", "anticipation"),
+    "optimism": ("anticipation", "joy"),
+}
+
+# Everyday surface forms that the node synonyms don't cover
+EMOTION_KEYWORDS = {
+    "joy": ["happy", "glad", "great", "wonderful", "excited", "cheerful", "grateful", "thrilled"],
+    "trust": ["trusting", "safe", "secure", "supported", "reliable"],
+    "fear": ["afraid", "scared", "anxious", "worried", "nervous", "panic", "stressed", "overwhelmed", "frightened"],
+    "surprise": ["surprised", "shocked", "unexpected", "suddenly", "wow"],
+    "sadness": ["sad", "unhappy", "depressed", "lonely", "down", "crying", "heartbroken", "hopeless", "miserable"],
+    "disgust": ["disgusted", "gross", "sick", "repulsed"],
+    "anger": ["angry", "mad", "furious", "annoyed", "frustrated", "irritated", "hate"],
+    "anticipation": ["looking_forward", "can't_wait", "eager", "hopeful", "waiting"],
+    "love": ["loving", "adore", "caring", "cherish"],
+    "remorse": ["guilty", "sorry", "ashamed", "regretful"],
+    "disappointment": ["disappointed", "let_down", "discouraged"],
+}
+
+# Lexicon term weights by where the term comes from
+LEXICON_WEIGHTS = {
+    "name": 1.0,
+    "keyword": 1.0,
+    "synonym": 0.8,
+    "trigger": 0.3,
+    "antonym": -0.5,
+    "component": 0.5,  # share of a mixed emotion's weight passed to each primary
+}
+
+# Words that negate the emotion terms in the next NEGATION_SCOPE tokens of a
+# clause ("not happy", "never felt safe"); tokens ending in n't also count
+NEGATION_CUES = {
+    "not", "no", "never", "nothing", "nobody", "none", "neither", "nor",
+    "without", "hardly", "barely", "cannot", "dont", "cant", "wont", "isnt", "wasnt",
+}
+NEGATION_SCOPE = 3
+
+# Multipliers for the term right after a degree modifier ("very happy", "slightly worried")
+INTENSIFIERS = {
+    "very": 1.5, "so": 1.5, "really": 1.5, "too": 1.5, "totally": 1.5, "absolutely": 1.5,
+    "deeply": 1.5, "truly": 1.5, "super": 1.5, "extremely": 2.0, "incredibly": 2.0,
+    "slightly": 0.5, "somewhat": 0.5, "mildly": 0.5, "kinda": 0.5, "bit": 0.5, "little": 0.5,
+}
 
 @dataclass
 class EmotionNode:
@@ -45,6 +122,99 @@ class Relationship:
     bidirectional: bool = False
     context: Dict[str, Any] = None
 
+@dataclass
+class NetworkIndex:
+    """Array-backed adjacency index over the network (CSR layout)"""
+    node_names: List[str]
+    node_ids: Dict[str, int]
+    node_types: np.ndarray  # int8, one of NODE_*
+    indptr: np.ndarray  # int32, outgoing edges of node i are indptr[i]:indptr[i + 1]
+    indices: np.ndarray  # int32 target node ids
+    strengths: np.ndarray  # float64 edge strengths
+    rel_types: np.ndarray  # int16 ids into rel_type_names
+    rel_type_names: List[str]
+
+def _hash_term(term: str) -> int:
+    """Stable hash of a term into the lexicon feature space"""
+    return zlib.crc32(term.encode("utf-8")) % LEXICON_HASH_FEATURES
+
+def _text_terms(text: str) -> List[str]:
+    """Unigrams plus underscore-joined bigrams, matching multi-word lexicon terms"""
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    return tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+
+def _is_negation(token: str) -> bool:
+    return token in NEGATION_CUES or token.endswith("n't")
+
+class EmotionLexicon:
+    """Sparse hashed-term x emotion matrix for fast lexicon-based emotion scoring"""
+    
+    def __init__(self, emotion_names: List[str], indptr: np.ndarray, indices: np.ndarray, data: np.ndarray):
+        from scipy import sparse
+        
+        self.emotion_names = list(emotion_names)
+        self.matrix = sparse.csr_matrix(
+            (data, indices, indptr), shape=(LEXICON_HASH_FEATURES, len(self.emotion_names))
+        )
+    
+    def has_term(self, term: str) -> bool:
+        feature = _hash_term(term)
+        return self.matrix.indptr[feature + 1] > self.matrix.indptr[feature]
+    
+    def weighted_terms(self, text: str) -> List[Tuple[str, float, bool]]:
+        """
+        (term, weight, negated) for the unigrams and bigrams of a text
+        
+        A degree modifier scales the next term (INTENSIFIERS); a negation cue
+        marks the terms in the rest of its clause, up to NEGATION_SCOPE
+        tokens, as negated. A cue that starts a lexicon phrase ("can't wait")
+        is read as the phrase instead.
+        """
+        terms = []
+        for clause in _CLAUSE_PATTERN.split(text.lower()):
+            tokens = _TOKEN_PATTERN.findall(clause)
+            negated_for, multiplier, previous = 0, 1.0, None
+            for i, token in enumerate(tokens):
+                next_token = tokens[i + 1] if i + 1 < len(tokens) else None
+                negated = negated_for > 0
+                negated_for = max(negated_for - 1, 0)
+                if _is_negation(token) and not (next_token and self.has_term(f"{token}_{next_token}")):
+                    negated_for = NEGATION_SCOPE
+                weight = multiplier
+                multiplier = INTENSIFIERS.get(token, 1.0)
+                terms.append((token, weight, negated))
+                if previous is not None:
+                    terms.append((f"{previous[0]}_{token}", weight, previous[1]))
+                previous = (token, negated)
+        return terms
+    
+    def vectorize(self, texts: List[str], negated: bool = False):
+        """Hashed, modifier-weighted bag-of-words matrix (texts x features) of the plain or the negated terms"""
+        from scipy import sparse
+        
+        rows, cols, values = [], [], []
+        for row, text in enumerate(texts):
+            for term, weight, is_negated in self.weighted_terms(text):
+                if is_negated == negated:
+                    rows.append(row)
+                    cols.append(_hash_term(term))
+                    values.append(weight)
+        # Duplicate (row, col) pairs are summed into term counts
+        return sparse.csr_matrix((np.array(values, dtype=np.float64), (rows, cols)),
+                                 shape=(len(texts), LEXICON_HASH_FEATURES))
+    
+    def score(self, texts: List[str], negated: bool = False) -> np.ndarray:
+        """
+        Raw non-negative emotion scores (texts x emotions)
+        
+        Negated terms are left out; with negated=True only they are scored,
+        which tells callers how much emotional language a text negates.
+        """
+        if not texts:
+            return np.zeros((0, len(self.emotion_names)))
+        scores = (self.vectorize(texts, negated=negated) @ self.matrix).toarray()
+        return np.clip(scores, 0.0, None)
+
 class CoreSemanticNetwork:
     """
     Evolance's core semantic network - the foundation of emotional intelligence
@@ -52,7 +222,9 @@ class CoreSemanticNetwork:
     """
     
     def __init__(self):
-        self.graph = nx.MultiDiGraph()
+        self._graph = None
+        self._node_data = None
+        self._emotion_names = None
         self.emotion_nodes: Dict[str, EmotionNode] = {}
         self.concept_nodes: Dict[str, ConceptNode] = {}
         self.relationships: List[Relationship] = []
@@ -61,6 +233,200 @@ class CoreSemanticNetwork:
         self._initialize_emotions()
         self._initialize_concepts()
         self._initialize_relationships()
+        
+        self.index = self._build_index()
+        self._lexicon_arrays = self._compile_lexicon()
+        self._lexicon = None
+    
+    @classmethod
+    def from_snapshot(cls, path: Path = DEFAULT_SNAPSHOT_PATH) -> "CoreSemanticNetwork":
+        """Load a prebuilt network; raises SnapshotError if the snapshot is missing or stale"""
+        header, arrays = read_snapshot(path, source_version=SOURCE_VERSION)
+        
+        network = cls.__new__(cls)
+        network._graph = None
+        # Node attributes stay in their blob until a caller needs them; the
+        # index and lexicon only need the names
+        network._node_data = arrays["node_data"]
+        network._emotion_nodes = network._concept_nodes = network._relationships = None
+        network._emotion_names = header["emotion_names"]
+        network.index = NetworkIndex(
+            node_names=header["node_names"],
+            node_ids={name: i for i, name in enumerate(header["node_names"])},
+            node_types=arrays["node_types"],
+            indptr=arrays["indptr"],
+            indices=arrays["indices"],
+            strengths=arrays["strengths"],
+            rel_types=arrays["rel_types"],
+            rel_type_names=header["rel_type_names"]
+        )
+        network._lexicon_arrays = {
+            "indptr": arrays["lexicon_indptr"],
+            "indices": arrays["lexicon_indices"],
+            "data": arrays["lexicon_data"]
+        }
+        network._lexicon = None
+        return network
+    
+    def save_snapshot(self, path: Path = DEFAULT_SNAPSHOT_PATH):
+        """Serialize the network and its index to a memory-mappable snapshot"""
+        header = {
+            "source_version": SOURCE_VERSION,
+            "emotion_names": list(self.emotion_nodes),
+            "node_names": self.index.node_names,
+            "rel_type_names": self.index.rel_type_names
+        }
+        node_data = json.dumps(self.export_network(), separators=(",", ":")).encode("utf-8")
+        arrays = {
+            "node_data": np.frombuffer(node_data, dtype=np.uint8),
+            "node_types": self.index.node_types,
+            "indptr": self.index.indptr,
+            "indices": self.index.indices,
+            "strengths": self.index.strengths,
+            "rel_types": self.index.rel_types,
+            "lexicon_indptr": self._lexicon_arrays["indptr"],
+            "lexicon_indices": self._lexicon_arrays["indices"],
+            "lexicon_data": self._lexicon_arrays["data"]
+        }
+        write_snapshot(path, header, arrays)
+    
+    def _load_nodes(self):
+        """Decode node and relationship attributes from the snapshot blob"""
+        data = json.loads(self._node_data.tobytes().decode("utf-8"))
+        self._emotion_nodes = {name: EmotionNode(**node) for name, node in data["emotions"].items()}
+        self._concept_nodes = {name: ConceptNode(**node) for name, node in data["concepts"].items()}
+        self._relationships = [Relationship(**rel) for rel in data["relationships"]]
+        self._node_data = None
+    
+    @property
+    def emotion_nodes(self) -> Dict[str, EmotionNode]:
+        if self._emotion_nodes is None:
+            self._load_nodes()
+        return self._emotion_nodes
+    
+    @emotion_nodes.setter
+    def emotion_nodes(self, nodes: Dict[str, EmotionNode]):
+        self._emotion_nodes = nodes
+    
+    @property
+    def concept_nodes(self) -> Dict[str, ConceptNode]:
+        if self._concept_nodes is None:
+            self._load_nodes()
+        return self._concept_nodes
+    
+    @concept_nodes.setter
+    def concept_nodes(self, nodes: Dict[str, ConceptNode]):
+        self._concept_nodes = nodes
+    
+    @property
+    def relationships(self) -> List[Relationship]:
+        if self._relationships is None:
+            self._load_nodes()
+        return self._relationships
+    
+    @relationships.setter
+    def relationships(self, relationships: List[Relationship]):
+        self._relationships = relationships
+    
+    @property
+    def graph(self):
+        """NetworkX view of the network, built on first access"""
+        if self._graph is None:
+            import networkx as nx
+            
+            graph = nx.MultiDiGraph()
+            for name, emotion in self.emotion_nodes.items():
+                graph.add_node(name, type="emotion", data=asdict(emotion))
+            for name, concept in self.concept_nodes.items():
+                graph.add_node(name, type="concept", data=asdict(concept))
+            for rel in self.relationships:
+                graph.add_edge(rel.source, rel.target, type=rel.relationship_type, strength=rel.strength)
+            self._graph = graph
+        return self._graph
+    
+    @property
+    def lexicon(self) -> EmotionLexicon:
+        """Emotion lexicon matrix, materialized on first use"""
+        if self._lexicon is None:
+            self._lexicon = EmotionLexicon(self._emotion_names or list(self.emotion_nodes), **self._lexicon_arrays)
+        return self._lexicon
+    
+    def _compile_lexicon(self) -> Dict[str, np.ndarray]:
+        """Compile emotion names, synonyms, keywords and dyads into CSR arrays over hashed terms"""
+        emotion_ids = {name: i for i, name in enumerate(self.emotion_nodes)}
+        weights = defaultdict(float)  # (feature, emotion id) -> weight
+        
+        def add_terms(emotion: str, terms: List[str], weight: float):
+            for term in terms:
+                key = (_hash_term(term.lower()), emotion_ids[emotion])
+                # Keep the strongest definition when a term appears twice
+                if abs(weight) > abs(weights.get(key, 0.0)):
+                    weights[key] = weight
+        
+        for name, emotion in self.emotion_nodes.items():
+            add_terms(name, [name], LEXICON_WEIGHTS["name"])
+            add_terms(name, EMOTION_KEYWORDS.get(name, []), LEXICON_WEIGHTS["keyword"])
+            add_terms(name, emotion.synonyms, LEXICON_WEIGHTS["synonym"])
+            add_terms(name, emotion.triggers, LEXICON_WEIGHTS["trigger"])
+            add_terms(name, emotion.antonyms, LEXICON_WEIGHTS["antonym"])
+        
+        # Terms of a mixed emotion also count towards its two primary components
+        for mixed, components in MIXED_EMOTION_COMPONENTS.items():
+            mixed_terms = [(feature, weight) for (feature, emotion_id), weight in list(weights.items())
+                           if emotion_id == emotion_ids[mixed] and weight > 0]
+            for component in components:
+                for feature, weight in mixed_terms:
+                    key = (feature, emotion_ids[component])
+                    weights[key] = max(weights.get(key, 0.0), weight * LEXICON_WEIGHTS["component"])
+        
+        keys = sorted(weights)
+        features = np.array([feature for feature, _ in keys], dtype=np.int32)
+        indptr = np.zeros(LEXICON_HASH_FEATURES + 1, dtype=np.int32)
+        np.cumsum(np.bincount(features, minlength=LEXICON_HASH_FEATURES), out=indptr[1:])
+        return {
+            "indptr": indptr,
+            "indices": np.array([emotion_id for _, emotion_id in keys], dtype=np.int32),
+            "data": np.array([weights[key] for key in keys], dtype=np.float64)
+        }
+    
+    def _build_index(self) -> NetworkIndex:
+        """Build the CSR adjacency index from the node and relationship tables"""
+        node_names = list(self.emotion_nodes) + list(self.concept_nodes)
+        node_ids = {name: i for i, name in enumerate(node_names)}
+        # Relationships may reference nodes that were never declared (as in the graph)
+        for rel in self.relationships:
+            for name in (rel.source, rel.target):
+                if name not in node_ids:
+                    node_ids[name] = len(node_names)
+                    node_names.append(name)
+        
+        node_types = np.zeros(len(node_names), dtype=np.int8)
+        for name in self.emotion_nodes:
+            node_types[node_ids[name]] = NODE_EMOTION
+        for name in self.concept_nodes:
+            node_types[node_ids[name]] = NODE_CONCEPT
+        
+        rel_type_names = sorted({rel.relationship_type for rel in self.relationships})
+        rel_type_ids = {name: i for i, name in enumerate(rel_type_names)}
+        
+        # Stable sort by source keeps edges in insertion order within each row
+        sources = np.array([node_ids[rel.source] for rel in self.relationships], dtype=np.int32)
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(len(node_names) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(sources, minlength=len(node_names)), out=indptr[1:])
+        
+        return NetworkIndex(
+            node_names=node_names,
+            node_ids=node_ids,
+            node_types=node_types,
+            indptr=indptr,
+            indices=np.array([node_ids[self.relationships[i].target] for i in order], dtype=np.int32),
+            strengths=np.array([self.relationships[i].strength for i in order], dtype=np.float64),
+            rel_types=np.array(
+                [rel_type_ids[self.relationships[i].relationship_type] for i in order], dtype=np.int16
+            ),
+            rel_type_names=rel_type_names
+        )
     
     def _initialize_emotions(self):
         """Initialize the core emotion nodes based on Plutchik's Wheel"""
@@ -168,7 +534,6 @@ class CoreSemanticNetwork:
         # Add primary emotions to the network
         for emotion in primary_emotions:
             self.emotion_nodes[emotion.name] = emotion
-            self.graph.add_node(emotion.name, type="emotion", data=asdict(emotion))
         
         # Add mixed emotions (Plutchik's combinations)
         self._add_mixed_emotions()
@@ -278,7 +643,6 @@ class CoreSemanticNetwork:
         # Add mixed emotions to the network
         for emotion in mixed_emotions:
             self.emotion_nodes[emotion.name] = emotion
-            self.graph.add_node(emotion.name, type="emotion", data=asdict(emotion))
     
     def _initialize_concepts(self):
         """Initialize core concept nodes"""
@@ -316,7 +680,6 @@ class CoreSemanticNetwork:
         
         for concept in core_concepts:
             self.concept_nodes[concept.name] = concept
-            self.graph.add_node(concept.name, type="concept", data=asdict(concept))
     
     def _initialize_relationships(self):
         """Initialize core relationships between emotions and concepts"""
@@ -356,9 +719,6 @@ class CoreSemanticNetwork:
         """Add a relationship between two nodes"""
         relationship = Relationship(source, target, rel_type, strength)
         self.relationships.append(relationship)
-        
-        # Add to graph
-        self.graph.add_edge(source, target, type=rel_type, strength=strength)
     
     def get_emotion_info(self, emotion_name: str) -> Optional[EmotionNode]:
         """Get information about a specific emotion"""
@@ -368,37 +728,29 @@ class CoreSemanticNetwork:
         """Get information about a specific concept"""
         return self.concept_nodes.get(concept_name)
     
-    def find_related_emotions(self, concept: str) -> List[Tuple[str, float]]:
-        """Find emotions related to a concept"""
-        if concept not in self.graph:
+    def _find_related(self, name: str, node_type: int) -> List[Tuple[str, float]]:
+        """Find outgoing neighbors of a given node type, keeping the strongest edge to each"""
+        node_id = self.index.node_ids.get(name)
+        if node_id is None:
             return []
         
-        related = []
-        for neighbor in self.graph.neighbors(concept):
-            if self.graph.nodes[neighbor].get("type") == "emotion":
-                # Get the strongest relationship
-                max_strength = 0
-                for edge_data in self.graph.get_edge_data(concept, neighbor).values():
-                    max_strength = max(max_strength, edge_data.get("strength", 0))
-                related.append((neighbor, max_strength))
+        start, end = self.index.indptr[node_id], self.index.indptr[node_id + 1]
+        related = {}
+        for target, strength in zip(self.index.indices[start:end].tolist(),
+                                    self.index.strengths[start:end].tolist()):
+            if self.index.node_types[target] == node_type:
+                target_name = self.index.node_names[target]
+                related[target_name] = max(related.get(target_name, 0), strength)
         
-        return sorted(related, key=lambda x: x[1], reverse=True)
+        return sorted(related.items(), key=lambda x: x[1], reverse=True)
+    
+    def find_related_emotions(self, concept: str) -> List[Tuple[str, float]]:
+        """Find emotions related to a concept"""
+        return self._find_related(concept, NODE_EMOTION)
     
     def find_related_concepts(self, emotion: str) -> List[Tuple[str, float]]:
         """Find concepts related to an emotion"""
-        if emotion not in self.graph:
-            return []
-        
-        related = []
-        for neighbor in self.graph.neighbors(emotion):
-            if self.graph.nodes[neighbor].get("type") == "concept":
-                # Get the strongest relationship
-                max_strength = 0
-                for edge_data in self.graph.get_edge_data(emotion, neighbor).values():
-                    max_strength = max(max_strength, edge_data.get("strength", 0))
-                related.append((neighbor, max_strength))
-        
-        return sorted(related, key=lambda x: x[1], reverse=True)
+        return self._find_related(emotion, NODE_CONCEPT)
     
     def get_coping_strategies(self, emotion: str) -> List[str]:
         """Get coping strategies for a specific emotion"""
@@ -415,10 +767,47 @@ class CoreSemanticNetwork:
         return []
     
     def analyze_text_emotions(self, text: str) -> Dict[str, float]:
-        """Analyze text and return emotion probabilities"""
-        # This will be implemented with NLP models
-        # For now, return placeholder
-        return {"joy": 0.3, "sadness": 0.1, "anxiety": 0.2}
+        """Analyze text and return emotion probabilities (empty if no lexicon terms matched)"""
+        return self.analyze_texts_emotions([text])[0]
+    
+    def analyze_texts_emotions(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Batch variant of analyze_text_emotions, scoring all texts in one sparse product"""
+        scores = self.lexicon.score(texts)
+        totals = scores.sum(axis=1)
+        results = []
+        for row, total in zip(scores, totals):
+            if total <= 0:
+                results.append({})
+                continue
+            probabilities = row / total
+            order = np.argsort(-probabilities)
+            results.append({
+                self.lexicon.emotion_names[i]: float(probabilities[i])
+                for i in order if probabilities[i] > 0
+            })
+        return results
+    
+    def lexicon_prefilter(self, text: str, min_confidence: float = 0.5,
+                          min_score: float = 1.0) -> Optional[Tuple[str, float]]:
+        """
+        Cheap pre-filter for the transformer emotion models
+        
+        Returns (emotion, confidence) when the lexicon alone gives a clear answer,
+        or None when the text is ambiguous and the expensive models should run.
+        Any negated emotion term ("not happy") makes the text ambiguous: the
+        lexicon cannot tell what the negation implies.
+        """
+        if self.lexicon.score([text], negated=True)[0].sum() > 0:
+            return None
+        scores = self.lexicon.score([text])[0]
+        total = scores.sum()
+        if total < min_score:
+            return None
+        best = int(np.argmax(scores))
+        confidence = float(scores[best] / total)
+        if confidence < min_confidence:
+            return None
+        return self.lexicon.emotion_names[best], confidence
     
     def get_emotional_context(self, concepts: List[str]) -> Dict[str, Any]:
         """Get emotional context for a set of concepts"""
@@ -449,5 +838,19 @@ class CoreSemanticNetwork:
             "relationships": [asdict(rel) for rel in self.relationships]
         }
 
+def load_core_network(snapshot_path: Path = DEFAULT_SNAPSHOT_PATH) -> CoreSemanticNetwork:
+    """Load the core network from its snapshot, rebuilding (and refreshing the snapshot) if stale"""
+    try:
+        return CoreSemanticNetwork.from_snapshot(snapshot_path)
+    except SnapshotError as e:
+        logger.info(f"Building core semantic network from source ({e})")
+    
+    network = CoreSemanticNetwork()
+    try:
+        network.save_snapshot(snapshot_path)
+    except OSError as e:
+        logger.warning(f"Could not write semantic network snapshot: {e}")
+    return network
+
 # Global instance
-core_network = CoreSemanticNetwork() 
\ No newline at end of file
+core_network = load_core_network() 
\ No newline at end of file
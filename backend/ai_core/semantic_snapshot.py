@@ -0,0 +1,154 @@
+"""
+Evolance Semantic Network Snapshots
+Versioned, memory-mappable binary artifacts for fast CoreSemanticNetwork startup
+
+File layout:
+    8 bytes   magic (b"EVSNAP01")
+    8 bytes   header length (little-endian uint64)
+    N bytes   JSON header (format version, source version, node names, array table)
+    ...       array blobs, each aligned to 64 bytes (CoreSemanticNetwork also keeps
+              its node attributes as a UTF-8 JSON blob, decoded on first use)
+
+Arrays are read back as read-only views over a single np.memmap, so every
+worker process that loads the same snapshot shares the underlying pages.
+
+Build step:
+    python -m ai_core.semantic_snapshot [output_path]
+"""
+
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+MAGIC = b"EVSNAP01"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+_PREFIX = struct.Struct("<8sQ")
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing, corrupt or does not match the source"""
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_snapshot(path: Path, header: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+    """
+    Write a snapshot atomically
+
+    Args:
+        path: Destination file
+        header: JSON-serializable metadata (must contain "source_version")
+        arrays: Named numpy arrays to store as aligned raw blobs
+    """
+    path = Path(path)
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+    # Array offsets are relative to the start of the data section, so the
+    # header can be serialized before we know its own length
+    table = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        table[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+            "nbytes": array.nbytes,
+        }
+        offset += array.nbytes
+
+    full_header = dict(header)
+    full_header["format_version"] = FORMAT_VERSION
+    full_header["created_at"] = time.time()
+    full_header["arrays"] = table
+    header_bytes = json.dumps(full_header, separators=(",", ":")).encode("utf-8")
+    data_start = _align(_PREFIX.size + len(header_bytes))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_PREFIX.pack(MAGIC, len(header_bytes)))
+            f.write(header_bytes)
+            f.write(b"\0" * (data_start - _PREFIX.size - len(header_bytes)))
+            for name, array in arrays.items():
+                position = data_start + table[name]["offset"]
+                f.write(b"\0" * (position - f.tell()))
+                f.write(array.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates 0600 files; snapshots are shared read-only across workers
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def read_snapshot(path: Path, source_version: str = None) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    Open a snapshot and return its header and memory-mapped arrays
+
+    Args:
+        path: Snapshot file
+        source_version: If given, the snapshot must have been built from this source version
+
+    Raises:
+        SnapshotError: If the file is missing, corrupt or stale
+    """
+    path = Path(path)
+    try:
+        with open(path, "rb") as f:
+            magic, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise SnapshotError(f"{path} is not a semantic network snapshot")
+            header = json.loads(f.read(header_len).decode("utf-8"))
+    except (OSError, struct.error, ValueError) as e:
+        raise SnapshotError(f"Could not read snapshot {path}: {e}")
+
+    if header.get("format_version") != FORMAT_VERSION:
+        raise SnapshotError(f"Snapshot format {header.get('format_version')} != {FORMAT_VERSION}")
+    if source_version is not None and header.get("source_version") != source_version:
+        raise SnapshotError("Snapshot was built from a different source version")
+
+    data_start = _align(_PREFIX.size + header_len)
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        start = data_start + spec["offset"]
+        blob = buffer[start:start + spec["nbytes"]]
+        if blob.size != spec["nbytes"]:
+            raise SnapshotError(f"Snapshot {path} is truncated")
+        arrays[name] = blob.view(np.dtype(spec["dtype"])).reshape(spec["shape"])
+
+    return header, arrays
+
+
+def main(argv=None):
+    """Build the core network snapshot from source"""
+    argv = sys.argv[1:] if argv is None else argv
+
+    from .semantic_network import CoreSemanticNetwork, DEFAULT_SNAPSHOT_PATH
+
+    output = Path(argv[0]) if argv else DEFAULT_SNAPSHOT_PATH
+    start = time.perf_counter()
+    network = CoreSemanticNetwork()
+    network.save_snapshot(output)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"✅ Wrote semantic network snapshot to {output} ({output.stat().st_size} bytes, {elapsed:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
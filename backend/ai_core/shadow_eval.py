@@ -0,0 +1,459 @@
+"""
+Evolance Shadow Evaluation
+Compares the progressive-learning models with Gemini on live traffic and routes by percentage
+
+Summarize the recorded metrics, or set the rollout by hand:
+
+    python -m ai_core.shadow_eval report --model-dir ai_models --hours 24
+    python -m ai_core.shadow_eval set-rollout 25 --model-dir ai_models
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from .atomic_io import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last one is open-ended
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+BUCKET_FORMAT = "%Y%m%dT%H"  # one bucket per hour
+CHARS_PER_TOKEN = 4
+
+
+def _empty_bucket() -> Dict[str, Any]:
+    return {
+        "served": {"gemini": 0, "own": 0},
+        "shadowed": 0,
+        "dropped": 0,
+        "unavailable": 0,
+        "errors": 0,
+        "emotion_agree": 0,
+        "response_similarity_sum": 0.0,
+        "stability_diff_sum": 0.0,
+        "latency": {
+            route: {"count": 0, "sum_ms": 0.0, "histogram": [0] * len(LATENCY_BUCKETS_MS)}
+            for route in ("gemini", "own")
+        },
+        "own_cpu_ms": 0.0,
+        "gemini_tokens": 0,
+    }
+
+
+def _merge(into: Dict[str, Any], other: Dict[str, Any]):
+    for key, value in other.items():
+        if isinstance(value, dict):
+            _merge(into.setdefault(key, {}), value)
+        elif isinstance(value, list):
+            current = into.setdefault(key, [0] * len(value))
+            for i, count in enumerate(value):
+                current[i] += count
+        else:
+            into[key] = into.get(key, 0) + value
+
+
+def _percentile(histogram: List[int], fraction: float) -> Optional[float]:
+    """Upper bound of the bucket holding the given fraction of samples (the open bucket reports its lower bound)"""
+    total = sum(histogram)
+    if not total:
+        return None
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS_MS[:-1], histogram):
+        seen += count
+        if seen >= fraction * total:
+            return bound
+    return LATENCY_BUCKETS_MS[-2]
+
+
+def _similarity(a: str, b: str) -> float:
+    """Word-set Jaccard similarity; a cheap proxy for how close two replies are"""
+    words_a, words_b = set(a.lower().split()), set(b.lower().split())
+    if not words_a and not words_b:
+        return 1.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+class ShadowMetricsStore:
+    """
+    Hourly counters of routing, agreement, latency and cost
+
+    Each process keeps its own counters and writes them to
+    {path}/metrics-<host>-<pid>.json at most every flush_interval seconds;
+    summarize() adds up the files of every process. Latencies are kept as
+    fixed-bucket histograms, so a bucket is a few hundred bytes however
+    many requests it counts. Buckets older than retention_days are dropped.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 30.0, retention_days: int = 30):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        os.makedirs(path, exist_ok=True)
+        self.file = os.path.join(path, f"metrics-{socket.gethostname()}-{os.getpid()}.json")
+        self.buckets: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def _bucket(self) -> Dict[str, Any]:
+        key = datetime.utcnow().strftime(BUCKET_FORMAT)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = _empty_bucket()
+        return bucket
+
+    def _observe_latency(self, bucket: Dict[str, Any], route: str, latency_ms: float):
+        latency = bucket["latency"][route]
+        latency["count"] += 1
+        latency["sum_ms"] += latency_ms
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                latency["histogram"][i] += 1
+                break
+
+    def record_served(self, route: str, latency_ms: float, tokens: int = 0):
+        with self._lock:
+            bucket = self._bucket()
+            bucket["served"][route] += 1
+            self._observe_latency(bucket, route, latency_ms)
+            bucket["gemini_tokens"] += tokens
+        self.maybe_flush()
+
+    def record_comparison(self, emotion_agree: bool, response_similarity: float, stability_diff: float,
+                          own_latency_ms: float, own_cpu_ms: float):
+        with self._lock:
+            bucket = self._bucket()
+            bucket["shadowed"] += 1
+            bucket["emotion_agree"] += int(emotion_agree)
+            bucket["response_similarity_sum"] += response_similarity
+            bucket["stability_diff_sum"] += stability_diff
+            bucket["own_cpu_ms"] += own_cpu_ms
+            self._observe_latency(bucket, "own", own_latency_ms)
+        self.maybe_flush()
+
+    def increment(self, counter: str):
+        """Count a dropped, unavailable or failed shadow run"""
+        with self._lock:
+            self._bucket()[counter] += 1
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        cutoff = (datetime.utcnow() - timedelta(days=self.retention_days)).strftime(BUCKET_FORMAT)
+        with self._lock:
+            self._last_flush = time.monotonic()
+            self.buckets = {key: bucket for key, bucket in self.buckets.items() if key >= cutoff}
+            snapshot = json.loads(json.dumps(self.buckets))
+        write_json_atomic(self.file, {"buckets": snapshot})
+        # Files of processes that stopped longer ago than the retention period
+        expired = time.time() - self.retention_days * 86400
+        for path in glob.glob(os.path.join(self.path, "metrics-*.json")):
+            try:
+                if os.path.getmtime(path) < expired:
+                    os.unlink(path)
+            except OSError:
+                pass
+
+    def load_buckets(self, since: str = "") -> Dict[str, Dict[str, Any]]:
+        """Buckets from every process's file (this process's unflushed counters included)"""
+        merged: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            local = json.loads(json.dumps(self.buckets))
+        for path in glob.glob(os.path.join(self.path, "metrics-*.json")):
+            if path == self.file and local:
+                continue  # our own counters are newer in memory
+            try:
+                with open(path, "r") as f:
+                    buckets = json.load(f).get("buckets", {})
+            except (OSError, ValueError):
+                continue
+            for key, bucket in buckets.items():
+                if key >= since:
+                    _merge(merged.setdefault(key, {}), bucket)
+        for key, bucket in local.items():
+            if key >= since:
+                _merge(merged.setdefault(key, {}), bucket)
+        return merged
+
+    def summarize(self, hours: int = 24, cost_per_1k_tokens: float = 0.0) -> Dict[str, Any]:
+        """Agreement, latency and cost over the last `hours`"""
+        since = (datetime.utcnow() - timedelta(hours=hours)).strftime(BUCKET_FORMAT)
+        total = _empty_bucket()
+        for bucket in self.load_buckets(since).values():
+            _merge(total, bucket)
+
+        shadowed = total["shadowed"]
+        gemini_served = total["served"]["gemini"]
+        tokens_per_request = total["gemini_tokens"] / gemini_served if gemini_served else 0.0
+        latency = {}
+        for route, stats in total["latency"].items():
+            latency[route] = {
+                "count": stats["count"],
+                "avg_ms": round(stats["sum_ms"] / stats["count"], 1) if stats["count"] else None,
+                "p50_ms": _percentile(stats["histogram"], 0.5),
+                "p95_ms": _percentile(stats["histogram"], 0.95),
+            }
+        return {
+            "hours": hours,
+            "served": total["served"],
+            "shadow": {
+                "compared": shadowed,
+                "dropped": total["dropped"],
+                "unavailable": total["unavailable"],
+                "errors": total["errors"],
+                "emotion_agreement": round(total["emotion_agree"] / shadowed, 4) if shadowed else None,
+                "response_similarity": round(total["response_similarity_sum"] / shadowed, 4) if shadowed else None,
+                "stability_diff": round(total["stability_diff_sum"] / shadowed, 2) if shadowed else None,
+                "own_cpu_ms_per_request": round(total["own_cpu_ms"] / shadowed, 2) if shadowed else None,
+            },
+            "latency": latency,
+            "cost": {
+                "gemini_tokens": total["gemini_tokens"],
+                "gemini_tokens_per_request": round(tokens_per_request, 1),
+                "gemini_cost": round(total["gemini_tokens"] / 1000 * cost_per_1k_tokens, 4),
+                "tokens_saved": round(total["served"]["own"] * tokens_per_request),
+                "cost_saved": round(total["served"]["own"] * tokens_per_request / 1000 * cost_per_1k_tokens, 4),
+            },
+        }
+
+
+class RolloutPolicy:
+    """
+    Share of requests served by the own models, stepped by shadow statistics
+
+    The percentage lives in {path}/rollout.json so every serving process
+    routes the same way. In "auto" mode evaluate() raises it by `step` when
+    the last `window_hours` hold at least `min_comparisons` comparisons
+    with emotion agreement >= target_agreement, halves it when agreement
+    falls below floor_agreement, and changes it at most once per
+    `cooldown` seconds. In "manual" mode only set() changes it.
+    """
+
+    def __init__(self, path: str, mode: str = "auto", target_agreement: float = 0.85,
+                 floor_agreement: float = 0.75, min_comparisons: int = 200, step: float = 10.0,
+                 max_percentage: float = 100.0, window_hours: int = 24, cooldown: float = 3600.0,
+                 reload_interval: float = 5.0):
+        if mode not in ("auto", "manual"):
+            raise ValueError(f"Unknown rollout mode: {mode}")
+        self.path = os.path.join(path, "rollout.json")
+        self.mode = mode
+        self.target_agreement = target_agreement
+        self.floor_agreement = floor_agreement
+        self.min_comparisons = min_comparisons
+        self.step = step
+        self.max_percentage = max_percentage
+        self.window_hours = window_hours
+        self.cooldown = cooldown
+        self.reload_interval = reload_interval
+        self._state = self._read()
+        self._last_read = time.monotonic()
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"percentage": 0.0, "updated_at": None, "history": []}
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        if time.monotonic() - self._last_read >= self.reload_interval:
+            self._state = self._read()
+            self._last_read = time.monotonic()
+        return self._state
+
+    @property
+    def percentage(self) -> float:
+        return self.state["percentage"]
+
+    def set(self, percentage: float, reason: str = "manual") -> Dict[str, Any]:
+        percentage = max(0.0, min(float(percentage), self.max_percentage))
+        state = self._read()
+        state["history"] = (state.get("history", []) + [{
+            "at": datetime.utcnow().isoformat(), "from": state["percentage"], "to": percentage, "reason": reason
+        }])[-50:]
+        state.update(percentage=percentage, updated_at=time.time())
+        write_json_atomic(self.path, state)
+        self._state, self._last_read = state, time.monotonic()
+        logger.info(f"Own-model rollout {state['history'][-1]['from']}% -> {percentage}% ({reason})")
+        return state
+
+    def evaluate(self, summary: Dict[str, Any]) -> Optional[float]:
+        """Step the percentage from a ShadowMetricsStore summary; returns the new value if it changed"""
+        if self.mode != "auto":
+            return None
+        state = self._read()
+        if state.get("updated_at") and time.time() - state["updated_at"] < self.cooldown:
+            return None
+        shadow = summary["shadow"]
+        if shadow["compared"] < self.min_comparisons or shadow["emotion_agreement"] is None:
+            return None
+        agreement = shadow["emotion_agreement"]
+        current = state["percentage"]
+        if agreement < self.floor_agreement and current > 0:
+            target = current / 2 if current > self.step else 0.0
+        elif agreement >= self.target_agreement and current < self.max_percentage:
+            target = current + self.step
+        else:
+            return None
+        self.set(target, reason=f"agreement {agreement:.3f} over {shadow['compared']} comparisons")
+        return self.percentage
+
+
+class ShadowEvaluator:
+    """
+    Shadow runs of the progressive-learning models next to Gemini, and percentage routing
+
+    route() picks the own models for the rollout percentage of requests,
+    once the served bundle has an emotion classifier; it also swaps in
+    bundles that a worker published, promoted or rolled back.
+    For a sample_rate fraction of Gemini-served requests, submit() runs
+    the local models on the same message in a background thread and
+    records whether they agree with Gemini; a full backlog drops the
+    sample instead of delaying anything. The rollout policy is
+    re-evaluated at most every evaluate_interval seconds.
+    """
+
+    def __init__(self, progressive_learning, path: str, sample_rate: float = 0.1,
+                 rollout: Optional[RolloutPolicy] = None, store: Optional[ShadowMetricsStore] = None,
+                 max_pending: int = 32, evaluate_interval: float = 60.0, cost_per_1k_tokens: float = 0.0,
+                 rng: Optional[random.Random] = None):
+        self.progressive_learning = progressive_learning
+        self.sample_rate = sample_rate
+        self.store = store or ShadowMetricsStore(path)
+        self.rollout = rollout or RolloutPolicy(path)
+        self.max_pending = max_pending
+        self.evaluate_interval = evaluate_interval
+        self.cost_per_1k_tokens = cost_per_1k_tokens
+        self.rng = rng or random.Random()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="evolance-shadow")
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._last_evaluation = time.monotonic()
+
+    def route(self) -> str:
+        """"own" or "gemini" for the next request"""
+        # The only per-request check for bundles from other processes (rate-limited by reload_interval)
+        self.progressive_learning.refresh_models()
+        bundle = self.progressive_learning.bundle
+        if bundle is None or "emotion_classifier" not in bundle:
+            return "gemini"
+        return "own" if self.rng.random() * 100 < self.rollout.percentage else "gemini"
+
+    @staticmethod
+    def estimate_tokens(user_message: str, conversation_context: List[Dict], turn: Dict[str, Any]) -> int:
+        """Rough prompt plus completion tokens of a Gemini turn (characters / 4)"""
+        context = sum(len(entry.get("user_message", "")) + len(entry.get("ai_response", ""))
+                      for entry in conversation_context[-5:])
+        completion = len(turn.get("response", "")) + len(json.dumps(turn.get("emotion_data", {}), default=str)) \
+            + len(json.dumps(turn.get("emolytics", {}), default=str))
+        return (len(user_message) + context + completion) // CHARS_PER_TOKEN
+
+    def record_own(self, latency_ms: float):
+        self.store.record_served("own", latency_ms)
+
+    def submit(self, user_message: str, conversation_context: List[Dict], turn: Dict[str, Any],
+               latency_ms: float) -> bool:
+        """Record a Gemini-served request and maybe shadow it; returns True if a shadow run was queued"""
+        self.store.record_served("gemini", latency_ms, self.estimate_tokens(user_message, conversation_context, turn))
+        queued = False
+        if self.rng.random() < self.sample_rate:
+            with self._lock:
+                if self._pending < self.max_pending:
+                    self._pending += 1
+                    queued = True
+            if queued:
+                self._executor.submit(self._shadow, user_message, list(conversation_context), turn)
+            else:
+                self.store.increment("dropped")
+        self._maybe_evaluate()
+        return queued
+
+    def _shadow(self, user_message: str, conversation_context: List[Dict], turn: Dict[str, Any]):
+        try:
+            started, cpu_started = time.perf_counter(), time.thread_time()
+            own_emotion = self.progressive_learning.predict_emotion(user_message)
+            if own_emotion.get("model_used") != "trained":
+                self.store.increment("unavailable")
+                return
+            own_response = self.progressive_learning.generate_response(user_message, own_emotion)
+            own_emolytics = self.progressive_learning.analyze_emolytics(own_emotion, conversation_context)
+            latency_ms = (time.perf_counter() - started) * 1000
+            cpu_ms = (time.thread_time() - cpu_started) * 1000
+
+            gemini_stability = (turn.get("emolytics") or {}).get("emotional_state", {}).get("stability", 50)
+            own_stability = own_emolytics.get("emotional_state", {}).get("stability", 50)
+            self.store.record_comparison(
+                emotion_agree=own_emotion["primary_emotion"] == (turn.get("emotion_data") or {}).get("primary_emotion"),
+                response_similarity=_similarity(own_response, turn.get("response", "")),
+                stability_diff=abs(float(own_stability) - float(gemini_stability)),
+                own_latency_ms=latency_ms,
+                own_cpu_ms=cpu_ms,
+            )
+        except Exception as e:
+            logger.warning(f"Shadow evaluation failed: {e}")
+            self.store.increment("errors")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _maybe_evaluate(self):
+        if time.monotonic() - self._last_evaluation < self.evaluate_interval:
+            return
+        self._last_evaluation = time.monotonic()
+        self.rollout.evaluate(self.report(self.rollout.window_hours))
+
+    def report(self, hours: int = 24) -> Dict[str, Any]:
+        summary = self.store.summarize(hours, self.cost_per_1k_tokens)
+        summary["rollout"] = {"mode": self.rollout.mode, **self.rollout.state}
+        return summary
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "sample_rate": self.sample_rate,
+            "own_model_percentage": self.rollout.percentage,
+            "rollout_mode": self.rollout.mode,
+            "pending": self._pending,
+        }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+        self.store.flush()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Shadow evaluation of the progressive-learning models")
+    parser.add_argument("--model-dir", default="ai_models")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report = commands.add_parser("report", help="Summarize agreement, latency and cost")
+    report.add_argument("--hours", type=int, default=24)
+    report.add_argument("--cost-per-1k-tokens", type=float,
+                        default=float(os.getenv("GEMINI_COST_PER_1K_TOKENS", "0")))
+    rollout = commands.add_parser("set-rollout", help="Set the share of requests served by the own models")
+    rollout.add_argument("percentage", type=float)
+    args = parser.parse_args(argv)
+
+    path = os.path.join(args.model_dir, "shadow")
+    if args.command == "report":
+        summary = ShadowMetricsStore(path).summarize(args.hours, args.cost_per_1k_tokens)
+        summary["rollout"] = RolloutPolicy(path).state
+        print(json.dumps(summary, indent=2))
+    else:
+        state = RolloutPolicy(path, mode="manual").set(args.percentage)
+        print(f"Own-model rollout set to {state['percentage']}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Evolance Training Data Export
+Streams training records to newline-delimited JSON or Parquet, and back
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .atomic_io import write_json_atomic
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+    # Column types stored as Parquet columns; any other column is stored as JSON strings
+    SCALAR_TYPES = (pa.null(), pa.bool_(), pa.int64(), pa.float64(), pa.string())
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+# Parquet schema metadata key listing columns stored as JSON strings
+JSON_COLUMNS_KEY = b"evolance.json_columns"
+
+
+def _chunks(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _is_parquet(path: str) -> bool:
+    return str(path).endswith(".parquet")
+
+
+def _open_text(path: str, mode: str):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class ExportWatermark:
+    """
+    Remembers the newest record already exported
+
+    Records are compared on `key` (ISO timestamps order correctly as
+    strings). Several records can share the newest value, and one of them
+    may be stored after the export ran, so the watermark also keeps the
+    content hashes of the records exported at exactly that value: an
+    incremental export writes records newer than the value, and records at
+    the value that were not exported yet.
+    """
+
+    def __init__(self, path: str, key: str = "timestamp"):
+        self.path = path
+        self.key = key
+        self.value: Optional[str] = None
+        self.seen: set = set()  # record_id of the exported records whose key equals value
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                data = json.load(f)
+            self.value = data.get("value")
+            self.seen = set(data.get("seen", []))
+
+    @staticmethod
+    def record_id(record: Dict[str, Any]) -> str:
+        return hashlib.sha256(
+            json.dumps(record, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+        ).hexdigest()[:24]
+
+    def is_new(self, record: Dict[str, Any]) -> bool:
+        if self.value is None:
+            return True
+        value = record.get(self.key) or ""
+        return value > self.value or (value == self.value and self.record_id(record) not in self.seen)
+
+    def save(self, value: Optional[str], seen: Optional[set] = None):
+        if value is None:
+            return
+        seen = set(seen or ())
+        write_json_atomic(self.path, {"key": self.key, "value": value, "seen": sorted(seen)})
+        self.value = value
+        self.seen = seen
+
+
+def write_jsonl(records: Iterable[Dict[str, Any]], path: str, append: bool = False,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Write records as newline-delimited JSON (gzip-compressed for *.gz paths)
+
+    Only one chunk is held in memory at a time. Returns the number of records written.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    written = 0
+    with _open_text(path, "a" if append else "w") as f:
+        for chunk in _chunks(records, chunk_size):
+            f.write("".join(json.dumps(record, separators=(",", ":"), default=str) + "\n" for record in chunk))
+            written += len(chunk)
+    return written
+
+
+def _unify(first: "pa.DataType", second: "pa.DataType") -> Optional["pa.DataType"]:
+    """The type values of both types convert to (null -> any, int64 -> double); None if there is none"""
+    try:
+        return pa.unify_schemas([pa.schema([("value", first)]), pa.schema([("value", second)])],
+                                promote_options="permissive").field("value").type
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
+
+
+def _infer_types(chunk: List[Dict[str, Any]], types: Dict[str, "pa.DataType"], json_columns: set):
+    """Widen the column types seen so far with a chunk; columns without a common JSON scalar type become JSON"""
+    for column in dict.fromkeys(key for record in chunk for key in record):
+        types.setdefault(column, pa.null())
+        if column in json_columns:
+            continue
+        values = [record.get(column) for record in chunk]
+        kind = None
+        if not any(isinstance(value, (dict, list)) for value in values):
+            try:
+                kind = _unify(types[column], pa.array(values).type)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+                pass
+        if kind in SCALAR_TYPES:
+            types[column] = kind
+        else:
+            json_columns.add(column)
+
+
+def _to_table(chunk: List[Dict[str, Any]], schema: "pa.Schema", json_columns: set) -> "pa.Table":
+    data = {}
+    for column in schema.names:
+        values = [record.get(column) for record in chunk]
+        if column in json_columns:
+            values = [None if value is None else json.dumps(value, default=str) for value in values]
+        data[column] = values
+    return pa.table(data, schema=schema)
+
+
+def write_parquet(records: Iterable[Dict[str, Any]], path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Write records as Parquet, one row group per chunk
+
+    A Parquet file has one schema, and a key or type may first appear in
+    any record. Records are therefore spilled to a temporary JSONL file
+    while the schema is inferred from all of them, then written from it:
+    the columns are every key seen, a column takes the widest type of its
+    values (null -> int64 -> double), and a column holding nested values
+    (dicts and lists) or values without a common type is stored as JSON
+    strings, decoded again by iter_records. Columns that are null
+    throughout are strings. Only one chunk is held in memory at a time.
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required for Parquet export")
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    types: Dict[str, "pa.DataType"] = {}
+    json_columns: set = set()
+    fd, spill_path = tempfile.mkstemp(dir=directory, prefix=".parquet-spill.", suffix=".jsonl")
+    os.close(fd)
+    writer = None
+    written = 0
+    try:
+        with _open_text(spill_path, "w") as f:
+            for chunk in _chunks(records, chunk_size):
+                _infer_types(chunk, types, json_columns)
+                f.write("".join(json.dumps(record, separators=(",", ":"), default=str) + "\n" for record in chunk))
+                written += len(chunk)
+        if not written:
+            return 0
+        schema = pa.schema([
+            (column, pa.string() if column in json_columns or pa.types.is_null(kind) else kind)
+            for column, kind in types.items()
+        ]).with_metadata({JSON_COLUMNS_KEY: json.dumps(sorted(json_columns)).encode("utf-8")})
+        writer = pq.ParquetWriter(path, schema)
+        for chunk in _chunks(iter_records(spill_path), chunk_size):
+            writer.write_table(_to_table(chunk, schema, json_columns))
+    finally:
+        if writer is not None:
+            writer.close()
+        os.unlink(spill_path)
+    return written
+
+
+def export_records(records: Iterable[Dict[str, Any]], path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   watermark: ExportWatermark = None) -> Dict[str, Any]:
+    """
+    Stream records to `path` (Parquet for *.parquet, JSONL otherwise)
+
+    The file is written to a temporary name and moved into place when
+    complete. With a watermark, only records it has not covered yet are
+    written and the watermark advances once the file is in place.
+    """
+    newest = {"value": watermark.value if watermark else None,
+              "seen": set(watermark.seen) if watermark else set()}
+
+    def selected():
+        for record in records:
+            if watermark is not None:
+                if not watermark.is_new(record):
+                    continue
+                value = record.get(watermark.key)
+                if value and (newest["value"] is None or value > newest["value"]):
+                    newest["value"], newest["seen"] = value, set()
+                if value and value == newest["value"]:
+                    newest["seen"].add(watermark.record_id(record))
+            yield record
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    suffix = "".join(os.path.basename(path).partition(".")[1:])
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".export.", suffix=suffix)
+    os.close(fd)
+    try:
+        if _is_parquet(path):
+            written = write_parquet(selected(), tmp_path, chunk_size)
+        else:
+            written = write_jsonl(selected(), tmp_path, chunk_size=chunk_size)
+        if written or not os.path.exists(path):
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        else:
+            # Nothing new: keep the previous export rather than replacing it with an empty file
+            os.unlink(tmp_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    if watermark is not None:
+        watermark.save(newest["value"], newest["seen"])
+    return {"path": path, "records": written, "watermark": newest["value"]}
+
+
+def truncate_torn_line(path: str, scan: int = 1 << 16) -> bool:
+    """
+    Cut a partially written last line (left by a crash mid-append) from a JSONL file
+
+    Returns True when the file was truncated. Only the last `scan` bytes are
+    searched; a longer torn line is left for readers to skip.
+    """
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return False
+        f.seek(max(0, size - scan))
+        tail = f.read()
+        if tail.endswith(b"\n"):
+            return False
+        cut = tail.rfind(b"\n")
+        if cut < 0 and size > len(tail):
+            return False
+        f.truncate(size - len(tail) + cut + 1)
+    logger.warning(f"Truncated a torn record at the end of {path}")
+    return True
+
+
+def iter_records(*paths: str, batch_size: int = DEFAULT_CHUNK_SIZE,
+                 skip_invalid: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Stream records from JSONL (optionally gzipped) or Parquet exports, in order
+
+    With skip_invalid, JSONL lines that do not parse (a torn write) are
+    logged and skipped instead of raising.
+    """
+    for path in paths:
+        if _is_parquet(path):
+            if not PYARROW_AVAILABLE:
+                raise ImportError("pyarrow is required to read Parquet exports")
+            parquet_file = pq.ParquetFile(path)
+            metadata = parquet_file.schema_arrow.metadata or {}
+            json_columns = set(json.loads(metadata.get(JSON_COLUMNS_KEY, b"[]")))
+            for batch in parquet_file.iter_batches(batch_size=batch_size):
+                for record in batch.to_pylist():
+                    for column in json_columns:
+                        if record.get(column) is not None:
+                            record[column] = json.loads(record[column])
+                    yield record
+        else:
+            with _open_text(path, "r") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        if not skip_invalid:
+                            raise
+                        logger.warning(f"Skipping corrupt record in {path}")
+                        continue
+                    yield record
+
+
+def iter_batches(*paths: str, batch_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Stream records in lists of batch_size, for training loops that consume batches"""
+    yield from _chunks(iter_records(*paths, batch_size=batch_size), batch_size)
@@ -0,0 +1,113 @@
+"""
+Evolance Training Jobs
+Directory-backed training job queue shared by serving processes and the training worker
+"""
+
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .atomic_io import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+
+class TrainingJobQueue:
+    """
+    One pending job per model, in files under `path`
+
+    pending/<model>.json  -> queued; enqueueing a model that is already
+                             pending is a no-op, so bursts of triggers
+                             collapse into one run
+    running/<model>.json  -> claimed by a worker (claiming is an atomic
+                             rename, so two workers never take the same job)
+    status.json           -> progress and results reported by the worker
+
+    A model may be pending while an older job for it is running; the new
+    job then trains on the data collected since.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pending_dir = os.path.join(path, "pending")
+        self.running_dir = os.path.join(path, "running")
+        self.status_path = os.path.join(path, "status.json")
+        os.makedirs(self.pending_dir, exist_ok=True)
+        os.makedirs(self.running_dir, exist_ok=True)
+
+    def enqueue(self, model: str, params: Dict[str, Any] = None) -> bool:
+        """Queue a training job; False if one for this model is already pending"""
+        job = {"model": model, "params": params or {}, "enqueued_at": datetime.utcnow().isoformat()}
+        fd, tmp_path = tempfile.mkstemp(dir=self.pending_dir, prefix=".tmp.")
+        with os.fdopen(fd, "w") as f:
+            json.dump(job, f)
+        try:
+            # link() fails if the target exists: an atomic create-if-absent
+            os.link(tmp_path, os.path.join(self.pending_dir, f"{model}.json"))
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.unlink(tmp_path)
+
+    def pending(self) -> List[str]:
+        return sorted(entry[:-5] for entry in os.listdir(self.pending_dir) if entry.endswith(".json"))
+
+    def running(self) -> List[str]:
+        return sorted(entry[:-5] for entry in os.listdir(self.running_dir) if entry.endswith(".json"))
+
+    def claim(self, model: str) -> Optional[Dict[str, Any]]:
+        """Move a pending job to running; None if there is none or another worker won"""
+        target = os.path.join(self.running_dir, f"{model}.json")
+        if os.path.exists(target):
+            return None  # the previous run for this model has not finished
+        try:
+            os.rename(os.path.join(self.pending_dir, f"{model}.json"), target)
+        except FileNotFoundError:
+            return None
+        with open(target, "r") as f:
+            job = json.load(f)
+        job["claimed_at"] = datetime.utcnow().isoformat()
+        return job
+
+    def claim_all(self) -> List[Dict[str, Any]]:
+        """Claim every pending job (so one training run can publish them together)"""
+        return [job for job in (self.claim(model) for model in self.pending()) if job is not None]
+
+    def finish(self, job: Dict[str, Any]):
+        try:
+            os.unlink(os.path.join(self.running_dir, f"{job['model']}.json"))
+        except FileNotFoundError:
+            pass
+
+    def recover(self) -> List[str]:
+        """Re-queue jobs left running by a worker that died; call before a worker starts"""
+        recovered = []
+        for model in self.running():
+            source = os.path.join(self.running_dir, f"{model}.json")
+            try:
+                os.rename(source, os.path.join(self.pending_dir, f"{model}.json"))
+            except OSError:
+                os.unlink(source)
+            recovered.append(model)
+        if recovered:
+            logger.warning(f"Re-queued interrupted training jobs: {', '.join(recovered)}")
+        return recovered
+
+    def write_status(self, status: Dict[str, Any]):
+        write_json_atomic(self.status_path, {**status, "updated_at": time.time()})
+
+    def read_status(self) -> Dict[str, Any]:
+        try:
+            with open(self.status_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def get_status(self) -> Dict[str, Any]:
+        """Queue contents plus the worker's last reported progress"""
+        return {"pending": self.pending(), "running": self.running(), **self.read_status()}
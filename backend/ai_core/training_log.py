@@ -0,0 +1,198 @@
+"""
+Evolance Training Log
+Append-only, segmented JSONL log of progressive-learning samples
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .training_export import iter_records, truncate_torn_line
+from .atomic_io import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PATTERN = re.compile(r"^(\d{8})\.jsonl$")
+INDEX_FILE = "index.json"
+
+
+def _segment_name(number: int) -> str:
+    return f"{number:08d}.jsonl"
+
+
+def _count_lines(path: str) -> int:
+    count = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            count += block.count(b"\n")
+    return count
+
+
+class TrainingLog:
+    """
+    One category of training samples, appended to numbered JSONL segments
+
+    {path}/00000000.jsonl, 00000001.jsonl, ...   segments, oldest first
+    {path}/index.json                            record counts of closed segments
+
+    Appends are buffered and written `flush_every` records at a time with a
+    single write to the newest segment, which is closed once it holds
+    `segment_records` records. A torn last line left by a crash mid-write
+    is cut from the newest segment on open, and readers skip any line that
+    does not parse. Closed segments are never modified, so the
+    number of records is known at startup from the index plus a line count
+    of the newest segment, without reading the history. Reads stream the
+    segments in order; read_from resumes from a (segment, byte offset)
+    position, so consumers can pick up only what was appended since.
+
+    The object behaves like the list it replaces for append, len and
+    iteration (iteration flushes the buffer first).
+    """
+
+    def __init__(self, path: str, segment_records: int = 10000, flush_every: int = 50):
+        self.path = path
+        self.segment_records = segment_records
+        self.flush_every = flush_every
+        os.makedirs(path, exist_ok=True)
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._migrate_flat_file()
+        self._closed_counts: Dict[str, int] = self._read_index()
+        self._active = self._newest_segment()
+        active_path = os.path.join(path, _segment_name(self._active))
+        if os.path.exists(active_path):
+            truncate_torn_line(active_path)
+            self._active_count = _count_lines(active_path)
+        else:
+            self._active_count = 0
+
+    def _migrate_flat_file(self):
+        """Adopt the single {category}.jsonl file written before segments as segment 0"""
+        flat = f"{self.path.rstrip(os.sep)}.jsonl"
+        if os.path.exists(flat) and not self._segment_numbers():
+            os.rename(flat, os.path.join(self.path, _segment_name(0)))
+            logger.info(f"Migrated {flat} into the segmented training log")
+
+    def _segment_numbers(self) -> List[int]:
+        return sorted(int(match.group(1)) for match in map(SEGMENT_PATTERN.match, os.listdir(self.path)) if match)
+
+    def _newest_segment(self) -> int:
+        numbers = self._segment_numbers()
+        return numbers[-1] if numbers else 0
+
+    def _read_index(self) -> Dict[str, int]:
+        try:
+            with open(os.path.join(self.path, INDEX_FILE), "r") as f:
+                return json.load(f).get("segments", {})
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def segments(self) -> List[str]:
+        return [os.path.join(self.path, _segment_name(number)) for number in self._segment_numbers()]
+
+    def __len__(self) -> int:
+        closed = sum(count for name, count in self._closed_counts.items() if name != _segment_name(self._active))
+        return closed + self._active_count + len(self._buffer)
+
+    def append(self, record: Dict[str, Any]):
+        with self._lock:
+            self._buffer.append(record)
+            full = len(self._buffer) >= self.flush_every
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write buffered records; returns how many were written"""
+        with self._lock:
+            records, self._buffer = self._buffer, []
+            if not records:
+                return 0
+            # Another process may have rotated since our last write
+            newest = self._newest_segment()
+            if newest != self._active:
+                self._rotate_to(newest)
+            written = 0
+            while written < len(records):
+                room = max(self.segment_records - self._active_count, 0)
+                if room == 0:
+                    self._rotate_to(self._active + 1)
+                    continue
+                chunk = records[written:written + room]
+                with open(os.path.join(self.path, _segment_name(self._active)), "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(record, separators=(",", ":"), default=str) + "\n"
+                                    for record in chunk))
+                self._active_count += len(chunk)
+                written += len(chunk)
+            return written
+
+    def _rotate_to(self, number: int):
+        """Close segments before `number` (recording their counts) and make `number` active"""
+        for closed in range(self._active, number):
+            name = _segment_name(closed)
+            segment_path = os.path.join(self.path, name)
+            if name not in self._closed_counts and os.path.exists(segment_path):
+                self._closed_counts[name] = _count_lines(segment_path)
+        write_json_atomic(os.path.join(self.path, INDEX_FILE), {"segments": self._closed_counts})
+        self._active = number
+        active_path = os.path.join(self.path, _segment_name(number))
+        self._active_count = _count_lines(active_path) if os.path.exists(active_path) else 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Stream every record, oldest first"""
+        self.flush()
+        return iter_records(*self.segments(), skip_invalid=True)
+
+    def tail(self, n: int) -> List[Dict[str, Any]]:
+        """The last `n` records, oldest first, reading only the newest segments that hold them"""
+        self.flush()
+        records: List[Dict[str, Any]] = []
+        for segment in reversed(self.segments()):
+            if len(records) >= n:
+                break
+            records = list(iter_records(segment, skip_invalid=True)) + records
+        return records[-n:] if n else []
+
+    def read_from(self, position: Optional[Tuple[int, int]] = None,
+                  limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Tuple[int, int]]:
+        """
+        Records appended after `position` ((segment, byte offset); None for the start)
+        and the position after them. A partially written last line is left for later.
+        """
+        self.flush()
+        segment, offset = position or (0, 0)
+        records: List[Dict[str, Any]] = []
+        for number in self._segment_numbers():
+            if number < segment:
+                continue
+            if number > segment:
+                segment, offset = number, 0
+            with open(os.path.join(self.path, _segment_name(number)), "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n") or (limit is not None and len(records) >= limit):
+                        return records, (segment, offset)
+                    offset += len(line)
+                    if line.strip():
+                        try:
+                            records.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            logger.warning(f"Skipping corrupt record in segment {number} at offset {offset - len(line)}")
+        return records, (segment, offset)
+
+    def position(self) -> Tuple[int, int]:
+        """The current end of the log as a read_from position (flushes first)"""
+        self.flush()
+        numbers = self._segment_numbers()
+        if not numbers:
+            return (0, 0)
+        return (numbers[-1], os.path.getsize(os.path.join(self.path, _segment_name(numbers[-1]))))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "records": len(self),
+            "segments": len(self._segment_numbers()),
+            "buffered": len(self._buffer),
+        }
@@ -0,0 +1,163 @@
+"""
+Evolance Training Worker
+Trains progressive-learning models out of band and publishes them as model bundles
+
+Run as a separate process next to the API:
+
+    python -m ai_core.training_worker --model-dir ai_models
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .progressive_learning import MODEL_TRAINERS, ONLINE_UPDATE, ProgressiveLearningSystem
+from .training_jobs import TrainingJobQueue
+
+logger = logging.getLogger(__name__)
+
+
+class TrainingWorker:
+    """
+    Polls the job queue and trains the queued models
+
+    All jobs pending when the worker wakes up are trained in one run on the
+    samples saved so far, and the result is published as one bundle (an
+    online_update job instead applies only the samples saved since the
+    previous update to the online models). Serving
+    processes pick the bundle up through ProgressiveLearningSystem.refresh_models.
+    Progress and per-model wall time and peak memory are reported in the
+    queue's status.json. The models of a run are fitted concurrently in up
+    to `processes` processes, with per-model n_jobs, thread and memory
+    limits (see progressive_learning.DEFAULT_MODEL_RESOURCES). With
+    auto_promote off, runs only publish new registry versions; they are
+    served after `python -m ai_core.model_registry promote`.
+    """
+
+    def __init__(self, model_dir: str = "ai_models", poll_interval: float = 2.0,
+                 min_samples: Optional[Dict[str, int]] = None, processes: int = len(MODEL_TRAINERS),
+                 model_resources: Optional[Dict[str, Dict]] = None, auto_promote: bool = True):
+        self.model_dir = model_dir
+        self.auto_promote = auto_promote
+        self.poll_interval = poll_interval
+        self.min_samples = min_samples
+        self.processes = processes
+        self.model_resources = model_resources
+        self.queue = TrainingJobQueue(f"{model_dir}/jobs")
+        self.history: List[Dict[str, Any]] = []  # recent runs, newest last
+
+    def _report(self, **current):
+        self.queue.write_status({
+            "worker": {"pid": os.getpid(), "heartbeat": datetime.utcnow().isoformat()},
+            "current": current or None,
+            "history": self.history[-10:],
+        })
+
+    def run_once(self) -> Optional[Dict[str, Any]]:
+        """Train everything pending; returns the run summary, or None if there was nothing to do"""
+        jobs = self.queue.claim_all()
+        if not jobs:
+            return None
+        models = [model for model in (*MODEL_TRAINERS, ONLINE_UPDATE) if any(job["model"] == model for job in jobs)]
+        started = time.perf_counter()
+        run = {"models": models, "started_at": datetime.utcnow().isoformat()}
+        self._report(**run, stage="loading_data", progress=0.0)
+        try:
+            # A fresh system per run sees the latest bundle (for carry-over); samples are streamed from the logs
+            if ONLINE_UPDATE in models:
+                system = ProgressiveLearningSystem(self.model_dir, min_samples=self.min_samples,
+                                                   learning_mode="online", auto_promote=self.auto_promote)
+                self._report(**run, stage="training", progress=0.0)
+                result = system.update_online()
+                samples = {category: result[category] for category in system.training_data}
+            else:
+                system = ProgressiveLearningSystem(self.model_dir, min_samples=self.min_samples,
+                                                   training_processes=self.processes,
+                                                   model_resources=self.model_resources,
+                                                   auto_promote=self.auto_promote)
+                self._report(**run, stage="training", progress=0.0)
+
+                def progress(model, done, total):
+                    self._report(**run, stage="training", last_model=model, progress=round(done / total, 3))
+
+                result = system.train_models(models, progress=progress)
+                samples = {category: len(samples) for category, samples in system.training_data.items()}
+            run.update(
+                status="succeeded",
+                durations=result["durations"],
+                resources=result.get("resources"),
+                bundle_version=result["bundle_version"],
+                model_confidence=system.learning_metrics["model_confidence"],
+                samples=samples,
+            )
+        except Exception as e:
+            logger.exception("Training run failed")
+            run.update(status="failed", error=str(e))
+        finally:
+            for job in jobs:
+                self.queue.finish(job)
+
+        run["duration_seconds"] = round(time.perf_counter() - started, 3)
+        self.history.append(run)
+        self._report()
+        logger.info(f"Training run {run['status']}: {', '.join(models)} in {run['duration_seconds']}s")
+        return run
+
+    def run_forever(self, stop: Optional[threading.Event] = None):
+        stop = stop or threading.Event()
+        self.queue.recover()
+        self._report()
+        while not stop.is_set():
+            if self.run_once() is None:
+                self._report()  # heartbeat
+                stop.wait(self.poll_interval)
+
+
+def start_training_worker(model_dir: str = "ai_models", poll_interval: float = 2.0,
+                          processes: int = len(MODEL_TRAINERS), auto_promote: bool = True) -> subprocess.Popen:
+    """Launch the worker as a child process (for deployments that don't run it separately)"""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.Popen(
+        [sys.executable, "-m", "ai_core.training_worker",
+         "--model-dir", os.path.abspath(model_dir), "--poll-interval", str(poll_interval),
+         "--processes", str(processes)] + ([] if auto_promote else ["--no-auto-promote"]),
+        cwd=backend_dir
+    )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Train progressive-learning models from the job queue")
+    parser.add_argument("--model-dir", default="ai_models")
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--once", action="store_true", help="Train what is pending, then exit")
+    parser.add_argument("--processes", type=int, default=len(MODEL_TRAINERS),
+                        help="Models fitted concurrently (1 = one after another in the worker process)")
+    parser.add_argument("--resources", type=json.loads, default=None,
+                        help='Per-model limits as JSON, e.g. \'{"emotion_classifier": {"n_jobs": 6, "memory_mb": 4096}}\'')
+    parser.add_argument("--no-auto-promote", dest="auto_promote", action="store_false",
+                        help="Publish new model versions without serving them")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    worker = TrainingWorker(args.model_dir, poll_interval=args.poll_interval,
+                            processes=args.processes, model_resources=args.resources,
+                            auto_promote=args.auto_promote)
+    if args.once:
+        worker.queue.recover()
+        worker.run_once()
+    else:
+        try:
+            worker.run_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
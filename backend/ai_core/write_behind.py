@@ -0,0 +1,145 @@
+"""
+Evolance Write-Behind Buffer
+Collects records in memory and writes them in batches from a background thread
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Batches writes off the request path
+
+    Records are appended to an in-memory buffer. A flusher thread hands them
+    to write_fn as one list when batch_size records are waiting or
+    flush_interval seconds have passed since the oldest one arrived. Failed
+    batches are retried with exponential backoff and dropped (and counted)
+    after max_retries. close() drains whatever is left.
+    """
+
+    def __init__(self, write_fn: Callable[[List[Any]], None], name: str = "writer",
+                 batch_size: int = 64, flush_interval: float = 0.25,
+                 max_retries: int = 3, retry_backoff: float = 0.5, max_buffer: int = 10000):
+        """
+        Args:
+            write_fn: Writes a batch of records; raises on failure
+            batch_size: Records per write
+            flush_interval: Longest a record waits for its batch to fill (seconds)
+            max_retries: Attempts per batch after the first failure
+            retry_backoff: Initial delay between retries, doubled each attempt
+            max_buffer: Oldest records are dropped beyond this many pending
+        """
+        self.write_fn = write_fn
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_buffer = max_buffer
+
+        self._buffer = deque()  # (enqueued_at, record)
+        self._condition = threading.Condition()
+        self._closed = False
+
+        # Metrics
+        self._enqueued = 0
+        self._written = 0
+        self._batches = 0
+        self._retries = 0
+        self._dropped = 0
+        self._total_batch_ms = 0.0
+
+        self._thread = threading.Thread(target=self._run, name=f"evolance-{name}-flusher", daemon=True)
+        self._thread.start()
+
+    def put(self, record: Any):
+        """Queue a record for writing; never blocks on the backing store"""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f"{self.name} buffer is closed")
+            self._buffer.append((time.monotonic(), record))
+            self._enqueued += 1
+            if len(self._buffer) > self.max_buffer:
+                self._buffer.popleft()
+                self._dropped += 1
+            # Wake the flusher to start the interval timer, or to write a full batch
+            if len(self._buffer) == 1 or len(self._buffer) >= self.batch_size:
+                self._condition.notify()
+
+    def _next_batch(self) -> List[Any]:
+        """Wait until a batch is due (or the buffer is closed) and take it"""
+        with self._condition:
+            while True:
+                if self._buffer:
+                    if len(self._buffer) >= self.batch_size or self._closed:
+                        break
+                    wait = self._buffer[0][0] + self.flush_interval - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self._condition.wait(wait)
+                elif self._closed:
+                    return []
+                else:
+                    self._condition.wait()
+            count = min(self.batch_size, len(self._buffer))
+            return [self._buffer.popleft()[1] for _ in range(count)]
+
+    def _write(self, batch: List[Any]):
+        delay = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                self.write_fn(batch)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error(f"{self.name}: dropping batch of {len(batch)} after {attempt + 1} attempts: {e}")
+                    with self._condition:
+                        self._dropped += len(batch)
+                    return
+                logger.warning(f"{self.name}: batch write failed, retrying in {delay:.2f}s: {e}")
+                with self._condition:
+                    self._retries += 1
+                time.sleep(delay)
+                delay *= 2
+                continue
+
+            with self._condition:
+                self._written += len(batch)
+                self._batches += 1
+                self._total_batch_ms += (time.perf_counter() - started) * 1000
+            return
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            self._write(batch)
+
+    def close(self, timeout: float = 30.0):
+        """Stop accepting records and wait for the buffer to drain"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"{self.name}: {len(self._buffer)} records still pending after {timeout}s")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "pending": len(self._buffer),
+                "enqueued": self._enqueued,
+                "written": self._written,
+                "batches": self._batches,
+                "retries": self._retries,
+                "dropped": self._dropped,
+                "avg_batch_size": round(self._written / self._batches, 1) if self._batches else 0.0,
+                "avg_batch_ms": round(self._total_batch_ms / self._batches, 2) if self._batches else 0.0,
+            }
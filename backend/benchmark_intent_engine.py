@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Intent Engine Benchmark
+Compares accuracy and latency of the embedding intent engine against zero-shot BART-MNLI
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from ai_core.intent_engine import EmbeddingIntentClassifier, INTENT_LABELS
+
+# Held-out utterances (none of these are prototypes)
+EVAL_SET = [
+    ("Why can't I sleep at night?", "question"),
+    ("What's the best way to calm down quickly?", "question"),
+    ("Do you think I'm overreacting?", "question"),
+    ("How long does grief usually last?", "question"),
+    ("I cooked dinner for my parents tonight.", "statement"),
+    ("My exam results came out this morning.", "statement"),
+    ("I've been walking every day this week.", "statement"),
+    ("Work was busy again.", "statement"),
+    ("Hey there!", "greeting"),
+    ("Hi EV, good to see you", "greeting"),
+    ("Morning!", "greeting"),
+    ("Talk soon, bye!", "farewell"),
+    ("I'm heading off now, see you later", "farewell"),
+    ("Catch you tomorrow", "farewell"),
+    ("Could you share a grounding exercise?", "request"),
+    ("Please give me some tips for better focus.", "request"),
+    ("Suggest a short meditation for stress.", "request"),
+    ("This advice is completely pointless.", "complaint"),
+    ("You keep repeating yourself and it's frustrating.", "complaint"),
+    ("The reminders are way too annoying.", "complaint"),
+    ("You're really good at listening.", "compliment"),
+    ("Thanks so much, I feel better already!", "compliment"),
+    ("That exercise was amazing.", "compliment"),
+    ("I really need some support right now.", "help"),
+    ("I'm overwhelmed and don't know where to turn.", "help"),
+    ("Help me get through tonight please.", "help"),
+]
+
+
+def _latency_summary(latencies):
+    latencies = np.array(latencies) * 1000
+    return f"mean {latencies.mean():7.1f} ms | p95 {np.percentile(latencies, 95):7.1f} ms"
+
+
+def benchmark_embedding(engine):
+    """Prototype-similarity classification"""
+    correct, latencies, confidences = 0, [], []
+    for text, label in EVAL_SET:
+        start = time.perf_counter()
+        prediction = engine.classify(text)
+        latencies.append(time.perf_counter() - start)
+        confidences.append(prediction.confidence)
+        correct += prediction.label == label
+    return correct / len(EVAL_SET), latencies, confidences
+
+
+def benchmark_zero_shot(classifier):
+    """Zero-shot BART-MNLI classification"""
+    correct, latencies = 0, []
+    for text, label in EVAL_SET:
+        start = time.perf_counter()
+        result = classifier(text, INTENT_LABELS)
+        latencies.append(time.perf_counter() - start)
+        correct += result["labels"][0] == label
+    return correct / len(EVAL_SET), latencies
+
+
+def benchmark_hybrid(engine, classifier, threshold):
+    """Embedding engine with zero-shot fallback below a confidence threshold"""
+    correct, latencies, fallbacks = 0, [], 0
+    for text, label in EVAL_SET:
+        start = time.perf_counter()
+        prediction = engine.classify(text)
+        predicted = prediction.label
+        if prediction.confidence < threshold:
+            predicted = classifier(text, INTENT_LABELS)["labels"][0]
+            fallbacks += 1
+        latencies.append(time.perf_counter() - start)
+        correct += predicted == label
+    return correct / len(EVAL_SET), latencies, fallbacks
+
+
+def main():
+    print("🎯 Intent Engine Benchmark")
+    print("=" * 70)
+    print(f"Evaluation set: {len(EVAL_SET)} utterances, {len(INTENT_LABELS)} intents\n")
+
+    start = time.perf_counter()
+    engine = EmbeddingIntentClassifier()
+    print(f"Embedding engine startup (model + prototypes): {(time.perf_counter() - start) * 1000:.0f} ms")
+    engine.classify("warm up")
+
+    accuracy, latencies, confidences = benchmark_embedding(engine)
+    print(f"Embedding   | accuracy {accuracy:.3f} | {_latency_summary(latencies)}")
+
+    try:
+        from transformers import pipeline
+        start = time.perf_counter()
+        classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
+        print(f"Zero-shot model startup: {(time.perf_counter() - start) * 1000:.0f} ms")
+        classifier("warm up", INTENT_LABELS)
+    except Exception as e:
+        print(f"⚠️ Zero-shot model unavailable, skipping comparison: {e}")
+        return
+
+    accuracy, latencies = benchmark_zero_shot(classifier)
+    print(f"Zero-shot   | accuracy {accuracy:.3f} | {_latency_summary(latencies)}")
+
+    for threshold in (0.3, 0.5, 0.7):
+        accuracy, latencies, fallbacks = benchmark_hybrid(engine, classifier, threshold)
+        print(f"Hybrid@{threshold:.1f}  | accuracy {accuracy:.3f} | {_latency_summary(latencies)} "
+              f"| fallbacks {fallbacks}/{len(EVAL_SET)}")
+
+
+if __name__ == "__main__":
+    main()
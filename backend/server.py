@@ -16,11 +16,16 @@ from passlib.context import CryptContext
 import openai
 from openai import OpenAI
 import math
+import time
 
 # Import hybrid AI integration
 from ai_core.hybrid_ai_integration import evolance_ai
-from ai_core.gemini_integration import GeminiEmotionAnalyzer, GeminiCoreAI
+from ai_core.gemini_integration import GeminiEmotionAnalyzer, GeminiCoreAI, GeminiChatPipeline
+from ai_core.gemini_client import get_gemini_client
 from ai_core.progressive_learning import ProgressiveLearningSystem
+from ai_core.training_worker import start_training_worker
+from ai_core.shadow_eval import RolloutPolicy, ShadowEvaluator
+from ai_core.response_cache import response_cache
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -45,8 +50,29 @@ if OPENAI_API_KEY and OPENAI_API_KEY != 'your-openai-api-key-here':
 else:
     openai_client = None
 
-# Initialize Progressive Learning System
-progressive_learning = ProgressiveLearningSystem()
+# Initialize Progressive Learning System; retraining runs in a separate worker process
+# (PROGRESSIVE_TRAINING_MODE=inline trains inside the request instead).
+# PROGRESSIVE_LEARNING_MODE=online updates the models per mini-batch instead of refitting.
+PROGRESSIVE_TRAINING_MODE = os.getenv("PROGRESSIVE_TRAINING_MODE", "worker")
+progressive_learning = ProgressiveLearningSystem(
+    training_mode=PROGRESSIVE_TRAINING_MODE,
+    train_every=int(os.getenv("PROGRESSIVE_TRAIN_EVERY", "100")),
+    learning_mode=os.getenv("PROGRESSIVE_LEARNING_MODE", "batch"),
+    online_batch_size=int(os.getenv("PROGRESSIVE_ONLINE_BATCH_SIZE", "32")),
+    auto_promote=os.getenv("MODEL_AUTO_PROMOTE", "true").lower() == "true"
+)
+# Set TRAINING_WORKER=external when the worker runs as its own service
+training_worker_process = None
+# Own-model vs Gemini routing: a rollout percentage stepped by shadow comparisons on
+# sampled Gemini traffic (SHADOW_ROLLOUT=manual keeps it where
+# `python -m ai_core.shadow_eval set-rollout` puts it)
+SHADOW_DIR = os.path.join(progressive_learning.model_dir, "shadow")
+shadow_eval = ShadowEvaluator(
+    progressive_learning, SHADOW_DIR,
+    sample_rate=float(os.getenv("SHADOW_SAMPLE_RATE", "0.1")),
+    rollout=RolloutPolicy(SHADOW_DIR, mode=os.getenv("SHADOW_ROLLOUT", "auto")),
+    cost_per_1k_tokens=float(os.getenv("GEMINI_COST_PER_1K_TOKENS", "0"))
+)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
@@ -77,6 +103,7 @@ class User(BaseModel):
     personality_test_completed: bool = False
     spiritual_level: int = 0
     profile_picture: Optional[str] = None
+    response_cache_opt_out: bool = False
 
 class UserResponse(BaseModel):
     id: str
@@ -644,8 +671,20 @@ hybrid_ai = evolance_ai
 
 # Initialize Gemini AI
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "your-gemini-api-key-here")
-gemini_emotion_analyzer = GeminiEmotionAnalyzer(GEMINI_API_KEY)
-gemini_core_ai = GeminiCoreAI(GEMINI_API_KEY)
+# One pooled client shared by the analyzer and core AI (GEMINI_API_ENDPOINT points it at a proxy or stub)
+gemini_client = get_gemini_client(
+    GEMINI_API_KEY,
+    api_endpoint=os.getenv("GEMINI_API_ENDPOINT") or None,
+    max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")),
+    max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+)
+gemini_emotion_analyzer = GeminiEmotionAnalyzer(GEMINI_API_KEY, client=gemini_client)
+gemini_core_ai = GeminiCoreAI(GEMINI_API_KEY, client=gemini_client)
+# combined (one structured call), parallel or sequential; see GeminiChatPipeline
+gemini_chat = GeminiChatPipeline(
+    gemini_emotion_analyzer, gemini_core_ai, mode=os.getenv("GEMINI_CHAT_MODE", "combined"),
+    fallback_mode=os.getenv("GEMINI_CHAT_FALLBACK_MODE", "parallel")
+)
 
 # Store conversation contexts per user
 user_conversations = {}
@@ -1155,6 +1194,7 @@ async def hybrid_ai_chat(
 ):
     """Enhanced chat endpoint using hybrid AI system"""
     try:
+        response_cache.set_opt_out(current_user.id, current_user.response_cache_opt_out)
         result = await hybrid_ai.process_chat_message(
             user_id=current_user.id,
             message=message,
@@ -1427,6 +1467,7 @@ async def gemini_chat_with_ai(request: ChatRequest, current_user: User = Depends
     try:
         user_id = current_user.id
         user_message = request.message
+        response_cache.set_opt_out(user_id, current_user.response_cache_opt_out)
         
         # Get user's conversation context
         if user_id not in user_conversations:
@@ -1434,8 +1475,9 @@ async def gemini_chat_with_ai(request: ChatRequest, current_user: User = Depends
         
         conversation_context = user_conversations[user_id]
         
-        # Check if we should use our own trained model
-        use_own_model = progressive_learning.should_use_own_model()
+        # Route to our own trained model for the rollout percentage of requests
+        use_own_model = shadow_eval.route() == "own"
+        started = time.perf_counter()
         
         if use_own_model:
             # Use our trained model
@@ -1443,18 +1485,16 @@ async def gemini_chat_with_ai(request: ChatRequest, current_user: User = Depends
             ai_response = progressive_learning.generate_response(user_message, emotion_data)
             updated_emolytics = progressive_learning.analyze_emolytics(emotion_data, conversation_context)
             model_used = "trained"
+            shadow_eval.record_own((time.perf_counter() - started) * 1000)
         else:
-            # Use Gemini for analysis and response
-            emotion_data = gemini_emotion_analyzer.analyze_conversation_emotion(
-                user_message, conversation_context
-            )
-            ai_response = gemini_emotion_analyzer.generate_emotional_response(
-                user_message, emotion_data
-            )
-            updated_emolytics = gemini_core_ai.update_emolytics(
-                user_id, emotion_data, conversation_context
-            )
+            # Use Gemini for analysis, response and emolytics (one combined call unless configured otherwise)
+            turn = await gemini_chat.run(user_message, conversation_context, user_id=user_id)
+            emotion_data = turn["emotion_data"]
+            ai_response = turn["response"]
+            updated_emolytics = turn["emolytics"]
             model_used = "gemini"
+            # Sampled requests also run our models, off the request path, for comparison
+            shadow_eval.submit(user_message, conversation_context, turn, (time.perf_counter() - started) * 1000)
             
             # Collect training data from Gemini interaction
             progressive_learning.collect_training_data(
@@ -1496,7 +1536,7 @@ async def gemini_chat_with_ai(request: ChatRequest, current_user: User = Depends
 async def get_emotional_patterns(user_id: str, current_user: User = Depends(get_current_user)):
     """Get emotional patterns analysis for a user."""
     try:
-        patterns = gemini_emotion_analyzer.analyze_emotional_patterns(user_id)
+        patterns = await gemini_emotion_analyzer.analyze_emotional_patterns_async(user_id)
         return {"patterns": patterns}
     except Exception as e:
         logger.error(f"Error analyzing patterns: {e}")
@@ -1510,12 +1550,38 @@ async def get_learning_status(current_user: User = Depends(get_current_user)):
         return {
             "learning_status": status,
             "independence_achieved": progressive_learning.should_use_own_model(),
-            "next_training_at": status["total_interactions"] + status.get("training_frequency", 100)
+            "next_training_at": status["total_interactions"] + status.get("training_frequency", 100),
+            "routing": shadow_eval.get_status()
         }
     except Exception as e:
         logger.error(f"Error getting learning status: {e}")
         return {"error": "Failed to get learning status"}
 
+@api_router.get("/ai/shadow-report")
+async def get_shadow_report(hours: int = 24, current_user: User = Depends(get_current_user)):
+    """Own-model vs Gemini agreement, latency and cost from shadow evaluation."""
+    try:
+        return shadow_eval.report(hours)
+    except Exception as e:
+        logger.error(f"Error building shadow report: {e}")
+        return {"error": "Failed to build shadow report"}
+
+class ResponseCachePreference(BaseModel):
+    opt_out: bool
+
+@api_router.put("/ai/response-cache")
+async def set_response_cache_preference(
+    preference: ResponseCachePreference,
+    current_user: User = Depends(get_current_user)
+):
+    """Opt out of (or back into) cached AI responses."""
+    await db.users.update_one(
+        {"id": current_user.id},
+        {"$set": {"response_cache_opt_out": preference.opt_out}}
+    )
+    response_cache.set_opt_out(current_user.id, preference.opt_out)
+    return {"response_cache_opt_out": preference.opt_out}
+
 @api_router.post("/ai/train-models")
 async def train_models_manually(current_user: User = Depends(get_current_user)):
     """Manually trigger model training."""
@@ -1588,6 +1654,14 @@ async def startup_event():
     except Exception as e:
         logger.error(f"❌ Failed to initialize data: {e}")
     
+    global training_worker_process
+    if PROGRESSIVE_TRAINING_MODE == "worker" and os.getenv("TRAINING_WORKER", "embedded") == "embedded":
+        training_worker_process = start_training_worker(
+            progressive_learning.model_dir, processes=int(os.getenv("TRAINING_PROCESSES", "3")),
+            auto_promote=os.getenv("MODEL_AUTO_PROMOTE", "true").lower() == "true"
+        )
+        logger.info(f"Training worker started (pid {training_worker_process.pid})")
+    
     logger.info("TimeSoul API started successfully")
     if openai_client:
         logger.info("OpenAI integration enabled")
@@ -1596,6 +1670,12 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await hybrid_ai.shutdown()
+    await gemini_client.aclose()
+    progressive_learning.save_training_data()  # flush buffered samples
+    shadow_eval.shutdown(wait=False)
+    if training_worker_process is not None:
+        training_worker_process.terminate()
     client.close()
 
 if __name__ == "__main__":
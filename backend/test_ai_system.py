@@ -102,6 +102,14 @@ def test_semantic_network():
         anger_body = core_network.get_body_mapping("anger")
         print(f"✓ Anger body regions: {anger_body}")
         
+        # Test lexicon emotion scoring
+        text_emotions = core_network.analyze_text_emotions("I'm anxious and worried about tomorrow")
+        assert max(text_emotions, key=text_emotions.get) == "fear"
+        print(f"✓ Lexicon emotions: {text_emotions}")
+        batch_emotions = core_network.analyze_texts_emotions(["I feel so happy", "I'm furious"])
+        assert [max(e, key=e.get) for e in batch_emotions] == ["joy", "anger"]
+        print(f"✓ Batch lexicon emotions: {batch_emotions}")
+        
         return True
         
     except Exception as e:
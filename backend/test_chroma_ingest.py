@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Offline tests for streaming, batched and resumable ingestion of generated data into Chroma collections
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_core.chroma_ingest import ChromaIngester, iter_dataset
+
+
+class MemoryCollection:
+    """Stands in for a Chroma collection: upsert and delete by id"""
+
+    def __init__(self):
+        self.documents = {}
+        self.upserts = 0
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.documents.pop(doc_id, None)
+
+    def upsert(self, ids, documents, embeddings, metadatas):
+        assert len(ids) == len(set(ids)) == len(documents) == len(embeddings) == len(metadatas)
+        self.upserts += 1
+        for doc_id, text, embedding, metadata in zip(ids, documents, embeddings, metadatas):
+            self.documents[doc_id] = (text, embedding, metadata)
+
+
+class Embedder:
+    """Deterministic embeddings; optionally fails on the n-th call"""
+
+    def __init__(self, fail_on=None):
+        self.calls = 0
+        self.fail_on = fail_on
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        self.threads.add(threading.current_thread().name)
+        if call == self.fail_on:
+            raise RuntimeError("embedding worker died")
+        return [[len(text), sum(map(ord, text)) % 97] for text in texts]
+
+
+def dataset(conversations=30):
+    items = [{
+        "scenario": f"scenario {i % 3}",
+        "messages": [
+            {"role": "user", "text": f"I feel anxious about test {i}", "emotion": "fear"},
+            {"role": "assistant", "text": "That sounds hard, I am here for you"},
+        ]
+    } for i in range(conversations)]
+    return items + [{"emotional_responses": [{"emotion": "joy", "response": "Wonderful!"}]}]
+
+
+def write_dataset(path, items, jsonl=False):
+    with open(path, "w") as f:
+        if jsonl:
+            f.write("".join(json.dumps(item) + "\n" for item in items))
+        else:
+            json.dump(items, f, indent=2)
+
+
+def make_ingester(path, embed, **settings):
+    collections = {"conversations": MemoryCollection(), "emotional_patterns": MemoryCollection()}
+    return ChromaIngester(collections, embed, os.path.join(path, "checkpoint.json"), **settings), collections
+
+
+def test_batches_upsert_by_content_hash():
+    with tempfile.TemporaryDirectory() as path:
+        data = os.path.join(path, "full_training_dataset.json")
+        write_dataset(data, dataset())
+        embed = Embedder()
+        reports = []
+        ingester, collections = make_ingester(path, embed, batch_size=8, workers=2, progress=reports.append)
+        result = ingester.ingest(data)
+        assert len(collections["conversations"].documents) == 30
+        assert len(collections["emotional_patterns"].documents) == 1, "a repeated response is stored once"
+        assert result["upserts"]["emotional_patterns"] == collections["emotional_patterns"].upserts > 1, \
+            "upserts count the repeated response once per batch"
+        assert result["items"] == 31 and result["ingested"] > 0 and result["documents_per_second"] > 0
+        assert len(reports) >= 4 and reports[-1]["items_done"] == 31
+        assert all(name.startswith("evolance-ingest") for name in embed.threads), "embedding runs on the pool"
+
+        again, collections = make_ingester(path, Embedder(), batch_size=8)
+        assert again.ingest(data, resume=False)["items"] == 31
+        assert len(collections["conversations"].documents) == 30, "re-running updates the same ids"
+        print("✅ Documents are embedded in batches on a pool and upserted by content hash")
+
+
+def test_interrupted_run_resumes():
+    with tempfile.TemporaryDirectory() as path:
+        data = os.path.join(path, "dataset.jsonl")
+        write_dataset(data, dataset(40), jsonl=True)
+        crashing, collections = make_ingester(path, Embedder(fail_on=5), batch_size=4, workers=1)
+        try:
+            crashing.ingest(data)
+            raise AssertionError("the embedding failure must surface")
+        except RuntimeError:
+            pass
+        with open(os.path.join(path, "checkpoint.json")) as f:
+            done = json.load(f)["sources"][os.path.abspath(data)]["items_done"]
+        assert 0 < done < 40 and len(collections["conversations"].documents) == done
+
+        embed = Embedder()
+        resumed, collections = make_ingester(path, embed, batch_size=4, workers=1)
+        result = resumed.ingest(data)
+        assert result["resumed_from"] == done and result["items"] == 41
+        assert len(collections["conversations"].documents) == 40 - done, "only the remaining items are read"
+        assert resumed.ingest(data)["ingested"] == 0, "a completed file is not ingested again"
+        print(f"✅ An interrupted run resumes after item {done}")
+
+
+def test_legacy_positional_ids_are_replaced():
+    with tempfile.TemporaryDirectory() as path:
+        data = os.path.join(path, "full_training_dataset.json")
+        write_dataset(data, dataset(10))
+        ingester, collections = make_ingester(path, Embedder(), batch_size=4)
+        # What the ingestion before content-hash ids left behind
+        for i in range(10):
+            collections["conversations"].documents[f"conv_{i}_0"] = (f"I feel anxious about test {i}", [], {})
+            collections["emotional_patterns"].documents[f"resp_{i}_1"] = ("That sounds hard, I am here for you", [], {})
+        collections["conversations"].documents["user_42_1700000000.0"] = ("stored by a user", [], {})
+
+        ingester.ingest(data)
+        conversations = set(collections["conversations"].documents)
+        assert not any(doc_id.startswith("conv_") and doc_id.count("_") == 2 for doc_id in conversations)
+        assert len(conversations) == 11, "each message once under its content hash, other documents untouched"
+        assert len(collections["emotional_patterns"].documents) == 1
+
+        keeping, collections = make_ingester(path, Embedder(), batch_size=4, delete_legacy_ids=False)
+        collections["conversations"].documents["conv_0_0"] = ("I feel anxious about test 0", [], {})
+        keeping.ingest(data, resume=False)
+        assert "conv_0_0" in collections["conversations"].documents
+        print("✅ Positional ids from earlier ingestions are deleted as their messages are re-ingested")
+
+
+def test_reads_json_arrays_and_jsonl():
+    with tempfile.TemporaryDirectory() as path:
+        array, lines = os.path.join(path, "data.json"), os.path.join(path, "data.jsonl")
+        write_dataset(array, dataset(5))
+        write_dataset(lines, dataset(5), jsonl=True)
+        assert list(iter_dataset(array)) == list(iter_dataset(lines)) == dataset(5)
+        print("✅ Datasets are read from JSON arrays and JSONL")
+
+
+def main():
+    print("📥 Testing Chroma Ingestion")
+    print("=" * 50)
+    test_batches_upsert_by_content_hash()
+    test_interrupted_run_resumes()
+    test_legacy_positional_ids_are_replaced()
+    test_reads_json_arrays_and_jsonl()
+    print("\n🎉 All Chroma ingestion tests passed!")
+
+
+if __name__ == "__main__":
+    main()
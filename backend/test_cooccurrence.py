@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the time-decayed concept co-occurrence graph
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_core.cooccurrence import CooccurrenceGraph, extract_concepts
+
+DAY = 86400
+
+
+def test_counts_and_top_neighbors():
+    now = [0.0]
+    graph = CooccurrenceGraph(half_life=DAY, clock=lambda: now[0])
+    graph.add_message("Work stress keeps me awake, work never stops.")
+    graph.add_message("Stress from work again")
+    graph.add_message("Sleep helps with stress")
+
+    assert extract_concepts("I can't sleep, work!") == ["can't", "sleep", "work"]
+    top = graph.neighbors("stress", k=2)
+    assert top[0] == ("work", 2.0), top
+    assert graph.weight("work") == 2.0, "a concept counts once per message"
+    assert graph.neighbors("unknown") == []
+    print("✅ Co-occurrence weights and top-k neighbors")
+
+
+def test_window_limits_pairs():
+    graph = CooccurrenceGraph(window=2)
+    graph.add_message("alpha bravo charlie delta echo")
+    assert {name for name, _ in graph.neighbors("alpha")} == {"bravo", "charlie"}
+    assert graph.edge_count == 7
+    print("✅ Only concepts within the window are linked")
+
+
+def test_decay_and_pruning():
+    now = [0.0]
+    graph = CooccurrenceGraph(half_life=DAY, min_weight=0.2, prune_every=1000, clock=lambda: now[0])
+    graph.add_message("lonely evenings")
+    now[0] = DAY
+    assert abs(graph.neighbors("lonely")[0][1] - 0.5) < 1e-9, "weight halves after one half-life"
+    graph.add_message("happy mornings")
+    now[0] = 3 * DAY
+    graph.prune()
+    assert graph.weight("lonely") == 0.0 and "lonely" not in graph._ids, "decayed concepts are pruned"
+    assert abs(graph.weight("happy") - 0.25) < 1e-9
+    assert graph.edge_count == 1
+    print("✅ Weights decay and weak edges/concepts are pruned")
+
+
+def test_bounded_memory():
+    graph = CooccurrenceGraph(max_concepts=50, max_edges=100, prune_every=200)
+    for i in range(2000):
+        graph.add_concepts([f"topic{i % 500}", f"topic{(i * 7) % 500}", "common"])
+    graph.prune()
+    assert len(graph) <= 50 and graph.edge_count <= 100
+    assert "common" in graph._ids, "the most used concept survives"
+    assert len(graph._concepts) <= 500, "ids are reused after eviction"
+    print(f"✅ Bounded to {len(graph)} concepts and {graph.edge_count} edges")
+
+
+def test_save_and_load():
+    graph = CooccurrenceGraph(half_life=30 * DAY)
+    graph.add_message("gratitude journaling helps gratitude")
+    graph.add_message("journaling before sleep")
+    with tempfile.TemporaryDirectory() as path:
+        file = os.path.join(path, "graph.npz")
+        graph.save(file)
+        loaded = CooccurrenceGraph.load(file, half_life=30 * DAY)
+    assert len(loaded) == len(graph) and loaded.edge_count == graph.edge_count
+    expected = dict(graph.neighbors("journaling"))
+    for name, weight in loaded.neighbors("journaling"):
+        assert abs(expected[name] - weight) < 1e-6
+    print("✅ Graph round-trips through save/load")
+
+
+def test_autosave_after_every_n_updates():
+    with tempfile.TemporaryDirectory() as path:
+        file = os.path.join(path, "graph.npz")
+        graph = CooccurrenceGraph()
+        graph.start_autosave(file, save_every=3, interval=60)
+        graph.add_message("morning walks calm anxiety")
+        graph.add_message("evening walks too")
+        time.sleep(0.1)
+        assert not os.path.exists(file), "no save before save_every updates"
+        graph.add_message("walks with friends")
+        deadline = time.monotonic() + 2
+        while not os.path.exists(file):
+            assert time.monotonic() < deadline, "the graph was not saved after save_every updates"
+            time.sleep(0.01)
+        assert abs(CooccurrenceGraph.load(file).weight("walks") - 3.0) < 1e-6
+
+        graph.add_message("running helps too")
+        graph.close()
+        assert abs(CooccurrenceGraph.load(file).weight("running") - 1.0) < 1e-6, "close writes the final state"
+        print("✅ The graph is saved in the background every save_every updates and on close")
+
+
+def test_throughput():
+    graph = CooccurrenceGraph()
+    message = "I have been feeling anxious about work and my relationship with family lately"
+    start = time.perf_counter()
+    for _ in range(5000):
+        graph.add_message(message)
+    elapsed = time.perf_counter() - start
+    print(f"✅ 5000 messages in {elapsed * 1000:.0f} ms ({elapsed / 5000 * 1e6:.1f} µs/message)")
+
+
+def main():
+    print("🕸️ Testing Co-occurrence Graph")
+    print("=" * 50)
+    test_counts_and_top_neighbors()
+    test_window_limits_pairs()
+    test_decay_and_pruning()
+    test_bounded_memory()
+    test_save_and_load()
+    test_autosave_after_every_n_updates()
+    test_throughput()
+    print("\n🎉 All co-occurrence graph tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the shared embedding function's batching and LRU cache, using a fake sentence-transformer
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from ai_core.embeddings import SentenceEmbeddingFunction
+
+
+class FakeModel:
+    """Records the texts of each encode call; embeds a text as its normalized (length, first character) pair"""
+
+    device = "cpu"
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size, normalize_embeddings, convert_to_numpy, show_progress_bar):
+        assert normalize_embeddings and convert_to_numpy
+        self.encoded.append(list(texts))
+        vectors = np.array([[len(text), ord(text[0])] for text in texts], dtype=np.float64)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def fake_function(**settings):
+    function = SentenceEmbeddingFunction("fake-model", **settings)
+    function._model = FakeModel()
+    return function
+
+
+def test_duplicates_are_encoded_once_in_order():
+    function = fake_function(batch_size=2)
+    texts = ["calm", "anxious", "calm", "sad", "anxious"]
+    vectors = function.embed(texts)
+    assert function.model.encoded == [["calm", "anxious", "sad"]], "each distinct text is encoded once"
+    assert vectors.shape == (5, 2) and vectors.dtype == np.float32
+    assert np.array_equal(vectors[0], vectors[2]) and np.array_equal(vectors[1], vectors[4])
+    for text, vector in zip(texts, vectors):
+        expected = np.array([len(text), ord(text[0])], dtype=np.float32)
+        assert np.allclose(vector, expected / np.linalg.norm(expected)), "rows follow the input order"
+    assert function(["sad"]) == [vectors[3].tolist()], "Chroma calls return plain lists"
+    assert function.get_metrics()["batches"] == 2
+    print("✅ Repeated texts are encoded once and results keep the input order")
+
+
+def test_cache_skips_the_model():
+    function = fake_function()
+    first = function.embed(["hello there", "goodbye"])
+    again = function.embed(["goodbye", "hello there"])
+    assert len(function.model.encoded) == 1, "cached texts are not encoded again"
+    assert np.array_equal(again, first[::-1])
+    metrics = function.get_metrics()
+    assert metrics["cached"] == 2 and metrics["hit_rate"] == 0.5 and metrics["loaded"]
+    print("✅ Cached embeddings are served without calling the model")
+
+
+def test_cache_evicts_least_recently_used():
+    function = fake_function(cache_size=2)
+    function.embed(["a1", "b1"])
+    function.embed(["a1"])  # a1 is now the most recently used
+    function.embed(["c1"])  # evicts b1
+    function.embed(["a1", "b1"])
+    assert function.model.encoded == [["a1", "b1"], ["c1"], ["b1"]]
+    assert list(function._cache) == ["a1", "b1"]
+    print("✅ The cache evicts the least recently used text")
+
+
+def test_load_returns_the_model():
+    function = fake_function()
+    model = function._model
+    assert function.load() is model and function.model is model
+    assert function.embed([]).shape == (0, 0) and model.encoded == []
+    print("✅ load() returns the loaded model; an empty batch encodes nothing")
+
+
+def main():
+    print("🧮 Testing Embeddings")
+    print("=" * 50)
+    test_duplicates_are_encoded_once_in_order()
+    test_cache_skips_the_model()
+    test_cache_evicts_least_recently_used()
+    test_load_returns_the_model()
+    print("\n🎉 All embedding tests passed!")
+
+
+if __name__ == "__main__":
+    main()
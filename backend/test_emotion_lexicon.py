@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the lexicon emotion scorer and its pre-filter for the transformer emotion model
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_core.semantic_network import core_network
+
+
+def top(emotions):
+    return max(emotions, key=emotions.get) if emotions else None
+
+
+def test_scores_everyday_language():
+    assert top(core_network.analyze_text_emotions("I'm anxious and worried about tomorrow")) == "fear"
+    assert top(core_network.analyze_text_emotions("I feel so happy today")) == "joy"
+    batch = core_network.analyze_texts_emotions(["I feel so happy", "I'm furious", "the table is brown"])
+    assert [top(emotions) for emotions in batch] == ["joy", "anger", None]
+    assert abs(sum(batch[0].values()) - 1.0) < 1e-9, "scores are probabilities"
+    print("✅ Everyday emotion words are scored, one sparse product per batch")
+
+
+def test_negation_is_not_read_as_the_emotion():
+    assert core_network.analyze_text_emotions("I am not happy at all") == {}
+    assert core_network.analyze_text_emotions("I never felt scared") == {}
+    assert core_network.lexicon_prefilter("I am not happy at all") is None
+    assert core_network.lexicon_prefilter("I don't feel scared, I feel so happy") is None, \
+        "a negated emotion term makes the text ambiguous"
+    # Negation ends at the clause, and phrases that start with a cue are not negations
+    assert top(core_network.analyze_text_emotions("I'm not sure, but I am really happy")) == "joy"
+    assert top(core_network.analyze_text_emotions("I can't wait for the trip")) == "anticipation"
+    print("✅ Negated emotion terms are dropped and stop the pre-filter")
+
+
+def test_intensifiers_scale_terms():
+    lexicon = core_network.lexicon
+    assert lexicon.score(["very happy"]).sum() == 1.5 * lexicon.score(["happy"]).sum()
+    assert lexicon.score(["slightly worried"]).sum() == 0.5 * lexicon.score(["worried"]).sum()
+    assert core_network.lexicon_prefilter("I am slightly worried") is None, "too weak to skip the model"
+    print("✅ Degree modifiers scale the next term")
+
+
+def test_prefilter_needs_a_clear_answer():
+    assert core_network.lexicon_prefilter("I am so happy and grateful") == ("joy", 1.0)
+    assert core_network.lexicon_prefilter("the meeting is at noon") is None
+    mixed = core_network.lexicon_prefilter("I am happy but also scared and angry", min_confidence=0.8)
+    assert mixed is None, "no emotion dominates"
+    print("✅ The pre-filter only answers when one emotion dominates")
+
+
+def main():
+    print("📖 Testing Emotion Lexicon")
+    print("=" * 50)
+    test_scores_everyday_language()
+    test_negation_is_not_read_as_the_emotion()
+    test_intensifiers_scale_terms()
+    test_prefilter_needs_a_clear_answer()
+    print("\n🎉 All emotion lexicon tests passed!")
+
+
+if __name__ == "__main__":
+    main()
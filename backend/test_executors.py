@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the bounded executor pools and the event-loop lag monitor
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_core.executors import BoundedExecutor, ExecutorPools, ExecutorSaturated, LoopLagMonitor
+
+
+class Gate:
+    """Blocking call that records concurrency and holds its thread until released"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, value):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        self.release.wait(5)
+        with self._lock:
+            self.running -= 1
+        return value
+
+
+async def settle(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+def test_submission_is_bounded():
+    async def scenario():
+        executor = BoundedExecutor("test", max_workers=2, max_queue=1)
+        gate = Gate()
+        tasks = [asyncio.create_task(executor.run(gate, i)) for i in range(6)]
+        await settle(lambda: executor.get_metrics()["active"] == 2)
+        metrics = executor.get_metrics()
+        # Two run, one is queued in the pool and three wait for admission on the loop
+        assert metrics["queue_depth"] == 4 and executor._pending == 1 and executor._waiting == 3
+        gate.release.set()
+        assert await asyncio.gather(*tasks) == list(range(6)), "results come back to their callers"
+        executor.shutdown()
+        return gate, executor.get_metrics()
+
+    gate, metrics = asyncio.run(scenario())
+    assert gate.max_running == 2
+    assert metrics["completed"] == metrics["submitted"] == 6 and metrics["queue_depth"] == 0
+    assert metrics["max_queue_depth"] == 4 and metrics["avg_wait_ms"] > 0
+    print("✅ At most max_workers calls run and at most max_queue more are queued in the pool")
+
+
+def test_saturated_pool_rejects_and_failures_are_counted():
+    async def scenario():
+        executor = BoundedExecutor("test", max_workers=1, max_queue=0, max_waiting=1)
+        gate = Gate()
+        running = asyncio.create_task(executor.run(gate, "running"))
+        await settle(lambda: executor.get_metrics()["active"] == 1)
+        waiting = asyncio.create_task(executor.run(gate, "waiting"))
+        await settle(lambda: executor._waiting == 1)
+        try:
+            await executor.run(gate, "rejected")
+            raise AssertionError("a caller beyond max_waiting must be rejected")
+        except ExecutorSaturated:
+            pass
+        gate.release.set()
+        assert await asyncio.gather(running, waiting) == ["running", "waiting"]
+
+        def fail():
+            raise ValueError("boom")
+        try:
+            await executor.run(fail)
+            raise AssertionError("the call's exception must propagate")
+        except ValueError:
+            pass
+        executor.shutdown()
+        return executor.get_metrics()
+
+    metrics = asyncio.run(scenario())
+    assert metrics["rejected"] == 1 and metrics["failed"] == 1 and metrics["completed"] == 2
+    assert metrics["queue_depth"] == 0 and metrics["active"] == 0
+    print("✅ A saturated pool rejects new callers; failed calls are counted and re-raised")
+
+
+def test_loop_lag_is_measured():
+    async def scenario():
+        monitor = LoopLagMonitor(interval=0.02)
+        monitor.ensure_started()
+        await asyncio.sleep(0.05)
+        time.sleep(0.2)  # blocks the event loop
+        await asyncio.sleep(0.05)
+        monitor.stop()
+        return monitor.get_metrics()
+
+    metrics = asyncio.run(scenario())
+    assert metrics["max_ms"] >= 100, f"a 200 ms block must show up as lag: {metrics}"
+    assert metrics["avg_ms"] <= metrics["max_ms"]
+    print(f"✅ Blocking the event loop shows up as lag ({metrics['max_ms']} ms)")
+
+
+def test_pools_read_limits_from_config_and_env():
+    os.environ["EVOLANCE_INFERENCE_WORKERS"] = "3"
+    try:
+        pools = ExecutorPools({"inference": {"max_workers": 1, "max_waiting": 10}, "vector_store": {"max_queue": 5}})
+    finally:
+        del os.environ["EVOLANCE_INFERENCE_WORKERS"]
+    metrics = pools.get_metrics()
+    assert metrics["inference"]["max_workers"] == 3, "env vars take precedence over the config"
+    assert pools.inference.max_waiting == 10
+    assert metrics["vector_store"]["max_queue"] == 5 and metrics["vector_store"]["max_workers"] == 4
+    assert set(metrics) == {"inference", "vector_store", "event_loop_lag"}
+    pools.shutdown()
+    print("✅ Pool limits come from the defaults, the config and the environment")
+
+
+def main():
+    print("🧵 Testing Executor Pools")
+    print("=" * 50)
+    test_submission_is_bounded()
+    test_saturated_pool_rejects_and_failures_are_counted()
+    test_loop_lag_is_measured()
+    test_pools_read_limits_from_config_and_env()
+    print("\n🎉 All executor tests passed!")
+
+
+if __name__ == "__main__":
+    main()
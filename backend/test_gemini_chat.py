@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the combined, parallel and sequential Gemini chat modes
+"""
+
+import sys
+import os
+import json
+import asyncio
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_core.gemini_integration import (
+    COMBINED_RESPONSE_SCHEMA, GeminiChatPipeline, GeminiCoreAI, GeminiEmotionAnalyzer, validate_schema
+)
+from ai_core.response_cache import SemanticResponseCache
+from test_gemini_client import StubGemini, make_client
+
+ANALYSIS = {"primary_emotion": "fear", "emotion_intensity": 70, "secondary_emotions": ["worry"],
+            "reasoning": "upcoming presentation", "emotional_triggers": ["work"], "confidence_score": 85}
+EMOLYTICS = {
+    "emotional_state": {"current_emotion": "fear", "intensity": 70, "stability": 40, "mood_trend": "stable"},
+    "emotional_insights": {"primary_triggers": ["work"], "coping_patterns": [], "emotional_strengths": [],
+                           "growth_areas": []},
+    "recommendations": {"immediate_actions": ["breathe"], "long_term_strategies": [], "wellness_practices": []},
+    "analytics_metrics": {"emotional_variability": 30, "response_time_to_triggers": "fast",
+                          "emotional_awareness_score": 60, "wellness_progress": 50},
+}
+REPLY = "It makes sense to feel nervous before a big presentation."
+COMBINED = {"emotion_analysis": ANALYSIS, "response": REPLY, "emolytics": EMOLYTICS}
+
+
+def separate_calls(combined_reply):
+    """Answer each prompt type the way Gemini would; `combined_reply` answers the combined prompt"""
+    def respond(prompt):
+        if "In one step" in prompt:
+            return combined_reply
+        if "Analyze this user message" in prompt:
+            return json.dumps(ANALYSIS)
+        if "Update the user's emotional analytics" in prompt:
+            return json.dumps(EMOLYTICS)
+        return REPLY
+    return respond
+
+
+def make_pipeline(stub, mode="combined", **settings):
+    client = make_client(stub)
+    analyzer = GeminiEmotionAnalyzer("test-key", response_cache=SemanticResponseCache(), client=client)
+    return GeminiChatPipeline(analyzer, GeminiCoreAI("test-key", client=client), mode=mode, **settings)
+
+
+def run_turn(pipeline, message="I'm nervous about tomorrow's presentation", **kwargs):
+    async def run():
+        result = await pipeline.run(message, [], user_id="u1", **kwargs)
+        await pipeline.analyzer.client.aclose()
+        return result
+    return asyncio.run(run())
+
+
+def test_schema_validation():
+    assert validate_schema(COMBINED, COMBINED_RESPONSE_SCHEMA) == []
+    broken = json.loads(json.dumps(COMBINED))
+    broken["emotion_analysis"]["emotion_intensity"] = "high"
+    del broken["emolytics"]["emotional_state"]["mood_trend"]
+    assert validate_schema(broken, COMBINED_RESPONSE_SCHEMA) == [
+        "$.emotion_analysis.emotion_intensity: expected number",
+        "$.emolytics.emotional_state.mood_trend: missing",
+    ]
+    assert validate_schema([], COMBINED_RESPONSE_SCHEMA) == ["$: expected object"]
+    print("✅ Combined responses are validated against the schema")
+
+
+def test_combined_mode_is_one_round_trip():
+    stub = StubGemini()
+    stub.responder = separate_calls("```json\n" + json.dumps(COMBINED) + "\n```")
+    pipeline = make_pipeline(stub)
+    try:
+        result = run_turn(pipeline)
+        assert len(stub.requests) == 1, "analysis, reply and emolytics come from one call"
+        assert result["mode"] == "combined" and result["response"] == REPLY
+        assert result["emotion_data"]["primary_emotion"] == "fear" and "timestamp" in result["emotion_data"]
+        assert result["emolytics"] == EMOLYTICS
+        assert pipeline.analyzer.emotion_history[-1]["primary_emotion"] == "fear"
+        assert pipeline.analyzer.response_cache.get_metrics()["stores"] == 0, "the combined path skips the cache"
+        print("✅ Combined mode makes a single Gemini call")
+    finally:
+        stub.close()
+
+
+def test_invalid_combined_response_falls_back():
+    stub = StubGemini()
+    stub.responder = separate_calls(json.dumps({**COMBINED, "response": ""}))
+    pipeline = make_pipeline(stub)
+    try:
+        result = run_turn(pipeline)
+        assert result["mode"] == "parallel" and len(stub.requests) == 4
+        assert result["response"] == REPLY and result["emolytics"] == EMOLYTICS
+        assert pipeline.get_metrics()["combined_fallbacks"] == 1
+
+        stub.responder = separate_calls("not json at all")
+        assert run_turn(pipeline, message="something else")["mode"] == "parallel"
+
+        sequential = make_pipeline(stub, fallback_mode="sequential")
+        assert run_turn(sequential, message="a third message")["mode"] == "sequential"
+        print("✅ Unparseable or invalid combined responses fall back to the configured separate path")
+    finally:
+        stub.close()
+
+
+def test_reply_cache_is_keyed_by_emotional_state():
+    analyzer = GeminiEmotionAnalyzer("test-key", response_cache=SemanticResponseCache(), client=object())
+    namespace = lambda analysis, profile=None: analyzer._response_cache_args(analysis, profile, "u1")["namespace"]
+    base = namespace(ANALYSIS)
+    assert namespace({**ANALYSIS, "timestamp": "later", "confidence_score": 10}) == base, \
+        "fields the prompt does not use do not split the cache"
+    for change in ({"emotion_intensity": 95}, {"emotional_triggers": ["family"]},
+                   {"reasoning": "a breakup"}, {"secondary_emotions": []}):
+        assert namespace({**ANALYSIS, **change}) != base, f"{change} changes the prompt"
+    assert namespace(ANALYSIS, {"name": "Sam"}) != base
+    print("✅ Replies are cached per emotional state and profile, not per primary emotion")
+
+
+def test_parallel_overlaps_reply_and_emolytics():
+    stub = StubGemini()
+    stub.responder = separate_calls(None)
+    stub.script = [(200, 0.0), (200, 0.2), (200, 0.2)]
+    pipeline = make_pipeline(stub, mode="parallel")
+    try:
+        result = run_turn(pipeline)
+        assert result["mode"] == "parallel" and stub.max_active == 2, "reply and emolytics run concurrently"
+        assert result["response"] == REPLY and result["emolytics"] == EMOLYTICS
+
+        stub.max_active = 0
+        stub.script = [(200, 0.0), (200, 0.1), (200, 0.1)]
+        result = run_turn(pipeline, message="a different message", mode="sequential")
+        assert result["mode"] == "sequential" and stub.max_active == 1
+        assert result["response"] == REPLY
+        print("✅ Parallel mode overlaps the reply and emolytics calls; sequential does not")
+    finally:
+        stub.close()
+
+
+def main():
+    print("💬 Testing Gemini Chat Modes")
+    print("=" * 50)
+    test_schema_validation()
+    test_combined_mode_is_one_round_trip()
+    test_invalid_combined_response_falls_back()
+    test_reply_cache_is_keyed_by_emotional_state()
+    test_parallel_overlaps_reply_and_emolytics()
+    print("\n🎉 All Gemini chat mode tests passed!")
+
+
+if __name__ == "__main__":
+    main()
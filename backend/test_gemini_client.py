@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the pooled Gemini client, run against a local stub of the REST API
+through the httpx transport that get_gemini_client ships
+"""
+
+import sys
+import os
+import json
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_core.gemini_client import GeminiClient, GeminiError, RestTransport, get_gemini_client
+from ai_core.gemini_integration import GeminiCoreAI, GeminiEmotionAnalyzer
+from ai_core.response_cache import SemanticResponseCache
+
+
+class StubGemini:
+    """
+    Local generateContent server
+
+    `script` is a list of (status, delay) consumed one per request. The
+    reply text comes from `responder(prompt)` when set, else `reply`.
+    """
+
+    def __init__(self):
+        self.script = []
+        self.responder = None
+        self.reply = "Hello from the stub"
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.requests.append({"path": self.path, "key": self.headers.get("x-goog-api-key"), "body": body})
+                    status, delay = stub.script.pop(0) if stub.script else (200, 0.0)
+                    prompt = body["contents"][0]["parts"][0]["text"]
+                    reply = stub.responder(prompt) if stub.responder else stub.reply
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                time.sleep(delay)
+                with stub.lock:
+                    stub.active -= 1
+                if status == 200:
+                    payload = {"candidates": [{"content": {"parts": [{"text": reply}]}}]}
+                else:
+                    payload = {"error": {"code": status, "message": f"stub error {status}"}}
+                data = json.dumps(payload).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except BrokenPipeError:
+                    pass  # the client gave up on this attempt (timeout test)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_client(stub, **settings):
+    transport = RestTransport("test-key", stub.url, pool_size=settings.get("max_concurrency", 8))
+    return GeminiClient(transport, rng=lambda: 0.0, **settings)
+
+
+def test_generate_reuses_connections():
+    stub = StubGemini()
+    client = make_client(stub)
+
+    async def run():
+        texts = [await client.generate("hi", generation_config={"response_mime_type": "application/json"})
+                 for _ in range(10)]
+        await client.aclose()
+        return texts
+
+    try:
+        assert asyncio.run(run()) == ["Hello from the stub"] * 10
+        request = stub.requests[0]
+        assert request["path"] == "/v1beta/models/gemini-2.5-pro:generateContent"
+        assert request["key"] == "test-key"
+        assert request["body"]["contents"][0]["parts"][0]["text"] == "hi"
+        assert request["body"]["generationConfig"] == {"responseMimeType": "application/json"}
+        assert client.get_metrics()["connections_opened"] == 1, "keep-alive connection is reused"
+        print("✅ Sequential calls share one keep-alive connection")
+    finally:
+        stub.close()
+
+
+def test_concurrency_is_capped():
+    stub = StubGemini()
+    stub.script = [(200, 0.05)] * 24
+    client = make_client(stub, max_concurrency=4)
+
+    async def run():
+        results = await asyncio.gather(*(client.generate(f"message {i}") for i in range(24)))
+        await client.aclose()
+        return results
+
+    try:
+        started = time.perf_counter()
+        results = asyncio.run(run())
+        elapsed = time.perf_counter() - started
+        metrics = client.get_metrics()
+        assert len(results) == 24 and stub.max_active <= 4 and metrics["max_in_flight"] == 4
+        assert metrics["connections_opened"] <= 4
+        print(f"✅ 24 concurrent calls capped at 4 in flight over {metrics['connections_opened']} "
+              f"connections ({elapsed * 1000:.0f} ms)")
+    finally:
+        stub.close()
+
+
+def test_retries_transient_errors_only():
+    stub = StubGemini()
+    client = make_client(stub, max_retries=3)
+    try:
+        stub.script = [(503, 0.0), (429, 0.0)]
+        assert asyncio.run(client.generate("retry me")) == "Hello from the stub"
+        assert client.get_metrics()["retries"] == 2
+
+        stub.script = [(400, 0.0)]
+        try:
+            asyncio.run(client.generate("bad request"))
+            assert False, "400 should not be retried"
+        except GeminiError as e:
+            assert e.status == 400 and not e.retryable
+        assert client.get_metrics()["retries"] == 2
+
+        stub.script = [(503, 0.0)] * 4
+        try:
+            asyncio.run(client.generate("still down"))
+            assert False, "retries are bounded"
+        except GeminiError as e:
+            assert e.status == 503
+        assert client.get_metrics()["failures"] == 2
+        print("✅ 429/5xx are retried with backoff; other errors and exhausted retries surface")
+    finally:
+        stub.close()
+
+
+def test_attempt_timeout_is_retried():
+    stub = StubGemini()
+    stub.script = [(200, 0.5)]
+    client = make_client(stub, timeout=0.2, max_retries=1)
+    try:
+        assert asyncio.run(client.generate("slow")) == "Hello from the stub"
+        assert client.get_metrics()["retries"] == 1
+        print("✅ Attempts that exceed the timeout are retried")
+    finally:
+        stub.close()
+
+
+def test_backoff_is_jittered_and_capped():
+    client = GeminiClient(RestTransport("k"), backoff_base=0.5, backoff_max=4.0, rng=lambda: 1.0)
+    assert [client.backoff(attempt) for attempt in range(5)] == [0.5, 1.0, 2.0, 4.0, 4.0]
+    jittered = GeminiClient(RestTransport("k"), backoff_base=0.5)
+    assert all(0.0 <= jittered.backoff(3) <= 4.0 for _ in range(100))
+    print("✅ Backoff grows exponentially, capped, with full jitter")
+
+
+def test_factory_ships_the_rest_transport():
+    stub = StubGemini()
+    client = get_gemini_client("factory-key", api_endpoint=stub.url, max_concurrency=2, max_retries=1)
+    try:
+        assert isinstance(client.transport, RestTransport)
+        assert get_gemini_client("factory-key", api_endpoint=stub.url) is client, "one client per key and endpoint"
+        assert client.generate_blocking("blocking call") == "Hello from the stub"
+
+        async def run():
+            text = await client.generate("async call")
+            await client.aclose()
+            return text
+        assert asyncio.run(run()) == "Hello from the stub"
+        assert [request["key"] for request in stub.requests] == ["factory-key"] * 2
+        stub.script = [(503, 0.0), (503, 0.0)]
+        try:
+            client.generate_blocking("down")
+            assert False, "retries are bounded on the blocking path too"
+        except GeminiError as e:
+            assert e.status == 503 and e.retryable
+        print("✅ get_gemini_client builds the REST transport for async and blocking calls")
+    finally:
+        stub.close()
+
+
+def test_analyzer_cache_runs_off_the_loop():
+    stub = StubGemini()
+    threads = []
+
+    class RecordingCache(SemanticResponseCache):
+        def get(self, *args, **kwargs):
+            threads.append(threading.current_thread())
+            return super().get(*args, **kwargs)
+
+        def put(self, *args, **kwargs):
+            threads.append(threading.current_thread())
+            return super().put(*args, **kwargs)
+
+    client = make_client(stub)
+    analyzer = GeminiEmotionAnalyzer("test-key", response_cache=RecordingCache(), client=client)
+    emotion = {"primary_emotion": "joy", "emotion_intensity": 60}
+
+    async def run():
+        first = await analyzer.generate_emotional_response_async("I got the job", emotion, user_id="u1")
+        second = await analyzer.generate_emotional_response_async("I got the job", emotion, user_id="u1")
+        await client.aclose()
+        return first, second
+
+    try:
+        assert asyncio.run(run()) == ("Hello from the stub",) * 2
+        assert len(stub.requests) == 1, "the second reply comes from the cache"
+        assert len(threads) == 3 and threading.main_thread() not in threads
+        print("✅ Response cache lookups and stores run off the event loop")
+    finally:
+        stub.close()
+
+
+def test_analyzer_and_core_ai_share_the_client():
+    stub = StubGemini()
+    stub.reply = json.dumps({"primary_emotion": "fear", "emotion_intensity": 70})
+    client = make_client(stub)
+    analyzer = GeminiEmotionAnalyzer("test-key", response_cache=SemanticResponseCache(), client=client)
+    core_ai = GeminiCoreAI("test-key", client=client)
+
+    async def run():
+        emotion = await analyzer.analyze_conversation_emotion_async("I'm nervous about tomorrow")
+        emolytics = await core_ai.update_emolytics_async("u1", emotion, [])
+        await client.aclose()
+        return emotion, emolytics
+
+    try:
+        emotion, emolytics = asyncio.run(run())
+        assert emotion["primary_emotion"] == "fear" and emolytics["emotion_intensity"] == 70
+        assert analyzer.analyze_conversation_emotion("blocking call")["primary_emotion"] == "fear"
+        assert client.get_metrics()["calls"] == 3
+        print("✅ Analyzer and core AI run async (and blocking) calls through one client")
+    finally:
+        stub.close()
+
+
+def main():
+    print("♊ Testing Gemini Client")
+    print("=" * 50)
+    test_generate_reuses_connections()
+    test_concurrency_is_capped()
+    test_retries_transient_errors_only()
+    test_attempt_timeout_is_retried()
+    test_backoff_is_jittered_and_capped()
+    test_factory_ships_the_rest_transport()
+    test_analyzer_cache_runs_off_the_loop()
+    test_analyzer_and_core_ai_share_the_client()
+    print("\n🎉 All Gemini client tests passed!")
+
+
+if __name__ == "__main__":
+    main()
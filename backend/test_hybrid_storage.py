@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the hybrid system's interaction storage and retrieval, using stub Chroma collections
+"""
+
+import sys
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_core.hybrid_ai_system import HybridAISystem, UserInteraction
+
+
+class StubCollection:
+    """Records writes; upsert replaces documents by id like Chroma"""
+
+    def __init__(self):
+        self.documents = {}
+        self.calls = []
+
+    def upsert(self, documents, metadatas, ids):
+        assert len(ids) == len(set(ids)), "Chroma rejects a batch with repeated ids"
+        self.calls.append(("upsert", list(ids)))
+        for doc_id, document, metadata in zip(ids, documents, metadatas):
+            self.documents[doc_id] = (document, metadata)
+
+    def query(self, n_results, where, include, query_texts=None, query_embeddings=None):
+        """Nearest stored documents by insertion order; the same response repeats to force widening"""
+        self.calls.append(("query", n_results, where, query_texts, query_embeddings))
+        matches = [metadata for _, metadata in self.documents.values()
+                   if all(metadata.get(key) == value for key, value in where.items())][:n_results]
+        return {"metadatas": [matches], "distances": [[0.1 * rank for rank in range(len(matches))]]}
+
+
+def bare_system(config=None):
+    """A HybridAISystem without models or clients; tests attach the parts they use"""
+    system = HybridAISystem.__new__(HybridAISystem)
+    system.config = config or {}
+    system.collection = StubCollection()
+    system.intent_engine = None
+    system._retrieval_stats = {"queries": 0, "widened": 0, "hits": 0, "misses": 0}
+    system._retrieval_lock = threading.Lock()
+    return system
+
+
+def interaction(message, timestamp, user_id="u1"):
+    return UserInteraction(user_id=user_id, message=message, timestamp=timestamp,
+                           emotion="joy", intent="statement", response="ok")
+
+
+def test_interaction_writes_are_idempotent():
+    system = bare_system()
+    now = datetime(2024, 5, 1, 12, 0, 0)
+    batch = [interaction("hello", now), interaction("hello", now), interaction("another", now),
+             interaction("hello", now, user_id="u2")]
+    system._write_interactions(batch)
+    assert len(system.collection.documents) == 3, "same user, time and text is one interaction"
+    system._write_interactions(batch)  # a retried batch
+    assert len(system.collection.documents) == 3
+    assert all(doc_id.startswith(("u1_", "u2_")) for doc_id in system.collection.documents)
+    print("✅ Interaction batches are upserted under content-hash ids")
+
+
+def test_retrieval_filters_by_emotion_and_widens():
+    system = bare_system({"semantic_retrieval": {"responses": 3, "initial_n_results": 5, "max_n_results": 40}})
+    now = datetime(2024, 5, 1, 12, 0, 0)
+    # Twenty past messages with the same response, then two distinct ones, and others with another emotion
+    stored = [interaction(f"sad {i}", now, user_id=f"u{i}") for i in range(22)]
+    for i, item in enumerate(stored):
+        item.emotion, item.response = "sadness", ("same reply" if i < 20 else f"reply {i}")
+    other = [interaction(f"happy {i}", now, user_id=f"h{i}") for i in range(5)]
+    system._write_interactions(stored + other)
+    system.collection.calls.clear()
+
+    responses = system._get_semantic_responses("I feel down", "sadness")
+    queries = [call for call in system.collection.calls if call[0] == "query"]
+    assert [n_results for _, n_results, *_ in queries] == [5, 10, 20, 40], "the page doubles up to max_n_results"
+    assert all(where == {"emotion": "sadness"} for _, _, where, *_ in queries), "the emotion filter runs in Chroma"
+    assert all(texts == ["I feel down"] for *_, texts, _ in queries)
+    assert responses == ["same reply", "reply 20", "reply 21"]
+    assert system._retrieval_metrics() == {"queries": 4, "widened": 3, "hits": 1, "misses": 0}
+
+    system.config["semantic_retrieval"]["max_n_results"] = 8
+    system.collection.calls.clear()
+    system._get_semantic_responses("I feel down", "sadness")
+    assert [call[1] for call in system.collection.calls] == [5, 8], "widening stops at max_n_results"
+    print("✅ Retrieval filters by emotion in Chroma and widens the page up to max_n_results")
+
+
+def test_retrieval_stats_are_thread_safe():
+    system = bare_system()
+    system._write_interactions([interaction("hello", datetime(2024, 5, 1, 12, 0, 0))])
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: system._get_semantic_responses("hello", "joy"), range(400)))
+    metrics = system._retrieval_metrics()
+    assert metrics["queries"] == 400 and metrics["hits"] == 400
+    print("✅ Retrieval statistics are counted under a lock from pool threads")
+
+
+def main():
+    print("💾 Testing Hybrid Interaction Storage")
+    print("=" * 50)
+    test_interaction_writes_are_idempotent()
+    test_retrieval_filters_by_emotion_and_widens()
+    test_retrieval_stats_are_thread_safe()
+    print("\n🎉 All hybrid storage tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the embedding intent engine, using a bag-of-words stub encoder
+"""
+
+import sys
+import os
+import re
+import zlib
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from ai_core.intent_engine import EmbeddingIntentClassifier
+
+PROTOTYPES = {
+    "greeting": ["hello there", "hi friend", "good morning"],
+    "farewell": ["goodbye now", "bye friend", "see you later"],
+    "question": ["why is that", "what is this", "how does it work"],
+}
+
+
+class StubEncoder:
+    """Hashed bag of words; counts encoder calls"""
+
+    def __init__(self, dim=256):
+        self.dim = dim
+        self.calls = 0
+
+    def __call__(self, texts):
+        self.calls += 1
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"[a-z]+", text.lower()):
+                vectors[row, zlib.crc32(word.encode()) % self.dim] += 1.0
+        return vectors
+
+
+def logged(text, intent):
+    return {"input": text, "intent": intent}
+
+
+def test_prototypes_classify_in_one_encoder_call():
+    encoder = StubEncoder()
+    engine = EmbeddingIntentClassifier(prototypes=PROTOTYPES, encoder=encoder)
+    calls = encoder.calls
+    predictions = engine.classify_batch(["hello there my friend", "goodbye now", "why is that so"])
+    assert [p.label for p in predictions] == ["greeting", "farewell", "question"]
+    assert encoder.calls == calls + 1, "a batch is embedded with one encoder call"
+    assert all(p.source == "prototype" for p in predictions)
+    assert abs(sum(predictions[0].scores.values()) - 1.0) < 1e-5
+    assert np.isclose(np.linalg.norm(predictions[0].embedding), 1.0)
+    print("✅ Prototypes classify a batch with one encoder call")
+
+
+def test_head_keeps_uncovered_labels_reachable():
+    engine = EmbeddingIntentClassifier(prototypes=PROTOTYPES, encoder=StubEncoder())
+    history = ([logged(f"hello there number {i}", "greeting") for i in range(30)]
+               + [logged(f"goodbye now number {i}", "farewell") for i in range(30)]
+               + [logged("why is that", "question")])  # below min_per_label
+    accuracy = engine.fit_head(history, min_samples=20, min_per_label=5)
+    assert accuracy is not None and list(engine.head.classes_) == ["farewell", "greeting"]
+
+    greeting, question = engine.classify_batch(["hello there", "why is that"])
+    assert greeting.label == "greeting" and greeting.source == "head"
+    assert question.label == "question" and question.source == "prototype", \
+        "labels the head was not trained on are still predicted by the prototypes"
+    print("✅ The head decides among its labels; other labels fall back to the prototypes")
+
+
+def test_head_needs_enough_data():
+    engine = EmbeddingIntentClassifier(prototypes=PROTOTYPES, encoder=StubEncoder())
+    assert engine.fit_head([logged("hello", "greeting")] * 10, min_samples=50) is None
+    assert engine.head is None
+    print("✅ No head is trained without enough logged intents")
+
+
+def main():
+    print("🎯 Testing Intent Engine")
+    print("=" * 50)
+    test_prototypes_classify_in_one_encoder_call()
+    test_head_keeps_uncovered_labels_reachable()
+    test_head_needs_enough_data()
+    print("\n🎉 All intent engine tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the per-user interaction store
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_core.interaction_store import InteractionStore
+
+
+def record(user_id, i, emotion="neutral"):
+    return {"input": f"message {i}", "output": "ok", "emotion": emotion, "intent": "statement",
+            "user_id": user_id, "timestamp": f"2024-01-01T00:00:{i % 60:02d}", "feedback": None}
+
+
+def test_per_user_queries():
+    with tempfile.TemporaryDirectory() as path:
+        store = InteractionStore(path, tail_size=5, segment_size=4)
+        for i in range(12):
+            store.append("alice", record("alice", i))
+        store.append("bob", record("bob", 0))
+
+        assert store.count("alice") == 12 and store.count("bob") == 1
+        assert [r["input"] for r in store.recent("alice", 3)] == ["message 9", "message 10", "message 11"]
+        assert len(store.recent("alice", 10)) == 10, "reads past the tail come from disk"
+        assert [r["input"] for r in store.history("alice")] == [f"message {i}" for i in range(12)]
+        assert store.get("alice", 1)["input"] == "message 1"
+        assert store.get("alice", 11)["input"] == "message 11"
+        assert store.get("alice", 12) is None
+        assert [r["user_id"] for r in store.history("bob")] == ["bob"]
+        assert store.total_count() == 13
+        segments = [name for name in os.listdir(os.path.join(path, store._user_dirname("alice")))
+                    if name.endswith(".jsonl")]
+        assert len(segments) == 3
+        print("✅ Per-user counts, tails, history and random access")
+
+
+def test_reopen_recovers_state():
+    with tempfile.TemporaryDirectory() as path:
+        store = InteractionStore(path, tail_size=6, segment_size=4)
+        for i in range(10):
+            store.append("alice", record("alice", i))
+
+        reopened = InteractionStore(path, tail_size=6, segment_size=4)
+        assert reopened.total_count() == 10
+        assert reopened.count("alice") == 10
+        assert [r["input"] for r in reopened.recent("alice", 6)] == [f"message {i}" for i in range(4, 10)]
+        reopened.append("alice", record("alice", 10))
+        assert reopened.get("alice", 10)["input"] == "message 10"
+        assert len(list(reopened.iter_all())) == 11
+        print("✅ Counts and tails are recovered from disk")
+
+
+def test_counts_come_from_the_segment_index():
+    with tempfile.TemporaryDirectory() as path:
+        store = InteractionStore(path, tail_size=2, segment_size=4)
+        for i in range(10):
+            store.append("alice", record("alice", i))
+        directory = os.path.join(path, store._user_dirname("alice"))
+        with open(os.path.join(directory, "index.json")) as f:
+            assert json.load(f)["segments"] == {"000000.jsonl": 4, "000001.jsonl": 4}
+
+        # A crash mid-write leaves a torn line in the newest segment
+        with open(os.path.join(directory, "000002.jsonl"), "a") as f:
+            f.write('{"input": "message 10", "out')
+        # Segment size changed since the old segments were written
+        reopened = InteractionStore(path, tail_size=2, segment_size=3)
+        assert reopened.total_count() == reopened.count("alice") == 10
+        reopened.append("alice", record("alice", 10))
+        assert reopened.get("alice", 5)["input"] == "message 5", "random access follows the recorded counts"
+        assert [r["input"] for r in reopened.history("alice")] == [f"message {i}" for i in range(11)]
+        print("✅ Segment counts come from the index and a torn last record is cut on reopen")
+
+
+def test_loaded_users_are_bounded():
+    with tempfile.TemporaryDirectory() as path:
+        store = InteractionStore(path, tail_size=2, segment_size=10, max_users=3)
+        for user in range(5):
+            store.append(f"user-{user}", record(f"user-{user}", 0))
+        assert store.get_metrics()["users_loaded"] == 3
+        assert store.count("user-0") == 1, "evicted users are reloaded from disk"
+        print("✅ In-memory tails are bounded by max_users")
+
+
+def test_eviction_never_splits_a_users_log():
+    with tempfile.TemporaryDirectory() as path:
+        store = InteractionStore(path, tail_size=3, segment_size=7, max_users=2)
+        users = [f"user-{user}" for user in range(6)]
+        per_thread = 60
+
+        def write(worker):
+            for i in range(per_thread):
+                user = users[(worker + i) % len(users)]
+                store.append(user, record(user, i))
+                store.count(users[(worker * 7 + i) % len(users)])
+
+        threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert store.total_count() == 8 * per_thread
+        assert store.get_metrics()["users_loaded"] == 2, "unpinned logs are evicted down to max_users"
+        expected = 8 * per_thread // len(users)
+        reopened = InteractionStore(path, tail_size=3, segment_size=7)
+        for user in users:
+            directory = os.path.join(path, store._user_dirname(user))
+            segments = sorted(name for name in os.listdir(directory) if name.endswith(".jsonl"))
+            sizes = [sum(1 for _ in open(os.path.join(directory, name))) for name in segments]
+            assert sizes == [7] * (expected // 7) + [expected % 7], f"{user} segments diverged: {sizes}"
+            assert store.count(user) == reopened.count(user) == expected
+        print("✅ Concurrent appends with a small max_users keep one log per user")
+
+
+def main():
+    print("🗂️ Testing Interaction Store")
+    print("=" * 50)
+    test_per_user_queries()
+    test_reopen_recovers_state()
+    test_counts_come_from_the_segment_index()
+    test_loaded_users_are_bounded()
+    test_eviction_never_splits_a_users_log()
+    print("\n🎉 All interaction store tests passed!")
+
+
+if __name__ == "__main__":
+    main()
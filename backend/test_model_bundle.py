@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Offline tests for resident, memory-mapped and hot-swapped progressive-learning model bundles
+"""
+
+import sys
+import os
+import random
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import joblib
+
+from ai_core import model_bundle
+from ai_core.model_bundle import ModelBundle
+from ai_core.progressive_learning import ProgressiveLearningSystem
+
+MESSAGES = {
+    "joy": ["I got the promotion today", "so happy with my friends", "what a wonderful sunny day"],
+    "sadness": ["I feel lonely and down", "I miss my family so much", "crying all evening again"],
+    "fear": ["anxious about the exam", "scared of the presentation", "nervous about the interview"],
+}
+
+
+def train(system, samples=120, seed=1):
+    rng = random.Random(seed)
+    for i in range(samples):
+        emotion = rng.choice(sorted(MESSAGES))
+        text = f"{rng.choice(MESSAGES[emotion])} {i}"
+        system.training_data["emotion_data"].append({"text": text, "primary_emotion": emotion})
+        system.training_data["conversation_pairs"].append({
+            "user_input": text, "ai_response": f"Reply for {emotion}", "emotion_context": {"primary_emotion": emotion}
+        })
+        system.training_data["emolytics_patterns"].append({
+            "emotion_data": {"primary_emotion": emotion, "emotional_triggers": ["work"]},
+            "emolytics_update": {"emotional_state": {"stability": 60}, "recommendations": {"immediate_actions": ["rest"]}}
+        })
+    return system.train_models()
+
+
+class CountingLoads:
+    """Counts joblib.load calls made by model bundles"""
+
+    def __enter__(self):
+        self.calls = 0
+        self._original = model_bundle.joblib.load
+
+        def load(*args, **kwargs):
+            self.calls += 1
+            return self._original(*args, **kwargs)
+        model_bundle.joblib.load = load
+        return self
+
+    def __exit__(self, *exc):
+        model_bundle.joblib.load = self._original
+
+
+def test_models_stay_resident():
+    with tempfile.TemporaryDirectory() as path:
+        train(ProgressiveLearningSystem(path))
+        served = ProgressiveLearningSystem(path)
+        assert served.bundle is not None and served.bundle.loads == 0, "nothing is unpickled at startup"
+        with CountingLoads() as loads:
+            for i in range(50):
+                prediction = served.predict_emotion(f"scared of the interview {i}")
+                served.generate_response("I feel lonely", prediction)
+                served.analyze_emolytics(prediction, [])
+        assert prediction["model_used"] == "trained"
+        assert loads.calls == 6, f"each component is loaded once, not per request ({loads.calls})"
+        print("✅ Components load lazily once and stay resident across requests")
+
+
+def test_components_are_memory_mapped():
+    with tempfile.TemporaryDirectory() as path:
+        train(ProgressiveLearningSystem(path))
+        served = ProgressiveLearningSystem(path)
+        served.generate_response("I feel lonely", {})
+        classifier = served.bundle.get("response_classifier")
+        assert isinstance(classifier.coefs_[0], np.memmap), "MLP weights are mapped from the bundle file"
+        assert not classifier.coefs_[0].flags.writeable
+        print("✅ Numpy arrays inside components are read-only memory maps")
+
+
+def test_retrain_swaps_bundle_atomically():
+    with tempfile.TemporaryDirectory() as path:
+        system = ProgressiveLearningSystem(path)
+        train(system)
+        first = system.bundle
+        assert "response_classifier" in first, "the response classifier is now persisted"
+
+        # A request that grabbed the old bundle keeps a consistent set of models
+        in_flight = system.bundle
+        train(system, seed=2)
+        assert system.bundle is not first and system.bundle.version > first.version
+        assert in_flight.get("emotion_classifier") is first.get("emotion_classifier")
+        versions = [entry for entry in os.listdir(os.path.join(path, "bundles")) if entry != "current.json"]
+        assert sorted(versions) == sorted([first.version, system.bundle.version])
+        assert ProgressiveLearningSystem(path).bundle.version == system.bundle.version
+        print("✅ Retraining publishes a new version and swaps it in by reference")
+
+
+def test_partial_retrain_carries_components_over():
+    with tempfile.TemporaryDirectory() as path:
+        system = ProgressiveLearningSystem(path)
+        train(system)
+        previous = system.bundle
+        system.train_emolytics_analyzer()
+        system.save_models()
+        assert system.bundle.version != previous.version
+        assert set(system.bundle.names) == set(previous.names)
+        reopened = ModelBundle.latest(os.path.join(path, "bundles"))
+        assert reopened.metadata["learning_metrics"]["model_confidence"] > 0
+        assert ProgressiveLearningSystem(path).predict_emotion("nervous about the exam")["model_used"] == "trained"
+        print("✅ Retraining one model keeps the others from the previous bundle")
+
+
+def test_legacy_model_directory_is_served():
+    with tempfile.TemporaryDirectory() as path:
+        system = ProgressiveLearningSystem(os.path.join(path, "trained"))
+        train(system)
+        legacy_dir = os.path.join(path, "legacy")
+        os.makedirs(legacy_dir)
+        for name in ("emotion_vectorizer", "emotion_classifier", "response_patterns"):
+            joblib.dump(system.bundle.get(name), os.path.join(legacy_dir, f"{name}.pkl"))
+
+        legacy = ProgressiveLearningSystem(legacy_dir)
+        assert legacy.bundle.version == "legacy"
+        assert legacy.predict_emotion("so happy today")["model_used"] == "trained"
+        assert legacy.generate_response("hi", {}) == "I'm still learning. Please continue our conversation."
+        print("✅ Flat ai_models/ files from before bundles are still served")
+
+
+def main():
+    print("📦 Testing Model Bundles")
+    print("=" * 50)
+    test_models_stay_resident()
+    test_components_are_memory_mapped()
+    test_retrain_swaps_bundle_atomically()
+    test_partial_retrain_carries_components_over()
+    test_legacy_model_directory_is_served()
+    print("\n🎉 All model bundle tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the versioned model registry: manifests, promotion, rollback and garbage collection
+"""
+
+import sys
+import os
+import io
+import json
+import tempfile
+import time
+from contextlib import redirect_stdout
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_core import model_registry
+from ai_core.model_bundle import MANIFEST_FILE
+from ai_core.model_registry import ModelRegistry
+from ai_core.progressive_learning import ProgressiveLearningSystem
+from test_model_bundle import train
+
+
+def publish(registry, value, **kwargs):
+    return registry.publish({"emolytics_patterns": {"value": value}}, **kwargs)
+
+
+def test_manifest_records_metrics_watermark_and_hashes():
+    with tempfile.TemporaryDirectory() as path:
+        system = ProgressiveLearningSystem(path)
+        train(system)
+        manifest = system.registry.manifest(system.bundle.version)
+        assert set(manifest["hashes"]) == set(manifest["components"])
+        assert manifest["metadata"]["metrics"]["emotion_accuracy"] is not None
+        watermark = manifest["metadata"]["data_watermark"]["emotion_data"]
+        assert watermark["records"] == 120 and watermark["position"][1] > 0
+        assert system.registry.verify(system.bundle.version) == []
+        print("✅ Each version's manifest records metrics, the data watermark and component hashes")
+
+
+def test_rollback_is_picked_up_by_serving_processes():
+    with tempfile.TemporaryDirectory() as path:
+        trainer = ProgressiveLearningSystem(path)
+        train(trainer)
+        good = trainer.bundle.version
+        serving = ProgressiveLearningSystem(path, reload_interval=0)
+        train(trainer, seed=2)
+        assert serving.refresh_models() and serving.bundle.version == trainer.bundle.version
+
+        state = trainer.registry.rollback()
+        assert state["version"] == good and state["history"] == []
+        assert serving.refresh_models() and serving.bundle.version == good, "rolling back to an older version"
+        assert ProgressiveLearningSystem(path).bundle.version == good, "restarts follow the pointer"
+        print("✅ Rollback switches the pointer and serving processes follow it")
+
+
+def test_cli_lists_and_promotes():
+    with tempfile.TemporaryDirectory() as path:
+        registry = ModelRegistry(os.path.join(path, "bundles"))
+        first = publish(registry, 1)
+        second = publish(registry, 2)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            model_registry.main(["--model-dir", path, "list"])
+            model_registry.main(["--model-dir", path, "promote", first.version])
+        lines = output.getvalue().splitlines()
+        assert lines[1].startswith(f"* {second.version}") and lines[0].startswith(f"  {first.version}")
+        assert registry.current_version() == first.version
+        assert registry._read_current()["history"] == [second.version]
+        print("✅ python -m ai_core.model_registry list / promote")
+
+
+def test_crash_leftovers_are_ignored_and_collected():
+    with tempfile.TemporaryDirectory() as path:
+        registry = ModelRegistry(path)
+        version = publish(registry, 1).version
+        interrupted = os.path.join(path, ".20990101T000000000000Z.abc")
+        os.makedirs(interrupted)
+        with open(os.path.join(interrupted, "emolytics_patterns.pkl"), "wb") as f:
+            f.write(b"partial")
+        assert registry.current_version() == version
+        old = time.time() - 2 * model_registry.STALE_WRITE_SECONDS
+        os.utime(interrupted, (old, old))
+        registry.gc(keep=5)
+        assert not os.path.exists(interrupted)
+        print("✅ Interrupted writes are never served and are collected once stale")
+
+
+def test_promote_refuses_corrupted_versions():
+    with tempfile.TemporaryDirectory() as path:
+        registry = ModelRegistry(path)
+        first = publish(registry, 1)
+        second = publish(registry, 2)
+        with open(os.path.join(first.path, "emolytics_patterns.pkl"), "ab") as f:
+            f.write(b"corrupt")
+        assert registry.verify(first.version) == ["emolytics_patterns: hash mismatch"]
+        try:
+            registry.promote(first.version)
+            raise AssertionError("promoting a corrupted version must fail")
+        except ValueError:
+            pass
+        assert registry.current_version() == second.version
+        print("✅ Promotion verifies component hashes")
+
+
+def test_gc_keeps_current_and_rollback_target():
+    with tempfile.TemporaryDirectory() as path:
+        registry = ModelRegistry(path)
+        versions = [publish(registry, i).version for i in range(6)]
+        registry.promote(versions[0])
+        removed = registry.gc(keep=2)
+        remaining = [manifest["version"] for manifest in registry.versions()]
+        assert remaining == [versions[0], versions[4], versions[5]], remaining
+        assert sorted(removed) == versions[1:4]
+
+        automatic = ModelRegistry(os.path.join(path, "auto"), keep=3)
+        for i in range(5):
+            publish(automatic, i)
+        assert len(automatic.versions()) == 3
+        print("✅ Garbage collection keeps the current version, its rollback target and the newest versions")
+
+
+def test_publish_without_promotion():
+    with tempfile.TemporaryDirectory() as path:
+        system = ProgressiveLearningSystem(path)
+        train(system)
+        served = system.bundle.version
+        system.auto_promote = False
+        train(system, seed=2)
+        assert system.bundle.version == served and len(system.registry.versions()) == 2
+        assert ProgressiveLearningSystem(path).bundle.version == served
+        print("✅ With auto_promote off, new versions wait for an explicit promote")
+
+
+def test_unpromoted_versions_are_never_current():
+    with tempfile.TemporaryDirectory() as path:
+        registry = ModelRegistry(path)
+        candidate = publish(registry, 1, promote=False)
+        assert registry.current_version() is None and ModelRegistry(path).open_current() is None
+        assert not os.path.exists(registry.current_path), "opening the registry again adopts nothing"
+
+        system = ProgressiveLearningSystem(os.path.join(path, "system"), auto_promote=False)
+        train(system)
+        assert system.bundle is None and system.registry.versions(), "the first version waits for a promote too"
+
+        registry.promote(candidate.version)
+        assert registry.current_version() == candidate.version
+        print("✅ Without a pointer nothing is served, not even the only version")
+
+
+def test_pre_registry_bundle_is_adopted_once():
+    with tempfile.TemporaryDirectory() as path:
+        legacy = publish(ModelRegistry(path), 1, promote=False)
+        manifest_path = os.path.join(legacy.path, MANIFEST_FILE)
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        del manifest["hashes"]  # written before the registry existed
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f)
+
+        registry = ModelRegistry(path)
+        assert registry.current_version() == legacy.version
+        assert registry._read_current()["reason"] == "adopted pre-registry version"
+        publish(registry, 2, promote=False)
+        assert ModelRegistry(path).current_version() == legacy.version, "later versions still need a promote"
+        print("✅ The newest pre-registry bundle is promoted once when the pointer is missing")
+
+
+def main():
+    print("🗂️ Testing Model Registry")
+    print("=" * 50)
+    test_manifest_records_metrics_watermark_and_hashes()
+    test_rollback_is_picked_up_by_serving_processes()
+    test_cli_lists_and_promotes()
+    test_crash_leftovers_are_ignored_and_collected()
+    test_promote_refuses_corrupted_versions()
+    test_gc_keeps_current_and_rollback_target()
+    test_publish_without_promotion()
+    test_unpromoted_versions_are_never_current()
+    test_pre_registry_bundle_is_adopted_once()
+    print("\n🎉 All model registry tests passed!")
+
+
+if __name__ == "__main__":
+    main()
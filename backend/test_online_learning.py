@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the online (partial_fit) progressive-learning mode
+"""
+
+import sys
+import os
+import random
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sklearn.naive_bayes import MultinomialNB
+
+from ai_core.online_learning import OnlineLearner
+from ai_core.progressive_learning import ONLINE_UPDATE, ProgressiveLearningSystem
+from ai_core.training_worker import TrainingWorker
+
+MESSAGES = {
+    "joy": ["I got the promotion today", "so happy with my friends", "what a wonderful sunny day"],
+    "sadness": ["I feel lonely and down", "I miss my family so much", "crying all evening again"],
+    "fear": ["anxious about the exam", "scared of the presentation", "nervous about the interview"],
+}
+
+
+def samples(count, emotions=None, seed=1):
+    rng = random.Random(seed)
+    emotions = emotions or sorted(MESSAGES)
+    return [{"text": f"{rng.choice(MESSAGES[emotion])} {i}", "primary_emotion": emotion}
+            for i, emotion in enumerate(rng.choice(emotions) for _ in range(count))]
+
+
+def collect(system, count, seed=1):
+    for sample in samples(count, seed=seed):
+        emotion = sample["primary_emotion"]
+        system.collect_training_data(
+            sample["text"],
+            {"primary_emotion": emotion, "emotion_intensity": 60, "emotional_triggers": ["work"]},
+            f"Reply for {emotion}",
+            {"emotional_state": {"stability": 55}, "recommendations": {"immediate_actions": ["rest"]}}
+        )
+
+
+def test_mini_batches_match_full_fit():
+    data = samples(300)
+    learner = OnlineLearner()
+    for start in range(0, len(data), 25):
+        learner.partial_fit({"emotion_data": data[start:start + 25]})
+    X = learner.vectorizer.transform([sample["text"] for sample in data])
+    full = MultinomialNB(alpha=learner.classifier.alpha).fit(X, [sample["primary_emotion"] for sample in data])
+    assert list(learner.classifier.predict(X)) == list(full.predict(X))
+    assert learner.state["samples_seen"] == 300 and learner.accuracy > 0.9
+    print(f"✅ 12 partial_fit batches give the full-fit model (prequential accuracy {learner.accuracy:.3f})")
+
+
+def test_new_emotions_join_later():
+    learner = OnlineLearner()
+    learner.partial_fit({"emotion_data": samples(40, ["joy"])})
+    learner.partial_fit({"emotion_data": samples(40, ["joy", "sadness"], seed=2)})
+    learner.partial_fit({"emotion_data": samples(40, ["fear"], seed=3)})
+    assert set(learner.classifier.classes_) == {"joy", "sadness", "fear"}
+    X = learner.vectorizer.transform(["scared of the presentation", "I miss my family so much"])
+    assert list(learner.classifier.predict(X)) == ["fear", "sadness"]
+    print("✅ Emotion labels seen for the first time are added to the classifier")
+
+
+def test_update_cost_follows_batch_size():
+    with tempfile.TemporaryDirectory() as path:
+        system = ProgressiveLearningSystem(path, learning_mode="online", online_batch_size=32)
+        collect(system, 32 * 20)
+        segment = os.path.join(path, "training_data", "emotion_data", "00000000.jsonl")
+        with open(segment) as f:
+            history = sum(1 for _ in f)
+        assert system.online.state["samples_seen"] == history == 640
+
+        collect(system, 32, seed=2)
+        assert system.online.state["positions"]["emotion_data"] == (0, os.path.getsize(segment))
+        assert system.online.state["batches"] == 21, "one update per mini-batch"
+        result = system.update_online()
+        assert result["emotion_data"] == 0, "an update only reads what was appended since the last one"
+        assert system.learning_metrics["model_confidence"] > 0.9
+        print(f"✅ Each update reads only its mini-batch ({system.online.state['batches']} batches, "
+              f"{history + 32} samples)")
+
+
+def test_checkpoint_is_served_and_resumed():
+    with tempfile.TemporaryDirectory() as path:
+        system = ProgressiveLearningSystem(path, learning_mode="online", online_batch_size=50)
+        collect(system, 100)
+        bundle = system.bundle
+        assert "online_state" in bundle and "response_classifier" not in bundle
+        assert system.bundle.get("emotion_classifier") is not system.online.classifier, \
+            "serving maps the checkpoint, the learner keeps updating its own copy"
+
+        served = ProgressiveLearningSystem(path)
+        assert served.predict_emotion("nervous about the interview")["primary_emotion"] == "fear"
+        assert served.generate_response("I feel lonely and down", {}) == "Reply for sadness"
+        assert served.analyze_emolytics({"primary_emotion": "joy", "emotional_triggers": ["work"]}, [])[
+            "recommendations"]["immediate_actions"] == ["rest"]
+
+        resumed = ProgressiveLearningSystem(path, learning_mode="online", online_batch_size=50)
+        collect(resumed, 50, seed=3)
+        assert resumed.online.state["samples_seen"] == 150, "the learner resumed from the checkpoint"
+        assert resumed.get_learning_status()["online_learning"]["batches"] == 3
+        print("✅ Checkpoints are served like batch models and resumed after a restart")
+
+
+def test_unpromoted_checkpoints_are_resumed():
+    with tempfile.TemporaryDirectory() as path:
+        collecting = ProgressiveLearningSystem(path, train_every=1000)
+        for run, seed in enumerate((1, 2, 3), 1):
+            collect(collecting, 30, seed=seed)
+            collecting.save_training_data()
+            # Each worker run starts a fresh system, as training_worker does
+            worker = ProgressiveLearningSystem(path, learning_mode="online", auto_promote=False)
+            result = worker.update_online()
+            assert result["emotion_data"] == 30, f"run {run} re-read {result['emotion_data']} samples"
+            assert worker.online.state["samples_seen"] == 30 * run
+        assert worker.registry.current_version() is None, "nothing was promoted"
+        assert len(worker.registry.versions()) == 3 and worker.bundle is None
+        print("✅ With auto_promote off, each update resumes from the newest published checkpoint")
+
+
+def test_periodic_refit_validates():
+    with tempfile.TemporaryDirectory() as path:
+        system = ProgressiveLearningSystem(path, learning_mode="online", online_batch_size=40)
+        system.online = OnlineLearner(validate_every=3)
+        collect(system, 120)
+        validation = system.online.state["validation"]
+        assert validation["samples"] == 120
+        assert abs(validation["online_accuracy"] - validation["refit_accuracy"]) <= 0.1
+        print(f"✅ Full refit validation: online {validation['online_accuracy']} "
+              f"vs refit {validation['refit_accuracy']}")
+
+
+def test_validation_is_bounded():
+    with tempfile.TemporaryDirectory() as path:
+        system = ProgressiveLearningSystem(path, learning_mode="online", online_batch_size=40)
+        system.online = OnlineLearner(validate_every=2, validation_samples=50)
+        collect(system, 160)
+        assert system.online.state["batches"] == 4
+        assert system.online.state["validation"]["samples"] == 50, "only the most recent samples are refit"
+        print("✅ Validation refits a bounded window of recent samples")
+
+
+def test_worker_applies_online_updates():
+    with tempfile.TemporaryDirectory() as path:
+        serving = ProgressiveLearningSystem(path, training_mode="worker", learning_mode="online",
+                                            online_batch_size=60, reload_interval=3600)
+        collect(serving, 60)
+        assert serving.jobs.pending() == [ONLINE_UPDATE] and serving.bundle is None
+        run = TrainingWorker(path).run_once()
+        assert run["status"] == "succeeded" and run["samples"]["emotion_data"] == 60
+
+        collect(serving, 60, seed=4)
+        run = TrainingWorker(path).run_once()
+        assert run["samples"]["emotion_data"] == 60, "the worker resumes from the checkpoint's log positions"
+        assert serving.refresh_models(force=True)
+        assert serving.predict_emotion("so happy with my friends")["primary_emotion"] == "joy"
+        print("✅ The training worker applies online mini-batches from the checkpoint")
+
+
+def main():
+    print("🌊 Testing Online Learning")
+    print("=" * 50)
+    test_mini_batches_match_full_fit()
+    test_new_emotions_join_later()
+    test_update_cost_follows_batch_size()
+    test_checkpoint_is_served_and_resumed()
+    test_unpromoted_checkpoints_are_resumed()
+    test_periodic_refit_validates()
+    test_validation_is_bounded()
+    test_worker_applies_online_updates()
+    print("\n🎉 All online learning tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Offline tests for PrivateChromaDB search, using a stub embedding function and stub Chroma collections
+"""
+
+import sys
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_core.private_chroma_db import PrivateChromaDB
+
+
+class StubEmbedder:
+    """Counts calls; every text embeds to the same vector"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, input):
+        self.calls.append(list(input))
+        return [[0.6, 0.8] for _ in input]
+
+
+class StubCollection:
+    """Answers queries with fixed (document, distance) pairs, in the order given"""
+
+    def __init__(self, results):
+        self.results = results
+        self.queries = []
+        self.threads = set()
+
+    def query(self, n_results, query_embeddings=None, query_texts=None):
+        assert query_texts is None, "collections are queried with the precomputed embedding"
+        self.queries.append((query_embeddings, n_results))
+        self.threads.add(threading.current_thread().name)
+        results = self.results[:n_results]
+        return {
+            "documents": [[text for text, _ in results]],
+            "metadatas": [[{"rank": i} for i in range(len(results))]],
+            "distances": [[distance for _, distance in results]],
+        }
+
+
+def bare_db(conversations, patterns, user_id="tester"):
+    """A PrivateChromaDB without a Chroma client; tests attach the collections they search"""
+    db = PrivateChromaDB.__new__(PrivateChromaDB)
+    db.embedding_function = StubEmbedder()
+    db.conversations = StubCollection(conversations)
+    db.emotional_patterns = StubCollection(patterns)
+    db._query_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="evolance-chroma-query")
+    db.authorized_users = {db._hash_user_id(user_id)}
+    return db
+
+
+def test_query_is_embedded_once_for_both_collections():
+    db = bare_db([("I feel anxious", 0.2)], [("That sounds hard", 0.1)])
+    db.search_similar_conversations("anxious about work", n_results=3, user_id="tester")
+    assert db.embedding_function.calls == [["anxious about work"]], "one embedding per search"
+    for collection in (db.conversations, db.emotional_patterns):
+        assert collection.queries == [([[0.6, 0.8]], 3)]
+        assert all(name.startswith("evolance-chroma-query") for name in collection.threads)
+    print("✅ The query is embedded once and both collections are searched with query_embeddings")
+
+
+def test_results_are_merged_by_distance():
+    conversations = [("conversation b", 0.3), ("conversation a", 0.1), ("conversation c", 0.7)]
+    patterns = [("pattern a", 0.2), ("pattern b", 0.5), ("pattern c", 0.9)]
+    db = bare_db(conversations, patterns)
+    results = db.search_similar_conversations("hello", n_results=4, user_id="tester")
+    assert [result["text"] for result in results] == ["conversation a", "pattern a", "conversation b", "pattern b"]
+    assert [result["type"] for result in results] == ["conversation", "pattern", "conversation", "pattern"]
+    assert [result["distance"] for result in results] == sorted(result["distance"] for result in results)
+    assert results[0]["metadata"] == {"rank": 1}, "metadata stays with its document"
+    print("✅ Both result lists are merged by distance and truncated to n_results")
+
+
+def test_missing_distances_sort_last():
+    db = bare_db([("conversation", 0.4)], [("pattern", 0.1)])
+    db.conversations.query = lambda n_results, query_embeddings=None: {
+        "documents": [["undistanced"]], "metadatas": [[{}]]
+    }
+    results = db.search_similar_conversations("hello", n_results=5, user_id="tester")
+    assert [result["text"] for result in results] == ["pattern", "undistanced"]
+    assert results[1]["distance"] is None
+    print("✅ Results without a distance come after all ranked results")
+
+
+def test_unauthorized_users_are_not_searched():
+    db = bare_db([("conversation", 0.1)], [("pattern", 0.2)])
+    assert db.search_similar_conversations("hello", user_id="stranger") == []
+    assert db.embedding_function.calls == [] and db.conversations.queries == []
+    print("✅ Unauthorized users get no results and trigger no embedding")
+
+
+def main():
+    print("🔐 Testing Private ChromaDB")
+    print("=" * 50)
+    test_query_is_embedded_once_for_both_collections()
+    test_results_are_merged_by_distance()
+    test_missing_distances_sort_last()
+    test_unauthorized_users_are_not_searched()
+    print("\n🎉 All private ChromaDB tests passed!")
+
+
+if __name__ == "__main__":
+    main()
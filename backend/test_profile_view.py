@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the incrementally maintained emotional profile view
+Checks the materialized profile against a from-scratch computation
+"""
+
+import sys
+import os
+import random
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_core.interaction_store import InteractionStore
+from ai_core.profile_view import ProfileView
+
+EMOTIONS = ["joy", "love", "sadness", "fear", "anger", "surprise", "neutral"]
+
+
+def make_record(user_id, i, rng):
+    return {"input": f"m{i}", "output": "ok", "emotion": rng.choice(EMOTIONS), "intent": "statement",
+            "user_id": user_id, "timestamp": f"t{i:05d}",
+            "feedback": rng.choice([None, 0.1, 0.5, 0.9])}
+
+
+def reference_profile(user_data):
+    """Full recomputation over the user's history"""
+    feedback = lambda item: 0.5 if item.get("feedback") is None else item["feedback"]
+    emotions = [item.get("emotion", "neutral") for item in user_data[-50:]]
+    counts = {}
+    for emotion in emotions:
+        counts[emotion] = counts.get(emotion, 0) + 1
+
+    trend = "stable"
+    if len(user_data) >= 10:
+        recent = user_data[-10:]
+        older = user_data[-20:-10] if len(user_data) >= 20 else user_data[:10]
+        recent_avg = sum(map(feedback, recent)) / len(recent)
+        older_avg = sum(map(feedback, older)) / len(older)
+        trend = "ascending" if recent_avg > older_avg + 0.1 else "descending" if recent_avg < older_avg - 0.1 else "stable"
+
+    all_time = {}
+    for item in user_data:
+        all_time[item["emotion"]] = all_time.get(item["emotion"], 0) + 1
+    milestones = [user_data[9]["timestamp"]] if len(user_data) >= 10 else []
+    milestones += [user_data[49]["timestamp"]] if len(user_data) >= 50 else []
+    milestones += [e for e, c in all_time.items() if c >= 5]
+
+    return {
+        "fingerprint": counts,
+        "trend": trend,
+        "total": len(user_data),
+        "recent": emotions[-10:],
+        "dominant": max(counts.items(), key=lambda x: x[1])[0] if counts else "neutral",
+        "milestones": milestones,
+    }
+
+
+def summarize(profile):
+    milestones = [m["achieved_at"] for m in profile["growth_milestones"] if not m["type"].startswith("emotion_")]
+    milestones += [m["type"][len("emotion_mastery_"):] for m in profile["growth_milestones"]
+                   if m["type"].startswith("emotion_")]
+    return {
+        "fingerprint": profile["emotional_fingerprint"],
+        "trend": profile["fulfillment_trend"],
+        "total": profile["total_interactions"],
+        "recent": profile["recent_emotions"],
+        "dominant": profile["dominant_emotion"],
+        "milestones": milestones,
+    }
+
+
+def test_matches_full_recomputation():
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as path:
+        store = InteractionStore(path, tail_size=20, segment_size=16)
+        view = ProfileView(store)
+        history = []
+        for i in range(120):
+            record = make_record("alice", i, rng)
+            store.append("alice", record)
+            view.record("alice")
+            history.append(record)
+            assert summarize(view.get_profile("alice")) == reference_profile(history), f"diverged at {i}"
+        print("✅ Incremental profile matches full recomputation at every step")
+
+
+def test_snapshot_restore_and_catch_up():
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as path:
+        snapshot = os.path.join(path, "profiles.json")
+        store = InteractionStore(path, tail_size=20, segment_size=16)
+        view = ProfileView(store, snapshot_path=snapshot, snapshot_interval=3600)
+        history = []
+        for i in range(60):
+            record = make_record("bob", i, rng)
+            store.append("bob", record)
+            view.record("bob")
+            history.append(record)
+        view.close()
+        assert os.path.exists(snapshot)
+
+        # Interactions stored after the snapshot are replayed on the next read
+        for i in range(60, 75):
+            record = make_record("bob", i, rng)
+            store.append("bob", record)
+            history.append(record)
+
+        restarted = ProfileView(InteractionStore(path, tail_size=20, segment_size=16),
+                                snapshot_path=snapshot, snapshot_interval=3600)
+        assert restarted.get_metrics()["profiles"] == 1
+        assert summarize(restarted.get_profile("bob")) == reference_profile(history)
+        restarted.close()
+        print("✅ Profiles survive restarts and catch up with newer interactions")
+
+
+def test_cold_start_rebuilds_from_segments():
+    rng = random.Random(3)
+    with tempfile.TemporaryDirectory() as path:
+        store = InteractionStore(path, tail_size=10, segment_size=8)
+        history = []
+        for i in range(45):
+            record = make_record("carol", i, rng)
+            store.append("carol", record)
+            history.append(record)
+        view = ProfileView(store)
+        assert summarize(view.get_profile("carol")) == reference_profile(history)
+        assert view.get_profile("nobody")["total_interactions"] == 0
+        print("✅ Profiles without a snapshot are rebuilt from the user's segments")
+
+
+class SlowStore(InteractionStore):
+    """Blocks one user's segment scan until released"""
+
+    def __init__(self, *args, slow_user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.slow_user = slow_user
+        self.scanning = threading.Event()
+        self.release = threading.Event()
+
+    def iter_user(self, user_id):
+        if user_id == self.slow_user:
+            self.scanning.set()
+            self.release.wait(5)
+        return super().iter_user(user_id)
+
+
+def test_replay_does_not_block_other_users():
+    rng = random.Random(4)
+    with tempfile.TemporaryDirectory() as path:
+        store = SlowStore(path, tail_size=5, segment_size=8, slow_user="dave")
+        for i in range(30):
+            store.append("dave", make_record("dave", i, rng))
+        store.append("erin", make_record("erin", 0, rng))
+        view = ProfileView(store)
+
+        replay = threading.Thread(target=view.get_profile, args=("dave",))
+        replay.start()
+        assert store.scanning.wait(5)
+        finished = threading.Event()
+        threading.Thread(target=lambda: (view.record("erin"), view.get_profile("erin"), finished.set())).start()
+        assert finished.wait(2), "another user's update waited for dave's replay"
+        store.release.set()
+        replay.join()
+        assert view.get_profile("dave")["total_interactions"] == 30
+        print("✅ A cold user's replay holds only that user's lock")
+
+
+def main():
+    print("🧭 Testing Profile View")
+    print("=" * 50)
+    test_matches_full_recomputation()
+    test_snapshot_restore_and_catch_up()
+    test_cold_start_rebuilds_from_segments()
+    test_replay_does_not_block_other_users()
+    print("\n🎉 All profile view tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the hedged provider router
+Uses local stub providers, so no API keys or network access are needed
+"""
+
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_core.provider_router import CircuitBreaker, Provider, ProviderRouter
+
+
+def stub_provider(name, delay, response=None, fail=False):
+    """Async provider that answers after `delay` seconds"""
+    calls = []
+
+    async def generate(message, emotion, intent, context):
+        calls.append(message)
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError(f"{name} unavailable")
+        return response if response is not None else f"{name}: {message}"
+
+    generate.calls = calls
+    return generate
+
+
+async def local_fallback(message, emotion, intent, context):
+    return "local template"
+
+
+def test_fast_primary_wins():
+    primary = stub_provider("openai", 0.01)
+    secondary = stub_provider("gemini", 0.01)
+    router = ProviderRouter([
+        Provider("openai", primary, hedge_after=0.2),
+        Provider("gemini", secondary, hedge_after=0.2),
+    ])
+    response = asyncio.run(router.generate("hi", "joy", "greeting"))
+    assert response == "openai: hi"
+    assert secondary.calls == [], "no hedge should start when the primary is fast"
+    print("✅ Fast primary answers without hedging")
+
+
+def test_slow_primary_is_hedged():
+    primary = stub_provider("openai", 1.0)
+    secondary = stub_provider("gemini", 0.02)
+    router = ProviderRouter([
+        Provider("openai", primary, hedge_after=0.05),
+        Provider("gemini", secondary, hedge_after=0.05),
+    ])
+    response, elapsed = asyncio.run(_timed(router.generate("hi", "joy", "greeting")))
+    assert response == "gemini: hi"
+    assert elapsed < 0.5, f"hedged call took {elapsed:.2f}s"
+    stats = router.get_stats()
+    assert stats["gemini"]["hedges_started"] == 1
+    assert stats["gemini"]["wins"] == 1
+    print(f"✅ Slow primary hedged, answered in {elapsed * 1000:.0f} ms")
+
+
+def test_deadline_and_fallback():
+    router = ProviderRouter(
+        [Provider("openai", stub_provider("openai", 1.0), deadline=0.05, hedge_after=0.05)],
+        fallback=local_fallback
+    )
+    response, elapsed = asyncio.run(_timed(router.generate("hi", "joy", "greeting")))
+    assert response == "local template"
+    assert elapsed < 0.5
+    assert router.get_stats()["openai"]["timeouts"] == 1
+    print("✅ Deadline enforced and local fallback used")
+
+
+def test_circuit_breaker_skips_failing_provider():
+    failing = stub_provider("openai", 0.0, fail=True)
+    healthy = stub_provider("gemini", 0.0)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    router = ProviderRouter([
+        Provider("openai", failing, breaker=breaker),
+        Provider("gemini", healthy),
+    ])
+
+    async def run_many():
+        return [await router.generate(f"m{i}", "neutral", "statement") for i in range(4)]
+
+    responses = asyncio.run(run_many())
+    assert responses == ["gemini: m0", "gemini: m1", "gemini: m2", "gemini: m3"]
+    assert len(failing.calls) == 2, "open circuit should stop calls after the threshold"
+    assert router.get_stats()["openai"]["circuit"] == "open"
+    assert router.get_stats()["openai"]["skipped"] == 2
+    print("✅ Circuit breaker opens after repeated failures")
+
+
+def test_circuit_half_open_recovers():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow_request()
+    now[0] = 11.0
+    assert breaker.state == "half_open"
+    assert breaker.allow_request()
+    assert not breaker.allow_request(), "only one trial request while half open"
+    breaker.record_success()
+    assert breaker.state == "closed"
+    print("✅ Half-open circuit closes after a successful trial")
+
+
+async def _timed(coro):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    result = await coro
+    return result, loop.time() - start
+
+
+def main():
+    print("🔀 Testing Provider Router")
+    print("=" * 50)
+    test_fast_primary_wins()
+    test_slow_primary_is_hedged()
+    test_deadline_and_fallback()
+    test_circuit_breaker_skips_failing_provider()
+    test_circuit_half_open_recovers()
+    print("\n🎉 All provider router tests passed!")
+
+
+if __name__ == "__main__":
+    main()
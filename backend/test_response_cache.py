@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the semantic response cache
+Uses a bag-of-words stub encoder, so no models are downloaded
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from ai_core.response_cache import SemanticResponseCache
+
+VOCABULARY = ["feel", "sad", "today", "very", "anxious", "work", "happy"]
+
+
+def stub_encoder(texts):
+    """Counts vocabulary words per text"""
+    rows = []
+    for text in texts:
+        words = SemanticResponseCache.normalize(text).split()
+        rows.append([words.count(term) for term in VOCABULARY])
+    return np.array(rows, dtype=np.float32)
+
+
+def test_exact_hit_ignores_case_and_punctuation():
+    cache = SemanticResponseCache()
+    cache.put("I feel sad today.", "sadness", "statement", "I'm sorry you're sad.")
+    assert cache.get("i feel SAD today", "sadness", "statement") == "I'm sorry you're sad."
+    assert cache.get("i feel sad today", "joy", "statement") is None, "emotion is part of the key"
+    metrics = cache.get_metrics()
+    assert metrics["exact_hits"] == 1 and metrics["misses"] == 1
+    print("✅ Exact tier matches normalized prompts per emotion/intent")
+
+
+def test_semantic_hit_within_threshold():
+    cache = SemanticResponseCache(similarity_threshold=0.85, embed_fn=stub_encoder)
+    cache.put("I feel sad today", "sadness", "statement", "cached")
+    assert cache.get("I feel very sad today", "sadness", "statement") == "cached"
+    assert cache.get("anxious about work", "sadness", "statement") is None
+    assert cache.get("I feel very sad today", "sadness", "question") is None, "intent is part of the group"
+    assert cache.get_metrics()["semantic_hits"] == 1
+    print("✅ Semantic tier serves near-duplicate prompts only")
+
+
+def test_ttl_expiry():
+    now = [0.0]
+    cache = SemanticResponseCache(ttl_seconds=10, clock=lambda: now[0])
+    cache.put("hello", "neutral", "greeting", "Hi!")
+    now[0] = 9.0
+    assert cache.get("hello", "neutral", "greeting") == "Hi!"
+    now[0] = 11.0
+    assert cache.get("hello", "neutral", "greeting") is None
+    assert cache.get_metrics()["expirations"] == 1
+    print("✅ Entries expire after their TTL")
+
+
+def test_lru_eviction_frees_embedding_slots():
+    cache = SemanticResponseCache(max_entries=2, embed_fn=stub_encoder)
+    for i, text in enumerate(["feel sad", "anxious work", "happy today"]):
+        cache.put(text, "neutral", "statement", f"r{i}")
+    metrics = cache.get_metrics()
+    assert metrics["entries"] == 2 and metrics["evictions"] == 1
+    assert cache.get("feel sad", "neutral", "statement") is None
+    cache.put("very happy", "neutral", "statement", "r3")
+    assert len(cache._slot_keys) == 3, "evicted slots are reused"
+    print("✅ LRU eviction reuses embedding slots")
+
+
+def test_opt_out_and_crisis_bypass():
+    cache = SemanticResponseCache()
+    cache.set_opt_out("user-1")
+    cache.put("hello", "neutral", "greeting", "Hi!", user_id="user-1")
+    assert cache.get("hello", "neutral", "greeting") is None, "opted-out users are not stored"
+    cache.put("hello", "neutral", "greeting", "Hi!")
+    assert cache.get("hello", "neutral", "greeting", user_id="user-1") is None
+    cache.set_opt_out("user-1", False)
+    assert cache.get("hello", "neutral", "greeting", user_id="user-1") == "Hi!"
+
+    cache.put("I feel hopeless", "sadness", "statement", "generic reply")
+    assert cache.get("I feel hopeless", "sadness", "statement") is None
+    metrics = cache.get_metrics()
+    assert metrics["bypassed_crisis"] == 1 and metrics["bypassed_opt_out"] == 1
+    print("✅ Opted-out users and crisis messages bypass the cache")
+
+
+def test_caches_can_share_opt_outs():
+    shared = SemanticResponseCache()
+    own = SemanticResponseCache(ttl_seconds=5, opted_out_users=shared.opted_out_users)
+    shared.set_opt_out("user-1")
+    own.put("hello", "neutral", "greeting", "Hi!")
+    assert own.get("hello", "neutral", "greeting", user_id="user-1") is None
+    assert own.ttl_seconds == 5 and shared.ttl_seconds == 3600, "settings stay per instance"
+    print("✅ Separately configured caches share one opt-out set")
+
+
+def main():
+    print("🗄️ Testing Response Cache")
+    print("=" * 50)
+    test_exact_hit_ignores_case_and_punctuation()
+    test_semantic_hit_within_threshold()
+    test_ttl_expiry()
+    test_lru_eviction_frees_embedding_slots()
+    test_opt_out_and_crisis_bypass()
+    test_caches_can_share_opt_outs()
+    print("\n🎉 All response cache tests passed!")
+
+
+if __name__ == "__main__":
+    main()
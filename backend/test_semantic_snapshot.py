@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the memory-mapped semantic network snapshot format
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from ai_core import semantic_network
+from ai_core.semantic_network import CoreSemanticNetwork, load_core_network
+from ai_core.semantic_snapshot import ALIGNMENT, SnapshotError, read_snapshot, write_snapshot
+
+
+def test_round_trip_and_alignment():
+    with tempfile.TemporaryDirectory() as path:
+        snapshot = Path(path) / "test.evsnap"
+        arrays = {
+            "flags": np.array([1, 0, 1], dtype=np.int8),
+            "weights": np.linspace(0, 1, 7),
+            "matrix": np.arange(12, dtype=np.int32).reshape(3, 4),
+        }
+        write_snapshot(snapshot, {"source_version": "abc", "names": ["a", "b"]}, arrays)
+        header, loaded = read_snapshot(snapshot, source_version="abc")
+        assert header["names"] == ["a", "b"] and header["source_version"] == "abc"
+        for name, array in arrays.items():
+            assert loaded[name].dtype == array.dtype and np.array_equal(loaded[name], array)
+            assert not loaded[name].flags.writeable, "arrays are read-only views of the mapped file"
+            assert isinstance(loaded[name].base, np.memmap) or isinstance(loaded[name].base.base, np.memmap)
+
+        with open(snapshot, "rb") as f:
+            raw = f.read()
+        for name, spec in header["arrays"].items():
+            assert spec["offset"] % ALIGNMENT == 0, f"{name} blob is not {ALIGNMENT}-byte aligned"
+        data_start = min(raw.find(arrays[name].tobytes()) for name in arrays)
+        assert data_start % ALIGNMENT == 0
+        print("✅ Arrays round-trip through 64-byte aligned, memory-mapped blobs")
+
+
+def test_corrupt_snapshots_are_rejected():
+    with tempfile.TemporaryDirectory() as path:
+        snapshot = Path(path) / "test.evsnap"
+        write_snapshot(snapshot, {"source_version": "abc"}, {"values": np.arange(100, dtype=np.float64)})
+        try:
+            read_snapshot(snapshot, source_version="other")
+            raise AssertionError("a snapshot of another source version must be rejected")
+        except SnapshotError:
+            pass
+
+        with open(snapshot, "r+b") as f:
+            f.truncate(os.path.getsize(snapshot) - 8)
+        try:
+            read_snapshot(snapshot)
+            raise AssertionError("a truncated snapshot must be rejected")
+        except SnapshotError:
+            pass
+
+        garbage = Path(path) / "garbage.evsnap"
+        garbage.write_bytes(b"not a snapshot at all")
+        for broken in (garbage, Path(path) / "missing.evsnap"):
+            try:
+                read_snapshot(broken)
+                raise AssertionError(f"{broken.name} must be rejected")
+            except SnapshotError:
+                pass
+        print("✅ Stale, truncated, foreign and missing snapshots raise SnapshotError")
+
+
+def test_network_round_trip_decodes_nodes_lazily():
+    with tempfile.TemporaryDirectory() as path:
+        snapshot = Path(path) / "core.evsnap"
+        built = CoreSemanticNetwork()
+        built.save_snapshot(snapshot)
+        loaded = CoreSemanticNetwork.from_snapshot(snapshot)
+        assert loaded._emotion_nodes is None, "node attributes are not decoded at load"
+        assert loaded.find_related_emotions("joy") == built.find_related_emotions("joy")
+        assert loaded.analyze_text_emotions("I am so happy today") == built.analyze_text_emotions("I am so happy today")
+        assert loaded._emotion_nodes is None, "the index and lexicon work without node attributes"
+        assert loaded.export_network() == built.export_network()
+        print("✅ The core network round-trips and decodes node attributes on first use")
+
+
+def test_stale_snapshot_is_rebuilt():
+    with tempfile.TemporaryDirectory() as path:
+        snapshot = Path(path) / "core.evsnap"
+        CoreSemanticNetwork().save_snapshot(snapshot)
+        original = semantic_network.SOURCE_VERSION
+        semantic_network.SOURCE_VERSION = "changed-source"
+        try:
+            network = load_core_network(snapshot)
+            header, _ = read_snapshot(snapshot)
+            assert header["source_version"] == "changed-source", "the snapshot is rewritten for the new source"
+            assert network._node_data is None, "a rebuilt network comes from source"
+            assert CoreSemanticNetwork.from_snapshot(snapshot).index.node_names == network.index.node_names
+        finally:
+            semantic_network.SOURCE_VERSION = original
+        print("✅ A snapshot built from a different SOURCE_VERSION is rebuilt and replaced")
+
+
+def main():
+    print("🕸️ Testing Semantic Network Snapshots")
+    print("=" * 50)
+    test_round_trip_and_alignment()
+    test_corrupt_snapshots_are_rejected()
+    test_network_round_trip_decodes_nodes_lazily()
+    test_stale_snapshot_is_rebuilt()
+    print("\n🎉 All semantic snapshot tests passed!")
+
+
+if __name__ == "__main__":
+    main()
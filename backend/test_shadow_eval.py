@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Offline tests for shadow evaluation and percentage routing of the progressive-learning models
+"""
+
+import sys
+import os
+import io
+import json
+import random
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_core import shadow_eval
+from ai_core.progressive_learning import ProgressiveLearningSystem
+from ai_core.shadow_eval import RolloutPolicy, ShadowEvaluator, ShadowMetricsStore
+
+
+class StubModels:
+    """Stands in for ProgressiveLearningSystem: predicts `emotion`, optionally slowly"""
+
+    def __init__(self, emotion="joy", delay=0.0, trained=True):
+        self.emotion = emotion
+        self.delay = delay
+        self.trained = trained
+        self.bundle = {"emotion_classifier": object()} if trained else None
+        self.release = threading.Event()
+        self.release.set()
+
+    def refresh_models(self, force=False):
+        return False
+
+    def predict_emotion(self, text):
+        self.release.wait()
+        time.sleep(self.delay)
+        if not self.trained:
+            return {"primary_emotion": "neutral", "confidence": 0.0}
+        return {"primary_emotion": self.emotion, "confidence": 0.9, "model_used": "trained"}
+
+    def generate_response(self, text, emotion_data):
+        return "That sounds wonderful, tell me more"
+
+    def analyze_emolytics(self, emotion_data, context):
+        return {"emotional_state": {"stability": 60}}
+
+
+def turn(emotion="joy"):
+    return {
+        "emotion_data": {"primary_emotion": emotion},
+        "response": "That sounds wonderful, I am glad",
+        "emolytics": {"emotional_state": {"stability": 70}},
+    }
+
+
+def make_evaluator(path, models, **settings):
+    settings.setdefault("rng", random.Random(7))
+    return ShadowEvaluator(models, path, **settings)
+
+
+def test_shadow_runs_off_the_request_path():
+    with tempfile.TemporaryDirectory() as path:
+        models = StubModels(delay=0.2)
+        evaluator = make_evaluator(path, models, sample_rate=1.0)
+        started = time.perf_counter()
+        assert evaluator.submit("I got the job", [], turn(), latency_ms=900)
+        assert time.perf_counter() - started < 0.1, "the request does not wait for the local models"
+        evaluator.shutdown()
+        report = evaluator.report()
+        assert report["shadow"]["compared"] == 1 and report["shadow"]["emotion_agreement"] == 1.0
+        assert report["shadow"]["stability_diff"] == 10.0
+        assert report["latency"]["gemini"]["p50_ms"] == 1000 and report["latency"]["own"]["p50_ms"] == 250
+        print("✅ Sampled requests are compared with the local models in the background")
+
+
+def test_sampling_and_backlog():
+    with tempfile.TemporaryDirectory() as path:
+        models = StubModels()
+        models.release.clear()
+        evaluator = make_evaluator(path, models, sample_rate=1.0, max_pending=2)
+        queued = [evaluator.submit(f"message {i}", [], turn(), latency_ms=500) for i in range(5)]
+        models.release.set()
+        evaluator.shutdown()
+        assert queued == [True, True, False, False, False]
+        shadow = evaluator.report()["shadow"]
+        assert shadow["compared"] == 2 and shadow["dropped"] == 3
+
+    with tempfile.TemporaryDirectory() as path:
+        evaluator = make_evaluator(path, StubModels(trained=False), sample_rate=0.2)
+        for i in range(500):
+            evaluator.submit(f"message {i}", [], turn("sadness"), latency_ms=500)
+        evaluator.shutdown()
+        shadow = evaluator.report()["shadow"]
+        sampled = shadow["unavailable"] + shadow["dropped"]
+        assert shadow["compared"] == 0 and 70 <= sampled <= 130, f"about a fifth is sampled ({sampled})"
+        print("✅ A sample_rate fraction is shadowed; a full backlog drops samples instead of queueing")
+
+
+def test_store_is_compact_and_merges_processes():
+    with tempfile.TemporaryDirectory() as path:
+        first, second = ShadowMetricsStore(path), ShadowMetricsStore(path)
+        second.file = os.path.join(path, "metrics-other-1.json")
+        for i in range(1000):
+            first.record_served("gemini", 800 + i % 400, tokens=300)
+            second.record_comparison(i % 10 != 0, 0.5, 5.0, own_latency_ms=20, own_cpu_ms=3)
+        second.record_served("own", 15)
+        first.flush()
+        second.flush()
+        assert os.path.getsize(first.file) < 2000, "counters, not one row per request"
+
+        summary = ShadowMetricsStore(path).summarize(hours=1, cost_per_1k_tokens=0.5)
+        assert summary["served"] == {"gemini": 1000, "own": 1}
+        assert summary["shadow"]["emotion_agreement"] == 0.9
+        assert summary["latency"]["gemini"]["p95_ms"] == 2500 and summary["latency"]["own"]["p50_ms"] == 25
+        assert summary["cost"]["gemini_cost"] == 150.0 and summary["cost"]["tokens_saved"] == 300
+        print("✅ The metrics store keeps hourly counters and histograms, merged across processes")
+
+
+def test_rollout_steps_with_agreement():
+    with tempfile.TemporaryDirectory() as path:
+        policy = RolloutPolicy(path, min_comparisons=100, step=10, cooldown=0)
+        good = {"shadow": {"compared": 150, "emotion_agreement": 0.9}}
+        assert policy.evaluate({"shadow": {"compared": 50, "emotion_agreement": 0.99}}) is None, "too few samples"
+        assert policy.evaluate(good) == 10 and policy.evaluate(good) == 20
+        assert policy.evaluate({"shadow": {"compared": 150, "emotion_agreement": 0.8}}) is None, "hold between floor and target"
+        assert policy.evaluate({"shadow": {"compared": 150, "emotion_agreement": 0.6}}) == 10
+        assert [entry["to"] for entry in policy.state["history"]] == [10, 20, 10]
+
+        cooling = RolloutPolicy(path, min_comparisons=100, cooldown=3600)
+        assert cooling.evaluate(good) is None, "at most one change per cooldown"
+        manual = RolloutPolicy(path, mode="manual", min_comparisons=100, cooldown=0)
+        assert manual.evaluate(good) is None and manual.percentage == 10
+
+        evaluator = make_evaluator(path, StubModels(), rollout=RolloutPolicy(path, mode="manual"),
+                                   rng=random.Random(3))
+        routes = [evaluator.route() for _ in range(2000)]
+        assert 150 <= routes.count("own") <= 250, "about 10% of requests go to the own models"
+        print("✅ Routing moves by percentage: up with agreement, halved when it drops")
+
+
+def test_routing_picks_up_bundles_from_other_processes():
+    with tempfile.TemporaryDirectory() as path:
+        serving = ProgressiveLearningSystem(path, reload_interval=0)
+        evaluator = make_evaluator(path, serving, rollout=RolloutPolicy(path, mode="manual"))
+        evaluator.rollout.set(100)
+        assert evaluator.route() == "gemini", "nothing trained yet"
+
+        worker = ProgressiveLearningSystem(path, train_every=1000)
+        for i in range(60):
+            emotion = ("joy", "sadness", "fear")[i % 3]
+            worker.collect_training_data(f"I feel {emotion} today {i}", {"primary_emotion": emotion},
+                                         f"Reply for {emotion}", {"emotional_state": {"stability": 55}})
+        worker.train_models(["response_generator"])
+        assert evaluator.route() == "gemini", "a bundle without an emotion classifier is not routed to"
+        assert serving.bundle.version == worker.bundle.version, "the published bundle was swapped in"
+
+        worker.train_models(["emotion_classifier"])
+        assert evaluator.route() == "own" and serving.bundle.version == worker.bundle.version
+        assert serving.predict_emotion("I feel joy today")["model_used"] == "trained"
+        print("✅ Routing swaps in bundles published by another system and needs an emotion classifier")
+
+
+def test_evaluator_steps_rollout_from_live_traffic():
+    with tempfile.TemporaryDirectory() as path:
+        policy = RolloutPolicy(path, min_comparisons=20, step=25, cooldown=0)
+        evaluator = make_evaluator(path, StubModels(), sample_rate=1.0, rollout=policy, evaluate_interval=0)
+        for i in range(30):
+            evaluator.submit(f"message {i}", [], turn(), latency_ms=700)
+            evaluator._executor.submit(lambda: None).result()  # let the shadow run finish
+        assert policy.percentage >= 25
+        print(f"✅ Live agreement moved the own-model share to {policy.percentage}%")
+
+
+def test_report_command():
+    with tempfile.TemporaryDirectory() as path:
+        store = ShadowMetricsStore(os.path.join(path, "shadow"))
+        store.record_served("gemini", 900, tokens=250)
+        store.flush()
+        with redirect_stdout(io.StringIO()):
+            shadow_eval.main(["--model-dir", path, "set-rollout", "40"])
+        output = io.StringIO()
+        with redirect_stdout(output):
+            shadow_eval.main(["--model-dir", path, "report", "--cost-per-1k-tokens", "2"])
+        report = json.loads(output.getvalue())
+        assert report["served"]["gemini"] == 1 and report["cost"]["gemini_cost"] == 0.5
+        assert report["rollout"]["percentage"] == 40
+        print("✅ python -m ai_core.shadow_eval report / set-rollout")
+
+
+def main():
+    print("🌓 Testing Shadow Evaluation")
+    print("=" * 50)
+    test_shadow_runs_off_the_request_path()
+    test_sampling_and_backlog()
+    test_store_is_compact_and_merges_processes()
+    test_rollout_steps_with_agreement()
+    test_routing_picks_up_bundles_from_other_processes()
+    test_evaluator_steps_rollout_from_live_traffic()
+    test_report_command()
+    print("\n🎉 All shadow evaluation tests passed!")
+
+
+if __name__ == "__main__":
+    main()
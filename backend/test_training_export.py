@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Offline tests for streaming training-data export and reading
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_core.training_export import (
+    ExportWatermark, PYARROW_AVAILABLE, export_records, iter_batches, iter_records, write_jsonl
+)
+
+
+def make_records(start, stop):
+    for i in range(start, stop):
+        yield {"input": f"message {i}", "output": "ok", "emotion": "joy", "user_id": f"u{i % 3}",
+               "timestamp": f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}", "feedback": None,
+               "context": {"turn": i}}
+
+
+def test_jsonl_round_trip():
+    with tempfile.TemporaryDirectory() as path:
+        for name in ("export.jsonl", "export.jsonl.gz"):
+            file = os.path.join(path, name)
+            result = export_records(make_records(0, 2500), file, chunk_size=1000)
+            assert result["records"] == 2500
+            records = list(iter_records(file))
+            assert records == list(make_records(0, 2500))
+            assert [len(batch) for batch in iter_batches(file, batch_size=1000)] == [1000, 1000, 500]
+        with open(os.path.join(path, "export.jsonl")) as f:
+            assert f.readline().count("\n") == 1 and "  " not in f.readline(), "one compact record per line"
+        print("✅ JSONL (plain and gzip) round-trips in chunks")
+
+
+def test_incremental_export_with_watermark():
+    with tempfile.TemporaryDirectory() as path:
+        watermark_path = os.path.join(path, "watermark.json")
+        first = export_records(make_records(0, 100), os.path.join(path, "part1.jsonl"),
+                               watermark=ExportWatermark(watermark_path))
+        assert first["records"] == 100
+
+        # A later export over the full history only picks up the new records
+        second = export_records(make_records(0, 150), os.path.join(path, "part2.jsonl"),
+                                watermark=ExportWatermark(watermark_path))
+        assert second["records"] == 50
+        combined = list(iter_records(os.path.join(path, "part1.jsonl"), os.path.join(path, "part2.jsonl")))
+        assert combined == list(make_records(0, 150))
+
+        third = export_records(make_records(0, 150), os.path.join(path, "part3.jsonl"),
+                               watermark=ExportWatermark(watermark_path))
+        assert third["records"] == 0 and third["watermark"] == second["watermark"]
+        print("✅ Incremental exports only write records past the watermark")
+
+
+def test_watermark_keeps_records_at_the_same_timestamp():
+    with tempfile.TemporaryDirectory() as path:
+        watermark_path = os.path.join(path, "watermark.json")
+        records = list(make_records(0, 10))
+        first = export_records(records, os.path.join(path, "part1.jsonl"), watermark=ExportWatermark(watermark_path))
+        assert first["records"] == 10
+
+        # Stored after the export, with the same timestamp as the newest exported record
+        late = {**records[-1], "input": "late message", "user_id": "u9"}
+        second = export_records(records + [late], os.path.join(path, "part2.jsonl"),
+                                watermark=ExportWatermark(watermark_path))
+        assert second["records"] == 1 and list(iter_records(os.path.join(path, "part2.jsonl"))) == [late]
+        assert second["watermark"] == first["watermark"]
+
+        third = export_records(records + [late], os.path.join(path, "part3.jsonl"),
+                               watermark=ExportWatermark(watermark_path))
+        assert third["records"] == 0, "records at the watermark are exported once"
+        print("✅ Records sharing the watermark timestamp are exported exactly once")
+
+
+def test_append_mode():
+    with tempfile.TemporaryDirectory() as path:
+        file = os.path.join(path, "samples.jsonl")
+        write_jsonl(make_records(0, 10), file, append=True)
+        write_jsonl(make_records(10, 15), file, append=True)
+        assert len(list(iter_records(file))) == 15
+        print("✅ Append mode extends an existing JSONL file")
+
+
+def test_parquet_round_trip():
+    if not PYARROW_AVAILABLE:
+        print("⚠️ pyarrow not installed, skipping Parquet round-trip")
+        return
+    import pyarrow.parquet as pq
+    with tempfile.TemporaryDirectory() as path:
+        file = os.path.join(path, "export.parquet")
+        export_records(make_records(0, 2500), file, chunk_size=1000)
+        assert pq.ParquetFile(file).num_row_groups == 3
+        assert list(iter_records(file)) == list(make_records(0, 2500))
+        print("✅ Parquet round-trips with one row group per chunk")
+
+
+def test_parquet_schema_covers_every_chunk():
+    if not PYARROW_AVAILABLE:
+        print("⚠️ pyarrow not installed, skipping Parquet schema inference")
+        return
+    import pyarrow.parquet as pq
+    records = [
+        {"text": "a", "intensity": 1, "confidence": None, "context": "work"},
+        {"text": "b", "intensity": 2, "confidence": None, "context": "home"},
+        {"text": "c", "intensity": 2.5, "confidence": 0.8, "context": {"place": "gym"}},
+        {"text": "d", "intensity": 3, "confidence": 0.9, "context": None, "triggers": ["exam"]},
+        {"text": "e", "intensity": None, "confidence": None, "context": "work", "flag": True},
+    ]
+    with tempfile.TemporaryDirectory() as path:
+        file = os.path.join(path, "export.parquet")
+        assert export_records(records, file, chunk_size=2)["records"] == 5
+        assert pq.ParquetFile(file).num_row_groups == 3
+        schema = pq.ParquetFile(file).schema_arrow
+        assert str(schema.field("intensity").type) == "double", "ints in the first chunk widen to the later float"
+        assert str(schema.field("confidence").type) == "double", "a column null in the first chunk keeps its type"
+        loaded = list(iter_records(file))
+        assert [record["intensity"] for record in loaded] == [1, 2, 2.5, 3, None]
+        assert [record["confidence"] for record in loaded] == [None, None, 0.8, 0.9, None]
+        assert [record["context"] for record in loaded] == ["work", "home", {"place": "gym"}, None, "work"], \
+            "a dict after strings turns the column into JSON"
+        assert [record["triggers"] for record in loaded] == [None, None, None, ["exam"], None]
+        assert [record["flag"] for record in loaded] == [None, None, None, None, True], "late keys are kept"
+        assert os.listdir(path) == ["export.parquet"], "the spill file is removed"
+        print("✅ The Parquet schema covers late keys and types that change after the first chunk")
+
+
+def main():
+    print("📤 Testing Training Data Export")
+    print("=" * 50)
+    test_jsonl_round_trip()
+    test_incremental_export_with_watermark()
+    test_watermark_keeps_records_at_the_same_timestamp()
+    test_append_mode()
+    test_parquet_round_trip()
+    test_parquet_schema_covers_every_chunk()
+    print("\n🎉 All training export tests passed!")
+
+
+if __name__ == "__main__":
+    main()
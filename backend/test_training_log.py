@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the append-only, segmented progressive-learning training log
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_core import training_log
+from ai_core.progressive_learning import ProgressiveLearningSystem
+from ai_core.training_log import TrainingLog
+
+
+def records(start, stop):
+    return [{"text": f"sample {i}", "primary_emotion": "joy" if i % 2 else "sadness"} for i in range(start, stop)]
+
+
+def test_appends_are_buffered_and_rotated():
+    with tempfile.TemporaryDirectory() as path:
+        log = TrainingLog(path, segment_records=10, flush_every=4)
+        for record in records(0, 3):
+            log.append(record)
+        assert log.segments() == [] and len(log) == 3, "nothing is written until the buffer fills"
+        for record in records(3, 25):
+            log.append(record)
+        log.flush()
+        assert [os.path.basename(segment) for segment in log.segments()] == \
+            ["00000000.jsonl", "00000001.jsonl", "00000002.jsonl"]
+        assert [record["text"] for record in log] == [f"sample {i}" for i in range(25)]
+        with open(os.path.join(path, "index.json")) as f:
+            assert json.load(f)["segments"] == {"00000000.jsonl": 10, "00000001.jsonl": 10}
+        print("✅ Appends are written in buffered batches to segments of bounded size")
+
+
+def test_reopen_counts_without_reading_history():
+    with tempfile.TemporaryDirectory() as path:
+        log = TrainingLog(path, segment_records=100, flush_every=50)
+        for record in records(0, 1050):
+            log.append(record)
+        log.flush()
+
+        counted = []
+        original = training_log._count_lines
+
+        def count_lines(segment):
+            counted.append(os.path.basename(segment))
+            return original(segment)
+        training_log._count_lines = count_lines
+        try:
+            reopened = TrainingLog(path, segment_records=100)
+        finally:
+            training_log._count_lines = original
+        assert len(reopened) == 1050
+        assert counted == ["00000010.jsonl"], f"only the open segment is counted ({counted})"
+        print("✅ Reopening recovers the record count from the index and the open segment")
+
+
+def test_read_from_resumes_across_segments():
+    with tempfile.TemporaryDirectory() as path:
+        log = TrainingLog(path, segment_records=10, flush_every=1)
+        for record in records(0, 15):
+            log.append(record)
+        batch, position = log.read_from(None, limit=12)
+        assert len(batch) == 12 and position[0] == 1
+        with open(log.segments()[-1], "a") as f:
+            f.write('{"text": "half written')
+        batch, position = log.read_from(position)
+        assert [record["text"] for record in batch] == ["sample 12", "sample 13", "sample 14"]
+        assert log.read_from(position)[0] == [], "a partial line waits for the rest of the record"
+        print("✅ read_from resumes from a (segment, offset) position")
+
+
+def test_torn_write_is_repaired_on_open():
+    with tempfile.TemporaryDirectory() as path:
+        log = TrainingLog(path, segment_records=10, flush_every=1)
+        for record in records(0, 14):
+            log.append(record)
+        # A crash mid-write leaves half a record at the end of the open segment
+        with open(log.segments()[-1], "a") as f:
+            f.write('{"text": "sample 14", "primary_emo')
+
+        reopened = TrainingLog(path, segment_records=10, flush_every=1)
+        assert len(reopened) == 14
+        for record in records(14, 16):
+            reopened.append(record)
+        assert [record["text"] for record in reopened] == [f"sample {i}" for i in range(16)]
+        assert len(reopened.read_from(None)[0]) == 16
+
+        # Corruption that cannot be repaired is skipped by readers
+        with open(reopened.segments()[0], "r+") as f:
+            f.write("garbage!")
+        assert [record["text"] for record in reopened][:2] == ["sample 1", "sample 2"]
+        assert len(reopened.read_from(None)[0]) == 15 and len(reopened.tail(20)) == 15
+        print("✅ A torn last record is cut on open and unparseable lines are skipped")
+
+
+def test_tail_reads_only_the_newest_segments():
+    with tempfile.TemporaryDirectory() as path:
+        log = TrainingLog(path, segment_records=10, flush_every=7)
+        for record in records(0, 45):
+            log.append(record)
+        assert [record["text"] for record in log.tail(12)] == [f"sample {i}" for i in range(33, 45)]
+        assert len(log.tail(100)) == 45 and log.tail(0) == []
+        print("✅ tail returns the most recent records across segments")
+
+
+def test_progressive_learning_uses_the_log():
+    with tempfile.TemporaryDirectory() as path:
+        data_dir = os.path.join(path, "training_data")
+        os.makedirs(data_dir)
+        # Data saved by earlier versions: a flat JSONL file and a training_data.json
+        with open(os.path.join(data_dir, "emotion_data.jsonl"), "w") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in records(0, 40)))
+        with open(os.path.join(path, "training_data.json"), "w") as f:
+            json.dump({"emotion_data": records(40, 60), "conversation_pairs": [], "emolytics_patterns": []}, f)
+
+        system = ProgressiveLearningSystem(path)
+        assert len(system.training_data["emotion_data"]) == 60
+        assert system.learning_metrics["total_interactions"] == 60
+        assert os.path.exists(os.path.join(path, "training_data.json.migrated"))
+
+        for i in range(10):
+            system.collect_training_data(f"message {i}", {"primary_emotion": "joy"}, "Reply", {})
+        system.save_training_data()
+        restarted = ProgressiveLearningSystem(path)
+        assert restarted.learning_metrics["total_interactions"] == 70
+        assert restarted.train_emotion_classifier() is not None, "training streams the samples from disk"
+        print("✅ Samples from earlier versions are migrated and counters survive a restart")
+
+
+def main():
+    print("🪵 Testing Training Log")
+    print("=" * 50)
+    test_appends_are_buffered_and_rotated()
+    test_reopen_counts_without_reading_history()
+    test_read_from_resumes_across_segments()
+    test_torn_write_is_repaired_on_open()
+    test_tail_reads_only_the_newest_segments()
+    test_progressive_learning_uses_the_log()
+    print("\n🎉 All training log tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the out-of-band progressive-learning training worker
+"""
+
+import sys
+import os
+import random
+import subprocess
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_core.progressive_learning import ProgressiveLearningSystem
+from ai_core.training_jobs import TrainingJobQueue
+from ai_core.training_worker import TrainingWorker
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+MESSAGES = {
+    "joy": ["I got the promotion today", "so happy with my friends", "what a wonderful sunny day"],
+    "sadness": ["I feel lonely and down", "I miss my family so much", "crying all evening again"],
+    "fear": ["anxious about the exam", "scared of the presentation", "nervous about the interview"],
+}
+
+
+def collect(system, count, seed=1):
+    rng = random.Random(seed)
+    for i in range(count):
+        emotion = rng.choice(sorted(MESSAGES))
+        system.collect_training_data(
+            f"{rng.choice(MESSAGES[emotion])} {i}",
+            {"primary_emotion": emotion, "emotion_intensity": 60, "emotional_triggers": ["work"]},
+            f"Reply for {emotion}",
+            {"emotional_state": {"stability": 55}, "recommendations": {"immediate_actions": ["rest"]}}
+        )
+
+
+def test_queue_deduplicates_jobs():
+    with tempfile.TemporaryDirectory() as path:
+        queue = TrainingJobQueue(path)
+        assert queue.enqueue("emotion_classifier") and not queue.enqueue("emotion_classifier")
+        job = queue.claim("emotion_classifier")
+        assert job["model"] == "emotion_classifier" and queue.running() == ["emotion_classifier"]
+        assert queue.enqueue("emotion_classifier"), "a new job may wait while the old one runs"
+        assert queue.claim("emotion_classifier") is None, "one run per model at a time"
+        queue.finish(job)
+        assert queue.claim("emotion_classifier") is not None
+        assert queue.recover() == ["emotion_classifier"] and queue.pending() == ["emotion_classifier"]
+        print("✅ Jobs for the same model are deduplicated and claimed once")
+
+
+def test_worker_mode_never_trains_in_request():
+    with tempfile.TemporaryDirectory() as path:
+        system = ProgressiveLearningSystem(path, training_mode="worker", train_every={"emotion_classifier": 60,
+                                                                                     "response_generator": 60,
+                                                                                     "emolytics_analyzer": 30})
+        collect(system, 90)
+        assert system.bundle is None, "collect_training_data only queues jobs"
+        assert system.jobs.pending() == ["emolytics_analyzer", "emotion_classifier", "response_generator"]
+        assert os.path.exists(os.path.join(path, "training_data", "emotion_data", "00000000.jsonl"))
+        assert system.get_learning_status()["training_jobs"]["pending"] == system.jobs.pending()
+        print("✅ Worker mode persists samples and queues deduplicated jobs instead of training")
+
+
+def test_worker_publishes_and_serving_picks_up():
+    with tempfile.TemporaryDirectory() as path:
+        serving = ProgressiveLearningSystem(path, training_mode="worker", train_every=100, reload_interval=3600)
+        collect(serving, 100)
+        assert not serving.should_use_own_model() and serving.bundle is None
+
+        worker = TrainingWorker(path)
+        run = worker.run_once()
+        assert run["status"] == "succeeded" and set(run["durations"]) == set(run["models"])
+        assert worker.run_once() is None, "nothing left to do"
+        status = worker.queue.get_status()
+        assert status["pending"] == [] and status["history"][-1]["bundle_version"] == run["bundle_version"]
+
+        assert serving.refresh_models(force=True)
+        assert serving.bundle.version == run["bundle_version"]
+        assert serving.learning_metrics["model_confidence"] == run["model_confidence"] > 0
+        assert serving.predict_emotion("scared of the exam")["model_used"] == "trained"
+        print(f"✅ Worker trained {', '.join(run['models'])} "
+              f"({', '.join(f'{m} {d:.2f}s' for m, d in run['durations'].items())}) and serving swapped it in")
+
+
+def test_models_fit_concurrently():
+    with tempfile.TemporaryDirectory() as path:
+        system = ProgressiveLearningSystem(path, train_every=1000, training_processes=3)
+        collect(system, 120)
+        result = system.train_models()
+        usage = result["resources"]
+        assert len({fit["pid"] for fit in usage.values()} | {os.getpid()}) == 4, "one process per model"
+        assert max(fit["started_at"] for fit in usage.values()) < min(fit["finished_at"] for fit in usage.values()), \
+            "the fits overlap"
+        assert all(fit["peak_memory_mb"] > 0 for fit in usage.values())
+        assert {"emotion_classifier", "response_classifier", "emolytics_patterns"} <= set(system.bundle.names)
+        assert system.predict_emotion("scared of the exam")["model_used"] == "trained"
+        fits = ", ".join(f"{model} {fit['wall_seconds']}s/{fit['peak_memory_mb']}MB" for model, fit in usage.items())
+        print(f"✅ Models fitted concurrently in {result['wall_seconds']}s ({fits})")
+
+
+def test_inline_fits_report_no_peak_memory():
+    with tempfile.TemporaryDirectory() as path:
+        system = ProgressiveLearningSystem(path, train_every=1000)
+        collect(system, 60)
+        usage = system.train_models(["emolytics_analyzer"])["resources"]["emolytics_analyzer"]
+        assert usage["peak_memory_mb"] is None and usage["wall_seconds"] >= 0, \
+            "the serving process's high-water mark is not the fit's"
+        print("✅ Fits in the serving process report wall time but no peak memory")
+
+
+def test_failed_fit_is_isolated():
+    with tempfile.TemporaryDirectory() as path:
+        system = ProgressiveLearningSystem(path, train_every=1000, training_processes=3,
+                                           model_resources={"emotion_classifier": {"memory_mb": 4096}})
+        collect(system, 120)
+        system.collect_training_data("broken sample", {"primary_emotion": "joy"}, "Reply", "not a dict")
+        result = system.train_models()
+        usage = result["resources"]
+        assert "AttributeError" in usage["emolytics_analyzer"]["error"] and result["emolytics_success"] is None
+        assert usage["emotion_classifier"]["memory_limit_mb"] == 4096
+        assert usage["response_generator"]["memory_limit_mb"] is None
+        assert result["emotion_accuracy"] > 0 and "response_classifier" in system.bundle
+        assert "emolytics_patterns" not in system.bundle
+        print("✅ A failing fit fails alone under its own limits; the other models are still published")
+
+
+def test_worker_runs_as_separate_process():
+    with tempfile.TemporaryDirectory() as path:
+        serving = ProgressiveLearningSystem(path, training_mode="worker", train_every=100)
+        collect(serving, 100, seed=5)
+        subprocess.run([sys.executable, "-m", "ai_core.training_worker", "--model-dir", path, "--once"],
+                       cwd=BACKEND_DIR, check=True, capture_output=True, timeout=300)
+        assert serving.refresh_models(force=True), "bundles from another process are picked up without a restart"
+        assert serving.generate_response("I feel lonely", {}).startswith("Reply for")
+        print("✅ python -m ai_core.training_worker publishes bundles for serving processes")
+
+
+def main():
+    print("🏋️ Testing Training Worker")
+    print("=" * 50)
+    test_queue_deduplicates_jobs()
+    test_worker_mode_never_trains_in_request()
+    test_worker_publishes_and_serving_picks_up()
+    test_models_fit_concurrently()
+    test_inline_fits_report_no_peak_memory()
+    test_failed_fit_is_isolated()
+    test_worker_runs_as_separate_process()
+    print("\n🎉 All training worker tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the write-behind buffer used for interaction logging
+"""
+
+import sys
+import os
+import time
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_core.write_behind import WriteBehindBuffer
+
+
+class RecordingStore:
+    """Stand-in for a Chroma collection that records each batch"""
+
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+        self.lock = threading.Lock()
+
+    def write(self, batch):
+        with self.lock:
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("store unavailable")
+            self.batches.append(list(batch))
+
+
+def test_flushes_full_batches():
+    store = RecordingStore()
+    buffer = WriteBehindBuffer(store.write, batch_size=10, flush_interval=60)
+    for i in range(25):
+        buffer.put(i)
+    time.sleep(0.1)
+    assert [len(batch) for batch in store.batches] == [10, 10], "full batches flush immediately"
+    buffer.close()
+    assert [len(batch) for batch in store.batches] == [10, 10, 5], "close drains the remainder"
+    assert sum(store.batches, []) == list(range(25))
+    print("✅ Full batches flush immediately and close drains the rest")
+
+
+def test_flushes_after_interval():
+    store = RecordingStore()
+    buffer = WriteBehindBuffer(store.write, batch_size=100, flush_interval=0.05)
+    buffer.put("a")
+    buffer.put("b")
+    time.sleep(0.2)
+    assert store.batches == [["a", "b"]]
+    buffer.close()
+    print("✅ Partial batches flush after the interval")
+
+
+def test_retries_then_drops():
+    store = RecordingStore(failures=2)
+    buffer = WriteBehindBuffer(store.write, batch_size=2, flush_interval=0.01, max_retries=3, retry_backoff=0.01)
+    buffer.put(1)
+    buffer.put(2)
+    buffer.close()
+    assert store.batches == [[1, 2]]
+    assert buffer.get_metrics()["retries"] == 2
+
+    failing = RecordingStore(failures=100)
+    buffer = WriteBehindBuffer(failing.write, batch_size=1, flush_interval=0.01, max_retries=1, retry_backoff=0.01)
+    buffer.put(1)
+    buffer.close()
+    metrics = buffer.get_metrics()
+    assert metrics["dropped"] == 1 and metrics["written"] == 0
+    print("✅ Failed batches are retried, then dropped")
+
+
+def test_put_does_not_wait_for_store():
+    release = threading.Event()
+    buffer = WriteBehindBuffer(lambda batch: release.wait(), batch_size=1, flush_interval=0.01)
+    start = time.perf_counter()
+    for i in range(50):
+        buffer.put(i)
+    elapsed = time.perf_counter() - start
+    release.set()
+    buffer.close()
+    assert elapsed < 0.05, f"put blocked for {elapsed:.3f}s"
+    print(f"✅ 50 puts took {elapsed * 1000:.2f} ms while the store was blocked")
+
+
+def main():
+    print("📝 Testing Write-Behind Buffer")
+    print("=" * 50)
+    test_flushes_full_batches()
+    test_flushes_after_interval()
+    test_retries_then_drops()
+    test_put_does_not_wait_for_store()
+    print("\n🎉 All write-behind tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'ai_core'))
 
 from evolance_llm import llm_trainer, EmotionalTransformer
 from training_data_generator import generate_training_data
+from training_export import iter_records
 from datasets import Dataset
 
 def setup_training_environment():
@@ -39,20 +40,31 @@ def prepare_training_data():
     """Prepare training data for the LLM"""
     print("📊 Preparing training data...")
     
-    # Generate training data if it doesn't exist
-    data_file = Path("backend/data/full_training_dataset.json")
-    if not data_file.exists():
-        print("🔄 Generating training data...")
-        generate_training_data()
-    
-    # Load the dataset
-    with open(data_file, 'r') as f:
-        data = json.load(f)
+    # Exported interaction logs (JSONL or Parquet) can be streamed in instead of the generated set
+    export_paths = [path for path in os.getenv("EVOLANCE_TRAINING_DATA", "").split(",") if path]
+    if export_paths:
+        data = iter_records(*export_paths)
+    else:
+        # Generate training data if it doesn't exist
+        data_file = Path("backend/data/full_training_dataset.json")
+        if not data_file.exists():
+            print("🔄 Generating training data...")
+            generate_training_data()
+        
+        # Load the dataset
+        with open(data_file, 'r') as f:
+            data = json.load(f)
     
     # Format data for training
     formatted_data = []
     for item in data:
-        if "messages" in item:
+        if "input" in item and "output" in item:
+            # Exported interaction record
+            emotion = item.get("emotion") or "neutral"
+            formatted_data.append({
+                "text": f"<emotion>{emotion}</emotion><context>general</context>User: {item['input']}\nAssistant: {item['output']}"
+            })
+        elif "messages" in item:
             # Format conversation data
             conversation_text = ""
             for message in item["messages"]: